@@ -1,15 +1,24 @@
 import os
 import random
+from typing import Optional
 from flask import Blueprint, request, jsonify
-from supabase import create_client, Client
+from supabase import create_client, Client, ClientOptions
 from dotenv import load_dotenv
 
 load_dotenv()
 auth_bp = Blueprint("auth", __name__)
 
-SUPABASE_URL = os.environ["SUPABASE_URL"]
-SUPABASE_KEY = os.environ["SUPABASE_SERVICE_KEY"]
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+_supabase: Optional[Client] = None
+
+
+def get_supabase() -> Client:
+    """Shared Supabase client, created on first use rather than at import."""
+    global _supabase
+    if _supabase is None:
+        _supabase = create_client(
+            os.environ["SUPABASE_URL"], os.environ["SUPABASE_SERVICE_KEY"],
+            ClientOptions(postgrest_client_timeout=float(os.getenv("SUPABASE_READ_TIMEOUT_SECONDS", 30))))
+    return _supabase
 
 
 # -----------------------------
@@ -35,7 +44,7 @@ def register():
         return jsonify({"error": "Passwords do not match", "Code": 400}), 400
 
     # check existing
-    existing = supabase.table("users").select("*").eq("email", email).execute()
+    existing = get_supabase().table("users").select("*").eq("email", email).execute()
     if existing.data:
         return jsonify({"error": "Email already registered", "Code": 200}), 200
 
@@ -51,7 +60,7 @@ def register():
         "otp_code": otp
     }
 
-    res = supabase.table("users").insert(user_data).execute()
+    res = get_supabase().table("users").insert(user_data).execute()
     if res.error:
         return jsonify({"error": str(res.error), "Code": 500}), 500
 
@@ -72,7 +81,7 @@ def login():
     email = data.get("email", "").lower()
     password = data.get("password")
 
-    user_res = supabase.table("users").select("*").eq("email", email).execute()
+    user_res = get_supabase().table("users").select("*").eq("email", email).execute()
     if not user_res.data:
         return jsonify({"error": "Invalid email or password", "Code": 401}), 401
     user = user_res.data[0]
@@ -98,7 +107,7 @@ def update_account():
     data = request.form if request.form else request.json
     email = data.get("email", "").lower()
 
-    user_res = supabase.table("users").select("*").eq("email", email).execute()
+    user_res = get_supabase().table("users").select("*").eq("email", email).execute()
     if not user_res.data:
         return jsonify({"error": "User not found", "Code": 404}), 404
     user = user_res.data[0]
@@ -114,7 +123,7 @@ def update_account():
     if not updates:
         return jsonify({"error": "No updates provided", "Code": 400}), 400
 
-    update_res = supabase.table("users").update(updates).eq("email", email).execute()
+    update_res = get_supabase().table("users").update(updates).eq("email", email).execute()
     if update_res.error:
         return jsonify({"error": str(update_res.error), "Code": 500}), 500
 
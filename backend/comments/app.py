@@ -1,9 +1,13 @@
 import os
+import sys
 from flask import Flask
 from flask_cors import CORS
 from dotenv import load_dotenv
 from pathlib import Path
 
+# The backend directory, for the shared package
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
 # Load .env from parent directory (backend/.env)
 env_path = Path(__file__).parent.parent / '.env'
 load_dotenv(env_path)
@@ -1,8 +1,8 @@
 from dataclasses import dataclass, field
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Iterable
 from datetime import datetime, UTC
 
-@dataclass
+@dataclass(slots=True)
 class Comment:
     id: Optional[int] = field(default=None, init=False)
     task_id: int = 0
@@ -39,11 +39,22 @@ class Comment:
             user_name=str(data.get('user_name', '')),
             user_role=str(data.get('user_role', '')),
             content=str(data.get('content', '')),
-            created_at=str(data.get('created_at', datetime.now(UTC).isoformat())),
-            updated_at=str(data.get('updated_at', datetime.now(UTC).isoformat()))
+            created_at=str(data['created_at']) if 'created_at' in data else datetime.now(UTC).isoformat(),
+            updated_at=str(data['updated_at']) if 'updated_at' in data else datetime.now(UTC).isoformat()
         )
         
         if 'id' in data and data['id'] is not None:
             comment.id = int(data['id'])
             
-        return comment
\ No newline at end of file
+        return comment
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Dict[str, Any]]) -> List['Comment']:
+        """Convert many database rows to Comment objects"""
+        from_dict = cls.from_dict
+        return [from_dict(row) for row in rows]
+
+    @staticmethod
+    def to_rows(comments: Iterable['Comment']) -> List[Dict[str, Any]]:
+        """Convert many Comment objects to dictionaries"""
+        return [comment.to_dict() for comment in comments]
@@ -1,13 +1,18 @@
 from typing import Dict, Any, Optional, List
 from datetime import datetime, UTC
 import re
-import requests
+import threading
 from models.comment import Comment
 from repo.comment_repo import CommentRepo
+from shared.service_client import ServiceClient, get_service_client
 
 class CommentService:
-    def __init__(self, repo: Optional[CommentRepo] = None):
+    def __init__(self, repo: Optional[CommentRepo] = None, tasks_client: Optional[ServiceClient] = None,
+                 notification_client: Optional[ServiceClient] = None):
         self.repo = repo or CommentRepo()
+        # Pooled clients for the tasks and notification services
+        self.tasks_client = tasks_client or get_service_client("tasks")
+        self.notification_client = notification_client or get_service_client("notification")
 
     def _extract_username_from_email(self, email: str) -> str:
         """Extract username from email (part before @)"""
@@ -64,7 +69,7 @@ class CommentService:
         """
         try:
             # Get task details from tasks service
-            response = requests.get(f"http://127.0.0.1:5002/tasks/{task_id}")
+            response = self.tasks_client.get(f"/tasks/{task_id}")
             if response.status_code == 200:
                 task_data = response.json()
                 collaborators = []
@@ -98,7 +103,7 @@ class CommentService:
             user = self._get_user_by_username(username)
             if user:
                 try:
-                    response = requests.post("http://127.0.0.1:5006/notifications/triggers/comment-mention-structured", 
+                    response = self.notification_client.post("/notifications/triggers/comment-mention-structured", 
                                            json={
                                                "task_id": task_id,
                                                "mentioned_user_id": user['userid'],
@@ -126,7 +131,7 @@ class CommentService:
         
         for user_id in collaborators_to_notify:
             try:
-                response = requests.post("http://127.0.0.1:5006/notifications/triggers/comment-collaborator-structured", 
+                response = self.notification_client.post("/notifications/triggers/comment-collaborator-structured", 
                                        json={
                                            "task_id": task_id,
                                            "collaborator_user_id": user_id,
@@ -147,7 +152,7 @@ class CommentService:
             # Get task title
             task_title = "Unknown Task"
             try:
-                response = requests.get(f"http://127.0.0.1:5002/tasks/{task_id}")
+                response = self.tasks_client.get(f"/tasks/{task_id}")
                 if response.status_code == 200:
                     task_data = response.json()
                     task_title = task_data.get('task', {}).get('task_name', 'Unknown Task')
@@ -170,6 +175,19 @@ class CommentService:
         except Exception as e:
             print(f"Error in _trigger_comment_notifications: {e}")
 
+    def _refresh_task_search_index(self, task_id: Any):
+        """
+        Ask the tasks service to re-index the task's comments for /tasks/search.
+        Runs in a background thread so comment writes never wait on it.
+        """
+        def refresh():
+            try:
+                self.tasks_client.post(f"/tasks/{int(task_id)}/search/refresh", timeout=5)
+            except Exception as e:
+                print(f"Warning: Failed to refresh task search index for task {task_id}: {e}")
+
+        threading.Thread(target=refresh, daemon=True).start()
+
     def create_comment(self, payload: Dict[str, Any]) -> Dict[str, Any]:
         """
         Create a new comment.
@@ -218,6 +236,8 @@ class CommentService:
             )
         except Exception as e:
             print(f"Warning: Failed to trigger comment notifications: {e}")
+
+        self._refresh_task_search_index(payload['task_id'])
         
         return {
             "Code": 201,
@@ -268,6 +288,8 @@ class CommentService:
                 "Code": 404,
                 "Message": f"Comment with ID {comment_id} not found"
             }
+
+        self._refresh_task_search_index(updated_comment.get('task_id'))
         
         return {
             "Code": 200,
@@ -277,9 +299,14 @@ class CommentService:
 
     def delete_comment(self, comment_id: int) -> Dict[str, Any]:
         """Delete a comment by its ID."""
+        # Look up the task first so its search index entry can be refreshed
+        comment = self.repo.get_comment(comment_id)
+
         # Delete the comment
         success = self.repo.delete_comment(comment_id)
         if success:
+            if comment:
+                self._refresh_task_search_index(comment.get('task_id'))
             return {
                 "Code": 200,
                 "Message": f"Comment {comment_id} deleted successfully"
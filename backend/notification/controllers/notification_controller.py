@@ -1,10 +1,11 @@
 from flask import Blueprint, request, jsonify
 from services.notification_service import NotificationService
 from services.notification_trigger_service import NotificationTriggerService
+from shared.etag import etag_json_response
 
 notification_bp = Blueprint("notifications", __name__)
 service = NotificationService()
-trigger_service = NotificationTriggerService()
+trigger_service = NotificationTriggerService(service)
 
 @notification_bp.route("/notifications/create", methods=["POST"])
 def create_notification():
@@ -171,13 +172,14 @@ def get_unread_count(user_id: int):
     
     Responses:
         200: Unread count returned
+        304: Unchanged since the ETag sent in If-None-Match
         500: Internal Server Error
     """
     try:
         result = service.get_unread_count(user_id)
         status_code = result.pop("status", 200)
         
-        return jsonify(result), status_code
+        return etag_json_response(result, status_code)
         
     except Exception as e:
         return jsonify({"error": str(e), "status": 500}), 500
@@ -420,6 +422,40 @@ def trigger_task_collaborator_addition_notification():
     except Exception as e:
         return jsonify({"error": str(e), "status": 500}), 500
 
+@notification_bp.route("/notifications/triggers/task-import-summary", methods=["POST"])
+def trigger_task_import_summary_notification():
+    """
+    Trigger one consolidated notification for a collaborator added to tasks by a bulk import.
+    
+    Required fields in JSON body:
+    - user_id: ID of the collaborator to notify
+    - tasks: List of {"id", "task_name"} of the imported tasks
+    - importer_name: Name of the person who ran the import (optional, defaults to "System")
+    
+    Returns:
+    {
+        "message": "Import summary notification sent",
+        "result": { ... notification result ... },
+        "status": 200
+    }
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        
+        user_id = data.get("user_id")
+        tasks = data.get("tasks", [])
+        importer_name = data.get("importer_name", "System")
+        
+        if not user_id or not tasks:
+            return jsonify({"error": "user_id and tasks are required", "status": 400}), 400
+        
+        result = trigger_service.notify_task_import_summary(user_id, tasks, importer_name)
+        
+        return jsonify({"message": "Import summary notification sent", "result": result, "status": 200}), 200
+        
+    except Exception as e:
+        return jsonify({"error": str(e), "status": 500}), 500
+
 @notification_bp.route("/notifications/triggers/project-collaborator-addition", methods=["POST"])
 def trigger_project_collaborator_addition_notification():
     """
@@ -1,8 +1,23 @@
 from dataclasses import dataclass, field
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Iterable
 from datetime import datetime, UTC
 
-@dataclass
+def _safe_int(value, default=0):
+    """Safely convert to int"""
+    if value is None:
+        return default
+    try:
+        return int(value)
+    except (ValueError, TypeError):
+        return default
+
+def _safe_str(value, default=''):
+    """Safely convert to string"""
+    if value is None:
+        return default
+    return str(value)
+
+@dataclass(slots=True)
 class Notification:
     id: Optional[int] = field(default=None, init=False)                     # DB serial/bigint
     userid: int = 0                                                         # Foreign key to user table
@@ -32,26 +47,14 @@ class Notification:
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'Notification':
         """Create Notification object from dictionary with proper type conversion"""
-        # Helper function to safely convert to int
-        def safe_int(value, default=0):
-            if value is None:
-                return default
-            try:
-                return int(value)
-            except (ValueError, TypeError):
-                return default
-        
-        # Helper function to safely convert to string
-        def safe_str(value, default=''):
-            if value is None:
-                return default
-            return str(value)
-        
+        safe_int, safe_str = _safe_int, _safe_str
+        created_at = data.get('created_at')
+
         # Create notification instance
         notification = cls(
             userid=safe_int(data.get('userid'), 0),
             notification=safe_str(data.get('notification'), ''),
-            created_at=safe_str(data.get('created_at'), datetime.now(UTC).isoformat()),
+            created_at=str(created_at) if created_at is not None else datetime.now(UTC).isoformat(),
             is_read=bool(data.get('is_read', False)),
             notification_type=safe_str(data.get('notification_type'), 'general'),
             related_task_id=safe_int(data.get('related_task_id')) if data.get('related_task_id') is not None else None
@@ -62,3 +65,14 @@ class Notification:
             notification.id = safe_int(data['id'])
             
         return notification
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Dict[str, Any]]) -> List['Notification']:
+        """Convert many database rows to Notification objects"""
+        from_dict = cls.from_dict
+        return [from_dict(row) for row in rows]
+
+    @staticmethod
+    def to_rows(notifications: Iterable['Notification']) -> List[Dict[str, Any]]:
+        """Convert many Notification objects to dictionaries"""
+        return [notification.to_dict() for notification in notifications]
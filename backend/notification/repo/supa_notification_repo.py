@@ -1,20 +1,18 @@
-import os
 from typing import Optional, Dict, Any, List
-from supabase import create_client, Client
+from supabase import Client
+from shared.supabase_client import get_supabase_client
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
 load_dotenv()
 
-SUPABASE_URL = os.environ["SUPABASE_URL"]
-SUPABASE_KEY = os.environ["SUPABASE_SERVICE_KEY"]
 
 # Table name for notifications
 TABLE = "notification"
 
 class SupabaseNotificationRepo:
     def __init__(self):
-        self.client: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+        self.client: Client = get_supabase_client()
 
     def insert_notification(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """Insert a new notification into the database."""
@@ -2,6 +2,7 @@ from typing import Dict, Any, List, Optional
 import requests
 from dotenv import load_dotenv
 from services.notification_service import NotificationService
+from shared.service_client import get_service_client
 
 # Load environment variables from .env file
 load_dotenv()
@@ -11,15 +12,19 @@ class NotificationTriggerService:
     Service to handle notification triggers for various events like task assignments and updates.
     """
     
-    def __init__(self):
-        self.notification_service = NotificationService()
+    def __init__(self, notification_service: Optional[NotificationService] = None):
+        self.notification_service = notification_service or NotificationService()
+        # Pooled clients for the services this one reads from
+        self.users_client = get_service_client("users")
+        self.tasks_client = get_service_client("tasks")
+        self.projects_client = get_service_client("projects")
     
     def get_user_details(self, user_id: int) -> Optional[Dict[str, Any]]:
         """
         Get user details including notification preferences from user microservice.
         """
         try:
-            response = requests.get(f"http://127.0.0.1:5003/users/{user_id}")
+            response = self.users_client.get(f"/users/{user_id}")
             if response.status_code == 200:
                 user_data = response.json()
                 return user_data.get("data")
@@ -198,7 +203,7 @@ class NotificationTriggerService:
         Get task details from the task microservice.
         """
         try:
-            response = requests.get(f"http://127.0.0.1:5002/tasks/{task_id}")
+            response = self.tasks_client.get(f"/tasks/{task_id}")
             if response.status_code == 200:
                 data = response.json()
                 return data.get("task") or data
@@ -211,12 +216,8 @@ class NotificationTriggerService:
         Get task details directly from Supabase task table.
         """
         try:
-            # Import here to avoid circular imports
-            from repo.supa_notification_repo import SupabaseNotificationRepo
-            repo = SupabaseNotificationRepo()
-            
-            # Query the task table directly
-            response = repo.client.table("task").select("*").eq("id", task_id).execute()
+            # Query the task table directly through the notification repo's shared client
+            response = self.notification_service.repo.client.table("task").select("*").eq("id", task_id).execute()
             
             if response.data and len(response.data) > 0:
                 return response.data[0]
@@ -476,6 +477,41 @@ As the new owner, you are responsible for managing this task and can edit its de
         
         return results
 
+    def notify_task_import_summary(self, user_id: int, tasks: List[Dict[str, Any]], importer_name: str = "System") -> Dict[str, Any]:
+        """
+        Send one notification listing every imported task the user was added to,
+        instead of one notification per task.
+
+        tasks format: [{"id": int, "task_name": str}]
+        """
+        task_items_html = "".join(
+            f"<li><strong>{task.get('task_name', 'Task')}</strong> (ID: {task.get('id')})</li>" for task in tasks
+        )
+        task_items_text = "\n".join(f"- {task.get('task_name', 'Task')} (ID: {task.get('id')})" for task in tasks)
+
+        # HTML content for email
+        notification_content = f"""
+        <h3 style="color: #1f2937; margin-bottom: 16px;"><strong>Task Assignment Summary</strong></h3>
+        <p style="color: #374151; margin-bottom: 12px;">{importer_name} added you as a collaborator to {len(tasks)} imported task(s):</p>
+        <ul style="color: #374151; margin-bottom: 16px;">
+            {task_items_html}
+        </ul>
+        <p style="color: #6b7280; font-size: 14px;">You can now view and collaborate on these tasks in your SPM dashboard.</p>
+        """
+
+        # Plain text content for in-app notification
+        plain_text = f"""**Task Assignment Summary**
+{importer_name} added you as a collaborator to {len(tasks)} imported task(s):
+{task_items_text}"""
+
+        return self.send_notification_based_on_preferences(
+            user_id,
+            notification_content,
+            "task_assigned",
+            None,  # Several tasks, so no single related task
+            plain_text
+        )
+
     def notify_comment_mention(self, task_id: int, mentioned_user_id: int, commenter_name: str, 
                              comment_content: str, task_name: str = None) -> Dict[str, Any]:
         """
@@ -636,7 +672,7 @@ You can view and respond to this comment in your task."""
         
         # Get project details to get all collaborators
         try:
-            response = requests.get(f"http://127.0.0.1:5001/projects/{project_id}")
+            response = self.projects_client.get(f"/projects/{project_id}")
             if response.status_code == 200:
                 project_data = response.json().get("data", {})
                 all_collaborators = project_data.get("collaborators", [])
@@ -309,6 +309,5 @@ class TestNotificationModel(unittest.TestCase):
                 notification = Notification.from_dict(data)
                 self.assertEqual(notification.userid, expected)
 
-
 if __name__ == '__main__':
     unittest.main()
@@ -25,6 +25,10 @@ import logging
 
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# and the backend directory, for the shared package
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from shared.service_client import get_service_client
 
 # Load environment variables
 load_dotenv()
@@ -45,16 +49,22 @@ NOTIFICATION_API_URL = os.getenv("NOTIFICATION_API_URL", "http://localhost:5006"
 TASKS_API_URL = os.getenv("TASKS_API_URL", "http://localhost:5002")
 SCHEDULER_TIME = os.getenv("SCHEDULER_TIME", "09:00")  # Default: 9:00 AM
 
+# Pooled clients with timeouts, retries and circuit breaking
+tasks_client = get_service_client("tasks", TASKS_API_URL)
+notification_client = get_service_client("notification", NOTIFICATION_API_URL)
+
 
-def get_tasks_with_upcoming_deadlines(max_days_ahead: int = 7) -> List[Dict[str, Any]]:
+def get_tasks_with_upcoming_deadlines(max_days_ahead: int = 7, reminders_due: bool = False) -> List[Dict[str, Any]]:
     """
     Query tasks microservice for tasks with upcoming deadlines.
     
     Args:
         max_days_ahead: Maximum number of days to look ahead for deadlines
+        reminders_due: Only fetch tasks with a reminder due today (any interval)
     
     Returns:
-        List of tasks with due dates in the next max_days_ahead days
+        List of tasks with due dates in the next max_days_ahead days, each with
+        "days_until_due" and the matching "reminder_interval"
     """
     try:
         # Calculate date range for logging
@@ -64,10 +74,11 @@ def get_tasks_with_upcoming_deadlines(max_days_ahead: int = 7) -> List[Dict[str,
         logger.info(f"Querying tasks with due dates between {today} and {end_date}")
         
         # Call the tasks microservice endpoint
-        tasks_api_url = f"{TASKS_API_URL}/tasks/upcoming-deadlines"
         params = {"max_days_ahead": max_days_ahead}
+        if reminders_due:
+            params["reminders_due"] = "true"
         
-        response = requests.get(tasks_api_url, params=params, timeout=10)
+        response = tasks_client.get("/tasks/upcoming-deadlines", params=params, timeout=10)
         
         if response.status_code == 200:
             result = response.json()
@@ -127,7 +138,7 @@ def check_if_reminder_already_sent(task_id: int, reminder_days: int) -> bool:
         # Check if there's a notification of type 'due_date_reminder' created today
         # that contains this task_id and reminder_days info
         # Use the notification API to get notifications for the task
-        response = requests.get(f"{NOTIFICATION_API_URL}/notifications/task/{task_id}", timeout=5)
+        response = notification_client.get(f"/notifications/task/{task_id}", timeout=5)
         
         if response.status_code == 200:
             notifications = response.json().get("data", [])
@@ -164,7 +175,6 @@ def send_deadline_reminder(task_id: int, reminder_days: int) -> bool:
         True if notification sent successfully, False otherwise
     """
     try:
-        url = f"{NOTIFICATION_API_URL}/notifications/triggers/deadline-reminder"
         payload = {
             "task_id": task_id,
             "reminder_days": reminder_days
@@ -172,7 +182,7 @@ def send_deadline_reminder(task_id: int, reminder_days: int) -> bool:
         
         logger.info(f"Sending reminder for task {task_id} ({reminder_days} days before due)")
         
-        response = requests.post(url, json=payload, timeout=10)
+        response = notification_client.post("/notifications/triggers/deadline-reminder", json=payload, timeout=10)
         
         if response.status_code == 200:
             result = response.json()
@@ -199,8 +209,9 @@ def process_deadline_reminders():
     logger.info("=" * 80)
     
     try:
-        # Get all tasks with upcoming deadlines
-        tasks = get_tasks_with_upcoming_deadlines(max_days_ahead=7)
+        # Get the tasks with a reminder due today; the tasks service matches
+        # days until due against each task's reminder_intervals
+        tasks = get_tasks_with_upcoming_deadlines(max_days_ahead=7, reminders_due=True)
         
         if not tasks:
             logger.info("No tasks with upcoming deadlines found")
@@ -215,37 +226,29 @@ def process_deadline_reminders():
             task_id = task.get("id")
             task_name = task.get("task_name", "Unknown")
             due_date = task.get("due_date")
-            reminder_intervals = task.get("reminder_intervals", [7, 3, 1])
+            reminder_days = task.get("reminder_interval")
             
             if not due_date:
                 logger.warning(f"Task {task_id} has no due date, skipping")
                 skipped_count += 1
                 continue
             
-            # Calculate days until due
-            days_until_due = calculate_days_until_due(due_date)
+            if reminder_days is None:
+                continue
             
-            if days_until_due < 0:
-                logger.warning(f"Task {task_id} is overdue ({abs(days_until_due)} days), skipping")
+            logger.info(f"Processing task {task_id} ('{task_name}'): {task.get('days_until_due')} days until due")
+            
+            # Check if reminder already sent today
+            if check_if_reminder_already_sent(task_id, reminder_days):
+                logger.info(f"Skipping: Reminder already sent for task {task_id} ({reminder_days} days)")
                 skipped_count += 1
                 continue
             
-            logger.info(f"Processing task {task_id} ('{task_name}'): {days_until_due} days until due")
-            
-            # Check if we should send a reminder for any interval
-            for reminder_days in reminder_intervals:
-                if days_until_due == reminder_days:
-                    # Check if reminder already sent today
-                    if check_if_reminder_already_sent(task_id, reminder_days):
-                        logger.info(f"Skipping: Reminder already sent for task {task_id} ({reminder_days} days)")
-                        skipped_count += 1
-                        continue
-                    
-                    # Send the reminder
-                    if send_deadline_reminder(task_id, reminder_days):
-                        sent_count += 1
-                    else:
-                        error_count += 1
+            # Send the reminder
+            if send_deadline_reminder(task_id, reminder_days):
+                sent_count += 1
+            else:
+                error_count += 1
         
         logger.info("=" * 80)
         logger.info(f"Deadline reminder processing complete")
@@ -265,7 +268,7 @@ def test_scheduler_connection():
     
     # Test tasks API connection
     try:
-        response = requests.get(f"{TASKS_API_URL}/tasks/upcoming-deadlines", timeout=5)
+        response = tasks_client.get("/tasks/upcoming-deadlines", timeout=5)
         if response.status_code in [200, 404]:  # 404 is OK (no tasks found)
             logger.info(f"Tasks API connection successful (status: {response.status_code})")
         else:
@@ -278,7 +281,7 @@ def test_scheduler_connection():
     
     # Test notification API connection
     try:
-        response = requests.get(f"{NOTIFICATION_API_URL}/notifications/user/1", timeout=5)
+        response = notification_client.get("/notifications/user/1", timeout=5)
         logger.info(f"Notification API connection successful (status: {response.status_code})")
     except Exception as e:
         logger.error(f"Notification API connection failed: {str(e)}")
@@ -1,8 +1,12 @@
 import os
+import sys
 from flask import Flask
 from flask_cors import CORS
 from dotenv import load_dotenv
 
+# The backend directory, for the shared package
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
 load_dotenv()
 
 def create_app():
@@ -13,6 +17,10 @@ def create_app():
     from controllers.project_controller import project_bp
     app.register_blueprint(project_bp)
 
+    # Start draining notifications queued by write paths (including any left from a restart)
+    from shared.outbox import get_default_outbox
+    get_default_outbox()
+
     return app
 
 if __name__ == "__main__":
@@ -1,6 +1,7 @@
 from flask import Blueprint, request, jsonify
 from services.project_service import ProjectService
-from utils.parsing import parse_project_update_payload
+from utils.parsing import parse_project_update_payload, parse_date_range_args, parse_page_args, parse_id_list_arg, MAX_FILTER_IDS
+from shared.etag import etag_json_response, not_modified, version_etag
 
 project_bp = Blueprint("projects", __name__)
 service = ProjectService()
@@ -40,6 +41,41 @@ def create_project():
     except Exception as e:
         return jsonify({"error": str(e), "status": 500}), 500
 
+@project_bp.route("/projects", methods=["GET"])
+def get_all_projects():
+    """
+    Get all projects, in id order.
+
+    Query Parameters (optional):
+    - limit: Page size (1-500); enables pagination
+    - after_id: Return projects with an id greater than this (the previous page's next_after_id)
+    - user_ids: Only projects owned by or shared with these users (comma-separated, at most 100)
+
+    Returns:
+    {
+        "data": [ ... list of projects ... ],
+        "status": 200,
+        "pagination": { "limit", "next_after_id", "has_more" }   (only when limit was given)
+    }
+
+    Responses:
+        200: Projects returned (or empty list if there are none)
+        400: Invalid limit, after_id or user_ids
+        500: Internal Server Error
+    """
+    try:
+        page = parse_page_args(request.args)
+        user_ids = parse_id_list_arg(request.args, "user_ids", MAX_FILTER_IDS)
+        result = service.get_all_projects(page["limit"], page["after_id"], user_ids=user_ids)
+        status_code = result.get("status", 200)
+
+        return jsonify(result), status_code
+
+    except ValueError as ve:
+        return jsonify({"error": str(ve), "status": 400}), 400
+    except Exception as e:
+        return jsonify({"error": str(e), "status": 500}), 500
+
 @project_bp.route("/projects/user/<int:user_id>", methods=["GET"])
 def get_projects_by_user(user_id: int):
     """
@@ -47,24 +83,38 @@ def get_projects_by_user(user_id: int):
     
     Parameters:
     - user_id: ID of the user (owner_id OR in collaborators list)
+
+    Query Parameters (optional):
+    - start_date / end_date: Inclusive YYYY-MM-DD range on created_at, applied in the database query
     
     Returns:
     {
         "data": [ ... list of projects ... ],
-        "status": 200
+        "status": 200,
+        "date_filter": { "field", "start_date", "end_date" }   (only when a range was given)
     }
     
     Responses:
         200: Projects found and returned
+        304: Unchanged since the ETag sent in If-None-Match
+        400: Invalid date range
         404: No projects found for this user
         500: Internal Server Error
     """
     try:
-        result = service.get_projects_by_user(user_id)
+        date_range = parse_date_range_args(request.args)
+        # Answer an unchanged view from the row versions, before the rows are loaded
+        etag = version_etag(request.args.to_dict(flat=False), service.get_projects_by_user_versions(user_id, date_range))
+        unchanged = not_modified(etag)
+        if unchanged is not None:
+            return unchanged
+        result = service.get_projects_by_user(user_id, date_range)
         status_code = result.get("status", 200)
         
-        return jsonify(result), status_code
-        
+        return etag_json_response(result, status_code, etag)
+
+    except ValueError as ve:
+        return jsonify({"error": str(ve), "status": 400}), 400
     except Exception as e:
         return jsonify({"error": str(e), "status": 500}), 500
 
@@ -188,7 +238,7 @@ def add_task_to_project(project_id: int, task_id: int):
     {
         "message": "Task {task_id} and {subtask_count} subtasks successfully added to project {project_id}",
         "data": {
-            "project": { ... updated project data ... },
+            "project": { "id", "tasks", "collaborators" } (updated lists),
             "main_task_id": task_id,
             "subtask_ids": [ ... list of subtask IDs ... ],
             "all_task_ids": [ ... list of all task IDs (main + subtasks) ... ],
@@ -1,8 +1,8 @@
 from dataclasses import dataclass, field
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Iterable
 from datetime import datetime, UTC
 
-@dataclass
+@dataclass(slots=True)
 class Project:
     id: Optional[int] = field(default=None, init=False)                     # DB serial/bigint or UUID; adapt to your schema
     owner_id: int = 0
@@ -60,7 +60,7 @@ class Project:
             proj_name=str(data.get('proj_name', '')),
             collaborators=collaborators,
             tasks=tasks,
-            created_at=str(data.get('created_at', datetime.now(UTC).isoformat()))
+            created_at=str(data['created_at']) if 'created_at' in data else datetime.now(UTC).isoformat()
         )
         
         # Set ID if provided (since it's init=False)
@@ -68,3 +68,14 @@ class Project:
             project.id = int(data['id'])
             
         return project
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Dict[str, Any]]) -> List['Project']:
+        """Convert many database rows to Project objects"""
+        from_dict = cls.from_dict
+        return [from_dict(row) for row in rows]
+
+    @staticmethod
+    def to_rows(projects: Iterable['Project']) -> List[Dict[str, Any]]:
+        """Convert many Project objects to dictionaries"""
+        return [project.to_dict() for project in projects]
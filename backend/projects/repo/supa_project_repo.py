@@ -1,16 +1,31 @@
-import os
+from datetime import date, timedelta
 from typing import Optional, Dict, Any, List
-from supabase import create_client, Client
+from supabase import Client
+from shared.supabase_client import get_supabase_client
 
-SUPABASE_URL = os.environ["SUPABASE_URL"]
-SUPABASE_KEY = os.environ["SUPABASE_SERVICE_KEY"]
 
 # Table name for projects
 TABLE = "project"
 
+def _apply_date_range(query, date_range: Optional[Dict[str, Any]]):
+    """
+    Restrict a query to rows whose date column falls in an inclusive YYYY-MM-DD range
+    (as produced by utils.parsing.parse_date_range_args).
+    """
+    if not date_range:
+        return query
+    field = date_range["field"]
+    if date_range.get("start_date"):
+        query = query.gte(field, date_range["start_date"])
+    if date_range.get("end_date"):
+        # Inclusive end day: everything before the following midnight
+        next_day = date.fromisoformat(date_range["end_date"]) + timedelta(days=1)
+        query = query.lt(field, next_day.isoformat())
+    return query
+
 class SupabaseProjectRepo:
-    def __init__(self):
-        self.client: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+    def __init__(self, client: Optional[Client] = None):
+        self.client: Client = client or get_supabase_client()
 
     def insert_project(self, data: Dict[str, Any]) -> Dict[str, Any]:
         res = self.client.table(TABLE).insert(data).execute()
@@ -18,16 +33,20 @@ class SupabaseProjectRepo:
             raise RuntimeError("Insert failed — no data returned")
         return res.data[0]
 
-    def find_by_user(self, user_id: int) -> list:
+    def find_by_user(self, user_id: int, date_range: Optional[Dict[str, Any]] = None, columns: str = "*") -> list:
         """
         Find all projects where user is either owner or collaborator.
+        Optionally restricted to a created_at range inside the query.
+        `columns` must include id.
         """
         # Get projects where user is the owner
-        owner_res = self.client.table(TABLE).select("*").eq("owner_id", user_id).execute()
+        owner_query = self.client.table(TABLE).select(columns).eq("owner_id", user_id)
+        owner_res = _apply_date_range(owner_query, date_range).execute()
         owner_projects = owner_res.data or []
 
         # Get projects where user is in collaborators list
-        collab_res = self.client.table(TABLE).select("*").filter("collaborators", "cs", [user_id]).execute()
+        collab_query = self.client.table(TABLE).select(columns).filter("collaborators", "cs", [user_id])
+        collab_res = _apply_date_range(collab_query, date_range).execute()
         collab_projects = collab_res.data or []
 
         # Combine results and remove duplicates using project ID as key
@@ -54,9 +73,102 @@ class SupabaseProjectRepo:
             raise RuntimeError(f"Update failed — project with ID {project_id} not found")
         return res.data[0]
 
+    def _array_rpc(self, function: str, project_id: int, column: str, values: List[int], **extra) -> Dict[str, Any]:
+        """
+        Run one of the atomic array RPCs (see supabase/migrations) against a project row.
+
+        Raises:
+            LookupError: project does not exist
+            ValueError: fail_if_present was set and some IDs are already in the array
+        """
+        try:
+            res = self.client.rpc(function, {
+                "p_table": TABLE,
+                "p_column": column,
+                "p_id": project_id,
+                "p_values": [int(v) for v in values],
+                **extra
+            }).execute()
+        except Exception as e:
+            code = getattr(e, "code", None)
+            if code == "P0002":
+                raise LookupError(f"Project with ID {project_id} not found")
+            if code == "23505":
+                raise ValueError(f"Some of {list(values)} are already in the {column} of project {project_id}")
+            raise
+        return res.data
+
+    def append_ids(self, project_id: int, column: str, values: List[int], fail_if_present: bool = False) -> Dict[str, Any]:
+        """
+        Atomically append IDs (skipping ones already present) to the project's `tasks`
+        or `collaborators` array, without reading the row first.
+
+        Returns:
+            {"values": <updated list>, "added": <IDs actually appended>}
+        """
+        return self._array_rpc("array_append_ids", project_id, column, values, p_fail_if_present=fail_if_present)
+
+    def add_tasks(self, project_id: int, task_ids: List[int], collaborator_ids: List[int]) -> Dict[str, Any]:
+        """
+        Append task IDs and collaborator IDs to a project in one transaction
+        (the project_add_tasks RPC). Changes nothing if any task is already in it.
+
+        Returns:
+            {"tasks": {"values", "added"}, "collaborators": {"values", "added"},
+             "project": <the updated project row>}
+
+        Raises:
+            LookupError: project does not exist
+            ValueError: some of the tasks are already in the project
+        """
+        try:
+            res = self.client.rpc("project_add_tasks", {
+                "p_id": project_id,
+                "p_task_ids": [int(v) for v in task_ids],
+                "p_collaborators": [int(v) for v in collaborator_ids]
+            }).execute()
+        except Exception as e:
+            code = getattr(e, "code", None)
+            if code == "P0002":
+                raise LookupError(f"Project with ID {project_id} not found")
+            if code == "23505":
+                raise ValueError(f"Some of {list(task_ids)} are already in project {project_id}")
+            raise
+        return res.data
+
+    def remove_ids(self, project_id: int, column: str, values: List[int]) -> Dict[str, Any]:
+        """
+        Atomically remove IDs from the project's `tasks` or `collaborators` array.
+
+        Returns:
+            {"values": <updated list>, "removed": <IDs that were present>}
+        """
+        return self._array_rpc("array_remove_ids", project_id, column, values)
+
     def find_by_owner(self, owner_id: int) -> list:
         """
         Find all projects that are owned by a specific user (by owner_id only).
         """
         res = self.client.table(TABLE).select("*").eq("owner_id", owner_id).execute()
-        return res.data or []
\ No newline at end of file
+        return res.data or []
+
+    def find_all(self, limit: Optional[int] = None, after_id: Optional[int] = None,
+                 user_ids: Optional[List[int]] = None) -> list:
+        """
+        Find all projects ordered by id. With `limit`, returns at most limit + 1 rows
+        with id greater than `after_id`, so the caller can tell whether more follow.
+        With `user_ids`, only projects owned by or shared with one of those users.
+        """
+        query = self.client.table(TABLE).select("*")
+        if user_ids is not None:
+            if not user_ids:
+                return []
+            ids = [int(uid) for uid in user_ids]
+            query = query.or_(",".join([f"owner_id.in.({','.join(map(str, ids))})"] +
+                                       [f"collaborators.cs.[{uid}]" for uid in ids]))
+        if after_id is not None:
+            query = query.gt("id", after_id)
+        query = query.order("id")
+        if limit is not None:
+            query = query.limit(limit + 1)
+        return query.execute().data or []
\ No newline at end of file
@@ -1,11 +1,34 @@
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple
 import requests
 from models.project import Project
 from repo.supa_project_repo import SupabaseProjectRepo
+from shared.outbox import NotificationOutbox, get_default_outbox
+from shared.service_client import ServiceClient, get_service_client
+
+# ID array columns; updates change them through the atomic array RPCs
+ARRAY_COLUMNS = ("tasks", "collaborators")
+
+
+def _array_diff(old: Optional[list], new: Optional[list]) -> Tuple[list, list]:
+    """(IDs in `new` but not `old`, IDs in `old` but not `new`), each in list order."""
+    old, new = old or [], new or []
+    return [v for v in new if v not in old], [v for v in old if v not in new]
+
 
 class ProjectService:
-    def __init__(self, repo: Optional[SupabaseProjectRepo] = None):
+    def __init__(self, repo: Optional[SupabaseProjectRepo] = None, outbox: Optional[NotificationOutbox] = None,
+                 tasks_client: Optional[ServiceClient] = None):
         self.repo = repo or SupabaseProjectRepo()
+        self._outbox = outbox
+        # Pooled client for the tasks service (TASKS_SERVICE_URL)
+        self.tasks_client = tasks_client or get_service_client("tasks")
+
+    @property
+    def outbox(self) -> NotificationOutbox:
+        """Queue for notification service calls; write paths never wait on delivery."""
+        if self._outbox is None:
+            self._outbox = get_default_outbox()
+        return self._outbox
 
     def create(self, payload: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -44,41 +67,37 @@ class ProjectService:
             owner_id = payload.get("owner_id")
             project_name = payload.get("proj_name", f"Project {project_id}")
             
-            # Get creator name
-            creator_name = "System"
-            if owner_id:
-                try:
-                    response = requests.get(f"http://127.0.0.1:5003/users/{owner_id}")
-                    if response.status_code == 200:
-                        user_data = response.json()
-                        creator_name = user_data.get("data", {}).get("name", "System")
-                except Exception:
-                    pass  # Use default name if we can't fetch it
-            
             # Send notifications to all collaborators except the owner
             collaborator_ids = [collab_id for collab_id in collaborators if collab_id != owner_id]
             
             if collaborator_ids:
-                response = requests.post("http://127.0.0.1:5006/notifications/triggers/project-collaborator-addition", 
-                                       json={
-                                           "project_id": project_id,
-                                           "collaborator_ids": collaborator_ids,
-                                           "project_name": project_name,
-                                           "creator_name": creator_name
-                                       })
-                if response.status_code not in [200, 201]:
-                    print(f"Warning: Failed to send project collaborator notifications: {response.status_code}")
+                # Creator name is resolved by the outbox worker
+                self.outbox.enqueue("/notifications/triggers/project-collaborator-addition", {
+                    "project_id": project_id,
+                    "collaborator_ids": collaborator_ids,
+                    "project_name": project_name
+                }, name_lookup=("creator_name", owner_id, "System"))
         except Exception as e:
-            print(f"Warning: Failed to send project collaborator notifications: {e}")
+            print(f"Warning: Failed to queue project collaborator notifications: {e}")
 
-    def get_projects_by_user(self, user_id: int) -> Dict[str, Any]:
+    def get_projects_by_user(self, user_id: int, date_range: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
         Get all projects where user is either owner or collaborator.
+        `date_range` (from parse_date_range_args) is applied in the query and echoed
+        back as `date_filter` so callers can skip their own date filtering.
         """
-        projects = self.repo.find_by_user(user_id)
+        projects = self.repo.find_by_user(user_id, date_range=date_range)
         if not projects:
             return {"status": 404, "message": f"No projects found for user ID {user_id}"}
-        return {"status": 200, "data": projects}
+        result = {"status": 200, "data": projects}
+        if date_range:
+            result["date_filter"] = date_range
+        return result
+
+    def get_projects_by_user_versions(self, user_id: int, date_range: Optional[Dict[str, Any]] = None) -> list:
+        """(id, updated_at) of the projects get_projects_by_user would return, for its ETag."""
+        projects = self.repo.find_by_user(user_id, date_range=date_range, columns="id,updated_at")
+        return sorted((p["id"], p.get("updated_at")) for p in projects)
 
     def get_project_by_id(self, project_id: int) -> Dict[str, Any]:
         """
@@ -118,17 +137,37 @@ class ProjectService:
         # Create updated project object to ensure proper type conversion
         updated_project_obj = Project.from_dict(merged_data)
         
-        # Convert back to dict for database update
-        update_data = updated_project_obj.to_dict()
+        # Write back only the columns being changed; the ID arrays are changed by
+        # their difference from the current row through the atomic RPCs, so IDs
+        # other requests add or remove at the same time are kept
+        normalized = updated_project_obj.to_dict()
+        update_data = {k: v for k, v in normalized.items() if k in update_fields and k not in ARRAY_COLUMNS}
+        array_edits = {column: _array_diff(existing_project_data.get(column), normalized.get(column))
+                       for column in ARRAY_COLUMNS if column in update_fields}
+        if not update_data and not array_edits:
+            return {"status": 400, "message": "No fields to update provided", "data": existing_project_data}
         
         # Perform the update
         try:
-            updated_project_data = self.repo.update_project(project_id, update_data)
+            added_collaborators = []
+            for column, (added, removed) in array_edits.items():
+                if added:
+                    added = self.repo.append_ids(project_id, column, added)["added"]
+                    if column == "collaborators":
+                        added_collaborators = added
+                if removed:
+                    self.repo.remove_ids(project_id, column, removed)
+            if update_data:
+                updated_project_data = self.repo.update_project(project_id, update_data)
+            else:
+                updated_project_data = self.repo.get_project(project_id)
             
             # Check for collaborator additions and trigger notifications
-            self._trigger_collaborator_addition_notifications(existing_project_data, update_fields, project_id)
+            self._trigger_collaborator_addition_notifications(existing_project_data, added_collaborators, project_id)
             
             return {"status": 200, "message": f"Project {project_id} updated successfully", "data": updated_project_data}
+        except LookupError:
+            return {"status": 404, "message": f"Project with ID {project_id} not found"}
         except RuntimeError as e:
             if "not found" in str(e).lower():
                 return {"status": 404, "message": f"Project with ID {project_id} not found"}
@@ -137,57 +176,29 @@ class ProjectService:
         except Exception as e:
             return {"status": 500, "message": f"Failed to update project {project_id}: {str(e)}"}
 
-    def _trigger_collaborator_addition_notifications(self, existing_project_data: Dict[str, Any], update_fields: Dict[str, Any], project_id: int):
+    def _trigger_collaborator_addition_notifications(self, existing_project_data: Dict[str, Any], added_collaborators: list, project_id: int):
         """
-        Trigger notifications for newly added collaborators when updating an existing project.
+        Trigger notifications for collaborators newly added to an existing project.
+        `added_collaborators` are the IDs the append_ids RPC actually appended,
+        so a collaborator added by two concurrent requests is notified once.
         """
         try:
-            # Check if collaborators field was updated
-            if 'collaborators' not in update_fields:
-                return
-            
-            # Get existing and new collaborators
-            existing_collaborators = set(existing_project_data.get("collaborators", []) or [])
-            new_collaborators = set(update_fields.get("collaborators", []) or [])
-            
-            # Find newly added collaborators (excluding the owner)
-            owner_id = existing_project_data.get("owner_id")
-            newly_added_collaborators = new_collaborators - existing_collaborators
-            
             # Remove owner from newly added collaborators (they shouldn't get notifications)
-            if owner_id:
-                newly_added_collaborators.discard(owner_id)
-            
-            if not newly_added_collaborators:
-                return
+            owner_id = existing_project_data.get("owner_id")
+            collaborator_ids = [c for c in added_collaborators if c != owner_id]
             
-            # Get project name and updater name
             project_name = existing_project_data.get("proj_name", f"Project {project_id}")
-            updater_name = "System"
-            # Try to get updater from request context or use owner as fallback
-            if owner_id:
-                try:
-                    response = requests.get(f"http://127.0.0.1:5003/users/{owner_id}")
-                    if response.status_code == 200:
-                        user_data = response.json()
-                        updater_name = user_data.get("data", {}).get("name", "System")
-                except Exception:
-                    pass  # Use default name if we can't fetch it
             
-            # Send notifications to newly added collaborators
-            collaborator_ids = list(newly_added_collaborators)
+            # Send notifications to newly added collaborators; the updater name
+            # (owner as fallback) is resolved by the outbox worker
             if collaborator_ids:
-                response = requests.post("http://127.0.0.1:5006/notifications/triggers/project-collaborator-addition", 
-                                       json={
-                                           "project_id": project_id,
-                                           "collaborator_ids": collaborator_ids,
-                                           "project_name": project_name,
-                                           "creator_name": updater_name
-                                       })
-                if response.status_code not in [200, 201]:
-                    print(f"Warning: Failed to send project collaborator addition notifications: {response.status_code}")
+                self.outbox.enqueue("/notifications/triggers/project-collaborator-addition", {
+                    "project_id": project_id,
+                    "collaborator_ids": collaborator_ids,
+                    "project_name": project_name
+                }, name_lookup=("creator_name", owner_id, "System"))
         except Exception as e:
-            print(f"Warning: Failed to send project collaborator addition notifications: {e}")
+            print(f"Warning: Failed to queue project collaborator addition notifications: {e}")
 
     def get_projects_by_owner(self, owner_id: int) -> Dict[str, Any]:
         """
@@ -198,22 +209,39 @@ class ProjectService:
             return {"status": 404, "message": f"No projects found for owner ID {owner_id}"}
         return {"status": 200, "data": projects}
 
+    def get_all_projects(self, limit: Optional[int] = None, after_id: Optional[int] = None,
+                         user_ids: Optional[List[int]] = None) -> Dict[str, Any]:
+        """
+        Get all projects in id order, optionally one page of `limit` after `after_id`
+        and only those owned by or shared with one of `user_ids`.
+        Paginated responses include {"limit", "next_after_id", "has_more"}.
+        """
+        projects = self.repo.find_all(limit, after_id, user_ids=user_ids)
+        result = {"status": 200, "data": projects}
+        if limit is not None:
+            has_more = len(projects) > limit
+            result["data"] = projects[:limit]
+            result["pagination"] = {
+                "limit": limit,
+                "next_after_id": result["data"][-1]["id"] if has_more else None,
+                "has_more": has_more,
+            }
+        return result
+
     def add_task_to_project(self, project_id: int, task_id: int) -> Dict[str, Any]:
         """
         Add a task and its subtasks to a project by:
         1. Getting task details from task microservice
-        2. Adding task_id and all subtask_ids to project's tasks list
-        3. Adding new task collaborators to project's collaborators list
-        4. Using bulk update to set project_id for task and all subtasks
-        """
-        # Check if project exists
-        project = self.repo.get_project(project_id)
-        if not project:
-            return {"status": 404, "message": f"Project with ID {project_id} not found"}
+        2. Appending task_id and all subtask_ids to project's tasks list and the task
+           collaborators to project's collaborators list, in one transaction
+        3. Using bulk update to set project_id for task and all subtasks
 
+        Step 2 is a single RPC call, so concurrent additions to the same project
+        cannot overwrite each other and the project row is never read first.
+        """
         # Get task details from task microservice
         try:
-            task_response = requests.get(f"http://127.0.0.1:5002/tasks/{task_id}")
+            task_response = self.tasks_client.get(f"/tasks/{task_id}")
             if task_response.status_code != 200:
                 return {"status": 404, "message": f"Task with ID {task_id} not found in task microservice"}
             
@@ -226,46 +254,30 @@ class ProjectService:
         except requests.RequestException as e:
             return {"status": 500, "message": f"Failed to communicate with task microservice: {str(e)}"}
 
-        # Get current project data
-        current_tasks = project.get("tasks") or []
-        current_collaborators = project.get("collaborators") or []
-        
         # Get task and subtask IDs
         task_collaborators = task.get("collaborators") or []
         subtasks = task.get("subtasks") or []
         
         # Create list of all task IDs (main task + subtasks)
         all_task_ids = [task_id] + subtasks
-        
-        # Check if any of these tasks are already in the project -lowkey dont need
-        existing_tasks = [tid for tid in all_task_ids if tid in current_tasks]
-        if existing_tasks:
-            return {"status": 400, "message": f"Tasks {existing_tasks} are already in project {project_id}"}
-
-        # Add all task IDs to project's tasks list
-        updated_tasks = current_tasks + all_task_ids
 
-        # Add new task collaborators to project collaborators
-        updated_collaborators = current_collaborators.copy()
-        added_collaborators = []
-        
-        for collaborator_id in task_collaborators:
-            if collaborator_id not in updated_collaborators:
-                updated_collaborators.append(collaborator_id)
-                added_collaborators.append(collaborator_id)
-
-        # Update project in database
+        # Update project in database; the tasks append changes nothing if any of
+        # these tasks are already in the project
         try:
-            updated_project = self.repo.update_project(project_id, {
-                "tasks": updated_tasks,
-                "collaborators": updated_collaborators
-            })
+            result = self.repo.add_tasks(project_id, all_task_ids, task_collaborators)
+        except LookupError:
+            return {"status": 404, "message": f"Project with ID {project_id} not found"}
+        except ValueError:
+            return {"status": 400, "message": f"One or more of tasks {all_task_ids} are already in project {project_id}"}
         except Exception as e:
             return {"status": 500, "message": f"Failed to update project: {str(e)}"}
 
+        updated_project = result["project"]
+        added_collaborators = result["collaborators"]["added"]
+
         # Use bulk update to set project_id for task and all subtasks
         try:
-            bulk_update_response = requests.post("http://127.0.0.1:5002/tasks/update-project/bulk", 
+            bulk_update_response = self.tasks_client.post("/tasks/update-project/bulk", 
                 json={
                     "task_ids": all_task_ids,
                     "project_id": project_id
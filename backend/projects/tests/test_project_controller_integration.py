@@ -5,6 +5,8 @@ import os
 
 # Add parent directory to path to find modules
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# The backend directory, for the shared package
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 from services.project_service import ProjectService
 from models.project import Project
 from repo.supa_project_repo import SupabaseProjectRepo
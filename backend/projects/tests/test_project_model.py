@@ -1,11 +1,25 @@
 import unittest
+import threading
+from unittest.mock import Mock, patch
 import sys
 import os
 from datetime import datetime, UTC
 
 # Add parent directory to path to find modules
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# The backend directory, for the shared package
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+# The repo module reads these at import time; the service tests below use an in-memory repo.
+os.environ.setdefault("SUPABASE_URL", "http://localhost")
+os.environ.setdefault("SUPABASE_SERVICE_KEY", "test-key")
+
 from models.project import Project
+from utils.parsing import parse_date_range_args, parse_page_args
+from services.project_service import ProjectService
+from shared.outbox import NotificationOutbox
+from shared.local_db import MemoryClient, SQLiteClient
+from repo.supa_project_repo import SupabaseProjectRepo
 
 
 class TestProjectModel(unittest.TestCase):
@@ -307,3 +321,202 @@ class TestProjectModel(unittest.TestCase):
         assert reconstructed_project.tasks is None
         assert reconstructed_project.created_at == original_project.created_at
 
+
+class TestParseDateRangeArgs(unittest.TestCase):
+    """Unit tests for the /projects/user date-range query parameters."""
+
+    def test_no_dates_means_no_filter(self):
+        assert parse_date_range_args({}) is None
+
+    def test_valid_range(self):
+        assert parse_date_range_args({"start_date": "2024-01-01", "end_date": "2024-03-31"}) == {
+            "field": "created_at", "start_date": "2024-01-01", "end_date": "2024-03-31"}
+
+    def test_invalid_values_raise(self):
+        for bad in ({"end_date": "March"},
+                    {"start_date": "2024-04-01", "end_date": "2024-03-31"},
+                    {"start_date": "2024-01-01", "date_field": "due_date"}):
+            with self.assertRaises(ValueError):
+                parse_date_range_args(bad)
+
+class TestAddTaskToProject(unittest.TestCase):
+    """ProjectService.add_task_to_project through the real repo and the project_add_tasks RPC."""
+
+    def setUp(self):
+        self.clients = {"memory": MemoryClient(latency=0.001), "sqlite": SQLiteClient(":memory:", latency=0.001)}
+        for client in self.clients.values():
+            client.seed({"project": [{"id": 1, "proj_name": "Launch", "owner_id": 7, "tasks": [], "collaborators": [7]}]})
+        self.tasks_client = Mock()
+        self.tasks_client.get.side_effect = self.task_response
+        self.tasks_client.post.return_value = Mock(status_code=200, json=Mock(return_value={}))
+
+    def service(self, client):
+        return ProjectService(repo=SupabaseProjectRepo(client=client), tasks_client=self.tasks_client)
+
+    def task_response(self, url):
+        task_id = int(url.rsplit("/", 1)[1])
+        response = Mock(status_code=200)
+        response.json.return_value = {"task": {"id": task_id, "subtasks": [1000 + task_id], "collaborators": [task_id]}}
+        return response
+
+    def test_parallel_additions_are_not_lost(self):
+        for name, client in self.clients.items():
+            with self.subTest(backend=name):
+                service, results = self.service(client), []
+                threads = [threading.Thread(target=lambda i=i: results.append(service.add_task_to_project(1, i)))
+                           for i in range(1, 21)]
+                for t in threads:
+                    t.start()
+                for t in threads:
+                    t.join()
+
+                assert all(r["status"] == 200 for r in results)
+                project = client.rows("project")[0]
+                assert sorted(project["tasks"]) == sorted(list(range(1, 21)) + [1000 + i for i in range(1, 21)])
+                assert sorted(project["collaborators"]) == list(range(1, 21))
+                # One database call per addition, and the project row is never read
+                assert client.calls == {"rpc:project_add_tasks": 20}
+        # One bulk project_id update per addition, through the shared tasks client
+        assert self.tasks_client.post.call_count == 40
+
+    def test_duplicate_and_missing_project(self):
+        for name, client in self.clients.items():
+            with self.subTest(backend=name):
+                service = self.service(client)
+                first = service.add_task_to_project(1, 3)
+                assert first["data"]["added_collaborators"] == [3]
+                # The full project row, as the frontend expects
+                assert first["data"]["project"] == client.rows("project")[0]
+                assert first["data"]["project"]["proj_name"] == "Launch"
+                assert service.add_task_to_project(1, 3)["status"] == 400
+                assert service.add_task_to_project(2, 3)["status"] == 404
+                # The rejected duplicate added neither tasks nor collaborators
+                project = client.rows("project")[0]
+                assert project["tasks"] == [3, 1003] and project["collaborators"] == [7, 3]
+
+
+class TestUpdateProject(unittest.TestCase):
+    """Project updates write only the changed columns and edit ID arrays through the RPCs."""
+
+    def setUp(self):
+        self.client = MemoryClient({"project": [
+            {"id": 1, "proj_name": "Launch", "owner_id": 1, "collaborators": [1, 2], "tasks": [10, 11]}]})
+        self.repo = SupabaseProjectRepo(client=self.client)
+        self.service = ProjectService(repo=self.repo, outbox=NotificationOutbox(":memory:"), tasks_client=Mock())
+
+    def test_array_edits_keep_concurrent_changes(self):
+        original_append = self.repo.append_ids
+
+        def append_while_another_worker_edits(project_id, column, values, fail_if_present=False):
+            # Another worker adds task 12 between this worker's read and write
+            original_append(project_id, "tasks", [12])
+            return original_append(project_id, column, values, fail_if_present)
+
+        self.repo.append_ids = append_while_another_worker_edits
+        result = self.service.update_project_by_id({"project_id": 1, "collaborators": [1, 3], "proj_name": "Relaunch"})
+        assert result["status"] == 200
+        project = self.client.rows("project")[0]
+        assert project["collaborators"] == [1, 3] and project["proj_name"] == "Relaunch"
+        assert project["tasks"] == [10, 11, 12]
+        # Only the collaborator the RPC actually added is notified
+        assert self.service.outbox.stats()["pending"] == 1
+
+        result = self.service.update_project_by_id({"project_id": 1, "tasks": [11, 12]})
+        assert result["data"]["tasks"] == [11, 12]
+        assert self.client.calls["rpc:array_remove_ids"] == 2
+
+    def test_missing_project(self):
+        assert self.service.update_project_by_id({"project_id": 2, "tasks": [1]})["status"] == 404
+
+
+class TestProjectNotificationOutbox(unittest.TestCase):
+    """Project creation queues collaborator notifications instead of calling the notification service."""
+
+    def setUp(self):
+        self.sent = []
+        self.outbox = NotificationOutbox(":memory:", send=lambda endpoint, payload: self.sent.append(payload) or True,
+                                         resolve_name=lambda user_id: "Alice")
+        self.repo = Mock()
+        self.repo.insert_project.return_value = {"id": 5, "proj_name": "Launch"}
+        self.service = ProjectService(repo=self.repo, outbox=self.outbox)
+
+    @patch("services.project_service.requests.post")
+    def test_create_queues_notification(self, mock_post):
+        result = self.service.create({"owner_id": 1, "proj_name": "Launch", "collaborators": [1, 2]})
+        assert result["status"] == 201
+        mock_post.assert_not_called()
+        assert self.outbox.stats()["pending"] == 1
+
+        assert self.outbox.drain_once()["sent"] == 1
+        assert self.sent == [{"project_id": 5, "collaborator_ids": [2], "project_name": "Launch", "creator_name": "Alice"}]
+
+
+class TestUserProjectsETag(unittest.TestCase):
+    """Conditional GET on /projects/user/<id>, answered from the project row versions."""
+
+    def setUp(self):
+        from flask import Flask
+        from controllers.project_controller import project_bp
+        self.client = MemoryClient({"project": [
+            {"id": 1, "proj_name": "Launch", "owner_id": 1, "collaborators": [1]},
+            {"id": 2, "proj_name": "Shared", "owner_id": 2, "collaborators": [2, 1]}]})
+        self.repo = SupabaseProjectRepo(client=self.client)
+        self.service = ProjectService(repo=self.repo, outbox=NotificationOutbox(":memory:"), tasks_client=Mock())
+        app = Flask(__name__)
+        app.register_blueprint(project_bp)
+        self.http = app.test_client()
+        patcher = patch("controllers.project_controller.service", self.service)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_unchanged_projects_are_not_loaded(self):
+        etag = self.http.get("/projects/user/1").headers["ETag"]
+        with patch.object(self.service, "get_projects_by_user", side_effect=AssertionError("view was loaded")):
+            response = self.http.get("/projects/user/1", headers={"If-None-Match": etag})
+        assert response.status_code == 304 and response.data == b""
+
+    def test_updated_project_produces_new_etag(self):
+        etag = self.http.get("/projects/user/1").headers["ETag"]
+        self.repo.update_project(2, {"proj_name": "Renamed"})
+        response = self.http.get("/projects/user/1", headers={"If-None-Match": etag})
+        assert response.status_code == 200 and response.headers["ETag"] != etag
+        assert "Renamed" in [p["proj_name"] for p in response.get_json()["data"]]
+
+
+class TestGetAllProjects(unittest.TestCase):
+    """Unit tests for paging through every project by id (GET /projects)."""
+
+    def setUp(self):
+        projects = [{"id": i, "proj_name": f"Project {i}", "owner_id": 1, "collaborators": [1]} for i in (5, 1, 3, 2, 4)]
+        repo = SupabaseProjectRepo(client=MemoryClient({"project": projects}))
+        self.service = ProjectService(repo=repo, tasks_client=Mock())
+
+    def test_pages_walk_every_project_once(self):
+        ids, after_id, pages = [], None, 0
+        while True:
+            result = self.service.get_all_projects(limit=2, after_id=after_id)
+            ids.extend(p["id"] for p in result["data"])
+            pages += 1
+            after_id = result["pagination"]["next_after_id"]
+            if not result["pagination"]["has_more"]:
+                break
+        assert ids == [1, 2, 3, 4, 5] and pages == 3
+        assert [p["id"] for p in self.service.get_all_projects()["data"]] == [1, 2, 3, 4, 5]
+
+    def test_user_ids_keep_owned_and_shared_projects(self):
+        repo = SupabaseProjectRepo(client=MemoryClient({"project": [
+            {"id": 1, "proj_name": "A", "owner_id": 1, "collaborators": [1]},
+            {"id": 2, "proj_name": "B", "owner_id": 2, "collaborators": [2, 3]},
+            {"id": 3, "proj_name": "C", "owner_id": 4, "collaborators": [4]},
+        ]}))
+        service = ProjectService(repo=repo, tasks_client=Mock())
+        assert [p["id"] for p in service.get_all_projects(user_ids=[1, 3])["data"]] == [1, 2]
+        result = service.get_all_projects(limit=1, user_ids=[1, 3])
+        assert [p["id"] for p in result["data"]] == [1] and result["pagination"]["next_after_id"] == 1
+        assert service.get_all_projects(user_ids=[])["data"] == []
+
+    def test_page_args_validated(self):
+        assert parse_page_args({"limit": "50", "after_id": "7"}) == {"limit": 50, "after_id": 7}
+        for bad in ({"limit": "0"}, {"limit": "501"}, {"after_id": "x"}):
+            with self.assertRaises(ValueError):
+                parse_page_args(bad)
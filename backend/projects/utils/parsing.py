@@ -1,6 +1,13 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
+from datetime import date
 from dateutil import parser as dateparser
 
+# Largest page GET /projects returns
+MAX_PAGE_LIMIT = 500
+# Most IDs the user_ids filter of GET /projects accepts; each expands to its own
+# collaborators clause
+MAX_FILTER_IDS = 100
+
 def parse_project_payload(form_or_json: Dict[str, Any]) -> Dict[str, Any]:
     """
     Accepts either request.form (ImmutableMultiDict) or request.json (dict)
@@ -80,3 +87,78 @@ def parse_project_update_payload(form_or_json: Dict[str, Any]) -> Dict[str, Any]
                 update_data[field_name] = parsed_list
     
     return update_data
+
+
+# ---- Date Range Parsing ----
+def parse_date_range_args(args: Dict[str, Any], allowed_fields: tuple = ("created_at",)) -> Optional[Dict[str, Any]]:
+    """
+    Parses optional start_date / end_date (YYYY-MM-DD, inclusive) and date_field
+    query parameters used to filter listings server-side.
+
+    Returns None when neither date is given, otherwise
+    {"field": ..., "start_date": ..., "end_date": ...}.
+    """
+    g = args.get
+
+    start_raw = g("start_date") or None
+    end_raw = g("end_date") or None
+    field = g("date_field") or allowed_fields[0]
+
+    if field not in allowed_fields:
+        raise ValueError(f"Invalid date_field: {field}. Must be one of {list(allowed_fields)}.")
+
+    if not start_raw and not end_raw:
+        return None
+
+    parsed = {}
+    for name, raw in (("start_date", start_raw), ("end_date", end_raw)):
+        if raw:
+            try:
+                parsed[name] = date.fromisoformat(str(raw)).isoformat()
+            except ValueError:
+                raise ValueError(f"Invalid {name}: '{raw}'. Expected YYYY-MM-DD.")
+        else:
+            parsed[name] = None
+
+    if parsed["start_date"] and parsed["end_date"] and parsed["start_date"] > parsed["end_date"]:
+        raise ValueError("start_date must be on or before end_date")
+
+    return {"field": field, "start_date": parsed["start_date"], "end_date": parsed["end_date"]}
+
+
+def parse_page_args(args: Dict[str, Any]) -> Dict[str, Optional[int]]:
+    """
+    Parses optional limit (1-MAX_PAGE_LIMIT) and after_id query parameters for
+    paging through projects by id. Returns {"limit": ..., "after_id": ...}.
+    """
+    parsed = {}
+    for name in ("limit", "after_id"):
+        raw = args.get(name)
+        if raw in (None, ""):
+            parsed[name] = None
+            continue
+        try:
+            parsed[name] = int(raw)
+        except (TypeError, ValueError):
+            raise ValueError(f"{name} must be an integer")
+
+    if parsed["limit"] is not None and not 1 <= parsed["limit"] <= MAX_PAGE_LIMIT:
+        raise ValueError(f"limit must be between 1 and {MAX_PAGE_LIMIT}")
+    return parsed
+
+
+def parse_id_list_arg(args: Dict[str, Any], name: str, max_ids: int) -> Optional[List[int]]:
+    """
+    Parses an optional comma-separated list of integer IDs (at most `max_ids`),
+    e.g. user_ids=1,2,3. Returns None when the parameter is absent.
+    """
+    raw = args.get(name)
+    if raw is None:
+        return None
+    try:
+        ids = list(dict.fromkeys(int(part) for part in str(raw).split(",") if part.strip()))
+    except ValueError:
+        raise ValueError(f"{name} must be comma-separated integers")
+    if len(ids) > max_ids:
+        raise ValueError(f"{name} accepts at most {max_ids} ids")
+    return ids
@@ -2,6 +2,7 @@ from flask import Blueprint, request, jsonify, send_file
 from services.report_service import ReportService
 from services.export_service import ExportService
 from models.report import ReportData, TeamReportData
+from shared.service_client import get_service_client_stats
 from datetime import datetime
 import io
 
@@ -238,6 +239,9 @@ def generate_department_report(director_user_id: int):
     - format: 'json' (default), 'pdf', or 'excel'
     - start_date: Start date for filtering (YYYY-MM-DD format)
     - end_date: End date for filtering (YYYY-MM-DD format)
+    - loader: 'per_member' (default) or 'bulk', which loads the department's members,
+      their projects and tasks in a few paginated reads first and adds
+      "metadata": {"snapshot": {...}} to the result
     
     RETURNS:
     {
@@ -278,7 +282,12 @@ def generate_department_report(director_user_id: int):
                 return jsonify({"Message": "Invalid end_date format. Use YYYY-MM-DD", "Code": 400}), 400
         
         # Generate report data with date filtering
-        result = report_service.generate_department_report(director_user_id, start_date=start_date, end_date=end_date)
+        loader = request.args.get('loader', 'per_member').lower()
+        if loader not in ('per_member', 'bulk'):
+            return jsonify({"Message": "Invalid loader. Use 'per_member' or 'bulk'", "Code": 400}), 400
+
+        result = report_service.generate_department_report(director_user_id, start_date=start_date, end_date=end_date,
+                                                           bulk=loader == 'bulk')
         
         if result.get("status") != 200:
             return jsonify({"Message": result.get("message"), "Code": result.get("status")}), result.get("status")
@@ -370,6 +379,8 @@ def generate_company_report(admin_user_id: int):
     - format: 'json' (default), 'pdf', or 'excel'
     - start_date: Start date for filtering (YYYY-MM-DD format)
     - end_date: End date for filtering (YYYY-MM-DD format)
+    - loader: 'per_member' (default) or 'bulk', which loads the whole organisation in a
+      few paginated reads first instead of calling the services per member and project
     
     RETURNS:
     {
@@ -379,6 +390,15 @@ def generate_company_report(admin_user_id: int):
             "company_report": {
                 "departments": [ ... department reports with teams and members ... ]
             }
+        },
+        "metadata": {
+            "max_workers": 16,
+            "member_reports": 57,
+            "failed_members": [{"userid": 102, "error": "..."}],
+            "report_context": {"user_directory": {"users": 57, "batch_calls": 1}, "projects": 12, "project_fetches": 12},
+            "timings_ms": {"directory": 10.6, "member_reports": 43.8, "assemble": 0.3, "total": 54.8},
+            "snapshot": {"users": 57, "departments": 3, "teams": 9, "projects": 12, "tasks": 840,
+                         "bulk_reads": 8, "load_ms": 120.4}   (loader=bulk only)
         }
     }
     
@@ -411,7 +431,12 @@ def generate_company_report(admin_user_id: int):
                 return jsonify({"Message": "Invalid end_date format. Use YYYY-MM-DD", "Code": 400}), 400
         
         # Generate report data with date filtering
-        result = report_service.generate_company_report(admin_user_id, start_date=start_date, end_date=end_date)
+        loader = request.args.get('loader', 'per_member').lower()
+        if loader not in ('per_member', 'bulk'):
+            return jsonify({"Message": "Invalid loader. Use 'per_member' or 'bulk'", "Code": 400}), 400
+
+        result = report_service.generate_company_report(admin_user_id, start_date=start_date, end_date=end_date,
+                                                        bulk=loader == 'bulk')
         
         if result.get("status") != 200:
             return jsonify({"Message": result.get("message"), "Code": result.get("status")}), result.get("status")
@@ -450,6 +475,22 @@ def generate_company_report(admin_user_id: int):
         return jsonify({"Message": str(e), "Code": 500}), 500
 
 
+@report_bp.route("/reports/http/stats", methods=["GET"])
+def http_stats():
+    """
+    Circuit state and per-endpoint latency/error stats of the calls this service
+    makes to the other microservices.
+
+    RETURNS:
+    {
+        "data": {"tasks": {"base_url": "...", "circuit": "closed",
+                           "endpoints": {"tasks GET /tasks/user-task/{id}": {"count": 12, "errors": 0, ...}}}},
+        "Code": 200
+    }
+    """
+    return jsonify({"data": get_service_client_stats(), "Code": 200}), 200
+
+
 @report_bp.route("/health", methods=["GET"])
 def health_check():
     """
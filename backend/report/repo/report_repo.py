@@ -1,20 +1,157 @@
-import os
-import requests
-from typing import Optional, Dict, Any, List
+import threading
+from typing import Optional, Dict, Any, List, Iterable, Iterator
+
+from shared.service_client import ServiceClient, get_service_client
+
+# IDs per /users/batch request (the users service accepts up to 500)
+USER_BATCH_SIZE = 200
+# Rows per page for the bulk task and project reads (both services accept up to 500)
+BULK_PAGE_SIZE = 500
+# IDs per user_ids / project_ids filter of the bulk reads (both services accept up to 100)
+BULK_FILTER_SIZE = 100
+
+
+def _date_filter_applied(body: Dict[str, Any], start_date: str = None, end_date: str = None) -> bool:
+    """True when the service echoed back the same created_at range it was asked to apply."""
+    applied = body.get('date_filter') or {}
+    return (applied.get('field') == 'created_at'
+            and applied.get('start_date') == start_date
+            and applied.get('end_date') == end_date)
+
+
+class UserDirectory:
+    """
+    Users referenced while building one report, fetched in batches and memoized.
+
+    prefetch() resolves every not-yet-known ID with one /users/batch call, so a
+    report looks each person up once instead of once per task. Safe to share
+    between the threads of a report; an ID already being fetched by another
+    thread is waited for rather than fetched again. Unknown users are memoized
+    as None.
+    """
+
+    def __init__(self, repo: 'ReportRepo'):
+        self.repo = repo
+        self.batch_calls = 0
+        self._users: Dict[int, Optional[Dict[str, Any]]] = {}
+        self._in_flight: Dict[int, threading.Event] = {}
+        self._lock = threading.Lock()
+
+    def prefetch(self, user_ids: Iterable[int]) -> None:
+        """Resolve all of `user_ids` not resolved yet, in one batch."""
+        wanted = {user_id for user_id in user_ids if user_id is not None}
+        with self._lock:
+            missing = [user_id for user_id in wanted if user_id not in self._users and user_id not in self._in_flight]
+            waiting = {self._in_flight[user_id] for user_id in wanted if user_id in self._in_flight}
+            done = threading.Event()
+            for user_id in missing:
+                self._in_flight[user_id] = done
+            if missing:
+                self.batch_calls += 1
+
+        if missing:
+            found = {}
+            try:
+                found = self.repo.get_users_by_ids(sorted(missing))
+            finally:
+                with self._lock:
+                    for user_id in missing:
+                        self._users[user_id] = found.get(user_id)
+                        del self._in_flight[user_id]
+                done.set()
+        for event in waiting:
+            event.wait()
+
+    def add(self, users: Iterable[Dict[str, Any]]) -> None:
+        """Remember users the report already has, e.g. team members, so they are not fetched again."""
+        with self._lock:
+            for user in users:
+                if user.get('userid') is not None:
+                    self._users[user['userid']] = user
+
+    def get(self, user_id: int) -> Optional[Dict[str, Any]]:
+        """The user, fetched now if it was not prefetched; None if there is no such user."""
+        if user_id not in self._users:
+            self.prefetch([user_id])
+        return self._users.get(user_id)
+
+    def name(self, user_id: int) -> str:
+        user = self.get(user_id)
+        return user.get('name', f'User {user_id}') if user else f'User {user_id}'
+
+    def stats(self) -> Dict[str, int]:
+        return {"users": len(self._users), "batch_calls": self.batch_calls}
+
+
+class ReportContext:
+    """
+    Data shared by the members of one team, department or company report.
+
+    Holds the report's UserDirectory and each project's task list, fetched the
+    first time any member needs it and reused by every other member and by the
+    aggregation step. Like the directory it is safe to share between threads:
+    a project being fetched by one thread is waited for, not fetched again.
+    fetch_counts records how often each project was actually requested.
+    """
+
+    def __init__(self, repo: 'ReportRepo'):
+        self.repo = repo
+        self.users = repo.user_directory()
+        self.fetch_counts: Dict[int, int] = {}
+        self._project_tasks: Dict[int, List[Dict[str, Any]]] = {}
+        self._in_flight: Dict[int, threading.Event] = {}
+        self._lock = threading.Lock()
+
+    def project_tasks(self, project_id: int) -> List[Dict[str, Any]]:
+        """All tasks of the project. Shared between members, so callers must not modify the rows."""
+        if not project_id:
+            return []
+        while True:
+            with self._lock:
+                if project_id in self._project_tasks:
+                    return self._project_tasks[project_id]
+                waiting = self._in_flight.get(project_id)
+                if waiting is None:
+                    done = self._in_flight[project_id] = threading.Event()
+                    self.fetch_counts[project_id] = self.fetch_counts.get(project_id, 0) + 1
+                    break
+            # Another member is fetching it; if that fetch raised, try again ourselves
+            waiting.wait()
+
+        tasks = None
+        try:
+            tasks = self.repo.get_project_tasks(project_id) or []
+        finally:
+            with self._lock:
+                if tasks is not None:
+                    self._project_tasks[project_id] = tasks
+                del self._in_flight[project_id]
+            done.set()
+        return tasks
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "user_directory": self.users.stats(),
+            "projects": len(self._project_tasks),
+            "project_fetches": sum(self.fetch_counts.values()),
+        }
+
 
 class ReportRepo:
-    def __init__(self):
-        # Microservice URLs - these should be environment variables in production
-        self.users_service_url = os.getenv("USERS_SERVICE_URL", "http://localhost:5003")
-        self.tasks_service_url = os.getenv("TASKS_SERVICE_URL", "http://localhost:5002")
-        self.projects_service_url = os.getenv("PROJECTS_SERVICE_URL", "http://localhost:5001")
-        self.team_service_url = os.getenv("TEAM_SERVICE_URL", "http://localhost:5004")
-        self.dept_service_url = os.getenv("DEPT_SERVICE_URL", "http://localhost:5005")
+    def __init__(self, clients: Optional[Dict[str, ServiceClient]] = None):
+        # One pooled client per microservice, shared by the whole process unless
+        # given; base URLs come from USERS_SERVICE_URL, TASKS_SERVICE_URL, ...
+        clients = clients or {}
+        self.users = clients.get("users") or get_service_client("users")
+        self.tasks = clients.get("tasks") or get_service_client("tasks")
+        self.projects = clients.get("projects") or get_service_client("projects")
+        self.team = clients.get("team") or get_service_client("team")
+        self.dept = clients.get("dept") or get_service_client("dept")
 
     def get_user_info(self, user_id: int) -> Optional[Dict[str, Any]]:
         """Get user information from users microservice"""
         try:
-            response = requests.get(f"{self.users_service_url}/users/{user_id}")
+            response = self.users.get(f"/users/{user_id}")
             if response.status_code == 200:
                 return response.json().get('data')
             return None
@@ -22,6 +159,27 @@ class ReportRepo:
             print(f"Error fetching user info: {e}")
             return None
 
+    def get_users_by_ids(self, user_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        """Get many users from the users microservice's batch endpoint, keyed by userid"""
+        users = {}
+        for i in range(0, len(user_ids), USER_BATCH_SIZE):
+            chunk = user_ids[i:i + USER_BATCH_SIZE]
+            try:
+                response = self.users.get("/users/batch", params={"ids": ",".join(str(user_id) for user_id in chunk)})
+                if response.status_code == 200:
+                    users.update((user['userid'], user) for user in response.json().get('data', []))
+            except Exception as e:
+                print(f"Error fetching users {chunk[0]}..{chunk[-1]}: {e}")
+        return users
+
+    def user_directory(self) -> UserDirectory:
+        """A new directory of user names, to be used for the length of one report"""
+        return UserDirectory(self)
+
+    def report_context(self) -> ReportContext:
+        """A new context of users and project tasks, to be used for the length of one report"""
+        return ReportContext(self)
+
     def get_user_tasks(self, user_id: int, start_date: str = None, end_date: str = None) -> List[Dict[str, Any]]:
         """Get all tasks for a user from tasks microservice with optional date filtering
         
@@ -31,19 +189,20 @@ class ReportRepo:
             end_date: End date for filtering (YYYY-MM-DD format)
         """
         try:
-            url = f"{self.tasks_service_url}/tasks/user-task/{user_id}"
+            path = f"/tasks/user-task/{user_id}"
             params = {}
             if start_date:
                 params['start_date'] = start_date
             if end_date:
                 params['end_date'] = end_date
                 
-            response = requests.get(url, params=params)
+            response = self.tasks.get(path, params=params)
             if response.status_code == 200:
-                tasks = response.json().get('data', [])
+                body = response.json()
+                tasks = body.get('data', [])
                 
-                # If microservice doesn't support date filtering, filter here
-                if (start_date or end_date) and tasks:
+                # If microservice didn't apply the date filter itself, filter here
+                if (start_date or end_date) and tasks and not _date_filter_applied(body, start_date, end_date):
                     filtered_tasks = []
                     for task in tasks:
                         task_date = task.get('created_at', '')
@@ -75,19 +234,20 @@ class ReportRepo:
             end_date: End date for filtering (YYYY-MM-DD format)
         """
         try:
-            url = f"{self.projects_service_url}/projects/user/{user_id}"
+            path = f"/projects/user/{user_id}"
             params = {}
             if start_date:
                 params['start_date'] = start_date
             if end_date:
                 params['end_date'] = end_date
                 
-            response = requests.get(url, params=params)
+            response = self.projects.get(path, params=params)
             if response.status_code == 200:
-                projects = response.json().get('data', [])
+                body = response.json()
+                projects = body.get('data', [])
                 
-                # If microservice doesn't support date filtering, filter here
-                if (start_date or end_date) and projects:
+                # If microservice didn't apply the date filter itself, filter here
+                if (start_date or end_date) and projects and not _date_filter_applied(body, start_date, end_date):
                     filtered_projects = []
                     for project in projects:
                         project_date = project.get('created_at', '')
@@ -113,7 +273,7 @@ class ReportRepo:
     def get_project_tasks(self, project_id: int) -> List[Dict[str, Any]]:
         """Get all tasks for a project from tasks microservice"""
         try:
-            response = requests.get(f"{self.tasks_service_url}/tasks/project/{project_id}")
+            response = self.tasks.get(f"/tasks/project/{project_id}")
             if response.status_code == 200:
                 return response.json().get('data', [])
             return []
@@ -124,7 +284,7 @@ class ReportRepo:
     def get_project_info(self, project_id: int) -> Optional[Dict[str, Any]]:
         """Get project information from projects microservice"""
         try:
-            response = requests.get(f"{self.projects_service_url}/projects/{project_id}")
+            response = self.projects.get(f"/projects/{project_id}")
             if response.status_code == 200:
                 return response.json().get('data')
             return None
@@ -135,7 +295,7 @@ class ReportRepo:
     def get_team_members(self, team_id: int) -> List[Dict[str, Any]]:
         """Get all team members from users microservice"""
         try:
-            response = requests.get(f"{self.users_service_url}/users/team/{team_id}")
+            response = self.users.get(f"/users/team/{team_id}")
             if response.status_code == 200:
                 return response.json().get('data', [])
             return []
@@ -146,7 +306,7 @@ class ReportRepo:
     def get_dept_members(self, dept_id: int) -> List[Dict[str, Any]]:
         """Get all department members from users microservice"""
         try:
-            response = requests.get(f"{self.users_service_url}/users/department/{dept_id}")
+            response = self.users.get(f"/users/department/{dept_id}")
             if response.status_code == 200:
                 return response.json().get('data', [])
             return []
@@ -157,7 +317,7 @@ class ReportRepo:
     def get_team_info(self, team_id: int) -> Optional[Dict[str, Any]]:
         """Get team information from team microservice"""
         try:
-            response = requests.get(f"{self.team_service_url}/teams/{team_id}")
+            response = self.team.get(f"/teams/{team_id}")
             if response.status_code == 200:
                 return response.json().get('data')
             return None
@@ -168,7 +328,7 @@ class ReportRepo:
     def get_dept_info(self, dept_id: int) -> Optional[Dict[str, Any]]:
         """Get department information from dept microservice"""
         try:
-            response = requests.get(f"{self.dept_service_url}/departments/{dept_id}")
+            response = self.dept.get(f"/departments/{dept_id}")
             if response.status_code == 200:
                 return response.json().get('data')
             return None
@@ -179,7 +339,7 @@ class ReportRepo:
     def get_tasks_by_team(self, team_id: int) -> List[Dict[str, Any]]:
         """Get all tasks for team members from tasks microservice"""
         try:
-            response = requests.get(f"{self.tasks_service_url}/tasks/team/{team_id}")
+            response = self.tasks.get(f"/tasks/team/{team_id}")
             if response.status_code == 200:
                 return response.json().get('data', [])
             return []
@@ -190,7 +350,7 @@ class ReportRepo:
     def get_tasks_by_department(self, dept_id: int) -> List[Dict[str, Any]]:
         """Get all tasks for department members from tasks microservice"""
         try:
-            response = requests.get(f"{self.tasks_service_url}/tasks/department/{dept_id}")
+            response = self.tasks.get(f"/tasks/department/{dept_id}")
             if response.status_code == 200:
                 return response.json().get('data', [])
             return []
@@ -201,7 +361,7 @@ class ReportRepo:
     def get_all_departments(self) -> List[Dict[str, Any]]:
         """Get all departments from dept microservice"""
         try:
-            response = requests.get(f"{self.dept_service_url}/departments")
+            response = self.dept.get("/departments")
             if response.status_code == 200:
                 return response.json().get('data', [])
             return []
@@ -212,13 +372,75 @@ class ReportRepo:
     def get_all_teams(self) -> List[Dict[str, Any]]:
         """Get all teams from team microservice"""
         try:
-            response = requests.get(f"{self.team_service_url}/teams")
+            response = self.team.get("/teams")
             if response.status_code == 200:
                 return response.json().get('data', [])
             return []
         except Exception as e:
             print(f"Error fetching all teams: {e}")
             return []
+
+    # Bulk reads for ReportSnapshot. Unlike the lookups above these raise instead of
+    # returning [], since a snapshot missing a page would silently undercount.
+
+    def get_all_users(self) -> List[Dict[str, Any]]:
+        """Get every user from the users microservice"""
+        response = self.users.get("/users/all")
+        if response.status_code != 200:
+            raise RuntimeError(f"Error fetching all users: HTTP {response.status_code}")
+        return response.json().get('data', [])
+
+    def get_all_dept_members(self, dept_id: int) -> List[Dict[str, Any]]:
+        """Get every member of a department from the users microservice"""
+        response = self.users.get(f"/users/department/{dept_id}")
+        if response.status_code != 200:
+            raise RuntimeError(f"Error fetching department members: HTTP {response.status_code}")
+        return response.json().get('data', [])
+
+    def iter_task_pages(self, page_size: int = BULK_PAGE_SIZE, user_ids: Optional[List[int]] = None,
+                        project_ids: Optional[List[int]] = None) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Every task row (parents and subtasks, un-nested) from the tasks microservice, one
+        page per request; with `user_ids` / `project_ids` (at most BULK_FILTER_SIZE each)
+        only the rows owned by or shared with those users or in those projects.
+        """
+        params = {"flat": "true", "limit": page_size}
+        if user_ids is not None:
+            params["user_ids"] = ",".join(str(user_id) for user_id in user_ids)
+        if project_ids is not None:
+            params["project_ids"] = ",".join(str(project_id) for project_id in project_ids)
+        while True:
+            response = self.tasks.get("/tasks", params=params)
+            if response.status_code == 404 and "cursor" not in params:
+                return  # no tasks at all
+            if response.status_code != 200:
+                raise RuntimeError(f"Error fetching all tasks: HTTP {response.status_code}")
+            body = response.json()
+            yield body.get('data', [])
+            cursor = (body.get('pagination') or {}).get('next_cursor')
+            if not cursor:
+                return
+            params = {**params, "cursor": cursor}
+
+    def iter_project_pages(self, page_size: int = BULK_PAGE_SIZE,
+                           user_ids: Optional[List[int]] = None) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Every project from the projects microservice, one page per request; with
+        `user_ids` (at most BULK_FILTER_SIZE) only those the users own or collaborate on.
+        """
+        params = {"limit": page_size}
+        if user_ids is not None:
+            params["user_ids"] = ",".join(str(user_id) for user_id in user_ids)
+        while True:
+            response = self.projects.get("/projects", params=params)
+            if response.status_code != 200:
+                raise RuntimeError(f"Error fetching all projects: HTTP {response.status_code}")
+            body = response.json()
+            yield body.get('data', [])
+            next_after_id = (body.get('pagination') or {}).get('next_after_id')
+            if next_after_id is None:
+                return
+            params = {**params, "after_id": next_after_id}
         
     
 
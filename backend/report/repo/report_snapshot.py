@@ -0,0 +1,214 @@
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, List, Iterable
+
+from repo.report_repo import ReportRepo, ReportContext, UserDirectory, BULK_PAGE_SIZE, BULK_FILTER_SIZE, USER_BATCH_SIZE
+
+
+def _in_range(row: Dict[str, Any], start_date: str = None, end_date: str = None) -> bool:
+    """Whether the row's created_at day falls in the inclusive YYYY-MM-DD range."""
+    created = (row.get('created_at') or '')[:10]
+    if not created:
+        return True
+    if start_date and created < start_date:
+        return False
+    if end_date and created > end_date:
+        return False
+    return True
+
+
+def _by_owner_then_collaborator(rows_by_owner: Dict[int, List[Dict[str, Any]]],
+                                rows_by_collaborator: Dict[int, List[Dict[str, Any]]], user_id: int,
+                                start_date: str = None, end_date: str = None) -> List[Dict[str, Any]]:
+    """Owned rows then collaborated ones, deduplicated by id, as the services combine them."""
+    combined = {}
+    for row in rows_by_owner.get(user_id, []) + rows_by_collaborator.get(user_id, []):
+        if row['id'] not in combined and _in_range(row, start_date, end_date):
+            combined[row['id']] = row
+    return list(combined.values())
+
+
+def _read_pages(read, ids: List[int], size: int = BULK_FILTER_SIZE) -> List[List[Dict[str, Any]]]:
+    """Every page of read(chunk) for each chunk of at most `size` of `ids`; no reads for no ids."""
+    return [page for i in range(0, len(ids), size) for page in read(ids[i:i + size])]
+
+
+def _unique_rows(pages: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """The rows of `pages`, once each by id (filtered reads of different chunks overlap)."""
+    return list({row['id']: row for page in pages for row in page}.values())
+
+
+class ReportSnapshot:
+    """
+    In-memory copy of users, teams, departments, projects and tasks, for building
+    department and company reports.
+
+    load() reads the whole organisation, load_department() only what one
+    department's report touches, with a few paginated bulk requests; the snapshot
+    then answers the same lookups as ReportRepo (get_user_projects,
+    get_project_tasks, get_dept_members, ...) from indexes by owner, collaborator,
+    project, team and department, so ReportService builds the same reports without
+    a service call per member or project. Rows are shared between lookups and must
+    not be modified.
+
+    get_user_tasks returns parent tasks without their nested subtasks; reports take
+    their task figures from the project task lists instead.
+    """
+
+    def __init__(self, users: List[Dict[str, Any]], departments: List[Dict[str, Any]], teams: List[Dict[str, Any]],
+                 projects: List[Dict[str, Any]], tasks: List[Dict[str, Any]], bulk_reads: int = 0, load_ms: float = 0.0,
+                 known_users: Iterable[Dict[str, Any]] = ()):
+        """`known_users` are only looked up by id, not listed as team or department members."""
+        self.users = users
+        self.departments = departments
+        self.teams = teams
+        self.projects = projects
+        self.tasks = tasks
+        self.bulk_reads = bulk_reads
+        self.load_ms = load_ms
+
+        self.users_by_id = {user['userid']: user for user in known_users}
+        self.users_by_id.update((user['userid'], user) for user in users)
+        self.members_by_dept: Dict[int, List[Dict[str, Any]]] = defaultdict(list)
+        self.members_by_team: Dict[int, List[Dict[str, Any]]] = defaultdict(list)
+        for user in users:
+            if user.get('dept_id') is not None:
+                self.members_by_dept[user['dept_id']].append(user)
+            if user.get('team_id') is not None:
+                self.members_by_team[user['team_id']].append(user)
+        self.depts_by_id = {dept['id']: dept for dept in departments}
+        self.teams_by_id = {team['id']: team for team in teams}
+
+        self.projects_by_owner: Dict[int, List[Dict[str, Any]]] = defaultdict(list)
+        self.projects_by_collaborator: Dict[int, List[Dict[str, Any]]] = defaultdict(list)
+        for project in projects:
+            self._index_people(project, self.projects_by_owner, self.projects_by_collaborator)
+
+        self.tasks_by_project: Dict[int, List[Dict[str, Any]]] = defaultdict(list)
+        self.parent_tasks_by_owner: Dict[int, List[Dict[str, Any]]] = defaultdict(list)
+        self.parent_tasks_by_collaborator: Dict[int, List[Dict[str, Any]]] = defaultdict(list)
+        for task in tasks:
+            if task.get('project_id') is not None:
+                self.tasks_by_project[task['project_id']].append(task)
+            # Like the tasks service's in_("type", ["parent", None]), which never matches
+            # a NULL type: untyped rows are not anyone's parent tasks
+            if task.get('type') == 'parent':
+                self._index_people(task, self.parent_tasks_by_owner, self.parent_tasks_by_collaborator)
+
+    @staticmethod
+    def _index_people(row: Dict[str, Any], by_owner: Dict[int, list], by_collaborator: Dict[int, list]) -> None:
+        if row.get('owner_id') is not None:
+            by_owner[row['owner_id']].append(row)
+        for user_id in dict.fromkeys(row.get('collaborators') or []):
+            by_collaborator[user_id].append(row)
+
+    @classmethod
+    def load(cls, repo: ReportRepo, page_size: int = BULK_PAGE_SIZE) -> 'ReportSnapshot':
+        """Read the whole organisation through `repo`, the five sources concurrently"""
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=5) as executor:
+            futures = [executor.submit(fetch) for fetch in (
+                repo.get_all_users, repo.get_all_departments, repo.get_all_teams,
+                lambda: list(repo.iter_project_pages(page_size)), lambda: list(repo.iter_task_pages(page_size)))]
+            users, departments, teams, project_pages, task_pages = [future.result() for future in futures]
+        return cls(users, departments, teams,
+                   projects=[row for page in project_pages for row in page],
+                   tasks=[row for page in task_pages for row in page],
+                   bulk_reads=3 + len(project_pages) + len(task_pages),
+                   load_ms=round((time.perf_counter() - started) * 1000, 1))
+
+    @classmethod
+    def load_department(cls, repo: ReportRepo, director: Dict[str, Any],
+                        page_size: int = BULK_PAGE_SIZE) -> 'ReportSnapshot':
+        """
+        Read what the department report of `director` needs through `repo`: the
+        department's members, the projects they own or collaborate on, those
+        projects' tasks and the members' own tasks, then the other users those
+        rows name. Member and project IDs go out BULK_FILTER_SIZE per request.
+        """
+        started = time.perf_counter()
+        dept_id = director['dept_id']
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            dept_future = executor.submit(repo.get_dept_info, dept_id)
+            teams_future = executor.submit(repo.get_all_teams)
+            members = repo.get_all_dept_members(dept_id)
+            member_ids = sorted({director['userid']} | {member['userid'] for member in members})
+            member_task_future = executor.submit(
+                _read_pages, lambda ids: repo.iter_task_pages(page_size, user_ids=ids), member_ids)
+            project_pages = _read_pages(lambda ids: repo.iter_project_pages(page_size, user_ids=ids), member_ids)
+            projects = sorted(_unique_rows(project_pages), key=lambda project: project['id'])
+            task_pages = _read_pages(lambda ids: repo.iter_task_pages(page_size, project_ids=ids),
+                                     [project['id'] for project in projects])
+            task_pages += member_task_future.result()
+            dept, teams = dept_future.result(), teams_future.result()
+        # Same order as the unfiltered task listing, so project task lists match it
+        tasks = sorted(_unique_rows(task_pages), key=lambda task: (task.get('created_at') or '', task['id']))
+
+        # Collaborators and owners from outside the department, for their names
+        known = {director['userid']} | {member['userid'] for member in members}
+        referenced = set()
+        for row in projects + tasks:
+            referenced.add(row.get('owner_id'))
+            referenced.update(row.get('collaborators') or [])
+        missing = sorted(user_id for user_id in referenced - known if user_id is not None)
+        others = repo.get_users_by_ids(missing) if missing else {}
+
+        return cls(members, departments=[dept] if dept else [], teams=teams, projects=projects, tasks=tasks,
+                   bulk_reads=3 + len(project_pages) + len(task_pages) + -(-len(missing) // USER_BATCH_SIZE),
+                   load_ms=round((time.perf_counter() - started) * 1000, 1),
+                   known_users=[director, *others.values()])
+
+    # ReportRepo lookups, answered from the snapshot
+
+    def get_user_info(self, user_id: int) -> Optional[Dict[str, Any]]:
+        return self.users_by_id.get(user_id)
+
+    def get_users_by_ids(self, user_ids: Iterable[int]) -> Dict[int, Dict[str, Any]]:
+        return {user_id: self.users_by_id[user_id] for user_id in user_ids if user_id in self.users_by_id}
+
+    def user_directory(self) -> UserDirectory:
+        return UserDirectory(self)
+
+    def report_context(self) -> ReportContext:
+        return ReportContext(self)
+
+    def get_user_tasks(self, user_id: int, start_date: str = None, end_date: str = None) -> List[Dict[str, Any]]:
+        return _by_owner_then_collaborator(self.parent_tasks_by_owner, self.parent_tasks_by_collaborator,
+                                           user_id, start_date, end_date)
+
+    def get_user_projects(self, user_id: int, start_date: str = None, end_date: str = None) -> List[Dict[str, Any]]:
+        return _by_owner_then_collaborator(self.projects_by_owner, self.projects_by_collaborator,
+                                           user_id, start_date, end_date)
+
+    def get_project_tasks(self, project_id: int) -> List[Dict[str, Any]]:
+        return list(self.tasks_by_project.get(project_id, []))
+
+    def get_team_members(self, team_id: int) -> List[Dict[str, Any]]:
+        return list(self.members_by_team.get(team_id, []))
+
+    def get_dept_members(self, dept_id: int) -> List[Dict[str, Any]]:
+        return list(self.members_by_dept.get(dept_id, []))
+
+    def get_team_info(self, team_id: int) -> Optional[Dict[str, Any]]:
+        return self.teams_by_id.get(team_id)
+
+    def get_dept_info(self, dept_id: int) -> Optional[Dict[str, Any]]:
+        return self.depts_by_id.get(dept_id)
+
+    def get_all_departments(self) -> List[Dict[str, Any]]:
+        return list(self.departments)
+
+    def get_all_teams(self) -> List[Dict[str, Any]]:
+        return list(self.teams)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "users": len(self.users_by_id),
+            "departments": len(self.departments),
+            "teams": len(self.teams),
+            "projects": len(self.projects),
+            "tasks": len(self.tasks),
+            "bulk_reads": self.bulk_reads,
+            "load_ms": self.load_ms,
+        }
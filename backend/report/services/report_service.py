@@ -1,15 +1,35 @@
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Callable
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
 from dateutil import parser as dateparser
+import os
 import statistics
+import time
 
 from models.report import ReportData, TeamReportData
-from repo.report_repo import ReportRepo
+from repo.report_repo import ReportRepo, ReportContext
+from repo.report_snapshot import ReportSnapshot
+
+# Concurrent microservice lookups per company report
+DEFAULT_MAX_WORKERS = 16
+
+ROLE_NAMES = {1: 'staff', 2: 'manager', 3: 'director'}
+
+
+def _role_of(member: Dict[str, Any]) -> str:
+    """'staff', 'manager', 'director' or '' for a user's role (stored as a number or a name)"""
+    member_role = member.get('role')
+    if member_role is None:
+        return ''
+    if isinstance(member_role, int):
+        return ROLE_NAMES.get(member_role, '')
+    return str(member_role).lower()
 
 
 class ReportService:
-    def __init__(self, repo: Optional[ReportRepo] = None):
+    def __init__(self, repo: Optional[ReportRepo] = None, max_workers: Optional[int] = None):
         self.repo = repo or ReportRepo()
+        self.max_workers = max_workers or int(os.getenv("REPORT_MAX_WORKERS", DEFAULT_MAX_WORKERS))
 
     def generate_personal_report(self, user_id: int, start_date: str = None, end_date: str = None) -> Dict[str, Any]:
         """Generate personal report for staff showing their own stats
@@ -96,6 +116,8 @@ class ReportService:
 
             # Generate personal reports for all team members INCLUDING the manager
             member_reports = []
+            context = self.repo.report_context()
+            context.users.add([manager_info] + team_members)
             
             # First, add the manager's own report
             manager_tasks = self.repo.get_user_tasks(manager_user_id, start_date, end_date)
@@ -106,7 +128,7 @@ class ReportService:
             if manager_projects is None:
                 manager_projects = []
             
-            manager_report = self._generate_user_report_data(manager_info, manager_tasks, manager_projects)
+            manager_report = self._generate_user_report_data(manager_info, manager_tasks, manager_projects, context)
             member_reports.append(manager_report)
             
             # Then add other team members' reports
@@ -124,7 +146,7 @@ class ReportService:
                 if member_projects is None:
                     member_projects = []
                 
-                member_report = self._generate_user_report_data(member, member_tasks, member_projects)
+                member_report = self._generate_user_report_data(member, member_tasks, member_projects, context)
                 member_reports.append(member_report)
 
             # Create team report as compilation of personal reports
@@ -135,7 +157,7 @@ class ReportService:
             )
 
             # Calculate team aggregates
-            team_report = self._calculate_team_aggregates_detailed(team_report)
+            team_report = self._calculate_team_aggregates_detailed(team_report, context)
 
             result = {
                 "status": 200,
@@ -150,14 +172,23 @@ class ReportService:
         except Exception as e:
             return {"status": 500, "message": f"Error generating team report: {str(e)}"}
 
-    def generate_department_report(self, director_user_id: int, start_date: str = None, end_date: str = None) -> Dict[str, Any]:
+    def generate_department_report(self, director_user_id: int, start_date: str = None, end_date: str = None,
+                                   bulk: bool = False) -> Dict[str, Any]:
         """Generate department report for director showing department-wide performance and detailed workload analysis
         
         Args:
             director_user_id: ID of the director requesting the report
             start_date: Start date for filtering (YYYY-MM-DD format)
             end_date: End date for filtering (YYYY-MM-DD format)
+            bulk: Build the report from a ReportSnapshot of the director's department (see _generate_from_snapshot)
         """
+        if bulk:
+            director_info = self.repo.get_user_info(director_user_id)
+            if director_info and _role_of(director_info) == 'director' and director_info.get('dept_id'):
+                return self._generate_from_snapshot(
+                    'generate_department_report', director_user_id, start_date, end_date,
+                    load=lambda: ReportSnapshot.load_department(self.repo, director_info))
+            # Nothing to snapshot; the checks below report why
         try:
             # Get director information
             director_info = self.repo.get_user_info(director_user_id)
@@ -195,6 +226,8 @@ class ReportService:
 
             # Generate personal reports for all department members INCLUDING the director
             member_reports = []
+            context = self.repo.report_context()
+            context.users.add([director_info] + dept_members)
             
             # First, add the director's own report
             director_tasks = self.repo.get_user_tasks(director_user_id, start_date, end_date)
@@ -205,7 +238,7 @@ class ReportService:
             if director_projects is None:
                 director_projects = []
             
-            director_report = self._generate_user_report_data(director_info, director_tasks, director_projects)
+            director_report = self._generate_user_report_data(director_info, director_tasks, director_projects, context)
             
             # Add team information to director report
             director_report.team_id = director_info.get('team_id')
@@ -232,7 +265,7 @@ class ReportService:
                 if member_projects is None:
                     member_projects = []
                 
-                member_report = self._generate_user_report_data(member, member_tasks, member_projects)
+                member_report = self._generate_user_report_data(member, member_tasks, member_projects, context)
                 
                 # Add team information to member report for department view
                 member_report.team_id = member.get('team_id')
@@ -258,7 +291,7 @@ class ReportService:
             )
 
             # Calculate department aggregates
-            dept_report = self._calculate_team_aggregates_detailed(dept_report)
+            dept_report = self._calculate_team_aggregates_detailed(dept_report, context)
 
             result = {
                 "status": 200,
@@ -273,15 +306,28 @@ class ReportService:
         except Exception as e:
             return {"status": 500, "message": f"Error generating department report: {str(e)}"}
         
-    def generate_company_report(self, admin_user_id: int, start_date: str = None, end_date: str = None) -> Dict[str, Any]:
+    def generate_company_report(self, admin_user_id: int, start_date: str = None, end_date: str = None,
+                                bulk: bool = False) -> Dict[str, Any]:
         """Generate company-wide report showing all departments, teams, and members organized hierarchically
         
+        Department/team member lookups and then all member reports are fetched
+        concurrently (at most max_workers at a time); the report is assembled in
+        the same order as the departments, teams and members were listed. A member
+        whose report fails is left out and listed in metadata.failed_members.
+        metadata.timings_ms has the time spent in each stage.
+        
         Args:
             admin_user_id: ID of the admin/executive requesting the report
             start_date: Start date for filtering (YYYY-MM-DD format)
             end_date: End date for filtering (YYYY-MM-DD format)
+            bulk: Build the report from a ReportSnapshot of the organisation (see _generate_from_snapshot)
         """
+        if bulk:
+            return self._generate_from_snapshot('generate_company_report', admin_user_id, start_date, end_date)
         try:
+            started = time.perf_counter()
+            timings = {}
+
             # Get admin information
             admin_info = self.repo.get_user_info(admin_user_id)
             if not admin_info:
@@ -291,20 +337,67 @@ class ReportService:
             # For now, we'll allow any authenticated user to request company reports
             # You can add stricter role validation here if needed
 
-            # Get all departments
-            all_departments = self.repo.get_all_departments()
+            # Get all departments and teams
+            all_departments, all_teams = self._fan_out(lambda fetch: fetch(), [self.repo.get_all_departments,
+                                                                               self.repo.get_all_teams], isolate=False)
             if not all_departments:
                 print("Warning: No departments found in the system")
                 all_departments = []
-
-            # Get all teams
-            all_teams = self.repo.get_all_teams()
             if not all_teams:
                 print("Warning: No teams found in the system")
                 all_teams = []
 
+            # Members of every department and team
+            teams_by_dept = {}
+            for team in all_teams:
+                teams_by_dept.setdefault(team.get('dept_id'), []).append(team)
+            dept_teams = [teams_by_dept.get(department.get('id'), []) for department in all_departments]
+            lookups = [(self.repo.get_dept_members, department.get('id')) for department in all_departments]
+            lookups += [(self.repo.get_team_members, team.get('id')) for teams in dept_teams for team in teams]
+            lookup_results = iter([result or [] for result in
+                                   self._fan_out(lambda lookup: lookup[0](lookup[1]), lookups, isolate=False)])
+            dept_members = [next(lookup_results) for _ in all_departments]
+            team_members = [[next(lookup_results) for _ in teams] for teams in dept_teams]
+            timings['directory'] = time.perf_counter() - started
+
+            # Director of each department; manager and staff of each team
+            dept_roles = []
+            for department, members, teams, members_by_team in zip(all_departments, dept_members, dept_teams, team_members):
+                director_info = next((m for m in members if _role_of(m) == 'director'), None)
+                team_roles = []
+                for team, members in zip(teams, members_by_team):
+                    manager_info = None
+                    staff_members = []
+                    for member in members:
+                        role = _role_of(member)
+                        if role == 'manager':
+                            manager_info = member
+                        elif role == 'staff':
+                            staff_members.append(member)
+                    team_roles.append((team, manager_info, staff_members))
+                dept_roles.append((department, director_info, team_roles))
+
+            # Generate every member's personal report with full projects breakdown
+            stage_started = time.perf_counter()
+            report_members = []
+            for _, director_info, team_roles in dept_roles:
+                if director_info:
+                    report_members.append(director_info)
+                for _, manager_info, staff_members in team_roles:
+                    if manager_info:
+                        report_members.append(manager_info)
+                    report_members.extend(staff_members)
+            # One context for the whole report: each referenced user and project is fetched once
+            context = self.repo.report_context()
+            context.users.add(report_members)
+            member_results = iter(self._fan_out(
+                lambda member: self._generate_member_report(member, context, start_date, end_date), report_members))
+            timings['member_reports'] = time.perf_counter() - stage_started
+
             # Build company structure: departments -> teams -> members
+            stage_started = time.perf_counter()
             company_structure = []
+            failed_members = []
             company_totals = {
                 'total_departments': len(all_departments),
                 'total_teams': 0,
@@ -316,156 +409,54 @@ class ReportService:
                 'all_task_durations': []
             }
 
-            for department in all_departments:
+            def next_report(member: Dict[str, Any]) -> Optional[ReportData]:
+                report, error = next(member_results)
+                if error is not None:
+                    print(f"Warning: Skipping report for user {member.get('userid')}: {error}")
+                    failed_members.append({"userid": member.get('userid'), "error": str(error)})
+                    return None
+                company_totals['total_members'] += 1
+                company_totals['total_tasks'] += report.total_tasks or 0
+                company_totals['total_projects'] += report.total_projects or 0
+                company_totals['completed_tasks'] += report.completed_tasks or 0
+                company_totals['overdue_tasks'] += report.overdue_tasks or 0
+                if report.average_task_duration:
+                    company_totals['all_task_durations'].append(report.average_task_duration)
+                return report
+
+            for department, director_info, team_roles in dept_roles:
                 dept_id = department.get('id')
-                dept_name = department.get('name', f'Department {dept_id}')
-
-                # Get director for this department
-                dept_members = self.repo.get_dept_members(dept_id)
-                if dept_members is None:
-                    dept_members = []
-
-                # Find director
-                director_info = None
-                for member in dept_members:
-                    member_role = member.get('role')
-                    if member_role is None:
-                        role_str = ''
-                    elif isinstance(member_role, int):
-                        role_map = {1: 'staff', 2: 'manager', 3: 'director'}
-                        role_str = role_map.get(member_role, '')
-                    else:
-                        role_str = str(member_role).lower()
-                    
-                    if role_str == 'director':
-                        director_info = member
-                        break
-
-                # Generate director's personal report with full projects breakdown
-                director_report = None
-                if director_info:
-                    director_tasks = self.repo.get_user_tasks(director_info['userid'], start_date, end_date)
-                    director_projects = self.repo.get_user_projects(director_info['userid'], start_date, end_date)
-                    
-                    if director_tasks is None:
-                        director_tasks = []
-                    if director_projects is None:
-                        director_projects = []
-                    
-                    # Generate full report data including projects_breakdown
-                    director_report = self._generate_user_report_data(director_info, director_tasks, director_projects)
-                    
-                    # Update company totals with director's metrics
-                    company_totals['total_members'] += 1
-                    company_totals['total_tasks'] += director_report.total_tasks or 0
-                    company_totals['total_projects'] += director_report.total_projects or 0
-                    company_totals['completed_tasks'] += director_report.completed_tasks or 0
-                    company_totals['overdue_tasks'] += director_report.overdue_tasks or 0
-                    if director_report.average_task_duration:
-                        company_totals['all_task_durations'].append(director_report.average_task_duration)
-
-                # Get teams in this department
-                dept_teams = [team for team in all_teams if team.get('dept_id') == dept_id]
-                company_totals['total_teams'] += len(dept_teams)
+                director_report = next_report(director_info) if director_info else None
+                company_totals['total_teams'] += len(team_roles)
 
                 teams_data = []
-                for team in dept_teams:
+                for team, manager_info, staff_members in team_roles:
                     team_id = team.get('id')
-                    team_name = team.get('name', f'Team {team_id}')
-
-                    # Get team members
-                    team_members = self.repo.get_team_members(team_id)
-                    if team_members is None:
-                        team_members = []
-
-                    # Find manager and staff
-                    manager_info = None
-                    staff_members = []
-
-                    for member in team_members:
-                        member_role = member.get('role')
-                        if member_role is None:
-                            role_str = ''
-                        elif isinstance(member_role, int):
-                            role_map = {1: 'staff', 2: 'manager', 3: 'director'}
-                            role_str = role_map.get(member_role, '')
-                        else:
-                            role_str = str(member_role).lower()
-                        
-                        if role_str == 'manager':
-                            manager_info = member
-                        elif role_str == 'staff':
-                            staff_members.append(member)
-
-                    # Generate manager's personal report with full projects breakdown
-                    manager_report = None
-                    if manager_info:
-                        manager_tasks = self.repo.get_user_tasks(manager_info['userid'], start_date, end_date)
-                        manager_projects = self.repo.get_user_projects(manager_info['userid'], start_date, end_date)
-                        
-                        if manager_tasks is None:
-                            manager_tasks = []
-                        if manager_projects is None:
-                            manager_projects = []
-                        
-                        # Generate full report data including projects_breakdown
-                        manager_report = self._generate_user_report_data(manager_info, manager_tasks, manager_projects)
-                        
-                        # Update company totals
-                        company_totals['total_members'] += 1
-                        company_totals['total_tasks'] += manager_report.total_tasks or 0
-                        company_totals['total_projects'] += manager_report.total_projects or 0
-                        company_totals['completed_tasks'] += manager_report.completed_tasks or 0
-                        company_totals['overdue_tasks'] += manager_report.overdue_tasks or 0
-                        if manager_report.average_task_duration:
-                            company_totals['all_task_durations'].append(manager_report.average_task_duration)
-
-                    # Generate staff reports with full projects breakdown
-                    staff_reports = []
-                    for staff in staff_members:
-                        staff_tasks = self.repo.get_user_tasks(staff['userid'], start_date, end_date)
-                        staff_projects = self.repo.get_user_projects(staff['userid'], start_date, end_date)
-                        
-                        if staff_tasks is None:
-                            staff_tasks = []
-                        if staff_projects is None:
-                            staff_projects = []
-                        
-                        # Generate full report data including projects_breakdown
-                        staff_report = self._generate_user_report_data(staff, staff_tasks, staff_projects)
-                        staff_reports.append(staff_report)
-                        
-                        # Update company totals
-                        company_totals['total_members'] += 1
-                        company_totals['total_tasks'] += staff_report.total_tasks or 0
-                        company_totals['total_projects'] += staff_report.total_projects or 0
-                        company_totals['completed_tasks'] += staff_report.completed_tasks or 0
-                        company_totals['overdue_tasks'] += staff_report.overdue_tasks or 0
-                        if staff_report.average_task_duration:
-                            company_totals['all_task_durations'].append(staff_report.average_task_duration)
+                    manager_report = next_report(manager_info) if manager_info else None
+                    staff_reports = [report for report in (next_report(staff) for staff in staff_members) if report]
 
                     # Build team structure
-                    team_structure = {
+                    teams_data.append({
                         'team_id': team_id,
-                        'team_name': team_name,
+                        'team_name': team.get('name', f'Team {team_id}'),
                         'manager': manager_report.to_dict() if manager_report else None,
                         'staff': [staff.to_dict() for staff in staff_reports]
-                    }
-                    teams_data.append(team_structure)
+                    })
 
                 # Build department structure
-                dept_structure = {
+                company_structure.append({
                     'dept_id': dept_id,
-                    'dept_name': dept_name,
+                    'dept_name': department.get('name', f'Department {dept_id}'),
                     'director': director_report.to_dict() if director_report else None,
                     'teams': teams_data
-                }
-                company_structure.append(dept_structure)
+                })
 
             # Calculate company-wide metrics
             company_completion_percentage = (company_totals['completed_tasks'] / company_totals['total_tasks'] * 100) if company_totals['total_tasks'] > 0 else 0
             company_overdue_percentage = (company_totals['overdue_tasks'] / company_totals['total_tasks'] * 100) if company_totals['total_tasks'] > 0 else 0
             company_avg_duration = statistics.mean(company_totals['all_task_durations']) if company_totals['all_task_durations'] else None
+            timings['assemble'] = time.perf_counter() - stage_started
+            timings['total'] = time.perf_counter() - started
 
             result = {
                 "status": 200,
@@ -486,6 +477,13 @@ class ReportService:
                         },
                         "departments": company_structure
                     }
+                },
+                "metadata": {
+                    "max_workers": self.max_workers,
+                    "member_reports": len(report_members),
+                    "failed_members": failed_members,
+                    "report_context": context.stats(),
+                    "timings_ms": {stage: round(seconds * 1000, 1) for stage, seconds in timings.items()}
                 }
             }
 
@@ -494,9 +492,64 @@ class ReportService:
         except Exception as e:
             return {"status": 500, "message": f"Error generating company report: {str(e)}"}
 
+    def _generate_from_snapshot(self, report: str, user_id: int, start_date: str = None, end_date: str = None,
+                                load: Optional[Callable[[], ReportSnapshot]] = None) -> Dict[str, Any]:
+        """
+        Run the `report` generator against a ReportSnapshot loaded through this
+        service's repo (by `load`, the whole organisation by default): a few
+        paginated bulk reads instead of calls per member and project. The output is
+        the same; metadata.snapshot describes the load.
+        """
+        try:
+            snapshot = load() if load else ReportSnapshot.load(self.repo)
+        except Exception as e:
+            return {"status": 500, "message": f"Error loading report snapshot: {str(e)}"}
+        # Every lookup is now in memory, so worker threads would only contend for the GIL
+        result = getattr(ReportService(repo=snapshot, max_workers=1), report)(user_id, start_date, end_date)
+        if result.get("status") == 200:
+            result.setdefault("metadata", {})["snapshot"] = snapshot.stats()
+        return result
+
+    def _generate_member_report(self, member: Dict[str, Any], context: ReportContext, start_date: str = None,
+                                end_date: str = None) -> ReportData:
+        """Fetch one member's tasks and projects and build their personal report data"""
+        tasks = self.repo.get_user_tasks(member['userid'], start_date, end_date) or []
+        projects = self.repo.get_user_projects(member['userid'], start_date, end_date) or []
+        return self._generate_user_report_data(member, tasks, projects, context)
+
+    def _fan_out(self, fn: Callable[[Any], Any], items: List[Any], isolate: bool = True) -> List[Any]:
+        """
+        fn(item) for every item, at most max_workers at a time; results are in the order of `items`.
 
-    def _generate_user_report_data(self, user_info: Dict[str, Any], tasks: List[Dict[str, Any]], projects: List[Dict[str, Any]]) -> ReportData:
-        """Generate report data for a single user organized by projects"""
+        With `isolate`, each result is (result, None) or (None, exception) so one failing
+        item does not fail the others; otherwise the first failure is raised once all
+        items have finished.
+        """
+        def call(item):
+            try:
+                return fn(item), None
+            except Exception as e:
+                return None, e
+
+        if self.max_workers <= 1 or len(items) <= 1:
+            results = [call(item) for item in items]
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(items)), thread_name_prefix="report-fan-out") as pool:
+                results = list(pool.map(call, items))
+        if isolate:
+            return results
+        for _, error in results:
+            if error is not None:
+                raise error
+        return [result for result, _ in results]
+
+    def _generate_user_report_data(self, user_info: Dict[str, Any], tasks: List[Dict[str, Any]], projects: List[Dict[str, Any]],
+                                   context: Optional[ReportContext] = None) -> ReportData:
+        """Generate report data for a single user organized by projects
+        
+        Project tasks and owner/collaborator names come from `context`; pass the same
+        one for every member of a report so each project and user is fetched once per report.
+        """
         # Handle None values for safety
         if tasks is None:
             tasks = []
@@ -536,15 +589,26 @@ class ReportService:
         overdue_tasks = 0
         all_task_durations = []
 
-        for project in projects:
+        # Get all tasks for each project from the task service (once per report)
+        if context is None:
+            context = self.repo.report_context()
+        project_task_lists = [context.project_tasks(project.get('id')) for project in projects]
+
+        # Resolve every owner and collaborator referenced by those tasks in one batch
+        directory = context.users
+        referenced_users = []
+        for project_tasks in project_task_lists:
+            for task in project_tasks:
+                if not task.get('owner_name') and task.get('owner_id'):
+                    referenced_users.append(task['owner_id'])
+                if isinstance(task.get('collaborators'), list):
+                    referenced_users.extend(task['collaborators'])
+        directory.prefetch(referenced_users)
+
+        for project, project_tasks in zip(projects, project_task_lists):
             project_id = project.get('id')
             project_name = project.get('proj_name', 'Unknown Project')
             
-            # Get all tasks for this project from the task service
-            project_tasks = self.repo.get_project_tasks(project_id) if project_id else []
-            if project_tasks is None:
-                project_tasks = []
-            
             # Process each task in the project
             project_task_details = []
             project_completed_tasks = 0
@@ -561,9 +625,7 @@ class ReportService:
                 owner_id = task.get('owner_id')
                 owner_name = task.get('owner_name')
                 if not owner_name and owner_id:
-                    # Fetch owner info from user service
-                    owner_info = self.repo.get_user_info(owner_id)
-                    owner_name = owner_info.get('name', f'User {owner_id}') if owner_info else f'User {owner_id}'
+                    owner_name = directory.name(owner_id)
                 elif not owner_name:
                     owner_name = 'Unknown'
                 
@@ -572,12 +634,7 @@ class ReportService:
                 collaborator_names = []
                 if isinstance(collaborators, list):
                     for collab_id in collaborators:
-                        # Get collaborator info from user service
-                        collab_info = self.repo.get_user_info(collab_id)
-                        if collab_info:
-                            collaborator_names.append(collab_info.get('name', f'User {collab_id}'))
-                        else:
-                            collaborator_names.append(f'User {collab_id}')
+                        collaborator_names.append(directory.name(collab_id))
                 
                 # Parse dates for analysis
                 created_at = task.get('created_at')
@@ -782,10 +839,14 @@ class ReportService:
 
         return team_report
 
-    def _calculate_team_aggregates_detailed(self, team_report: TeamReportData) -> TeamReportData:
+    def _calculate_team_aggregates_detailed(self, team_report: TeamReportData,
+                                            context: Optional[ReportContext] = None) -> TeamReportData:
         """Calculate detailed aggregated statistics for team/department report including task details"""
         if not team_report.member_reports:
             return team_report
+        if context is None:
+            context = self.repo.report_context()
+        directory = context.users
 
         # Aggregate basic totals with error handling
         total_tasks = 0
@@ -847,10 +908,13 @@ class ReportService:
                 
                 # If we haven't seen this project yet, add it with full task details
                 if project_id not in all_projects_dict:
-                    # Get all tasks for this project from the repo (to avoid double-counting)
-                    project_tasks = self.repo.get_project_tasks(project_id) if project_id else []
-                    if project_tasks is None:
-                        project_tasks = []
+                    # Get all tasks for this project (to avoid double-counting); copied, since the
+                    # rows are shared through the context and get enriched below
+                    project_tasks = [dict(task) for task in context.project_tasks(project_id)]
+                    directory.prefetch([task.get('owner_id') for task in project_tasks] +
+                                       [collab_id for task in project_tasks
+                                        if isinstance(task.get('collaborators'), list)
+                                        for collab_id in task['collaborators']])
                     
                     # Build member involvement map for this project
                     member_involvement = {}  # {member_id: {'name': name, 'role': role, 'involved_tasks': [task_ids]}}
@@ -871,7 +935,7 @@ class ReportService:
                         
                         # Enrich task with owner name if not present
                         if owner_id and not task.get('owner_name'):
-                            owner_info = self.repo.get_user_info(owner_id)
+                            owner_info = directory.get(owner_id)
                             if owner_info:
                                 task['owner_name'] = owner_info.get('name', f'User {owner_id}')
                             else:
@@ -881,7 +945,7 @@ class ReportService:
                         collab_names = []
                         if isinstance(collaborators, list):
                             for collab_id in collaborators:
-                                collab_info = self.repo.get_user_info(collab_id)
+                                collab_info = directory.get(collab_id)
                                 if collab_info:
                                     collab_names.append(collab_info.get('name', f'User {collab_id}'))
                                 else:
@@ -906,7 +970,7 @@ class ReportService:
                         # Track owner
                         if owner_id:
                             if owner_id not in member_involvement:
-                                owner_info = self.repo.get_user_info(owner_id)
+                                owner_info = directory.get(owner_id)
                                 member_involvement[owner_id] = {
                                     'name': owner_info.get('name', f'User {owner_id}') if owner_info else f'User {owner_id}',
                                     'role': owner_info.get('role', 'Unknown') if owner_info else 'Unknown',
@@ -918,7 +982,7 @@ class ReportService:
                         if isinstance(collaborators, list):
                             for collab_id in collaborators:
                                 if collab_id not in member_involvement:
-                                    collab_info = self.repo.get_user_info(collab_id)
+                                    collab_info = directory.get(collab_id)
                                     member_involvement[collab_id] = {
                                         'name': collab_info.get('name', f'User {collab_id}') if collab_info else f'User {collab_id}',
                                         'role': collab_info.get('role', 'Unknown') if collab_info else 'Unknown',
@@ -1,17 +1,25 @@
 import unittest
 import json
+import requests
+import threading
+import time
 import sys
 import os
+from urllib.parse import urlsplit, parse_qs
 from datetime import datetime, UTC
 from unittest.mock import Mock, patch
 
 # Add parent directory to path to find modules
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# The backend directory, for the shared package
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
 from models.report import Report, ReportData, TeamReportData
 from services.report_service import ReportService
 from services.export_service import ExportService
-from repo.report_repo import ReportRepo
+from repo.report_repo import ReportRepo, ReportContext, UserDirectory
+from repo.report_snapshot import ReportSnapshot
+from shared.service_client import ServiceClient
 
 
 class TestReportModel(unittest.TestCase):
@@ -863,7 +871,7 @@ class TestReportServiceErrorPaths(unittest.TestCase):
     def setUp(self):
         """Set up test fixtures"""
         from unittest.mock import Mock
-        from repo.report_repo import ReportRepo
+        from repo.report_repo import ReportRepo, ReportContext, UserDirectory
         self.mock_repo = Mock(spec=ReportRepo)
         self.service = ReportService(repo=self.mock_repo)
     
@@ -1071,9 +1079,11 @@ class TestReportRepoCoverage(unittest.TestCase):
     
     def setUp(self):
         """Set up test fixtures"""
-        self.repo = ReportRepo()
+        # Fresh clients per test so failures do not carry over in the circuit breakers
+        self.repo = ReportRepo(clients={name: ServiceClient(name, "http://svc.test", retries=0)
+                                        for name in ("users", "tasks", "projects", "team", "dept")})
     
-    @patch('requests.get')
+    @patch('requests.Session.request')
     def test_get_user_info_error(self, mock_get):
         """Test get_user_info handles errors"""
         mock_get.side_effect = Exception("Connection error")
@@ -1082,7 +1092,7 @@ class TestReportRepoCoverage(unittest.TestCase):
         
         assert result is None
     
-    @patch('requests.get')
+    @patch('requests.Session.request')
     def test_get_user_tasks_error(self, mock_get):
         """Test get_user_tasks handles errors"""
         mock_get.side_effect = Exception("Connection error")
@@ -1091,7 +1101,7 @@ class TestReportRepoCoverage(unittest.TestCase):
         
         assert result == []
     
-    @patch('requests.get')
+    @patch('requests.Session.request')
     def test_get_user_projects_error(self, mock_get):
         """Test get_user_projects handles errors"""
         mock_get.side_effect = Exception("Connection error")
@@ -1100,7 +1110,7 @@ class TestReportRepoCoverage(unittest.TestCase):
         
         assert result == []
     
-    @patch('requests.get')
+    @patch('requests.Session.request')
     def test_get_project_tasks_error(self, mock_get):
         """Test get_project_tasks handles errors"""
         mock_get.side_effect = Exception("Connection error")
@@ -1109,7 +1119,7 @@ class TestReportRepoCoverage(unittest.TestCase):
         
         assert result == []
     
-    @patch('requests.get')
+    @patch('requests.Session.request')
     def test_get_project_info_error(self, mock_get):
         """Test get_project_info handles errors"""
         mock_get.side_effect = Exception("Connection error")
@@ -1118,7 +1128,7 @@ class TestReportRepoCoverage(unittest.TestCase):
         
         assert result is None
     
-    @patch('requests.get')
+    @patch('requests.Session.request')
     def test_get_team_members_error(self, mock_get):
         """Test get_team_members handles errors"""
         mock_get.side_effect = Exception("Connection error")
@@ -1127,7 +1137,7 @@ class TestReportRepoCoverage(unittest.TestCase):
         
         assert result == []
     
-    @patch('requests.get')
+    @patch('requests.Session.request')
     def test_get_dept_members_error(self, mock_get):
         """Test get_dept_members handles errors"""
         mock_get.side_effect = Exception("Connection error")
@@ -1136,7 +1146,7 @@ class TestReportRepoCoverage(unittest.TestCase):
         
         assert result == []
     
-    @patch('requests.get')
+    @patch('requests.Session.request')
     def test_get_team_info_error(self, mock_get):
         """Test get_team_info handles errors"""
         mock_get.side_effect = Exception("Connection error")
@@ -1145,7 +1155,7 @@ class TestReportRepoCoverage(unittest.TestCase):
         
         assert result is None
     
-    @patch('requests.get')
+    @patch('requests.Session.request')
     def test_get_dept_info_error(self, mock_get):
         """Test get_dept_info handles errors"""
         mock_get.side_effect = Exception("Connection error")
@@ -1154,7 +1164,7 @@ class TestReportRepoCoverage(unittest.TestCase):
         
         assert result is None
     
-    @patch('requests.get')
+    @patch('requests.Session.request')
     def test_get_tasks_by_team_success(self, mock_get):
         """Test get_tasks_by_team success path"""
         from unittest.mock import Mock
@@ -1167,7 +1177,7 @@ class TestReportRepoCoverage(unittest.TestCase):
         
         assert result == [{'id': 1, 'task_name': 'Task 1'}]
     
-    @patch('requests.get')
+    @patch('requests.Session.request')
     def test_get_tasks_by_team_error(self, mock_get):
         """Test get_tasks_by_team handles errors"""
         mock_get.side_effect = Exception("Connection error")
@@ -1176,7 +1186,7 @@ class TestReportRepoCoverage(unittest.TestCase):
         
         assert result == []
     
-    @patch('requests.get')
+    @patch('requests.Session.request')
     def test_get_tasks_by_department_success(self, mock_get):
         """Test get_tasks_by_department success path"""
         from unittest.mock import Mock
@@ -1189,7 +1199,7 @@ class TestReportRepoCoverage(unittest.TestCase):
         
         assert result == [{'id': 1, 'task_name': 'Task 1'}]
     
-    @patch('requests.get')
+    @patch('requests.Session.request')
     def test_get_tasks_by_department_error(self, mock_get):
         """Test get_tasks_by_department handles errors"""
         mock_get.side_effect = Exception("Connection error")
@@ -1198,6 +1208,498 @@ class TestReportRepoCoverage(unittest.TestCase):
         
         assert result == []
 
+    @patch('requests.Session.request')
+    def test_get_user_tasks_trusts_server_date_filter(self, mock_get):
+        """Test get_user_tasks skips local filtering when the service applied the range"""
+        mock_response = Mock()
+        mock_response.status_code = 200
+        # A row outside the range proves the local fallback did not run
+        mock_response.json.return_value = {
+            'data': [{'id': 1, 'created_at': '2023-01-01T00:00:00'}],
+            'date_filter': {'field': 'created_at', 'start_date': '2024-01-01', 'end_date': '2024-03-31'}
+        }
+        mock_get.return_value = mock_response
+
+        result = self.repo.get_user_tasks(101, '2024-01-01', '2024-03-31')
+
+        assert result == [{'id': 1, 'created_at': '2023-01-01T00:00:00'}]
+        assert mock_get.call_args.kwargs['params'] == {'start_date': '2024-01-01', 'end_date': '2024-03-31'}
+
+    @patch('requests.Session.request')
+    def test_get_user_projects_filters_locally_without_date_filter(self, mock_get):
+        """Test get_user_projects falls back to local filtering for services that ignore the range"""
+        mock_response = Mock()
+        mock_response.status_code = 200
+        mock_response.json.return_value = {'data': [
+            {'id': 1, 'created_at': '2023-01-01T00:00:00'},
+            {'id': 2, 'created_at': '2024-02-01T00:00:00'}
+        ]}
+        mock_get.return_value = mock_response
+
+        result = self.repo.get_user_projects(101, '2024-01-01', '2024-03-31')
+
+        assert [p['id'] for p in result] == [2]
+
+
+
+class FakeAdapter(requests.adapters.BaseAdapter):
+    """Transport adapter answering from a handler(request) instead of the network."""
+
+    def __init__(self, handler):
+        super().__init__()
+        self.handler = handler
+        self.calls = []
+
+    def send(self, request, **kwargs):
+        self.calls.append((request, kwargs))
+        result = self.handler(request)
+        if isinstance(result, Exception):
+            raise result
+        status, body = result
+        response = requests.Response()
+        response.status_code = status
+        response._content = json.dumps(body).encode()
+        response.request = request
+        response.url = request.url
+        return response
+
+    def close(self):
+        pass
+
+
+class TestReportRepoServiceClients(unittest.TestCase):
+    """ReportRepo reads other services through the shared ServiceClient."""
+
+    def make_client(self, handler):
+        self.adapter = FakeAdapter(handler)
+        session = requests.Session()
+        session.mount("http://", self.adapter)
+        return ServiceClient("tasks", "http://tasks.test", session=session, sleep=lambda seconds: None)
+
+    def test_report_repo_reads_through_service_clients(self):
+        users = self.make_client(lambda request: (200, {"data": {"userid": 5, "name": "Ann"}}))
+        repo = ReportRepo(clients={"users": users})
+        assert repo.get_user_info(5) == {"userid": 5, "name": "Ann"}
+        assert self.adapter.calls[0][0].url == "http://tasks.test/users/5"
+
+
+
+class FakeOrgRepo:
+    """ReportRepo stand-in for a small company; tracks how many calls run at once."""
+
+    def __init__(self, depts=2, teams_per_dept=2, staff_per_team=3, latency=0.002, fail_user=None):
+        self.latency = latency
+        self.fail_user = fail_user
+        self.lock = threading.Lock()
+        self.active = 0
+        self.peak = 0
+        self.departments = [{'id': d, 'name': f'Dept {d}'} for d in range(1, depts + 1)]
+        self.teams, self.users = [], []
+        userid = 100
+        for dept in self.departments:
+            self.users.append({'userid': userid, 'name': f'User {userid}', 'role': 3, 'dept_id': dept['id']})
+            userid += 1
+            for t in range(teams_per_dept):
+                team_id = dept['id'] * 10 + t
+                self.teams.append({'id': team_id, 'name': f'Team {team_id}', 'dept_id': dept['id']})
+                for role in ['manager'] + [1] * staff_per_team:
+                    self.users.append({'userid': userid, 'name': f'User {userid}', 'role': role,
+                                       'team_id': team_id, 'dept_id': dept['id']})
+                    userid += 1
+
+    def _call(self):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(self.latency)
+        with self.lock:
+            self.active -= 1
+
+    def get_user_info(self, user_id):
+        return {'userid': user_id, 'name': 'Admin'}
+
+    def get_users_by_ids(self, user_ids):
+        self._call()
+        return {u['userid']: u for u in self.users if u['userid'] in user_ids}
+
+    def user_directory(self):
+        return UserDirectory(self)
+
+    def report_context(self):
+        return ReportContext(self)
+
+    def get_all_departments(self):
+        self._call()
+        return list(self.departments)
+
+    def get_all_teams(self):
+        self._call()
+        return list(self.teams)
+
+    def get_dept_members(self, dept_id):
+        self._call()
+        return [u for u in self.users if u['dept_id'] == dept_id]
+
+    def get_team_members(self, team_id):
+        self._call()
+        return [u for u in self.users if u.get('team_id') == team_id]
+
+    def get_user_tasks(self, user_id, start_date=None, end_date=None):
+        self._call()
+        return [{'id': user_id * 10 + i, 'task_name': f'Task {i}', 'status': 'Completed' if i % 2 else 'Ongoing',
+                 'owner_id': user_id, 'project_id': None, 'created_at': '2025-01-01T00:00:00+00:00',
+                 'due_date': '2025-01-05'} for i in range(user_id % 4)]
+
+    def get_user_projects(self, user_id, start_date=None, end_date=None):
+        self._call()
+        if user_id == self.fail_user:
+            raise RuntimeError('projects service failed')
+        return []
+
+
+class TestCompanyReportFanOut(unittest.TestCase):
+    """Company report members are fetched concurrently, bounded, with the sequential result."""
+
+    def member_ids(self, result):
+        ids = []
+        for dept in result['data']['company_report']['departments']:
+            ids.append(dept['director'] and dept['director']['user_id'])
+            for team in dept['teams']:
+                ids.append(team['manager'] and team['manager']['user_id'])
+                ids.extend(staff['user_id'] for staff in team['staff'])
+        return ids
+
+    def test_concurrent_report_matches_sequential_order_and_totals(self):
+        sequential = ReportService(repo=FakeOrgRepo(), max_workers=1).generate_company_report(1)
+        repo = FakeOrgRepo()
+        concurrent = ReportService(repo=repo, max_workers=4).generate_company_report(1)
+        assert concurrent['status'] == 200
+        assert concurrent['data'] == sequential['data']
+        assert self.member_ids(concurrent) == [100, 101, 102, 103, 104, 105, 106, 107, 108,
+                                               109, 110, 111, 112, 113, 114, 115, 116, 117]
+        assert concurrent['data']['company_report']['company_metrics']['total_members'] == 18
+        assert 1 < repo.peak <= 4
+
+    def test_failed_member_is_skipped_and_reported(self):
+        result = ReportService(repo=FakeOrgRepo(fail_user=102), max_workers=4).generate_company_report(1)
+        assert result['status'] == 200
+        assert 102 not in self.member_ids(result) and 103 in self.member_ids(result)
+        assert result['data']['company_report']['company_metrics']['total_members'] == 17
+        assert result['metadata']['failed_members'] == [{'userid': 102, 'error': 'projects service failed'}]
+
+    def test_directory_failure_still_fails_report(self):
+        repo = FakeOrgRepo()
+        repo.get_all_teams = Mock(side_effect=Exception('teams service down'))
+        result = ReportService(repo=repo, max_workers=4).generate_company_report(1)
+        assert result['status'] == 500
+
+    def test_stage_timings_in_metadata(self):
+        metadata = ReportService(repo=FakeOrgRepo(), max_workers=4).generate_company_report(1)['metadata']
+        assert metadata['max_workers'] == 4 and metadata['member_reports'] == 18
+        assert set(metadata['timings_ms']) == {'directory', 'member_reports', 'assemble', 'total'}
+        assert metadata['timings_ms']['total'] >= metadata['timings_ms']['member_reports'] > 0
+
+
+
+class TestUserDirectory(unittest.TestCase):
+    """Users referenced by a report are fetched through /users/batch, once per report."""
+
+    def test_prefetch_batches_and_memoizes(self):
+        repo = FakeOrgRepo(latency=0)
+        repo.get_users_by_ids = Mock(wraps=repo.get_users_by_ids)
+        directory = UserDirectory(repo)
+        directory.add([{'userid': 100, 'name': 'Known'}])
+        directory.prefetch([100, 101, 102, 101, 999, None])
+        directory.prefetch([101, 102])
+        assert repo.get_users_by_ids.call_args_list == [((([101, 102, 999]),),)]
+        assert directory.name(100) == 'Known' and directory.name(101) == 'User 101'
+        assert directory.get(999) is None and directory.name(999) == 'User 999'
+        assert directory.stats() == {'users': 4, 'batch_calls': 1}
+
+    def test_concurrent_prefetch_fetches_each_user_once(self):
+        repo = FakeOrgRepo(latency=0.02)
+        repo.get_users_by_ids = Mock(wraps=repo.get_users_by_ids)
+        directory = UserDirectory(repo)
+        threads = [threading.Thread(target=directory.prefetch, args=([101, 102, 103],)) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert repo.get_users_by_ids.call_count == 1
+        assert [directory.name(user_id) for user_id in (101, 102, 103)] == ['User 101', 'User 102', 'User 103']
+
+    def test_team_report_resolves_task_users_in_one_batch(self):
+        repo = FakeOrgRepo(latency=0)
+        repo.get_users_by_ids = Mock(wraps=repo.get_users_by_ids)
+        repo.get_user_info = Mock(side_effect=lambda user_id: {'userid': 101, 'name': 'Manager', 'role': 2, 'team_id': 10})
+        repo.get_team_info = Mock(return_value={'id': 10, 'name': 'Team 10'})
+        repo.get_team_members = Mock(return_value=[u for u in repo.users if u.get('team_id') == 10])
+        repo.get_user_projects = Mock(return_value=[{'id': 7, 'proj_name': 'Shared'}])
+        repo.get_project_tasks = Mock(return_value=[
+            {'id': i, 'task_name': f'Task {i}', 'status': 'Ongoing', 'owner_id': 105 + i % 3,
+             'collaborators': [102, 106 + i % 2]} for i in range(30)])
+        result = ReportService(repo=repo).generate_team_report(101)
+        assert result['status'] == 200
+        # Owners/collaborators outside the team (105..107) in one call; team members were already known
+        assert repo.get_users_by_ids.call_args_list == [(([105, 106, 107],),)]
+        assert repo.get_user_info.call_count == 1
+        task = result['data']['team_report']['member_reports'][0]['task_details'][0]
+        assert task['owner_name'] == 'User 105' and task['collaborators'] == ['User 102', 'User 106']
+
+    def test_repo_fetches_users_from_batch_endpoint(self):
+        adapter = FakeAdapter(lambda request: (200, {'status': 200, 'data': [
+            {'userid': 1, 'name': 'Ann'}, {'userid': 3, 'name': 'Cat'}], 'missing': [2]}))
+        session = requests.Session()
+        session.mount("http://", adapter)
+        repo = ReportRepo(clients={'users': ServiceClient('users', 'http://users.test', session=session)})
+        assert repo.get_users_by_ids([1, 2, 3]) == {1: {'userid': 1, 'name': 'Ann'}, 3: {'userid': 3, 'name': 'Cat'}}
+        assert adapter.calls[0][0].url == 'http://users.test/users/batch?ids=1%2C2%2C3'
+
+
+class TestReportContext(unittest.TestCase):
+    """Each project's tasks are fetched once per report and shared by all members."""
+
+    def make_repo(self, latency=0):
+        repo = FakeOrgRepo(latency=latency)
+        repo.get_user_projects = Mock(side_effect=lambda user_id, *args: [
+            {'id': 1, 'proj_name': 'Company'}, {'id': user_id % 3 + 2, 'proj_name': 'Shared'}])
+
+        def get_project_tasks(project_id):
+            repo._call()
+            return [{'id': project_id * 100 + i, 'task_name': f'Task {i}', 'status': 'Ongoing',
+                     'owner_id': 100 + i, 'collaborators': [101]} for i in range(5)]
+        repo.get_project_tasks = Mock(side_effect=get_project_tasks)
+        self.contexts = []
+        repo.report_context = lambda: self.contexts.append(ReportContext(repo)) or self.contexts[-1]
+        return repo
+
+    def test_team_report_fetches_each_project_once(self):
+        repo = self.make_repo()
+        repo.get_user_info = Mock(return_value={'userid': 101, 'name': 'Manager', 'role': 2, 'team_id': 10})
+        repo.get_team_info = Mock(return_value={'id': 10, 'name': 'Team 10'})
+        result = ReportService(repo=repo).generate_team_report(101)
+        assert result['status'] == 200
+        assert sorted(call.args[0] for call in repo.get_project_tasks.call_args_list) == [1, 2, 3, 4]
+        assert self.contexts[0].fetch_counts == {1: 1, 2: 1, 3: 1, 4: 1}
+        # Aggregation enriches copies; the shared rows stay as fetched
+        assert 'owner_name' not in self.contexts[0].project_tasks(1)[0]
+        assert repo.get_project_tasks.call_count == 4
+
+    def test_concurrent_company_report_fetches_each_project_once(self):
+        repo = self.make_repo(latency=0.002)
+        result = ReportService(repo=repo, max_workers=8).generate_company_report(1)
+        assert result['status'] == 200
+        assert repo.get_project_tasks.call_count == 4
+        assert set(self.contexts[0].fetch_counts.values()) == {1}
+        assert result['metadata']['report_context'] == {
+            'user_directory': {'users': 18, 'batch_calls': 0}, 'projects': 4, 'project_fetches': 4}
+
+    def test_failed_fetch_is_retried_by_next_member(self):
+        repo = self.make_repo()
+        repo.get_project_tasks = Mock(side_effect=[RuntimeError('tasks service down'), [{'id': 1}]])
+        context = ReportContext(repo)
+        with self.assertRaises(RuntimeError):
+            context.project_tasks(1)
+        assert context.project_tasks(1) == [{'id': 1}] and context.project_tasks(1) == [{'id': 1}]
+        assert context.fetch_counts == {1: 2} and context.project_tasks(None) == []
+
+
+class FakeOrgServices:
+    """
+    The users, tasks, projects, team and dept endpoints ReportRepo calls, answered
+    from one in-memory organisation; route(request) is a FakeAdapter handler.
+    """
+
+    def __init__(self):
+        self.departments = [{'id': d, 'name': f'Dept {d}'} for d in (1, 2)]
+        self.teams, self.users = [], []
+        userid = 1
+        for dept in self.departments:
+            self.users.append({'userid': userid, 'name': f'Director {userid}', 'role': 3, 'dept_id': dept['id'], 'team_id': None})
+            userid += 1
+            for t in (1, 2):
+                team = {'id': dept['id'] * 10 + t, 'name': f'Team {dept["id"]}{t}', 'dept_id': dept['id']}
+                self.teams.append(team)
+                for role in (2, 1, 1):
+                    self.users.append({'userid': userid, 'name': f'User {userid}', 'role': role,
+                                       'dept_id': dept['id'], 'team_id': team['id']})
+                    userid += 1
+        # Projects span departments and months, so owner/collaborator and date filters matter
+        self.projects = [{'id': p, 'proj_name': f'Project {p}', 'owner_id': p * 2 % userid,
+                          'collaborators': [(p * 3 + k) % userid for k in range(3)],
+                          'created_at': f'2025-0{p % 4 + 1}-10T08:00:00+00:00'} for p in range(1, 7)]
+        self.tasks = []
+        for i in range(1, 61):
+            task = {'id': i, 'task_name': f'Task {i}', 'project_id': i % 7 or None, 'owner_id': i % userid or 1,
+                    'collaborators': [(i * 5) % userid, (i * 7) % userid], 'type': 'parent', 'parent_task': None,
+                    'status': ('Completed', 'Ongoing', 'Under Review', 'Unassigned')[i % 4], 'priority': i % 10,
+                    'description': f'Task {i}', 'created_at': f'2025-0{i % 4 + 1}-{i % 27 + 1:02d}T00:00:00+00:00',
+                    'due_date': f'2025-0{i % 4 + 2}-15T00:00:00+00:00', 'completed_at': None, 'subtasks': None}
+            if task['status'] == 'Completed':
+                task['completed_at'] = f'2025-0{i % 4 + 2}-0{i % 9 + 1}T00:00:00+00:00'
+            if i > 45:
+                task.update(type='subtask', parent_task=i - 40)
+            if i == 44:
+                # Untyped legacy row: the tasks service's in_("type", ["parent", None]) never
+                # matches a NULL type, so it is nobody's parent task, only a project task
+                task['type'] = None
+            self.tasks.append(task)
+        self.tasks.sort(key=lambda t: (t['created_at'], t['id']))
+        self.requests = []
+
+    @staticmethod
+    def _in_range(row, args):
+        day = row['created_at'][:10]
+        return args.get('start_date', day) <= day <= args.get('end_date', day)
+
+    def _page(self, rows, args, key):
+        offset = int(args.get('cursor', args.get('after_id', 0)))
+        limit = int(args['limit'])
+        page = rows[offset:offset + limit]
+        more = offset + limit < len(rows)
+        if key == 'next_cursor':
+            return {'data': page, 'pagination': {'limit': limit, 'next_cursor': str(offset + limit) if more else None}}
+        return {'data': page, 'pagination': {'limit': limit, 'next_after_id': offset + limit if more else None}}
+
+    @staticmethod
+    def _filtered(rows, args):
+        """Rows matching the user_ids / project_ids filters of the bulk reads, if any"""
+        if 'user_ids' not in args and 'project_ids' not in args:
+            return rows
+        user_ids = {int(i) for i in args.get('user_ids', '').split(',') if i}
+        project_ids = {int(i) for i in args.get('project_ids', '').split(',') if i}
+        return [r for r in rows if r['owner_id'] in user_ids or user_ids & set(r['collaborators'] or [])
+                or r.get('project_id') in project_ids]
+
+    def _people(self, rows, user_id, args):
+        owned = [r for r in rows if r['owner_id'] == user_id]
+        collab = [r for r in rows if user_id in (r['collaborators'] or [])]
+        return list({r['id']: r for r in owned + collab if self._in_range(r, args)}.values())
+
+    def route(self, request):
+        url = urlsplit(request.url)
+        args = {k: v[0] for k, v in parse_qs(url.query).items()}
+        path = url.path.strip('/').split('/')
+        self.requests.append(url.path)
+        date_filter = {'date_filter': {'field': 'created_at', 'start_date': args.get('start_date'),
+                                       'end_date': args.get('end_date')}} if 'start_date' in args or 'end_date' in args else {}
+        users = {u['userid']: u for u in self.users}
+        if path[0] == 'users':
+            if path[1] == 'all':
+                return 200, {'data': self.users}
+            if path[1] == 'batch':
+                ids = [int(i) for i in args['ids'].split(',')]
+                return 200, {'data': [users[i] for i in ids if i in users]}
+            if path[1] == 'department':
+                return 200, {'data': [u for u in self.users if u['dept_id'] == int(path[2])]}
+            if path[1] == 'team':
+                return 200, {'data': [u for u in self.users if u['team_id'] == int(path[2])]}
+            return (200, {'data': users[int(path[1])]}) if int(path[1]) in users else (404, {})
+        if path[0] == 'tasks':
+            if len(path) == 1:
+                return 200, self._page(self._filtered(self.tasks, args), args, 'next_cursor')
+            if path[1] == 'project':
+                return 200, {'data': [t for t in self.tasks if t['project_id'] == int(path[2])]}
+            parents = [t for t in self.tasks if t['type'] == 'parent']
+            return 200, {'data': self._people(parents, int(path[2]), args), **date_filter}
+        if path[0] == 'projects':
+            if len(path) == 1:
+                return 200, self._page(self._filtered(sorted(self.projects, key=lambda p: p['id']), args),
+                                       args, 'next_after_id')
+            return 200, {'data': self._people(self.projects, int(path[2]), args), **date_filter}
+        if path[0] == 'teams':
+            teams = {t['id']: t for t in self.teams}
+            return 200, {'data': teams[int(path[1])] if len(path) > 1 else self.teams}
+        if path[0] == 'departments':
+            depts = {d['id']: d for d in self.departments}
+            return 200, {'data': depts[int(path[1])] if len(path) > 1 else self.departments}
+        return 404, {}
+
+    def repo(self):
+        adapter = FakeAdapter(self.route)
+        session = requests.Session()
+        session.mount("http://", adapter)
+        return ReportRepo(clients={name: ServiceClient(name, f'http://{name}.test', session=session)
+                                   for name in ('users', 'tasks', 'projects', 'team', 'dept')})
+
+
+class TestReportSnapshot(unittest.TestCase):
+    """Bulk snapshot reports match the per-member reports built from the same services."""
+
+    def setUp(self):
+        self.services = FakeOrgServices()
+
+    def generate(self, report, user_id, bulk, **dates):
+        self.services.requests = []
+        service = ReportService(repo=self.services.repo(), max_workers=4)
+        result = getattr(service, report)(user_id, bulk=bulk, **dates)
+        assert result['status'] == 200, result
+        return result
+
+    def test_company_report_parity(self):
+        for dates in ({}, {'start_date': '2025-02-01', 'end_date': '2025-03-31'}):
+            per_member = self.generate('generate_company_report', 1, False, **dates)
+            per_member_requests = len(self.services.requests)
+            bulk = self.generate('generate_company_report', 1, True, **dates)
+            assert bulk['data'] == per_member['data']
+            assert bulk['data']['company_report']['company_metrics']['total_members'] == 14
+            # users/all, departments, teams, 1 project page, 1 task page, plus the admin lookup
+            assert len(self.services.requests) == 5 < per_member_requests
+            assert bulk['metadata']['snapshot']['tasks'] == 60 and bulk['metadata']['snapshot']['bulk_reads'] == 5
+
+    def test_department_report_parity(self):
+        for director in (1, 8):
+            for dates in ({}, {'start_date': '2025-02-01', 'end_date': '2025-03-31'}):
+                per_member = self.generate('generate_department_report', director, False, **dates)
+                bulk = self.generate('generate_department_report', director, True, **dates)
+                assert bulk['data'] == per_member['data']
+                assert bulk['data']['department_report']['total_team_tasks'] > 0
+
+    def test_department_snapshot_reads_only_the_department(self):
+        director = self.services.users[0]
+        members = {u['userid'] for u in self.services.users if u['dept_id'] == director['dept_id']}
+        projects = [p for p in self.services.projects
+                    if p['owner_id'] in members or members & set(p['collaborators'])]
+        project_ids = {p['id'] for p in projects}
+        tasks = [t for t in self.services.tasks
+                 if t['owner_id'] in members or members & set(t['collaborators']) or t['project_id'] in project_ids]
+        assert len(tasks) < len(self.services.tasks)
+
+        self.services.requests = []
+        snapshot = ReportSnapshot.load_department(self.services.repo(), director, page_size=7)
+        assert '/users/all' not in self.services.requests and '/departments' not in self.services.requests
+        assert [p['id'] for p in snapshot.projects] == sorted(project_ids)
+        assert [t['id'] for t in snapshot.tasks] == [t['id'] for t in tasks]
+        assert [u['userid'] for u in snapshot.get_dept_members(1)] == sorted(members)
+        # People outside the department are known by name but not listed as members
+        outsiders = {r['owner_id'] for r in projects + tasks} | {c for r in projects + tasks for c in r['collaborators']}
+        assert outsiders - members and all(snapshot.get_user_info(u) for u in outsiders - members if u)
+        assert snapshot.get_dept_members(2) == []
+        assert snapshot.bulk_reads == len(self.services.requests)
+
+    def test_department_report_without_department_skips_snapshot(self):
+        self.services.users[0]['dept_id'] = None
+        result = ReportService(repo=self.services.repo()).generate_department_report(1, bulk=True)
+        assert result['status'] == 400 and 'snapshot' not in result.get('metadata', {})
+
+    def test_snapshot_pages_through_bulk_reads(self):
+        snapshot = ReportSnapshot.load(self.services.repo(), page_size=7)
+        assert sorted(t['id'] for t in snapshot.tasks) == list(range(1, 61))
+        assert [p['id'] for p in snapshot.projects] == [1, 2, 3, 4, 5, 6]
+        # 3 + ceil(6 / 7) project pages + ceil(60 / 7) task pages
+        assert snapshot.bulk_reads == 3 + 1 + 9
+        assert [u['userid'] for u in snapshot.get_team_members(11)] == [2, 3, 4]
+        assert snapshot.get_project_tasks(3) == [t for t in self.services.tasks if t['project_id'] == 3]
+        # The untyped task 44 is left out of its owner's tasks, as the tasks service leaves it out
+        owner = next(t['owner_id'] for t in self.services.tasks if t['id'] == 44)
+        assert snapshot.get_user_tasks(owner) == self.services.repo().get_user_tasks(owner)
+        assert 44 not in [t['id'] for t in snapshot.get_user_tasks(owner)]
+
+    def test_failed_bulk_read_fails_report(self):
+        route = self.services.route
+        self.services.route = lambda request: (500, {}) if '/projects' in request.url else route(request)
+        result = ReportService(repo=self.services.repo()).generate_company_report(1, bulk=True)
+        assert result['status'] == 500 and 'snapshot' in result['message']
 
 if __name__ == '__main__': # pragma: no cover
     unittest.main() # pragma: no cover
@@ -0,0 +1 @@
+# Modules shared by every service; services put the backend directory on sys.path to import them
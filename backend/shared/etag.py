@@ -0,0 +1,50 @@
+import hashlib
+import json
+from typing import Any, Optional
+from flask import current_app, request
+
+
+def version_etag(*parts: Any) -> str:
+    """
+    Strong ETag from the version data of a view: the (id, updated_at) of its rows
+    and the request arguments that shape it. Much cheaper to fetch than the rows
+    themselves, so an unchanged view can be answered with not_modified() before
+    the full rows are read, hydrated and serialized.
+    """
+    body = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.blake2b(body.encode(), digest_size=16).hexdigest()
+
+
+def _revalidate(response):
+    # Clients may keep the body but must revalidate before reusing it
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+
+def not_modified(etag: str):
+    """A 304 Not Modified response if the request's If-None-Match holds `etag`, else None."""
+    if etag not in request.if_none_match:
+        return None
+    response = current_app.response_class(status=304)
+    response.set_etag(etag)
+    return _revalidate(response)
+
+
+def etag_json_response(payload: Any, status: int = 200, etag: Optional[str] = None):
+    """
+    Build a JSON response with a strong ETag, answering 304 Not Modified when the
+    request's If-None-Match already holds that ETag.
+
+    Pass the `etag` computed with version_etag() for views backed by rows with
+    updated_at; otherwise the ETag is a digest of the serialized body (fine for
+    small bodies such as a count, which are their own version). The payload is
+    serialized once and the same bytes are hashed and sent. Only 200 responses
+    get an ETag.
+    """
+    body = current_app.json.dumps(payload)
+    response = current_app.response_class(f"{body}\n", status=status, mimetype=current_app.json.mimetype)
+    if status != 200:
+        return response
+
+    response.set_etag(etag or hashlib.blake2b(body.encode(), digest_size=16).hexdigest())
+    return _revalidate(response).make_conditional(request)
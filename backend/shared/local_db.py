@@ -0,0 +1,1044 @@
+import bisect
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from postgrest.exceptions import APIError
+
+# Columns the production queries filter on, indexed by both local backends
+INDEXED_COLUMNS = {
+    "task": ["owner_id", "parent_task", "project_id", "due_date", "status", "type", "task_name", "created_at"],
+    "project": ["owner_id"],
+    "user": ["team_id", "dept_id", "email"],
+    "notification": ["userid", "is_read", "created_at"],
+    "comment": ["task_id", "created_at"],
+    "team": ["dept_id", "name"],
+    "dept": ["name"],
+}
+# JSON array columns queried with `cs` (contains), indexed by element
+ARRAY_INDEXED_COLUMNS = {
+    "task": ["collaborators"],
+    "project": ["collaborators"],
+}
+# Columns the in-memory backend also keeps sorted, for range filters
+RANGE_COLUMNS = {
+    "task": ["due_date", "created_at"],
+}
+# Primary key column, where it is not "id"
+PRIMARY_KEYS = {"user": "userid"}
+# Columns with a unique constraint; like Postgres, any number of rows may be NULL
+UNIQUE_COLUMNS = {
+    "task": ["recurrence_key"],
+}
+# Tables whose updated_at a trigger sets on every update
+VERSIONED_TABLES = ("task", "project")
+
+_IDENT_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+_COMPARE_OPS = ("eq", "neq", "gt", "gte", "lt", "lte")
+
+
+def _ident(name: str) -> str:
+    if not _IDENT_RE.match(name):
+        raise ValueError(f"Invalid column or table name: {name!r}")
+    return name
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+# ---- filter expressions ------------------------------------------------------
+# Filters are kept as tuples so each backend can plan them its own way:
+#   ("cmp", col, op, value)   op in eq/neq/gt/gte/lt/lte
+#   ("in", col, [values])     like SQL IN, never matches NULL
+#   ("is", col, None|bool)
+#   ("cs", col, [values])     JSON array column contains every value
+#   ("like", col, pattern, case_insensitive)
+#   ("and"|"or", [clauses])
+
+def _split_top_level(expr: str) -> List[str]:
+    """Split a PostgREST logical expression on commas outside brackets and quotes."""
+    parts, depth, current, quoted = [], 0, "", False
+    for ch in expr:
+        if ch == '"':
+            quoted = not quoted
+        elif not quoted and ch in "([{":
+            depth += 1
+        elif not quoted and ch in ")]}":
+            depth -= 1
+        if ch == "," and depth == 0 and not quoted:
+            parts.append(current)
+            current = ""
+        else:
+            current += ch
+    if current:
+        parts.append(current)
+    return parts
+
+
+def _literal(raw: str) -> Any:
+    """A PostgREST filter literal as a Python value."""
+    raw = raw.strip()
+    if len(raw) >= 2 and raw[0] == raw[-1] == '"':
+        return raw[1:-1]
+    if raw == "null":
+        return None
+    if raw in ("true", "false"):
+        return raw == "true"
+    for cast in (int, float):
+        try:
+            return cast(raw)
+        except ValueError:
+            pass
+    return raw
+
+
+def _array_literal(raw: Any) -> List[Any]:
+    if isinstance(raw, (list, tuple, set)):
+        return list(raw)
+    raw = str(raw).strip()
+    if raw.startswith("["):
+        return list(json.loads(raw))
+    if raw.startswith("{") and raw.endswith("}"):
+        return [_literal(v) for v in _split_top_level(raw[1:-1])]
+    return [_literal(raw)]
+
+
+def parse_logical(expr: str) -> Tuple[str, List[tuple]]:
+    """Parse "or(a.eq.1,b.cs.[2])"-style text (without the leading key) into a clause."""
+    return ("or", [_parse_clause(p) for p in _split_top_level(expr)])
+
+
+def _parse_clause(part: str) -> tuple:
+    part = part.strip()
+    for logic in ("and", "or"):
+        if part.startswith(f"{logic}(") and part.endswith(")"):
+            return (logic, [_parse_clause(p) for p in _split_top_level(part[len(logic) + 1:-1])])
+    col, op, value = part.split(".", 2)
+    if op in _COMPARE_OPS:
+        return ("cmp", col, op, _literal(value))
+    if op == "in":
+        return ("in", col, [_literal(v) for v in _split_top_level(value.strip()[1:-1])])
+    if op == "is":
+        return ("is", col, _literal(value))
+    if op == "cs":
+        return ("cs", col, _array_literal(value))
+    if op in ("like", "ilike"):
+        return ("like", col, value.replace("*", "%"), op == "ilike")
+    raise NotImplementedError(f"Filter operator {op!r} is not supported by the local backend")
+
+
+def _like_regex(pattern: str, case_insensitive: bool):
+    body = "".join(".*" if ch == "%" else "." if ch == "_" else re.escape(ch) for ch in pattern)
+    return re.compile(f"^{body}$", re.IGNORECASE | re.DOTALL if case_insensitive else re.DOTALL)
+
+
+def _matches(row: Dict[str, Any], clause: tuple) -> bool:
+    """Evaluate a clause against a row with SQL semantics (NULL never compares true)."""
+    kind = clause[0]
+    if kind == "and":
+        return all(_matches(row, c) for c in clause[1])
+    if kind == "or":
+        return any(_matches(row, c) for c in clause[1])
+    cell = row.get(clause[1])
+    if kind == "cmp":
+        op, value = clause[2], clause[3]
+        if cell is None or value is None:
+            return False
+        try:
+            if op == "eq":
+                return cell == value
+            if op == "neq":
+                return cell != value
+            if op == "gt":
+                return cell > value
+            if op == "gte":
+                return cell >= value
+            if op == "lt":
+                return cell < value
+            return cell <= value
+        except TypeError:
+            return False
+    if kind == "in":
+        return cell is not None and cell in clause[2]
+    if kind == "is":
+        return cell is None if clause[2] is None else cell == clause[2]
+    if kind == "cs":
+        return isinstance(cell, list) and all(v in cell for v in clause[2])
+    if kind == "like":
+        return isinstance(cell, str) and _like_regex(clause[2], clause[3]).match(cell) is not None
+    raise NotImplementedError(kind)
+
+
+def _sort_rows(rows: List[Dict[str, Any]], order_by: List[Tuple[str, bool]]) -> List[Dict[str, Any]]:
+    """Postgres ordering: NULLs last ascending, first descending."""
+    for col, desc in reversed(order_by):
+        present = [r for r in rows if r.get(col) is not None]
+        missing = [r for r in rows if r.get(col) is None]
+        present.sort(key=lambda r: r[col], reverse=desc)
+        rows = missing + present if desc else present + missing
+    return rows
+
+
+# ---- query builder -----------------------------------------------------------
+class _Params:
+    """The slice of httpx QueryParams that PageRequest uses to add raw and/or filters."""
+
+    def __init__(self, query: "LocalQuery"):
+        self.query = query
+
+    def add(self, key: str, value: str) -> "_Params":
+        if key not in ("and", "or"):
+            raise NotImplementedError(f"Query parameter {key!r} is not supported by the local backend")
+        inner = value.strip()
+        if inner.startswith("(") and inner.endswith(")"):
+            inner = inner[1:-1]
+        clauses = [_parse_clause(p) for p in _split_top_level(inner)]
+        self.query.clauses.append((key, clauses))
+        return self
+
+
+class LocalQuery:
+    """Records a postgrest-py style query for a local backend to run."""
+
+    def __init__(self, client: "_LocalClient", table: str):
+        self.client = client
+        self.table = _ident(table)
+        self.params = _Params(self)
+        self.clauses: List[tuple] = []
+        self.columns = "*"
+        self.count: Optional[str] = None
+        self.action = "select"
+        self.payload: Any = None
+        self.order_by: List[Tuple[str, bool]] = []
+        self.limit_n: Optional[int] = None
+        self.single_row = False
+
+    def select(self, columns: str = "*", count: Optional[str] = None, **kwargs) -> "LocalQuery":
+        self.columns, self.count = columns, count
+        return self
+
+    def insert(self, data, **kwargs) -> "LocalQuery":
+        self.action, self.payload = "insert", data
+        return self
+
+    def update(self, patch: Dict[str, Any], **kwargs) -> "LocalQuery":
+        self.action, self.payload = "update", patch
+        return self
+
+    def delete(self, **kwargs) -> "LocalQuery":
+        self.action = "delete"
+        return self
+
+    def _cmp(self, op: str, col: str, value: Any) -> "LocalQuery":
+        self.clauses.append(("cmp", _ident(col), op, value))
+        return self
+
+    def eq(self, col, value):
+        return self._cmp("eq", col, value)
+
+    def neq(self, col, value):
+        return self._cmp("neq", col, value)
+
+    def gt(self, col, value):
+        return self._cmp("gt", col, value)
+
+    def gte(self, col, value):
+        return self._cmp("gte", col, value)
+
+    def lt(self, col, value):
+        return self._cmp("lt", col, value)
+
+    def lte(self, col, value):
+        return self._cmp("lte", col, value)
+
+    def is_(self, col, value):
+        value = None if value in (None, "null") else value
+        self.clauses.append(("is", _ident(col), value))
+        return self
+
+    def in_(self, col, values):
+        self.clauses.append(("in", _ident(col), list(values)))
+        return self
+
+    def contains(self, col, values):
+        self.clauses.append(("cs", _ident(col), _array_literal(values)))
+        return self
+
+    def like(self, col, pattern):
+        self.clauses.append(("like", _ident(col), pattern, False))
+        return self
+
+    def ilike(self, col, pattern):
+        self.clauses.append(("like", _ident(col), pattern, True))
+        return self
+
+    def filter(self, col, op, value):
+        if op in _COMPARE_OPS:
+            return self._cmp(op, col, value)
+        if op == "cs":
+            return self.contains(col, value)
+        if op == "in":
+            return self.in_(col, value if isinstance(value, (list, tuple)) else [_literal(v) for v in str(value).strip("()").split(",")])
+        raise NotImplementedError(f"Filter operator {op!r} is not supported by the local backend")
+
+    def or_(self, expr: str, **kwargs):
+        self.clauses.append(parse_logical(expr))
+        return self
+
+    def order(self, col, desc=False, **kwargs):
+        self.order_by.append((_ident(col), desc))
+        return self
+
+    def limit(self, n, **kwargs):
+        self.limit_n = int(n)
+        return self
+
+    def single(self):
+        self.single_row = True
+        return self
+
+    def execute(self):
+        return self.client._execute(self)
+
+
+class LocalRPC:
+    def __init__(self, client: "_LocalClient", name: str, params: Dict[str, Any]):
+        self.client, self.name, self.params = client, name, params
+
+    def execute(self):
+        self.client._round_trip(f"rpc:{self.name}")
+        return SimpleNamespace(data=self.client._rpc(self.name, self.params), count=None)
+
+
+def _parse_columns(columns: str) -> Tuple[bool, List[str], List[Tuple[str, str, List[str]]]]:
+    """Split a select list into (star, plain columns, [(alias, fk column, embedded columns)])."""
+    star, plain, embeds = False, [], []
+    for part in _split_top_level(columns or "*"):
+        part = part.strip()
+        if part == "*":
+            star = True
+        elif "(" in part:
+            head, inner = part.split("(", 1)
+            alias, _, fk = head.partition(":")
+            if not fk:
+                raise NotImplementedError(f"Embedding {part!r} needs an alias:fk_column form in the local backend")
+            embeds.append((_ident(alias.strip()), _ident(fk.strip()), [c.strip() for c in inner.rstrip(")").split(",")]))
+        elif part:
+            plain.append(_ident(part))
+    return star, plain, embeds
+
+
+class _LocalClient:
+    """
+    Shared query execution for the local backends; storage() is the same for both.
+
+    Every execute() counts as one round trip in `calls` (by table, "rpc:<name>" and
+    "storage:<operation>") and first sleeps for `latency` seconds, to simulate the
+    network in tests and benchmarks.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.lock = threading.RLock()
+        self.latency = latency
+        self.calls: Counter = Counter()
+        self._storage = None
+
+    def table(self, name: str) -> LocalQuery:
+        return LocalQuery(self, name)
+
+    from_ = table
+
+    def rpc(self, name: str, params: Dict[str, Any]) -> LocalRPC:
+        return LocalRPC(self, name, params)
+
+    @property
+    def storage(self) -> "LocalStorage":
+        if self._storage is None:
+            self._storage = LocalStorage(self.storage_root(), calls=self.calls)
+        return self._storage
+
+    @property
+    def total_calls(self) -> int:
+        return sum(self.calls.values())
+
+    def _round_trip(self, key: str) -> None:
+        with self.lock:
+            self.calls[key] += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def storage_root(self) -> Optional[str]:
+        return None
+
+    def seed(self, tables: Dict[str, List[Dict[str, Any]]]) -> None:
+        """Insert rows, e.g. from the JSON file named by DB_SEED_PATH."""
+        for name, rows in tables.items():
+            if rows:
+                self._insert(_ident(name), [dict(r) for r in rows])
+
+    def rows(self, table: str) -> List[Dict[str, Any]]:
+        """Copies of every row in a table, without counting a round trip."""
+        with self.lock:
+            return self._select(_ident(table), [], [], None)
+
+    # Backends implement these
+    def _select(self, table: str, clauses: List[tuple], order_by, limit: Optional[int]) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def _insert(self, table: str, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def _update(self, table: str, clauses: List[tuple], patch: Dict[str, Any]) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def _delete(self, table: str, clauses: List[tuple]) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def _get(self, table: str, pk_value: Any) -> Optional[Dict[str, Any]]:
+        rows = self._select(table, [("cmp", PRIMARY_KEYS.get(table, "id"), "eq", pk_value)], [], 1)
+        return rows[0] if rows else None
+
+    def _execute(self, query: LocalQuery):
+        self._round_trip(query.table)
+        with self.lock:
+            if query.action == "insert":
+                items = query.payload if isinstance(query.payload, list) else [query.payload]
+                return SimpleNamespace(data=self._insert(query.table, [dict(i) for i in items]), count=None)
+            if query.action == "update":
+                return SimpleNamespace(data=self._update(query.table, query.clauses, dict(query.payload)), count=None)
+            if query.action == "delete":
+                return SimpleNamespace(data=self._delete(query.table, query.clauses), count=None)
+
+            count = None
+            if query.count:
+                count = len(self._select(query.table, query.clauses, [], None))
+            rows = self._select(query.table, query.clauses, query.order_by, query.limit_n)
+            data = [self._project(row, query.columns) for row in rows]
+        if query.single_row:
+            if len(data) != 1:
+                raise APIError({"code": "PGRST116", "message": "JSON object requested, multiple (or no) rows returned",
+                                "details": f"The result contains {len(data)} rows", "hint": None})
+            return SimpleNamespace(data=data[0], count=count)
+        return SimpleNamespace(data=data, count=count)
+
+    def _project(self, row: Dict[str, Any], columns: str) -> Dict[str, Any]:
+        star, plain, embeds = _parse_columns(columns)
+        result = dict(row) if star else {c: row.get(c) for c in plain}
+        for alias, fk, embedded_columns in embeds:
+            target = self._get(alias, row.get(fk)) if row.get(fk) is not None else None
+            result[alias] = None if target is None else (
+                dict(target) if embedded_columns == ["*"] else {c: target.get(c) for c in embedded_columns})
+        return result
+
+    def _rpc(self, name: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """The atomic array functions from supabase/migrations."""
+        if name == "project_add_tasks":
+            # Both appends under one lock hold, like the function's single transaction
+            with self.lock:
+                project = {"p_table": "project", "p_id": params["p_id"]}
+                tasks = self._rpc("array_append_ids", {**project, "p_column": "tasks",
+                                                       "p_values": params["p_task_ids"], "p_fail_if_present": True})
+                collaborators = self._rpc("array_append_ids", {**project, "p_column": "collaborators",
+                                                               "p_values": params["p_collaborators"]})
+                return {"tasks": tasks, "collaborators": collaborators,
+                        "project": dict(self._get("project", params["p_id"]))}
+        if name not in ("array_append_ids", "array_remove_ids"):
+            raise APIError({"code": "PGRST202", "message": f"Could not find the function {name}",
+                            "details": None, "hint": None})
+        table, column = _ident(params["p_table"]), _ident(params["p_column"])
+        values = list(dict.fromkeys(v for v in params["p_values"] if v is not None))
+        with self.lock:
+            row = self._get(table, params["p_id"])
+            if row is None:
+                raise APIError({"code": "P0002", "message": f"{table} {params['p_id']} not found",
+                                "details": None, "hint": None})
+            current = list(row.get(column) or [])
+            pk_clause = [("cmp", PRIMARY_KEYS.get(table, "id"), "eq", params["p_id"])]
+            if name == "array_append_ids":
+                added = [v for v in values if v not in current]
+                if params.get("p_fail_if_present") and len(added) < len(values):
+                    raise APIError({"code": "23505", "message": "Some ids are already present",
+                                    "details": None, "hint": None})
+                updated = current + added
+                self._update(table, pk_clause, {column: updated})
+                return {"values": updated, "added": added}
+            removed = [v for v in values if v in current]
+            updated = [v for v in current if v not in values]
+            self._update(table, pk_clause, {column: updated})
+            return {"values": updated, "removed": removed}
+
+    def _prepare_insert(self, table: str, row: Dict[str, Any]) -> Dict[str, Any]:
+        # Supabase tables default created_at to now()
+        row.setdefault("created_at", _now())
+        if table in VERSIONED_TABLES:
+            row.setdefault("updated_at", row["created_at"])
+        return row
+
+    def _prepare_update(self, table: str, patch: Dict[str, Any]) -> Dict[str, Any]:
+        # Like the set_updated_at trigger, every update moves updated_at
+        if table in VERSIONED_TABLES:
+            patch = {**patch, "updated_at": _now()}
+        return patch
+
+
+# ---- in-memory backend -------------------------------------------------------
+class _MemoryTable:
+    def __init__(self, name: str):
+        self.name = name
+        self.pk = PRIMARY_KEYS.get(name, "id")
+        self.rows: Dict[Any, Dict[str, Any]] = {}
+        self.next_id = 1
+        self.hash_indexes: Dict[str, Dict[Any, Set[Any]]] = {c: defaultdict(set) for c in INDEXED_COLUMNS.get(name, ())}
+        self.array_indexes: Dict[str, Dict[Any, Set[Any]]] = {c: defaultdict(set) for c in ARRAY_INDEXED_COLUMNS.get(name, ())}
+        # col -> sorted [(value, pk)] of non-NULL values
+        self.sorted_indexes: Dict[str, List[Tuple[Any, Any]]] = {c: [] for c in RANGE_COLUMNS.get(name, ())}
+        # col -> {value: key} of non-NULL values
+        self.unique_indexes: Dict[str, Dict[Any, Any]] = {c: {} for c in UNIQUE_COLUMNS.get(name, ())}
+
+    def check_unique(self, row: Dict[str, Any], key: Any) -> None:
+        """Raise like Postgres if `row` (stored under `key`) repeats a unique value of another row."""
+        for col, index in self.unique_indexes.items():
+            value = row.get(col)
+            if value is not None and index.get(value, key) != key:
+                raise APIError({"code": "23505", "message": f"duplicate key value violates unique constraint on {self.name}.{col}",
+                                "details": None, "hint": None})
+
+    def link(self, row: Dict[str, Any]) -> None:
+        key = row[self.pk]
+        for col, index in self.unique_indexes.items():
+            if row.get(col) is not None:
+                index[row[col]] = key
+        for col, index in self.hash_indexes.items():
+            try:
+                index[row.get(col)].add(key)
+            except TypeError:
+                pass  # unhashable value; found by scanning instead
+        for col, index in self.array_indexes.items():
+            for value in row.get(col) or []:
+                index[value].add(key)
+        for col, entries in self.sorted_indexes.items():
+            if row.get(col) is not None:
+                bisect.insort(entries, (row[col], key))
+
+    def unlink(self, row: Dict[str, Any]) -> None:
+        key = row[self.pk]
+        for col, index in self.unique_indexes.items():
+            if row.get(col) is not None:
+                index.pop(row[col], None)
+        for col, index in self.hash_indexes.items():
+            try:
+                bucket = index.get(row.get(col))
+            except TypeError:
+                continue
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del index[row.get(col)]
+        for col, index in self.array_indexes.items():
+            for value in row.get(col) or []:
+                bucket = index.get(value)
+                if bucket is not None:
+                    bucket.discard(key)
+                    if not bucket:
+                        del index[value]
+        for col, entries in self.sorted_indexes.items():
+            if row.get(col) is not None:
+                i = bisect.bisect_left(entries, (row[col], key))
+                if i < len(entries) and entries[i] == (row[col], key):
+                    entries.pop(i)
+
+    def _lookup(self, clause: tuple) -> Optional[Set[Any]]:
+        """Keys an indexed clause can match, or None if no index serves it."""
+        kind, col = clause[0], clause[1] if len(clause) > 1 else None
+        if kind == "or":
+            # Overlap on an indexed array column: OR of single-column cs clauses
+            subs = clause[1]
+            if subs and all(c[0] == "cs" and c[1] in self.array_indexes for c in subs):
+                result = set()
+                for c in subs:
+                    result |= self._lookup(c)
+                return result
+            return None
+        if kind == "cmp" and clause[2] == "eq":
+            return self._values(col, [clause[3]])
+        if kind == "in":
+            return self._values(col, [v for v in clause[2] if v is not None])
+        if kind == "is" and clause[2] is None and col in self.hash_indexes:
+            return set(self.hash_indexes[col].get(None, ()))
+        if kind == "cs" and col in self.array_indexes:
+            sets = [self.array_indexes[col].get(v, set()) for v in clause[2]]
+            return set.intersection(*sets) if sets else None
+        if kind == "cmp" and col in self.sorted_indexes and clause[3] is not None:
+            entries, value, op = self.sorted_indexes[col], clause[3], clause[2]
+            try:
+                if op in ("gt", "gte"):
+                    start = bisect.bisect_right(entries, (value, _MAX)) if op == "gt" else bisect.bisect_left(entries, (value, _MIN))
+                    return {k for _, k in entries[start:]}
+                if op in ("lt", "lte"):
+                    end = bisect.bisect_left(entries, (value, _MIN)) if op == "lt" else bisect.bisect_right(entries, (value, _MAX))
+                    return {k for _, k in entries[:end]}
+            except TypeError:
+                return None
+        return None
+
+    def _values(self, col: str, values: List[Any]) -> Optional[Set[Any]]:
+        if col == self.pk:
+            return {v for v in values if v in self.rows}
+        index = self.hash_indexes.get(col)
+        if index is None:
+            return None
+        result = set()
+        for value in values:
+            try:
+                result |= index.get(value, set())
+            except TypeError:
+                return None
+        return result
+
+    def candidates(self, clauses: List[tuple]) -> Tuple[Iterable[Any], bool]:
+        """Smallest key set any top-level clause narrows to; (all keys, False) for a full scan."""
+        best = None
+        for clause in clauses:
+            keys = self._lookup(clause)
+            if keys is not None and (best is None or len(keys) < len(best)):
+                best = keys
+        if best is None:
+            return list(self.rows), False
+        return sorted(best, key=lambda k: (str(type(k)), k)), True
+
+
+class _Extreme:
+    def __init__(self, sign: int):
+        self.sign = sign
+
+    def __lt__(self, other):
+        return self.sign < 0
+
+    def __gt__(self, other):
+        return self.sign > 0
+
+    def __eq__(self, other):
+        return self is other
+
+
+_MIN, _MAX = _Extreme(-1), _Extreme(1)
+
+
+class MemoryClient(_LocalClient):
+    """
+    Process-local tables in dicts, with hash indexes on INDEXED_COLUMNS, element
+    indexes on ARRAY_INDEXED_COLUMNS and sorted indexes on RANGE_COLUMNS, so a
+    query is planned from the most selective indexed filter like Postgres would.
+
+    stats() reports index lookups, full scans and rows examined.
+    """
+
+    def __init__(self, tables: Optional[Dict[str, List[Dict[str, Any]]]] = None, latency: float = 0.0):
+        super().__init__(latency)
+        self._tables: Dict[str, _MemoryTable] = {}
+        self.index_lookups = 0
+        self.full_scans = 0
+        self.rows_examined = 0
+        if tables:
+            self.seed(tables)
+
+    def _table(self, name: str) -> _MemoryTable:
+        table = self._tables.get(name)
+        if table is None:
+            table = self._tables[name] = _MemoryTable(name)
+        return table
+
+    def _scan(self, name: str, clauses: List[tuple]) -> List[Dict[str, Any]]:
+        table = self._table(name)
+        keys, indexed = table.candidates(clauses)
+        if indexed:
+            self.index_lookups += 1
+        else:
+            self.full_scans += 1
+        matched = []
+        for key in keys:
+            row = table.rows[key]
+            self.rows_examined += 1
+            if all(_matches(row, c) for c in clauses):
+                matched.append(row)
+        return matched
+
+    def _select(self, name, clauses, order_by, limit):
+        rows = _sort_rows(self._scan(name, clauses), order_by)
+        if limit is not None:
+            rows = rows[:limit]
+        return [dict(r) for r in rows]
+
+    def _insert(self, name, rows):
+        table = self._table(name)
+        created = []
+        for row in rows:
+            row = self._prepare_insert(name, row)
+            if row.get(table.pk) is None:
+                row[table.pk] = table.next_id
+            if row[table.pk] in table.rows:
+                raise APIError({"code": "23505", "message": f"duplicate key value violates unique constraint on {name}",
+                                "details": None, "hint": None})
+            table.check_unique(row, row[table.pk])
+            if isinstance(row[table.pk], int):
+                table.next_id = max(table.next_id, row[table.pk] + 1)
+            table.rows[row[table.pk]] = row
+            table.link(row)
+            created.append(dict(row))
+        return created
+
+    def _update(self, name, clauses, patch):
+        table = self._table(name)
+        patch = self._prepare_update(name, patch)
+        updated = []
+        for row in self._scan(name, clauses):
+            table.check_unique({**row, **patch}, row[table.pk])
+            table.unlink(row)
+            row.update(patch)
+            table.link(row)
+            updated.append(dict(row))
+        return updated
+
+    def _delete(self, name, clauses):
+        table = self._table(name)
+        deleted = []
+        for row in self._scan(name, clauses):
+            table.unlink(row)
+            del table.rows[row[table.pk]]
+            deleted.append(dict(row))
+        return deleted
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {"backend": "memory", "tables": {n: len(t.rows) for n, t in self._tables.items()},
+                    "index_lookups": self.index_lookups, "full_scans": self.full_scans,
+                    "rows_examined": self.rows_examined}
+
+
+# ---- SQLite backend ----------------------------------------------------------
+class SQLiteClient(_LocalClient):
+    """
+    Tables in a SQLite file (or ":memory:"). Each row is stored as JSON next to its
+    primary key; INDEXED_COLUMNS get expression indexes on json_extract() and
+    ARRAY_INDEXED_COLUMNS a side table of (element, key) pairs, so the filters the
+    repos send are answered from indexes. UNIQUE_COLUMNS get unique expression
+    indexes.
+
+    Tables are created on first use.
+    """
+
+    def __init__(self, path: str = ":memory:", latency: float = 0.0):
+        super().__init__(latency)
+        self.path = path
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._ready: Set[str] = set()
+
+    def storage_root(self) -> Optional[str]:
+        if self.path == ":memory:":
+            return None
+        return os.path.join(os.path.dirname(os.path.abspath(self.path)), "local_storage")
+
+    def _ensure(self, table: str) -> None:
+        if table in self._ready:
+            return
+        self._conn.execute(f'CREATE TABLE IF NOT EXISTS "{table}" (pk INTEGER PRIMARY KEY AUTOINCREMENT, data TEXT NOT NULL)')
+        for col in INDEXED_COLUMNS.get(table, ()):
+            self._conn.execute(f'CREATE INDEX IF NOT EXISTS "{table}_{col}" ON "{table}" (json_extract(data, \'$.{col}\'))')
+        for col in UNIQUE_COLUMNS.get(table, ()):
+            self._conn.execute(f'CREATE UNIQUE INDEX IF NOT EXISTS "{table}_{col}_key" ON "{table}" (json_extract(data, \'$.{col}\'))')
+        for col in ARRAY_INDEXED_COLUMNS.get(table, ()):
+            self._conn.execute(f'CREATE TABLE IF NOT EXISTS "{table}__{col}" (value, pk INTEGER NOT NULL, '
+                               f'PRIMARY KEY (value, pk)) WITHOUT ROWID')
+            self._conn.execute(f'CREATE INDEX IF NOT EXISTS "{table}__{col}_pk" ON "{table}__{col}" (pk)')
+        self._ready.add(table)
+
+    def _expr(self, table: str, col: str) -> str:
+        return "pk" if col == PRIMARY_KEYS.get(table, "id") else f"json_extract(data, '$.{_ident(col)}')"
+
+    @staticmethod
+    def _param(value: Any) -> Any:
+        return int(value) if isinstance(value, bool) else value
+
+    def _where(self, table: str, clause: tuple, params: List[Any]) -> str:
+        kind = clause[0]
+        if kind in ("and", "or"):
+            parts = [self._where(table, c, params) for c in clause[1]]
+            joiner = " AND " if kind == "and" else " OR "
+            return "(" + joiner.join(parts) + ")" if parts else ("1" if kind == "and" else "0")
+        expr = self._expr(table, clause[1])
+        if kind == "cmp":
+            if clause[3] is None:
+                return "0"
+            params.append(self._param(clause[3]))
+            return f"{expr} {dict(eq='=', neq='!=', gt='>', gte='>=', lt='<', lte='<=')[clause[2]]} ?"
+        if kind == "in":
+            values = [v for v in clause[2] if v is not None]
+            params.extend(self._param(v) for v in values)
+            return f"{expr} IN ({','.join('?' * len(values))})" if values else "0"
+        if kind == "is":
+            if clause[2] is None:
+                return f"{expr} IS NULL"
+            params.append(self._param(clause[2]))
+            return f"{expr} = ?"
+        if kind == "cs":
+            col = clause[1]
+            if not clause[2]:
+                return f"json_type(data, '$.{col}') = 'array'"
+            parts = []
+            for value in clause[2]:
+                params.append(self._param(value))
+                if col in ARRAY_INDEXED_COLUMNS.get(table, ()):
+                    parts.append(f'pk IN (SELECT pk FROM "{table}__{col}" WHERE value = ?)')
+                else:
+                    parts.append(f"EXISTS (SELECT 1 FROM json_each(data, '$.{col}') WHERE value = ?)")
+            return "(" + " AND ".join(parts) + ")"
+        if kind == "like":
+            if clause[3]:
+                params.append(clause[2])
+                return f"{expr} LIKE ?"
+            params.append(clause[2].replace("%", "*").replace("_", "?"))
+            return f"{expr} GLOB ?"
+        raise NotImplementedError(kind)
+
+    def _query(self, table: str, clauses: List[tuple], order_by=(), limit: Optional[int] = None,
+               columns: str = "pk, data") -> Tuple[str, List[Any]]:
+        params: List[Any] = []
+        sql = f'SELECT {columns} FROM "{table}"'
+        if clauses:
+            sql += " WHERE " + " AND ".join(self._where(table, c, params) for c in clauses)
+        if order_by:
+            terms = []
+            for col, desc in order_by:
+                expr = self._expr(table, col)
+                terms.append(f"{expr} IS NULL DESC, {expr} DESC" if desc else f"{expr} IS NULL, {expr}")
+            sql += " ORDER BY " + ", ".join(terms)
+        else:
+            # "+pk" keeps SQLite from walking the table in pk order instead of using a filter's index
+            sql += " ORDER BY +pk" if clauses else " ORDER BY pk"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return sql, params
+
+    def _row(self, table: str, pk: int, data: str) -> Dict[str, Any]:
+        row = json.loads(data)
+        row[PRIMARY_KEYS.get(table, "id")] = pk
+        return row
+
+    def explain(self, query: LocalQuery) -> List[str]:
+        """SQLite's query plan for a select, to check which indexes it uses."""
+        with self.lock:
+            self._ensure(query.table)
+            sql, params = self._query(query.table, query.clauses, query.order_by, query.limit_n)
+            return [row[-1] for row in self._conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+
+    def _select(self, table, clauses, order_by, limit):
+        self._ensure(table)
+        sql, params = self._query(table, clauses, order_by, limit)
+        return [self._row(table, pk, data) for pk, data in self._conn.execute(sql, params)]
+
+    def _sync_arrays(self, table: str, pk: int, row: Optional[Dict[str, Any]]) -> None:
+        for col in ARRAY_INDEXED_COLUMNS.get(table, ()):
+            self._conn.execute(f'DELETE FROM "{table}__{col}" WHERE pk = ?', (pk,))
+            if row is not None:
+                values = {v for v in row.get(col) or [] if isinstance(v, (int, float, str))}
+                self._conn.executemany(f'INSERT INTO "{table}__{col}" (value, pk) VALUES (?, ?)',
+                                       [(v, pk) for v in values])
+
+    def _write(self, fn):
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            result = fn()
+            self._conn.execute("COMMIT")
+            return result
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+
+    def _insert(self, table, rows):
+        self._ensure(table)
+        pk_name = PRIMARY_KEYS.get(table, "id")
+
+        def run():
+            created = []
+            for row in rows:
+                row = self._prepare_insert(table, row)
+                pk = row.pop(pk_name, None)
+                try:
+                    cur = self._conn.execute(f'INSERT INTO "{table}" (pk, data) VALUES (?, ?)',
+                                             (pk, json.dumps(row, default=str)))
+                except sqlite3.IntegrityError:
+                    raise APIError({"code": "23505", "message": f"duplicate key value violates unique constraint on {table}",
+                                    "details": None, "hint": None})
+                pk = cur.lastrowid if pk is None else pk
+                self._sync_arrays(table, pk, row)
+                created.append({**row, pk_name: pk})
+            return created
+
+        return self._write(run)
+
+    def _update(self, table, clauses, patch):
+        self._ensure(table)
+        pk_name = PRIMARY_KEYS.get(table, "id")
+        patch = {k: v for k, v in self._prepare_update(table, patch).items() if k != pk_name}
+
+        def run():
+            updated = []
+            for row in self._select(table, clauses, [], None):
+                pk = row.pop(pk_name)
+                row.update(patch)
+                try:
+                    self._conn.execute(f'UPDATE "{table}" SET data = ? WHERE pk = ?', (json.dumps(row, default=str), pk))
+                except sqlite3.IntegrityError:
+                    raise APIError({"code": "23505", "message": f"duplicate key value violates unique constraint on {table}",
+                                    "details": None, "hint": None})
+                self._sync_arrays(table, pk, row)
+                updated.append({**row, pk_name: pk})
+            return updated
+
+        return self._write(run)
+
+    def _delete(self, table, clauses):
+        self._ensure(table)
+        pk_name = PRIMARY_KEYS.get(table, "id")
+
+        def run():
+            deleted = self._select(table, clauses, [], None)
+            for row in deleted:
+                self._conn.execute(f'DELETE FROM "{table}" WHERE pk = ?', (row[pk_name],))
+                self._sync_arrays(table, row[pk_name], None)
+            return deleted
+
+        return self._write(run)
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            tables = {}
+            for table in sorted(self._ready):
+                tables[table] = self._conn.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0]
+            return {"backend": "sqlite", "path": self.path, "tables": tables}
+
+
+# ---- storage -----------------------------------------------------------------
+class LocalStorage:
+    """
+    Buckets kept in memory, or as files under `root`, behind the storage3 calls the repos make.
+
+    `content_types` keeps the content-type each object was uploaded with and
+    `streamed` counts uploads given a file path rather than bytes.
+    """
+
+    def __init__(self, root: Optional[str] = None, calls: Optional[Counter] = None):
+        self.root = root
+        self.calls = calls if calls is not None else Counter()
+        self.lock = threading.Lock()
+        self.streamed = 0
+        self.content_types: Dict[Tuple[str, str], Optional[str]] = {}
+        self._objects: Dict[Tuple[str, str], bytes] = {}
+
+    def from_(self, bucket: str) -> "LocalBucket":
+        if not bucket or "/" in bucket or bucket.startswith("."):
+            raise ValueError(f"Invalid bucket name: {bucket!r}")
+        return LocalBucket(self, bucket)
+
+
+class LocalBucket:
+    def __init__(self, storage: LocalStorage, name: str):
+        self.storage, self.name = storage, name
+
+    def _file(self, path: str) -> str:
+        full = os.path.abspath(os.path.join(self.storage.root, self.name, path))
+        if not full.startswith(os.path.abspath(os.path.join(self.storage.root, self.name)) + os.sep):
+            raise ValueError(f"Invalid storage path: {path}")
+        return full
+
+    def upload(self, path: str, file, file_options: Optional[Dict[str, Any]] = None):
+        storage = self.storage
+        with storage.lock:
+            storage.calls["storage:upload"] += 1
+            if isinstance(file, (str, os.PathLike)):
+                storage.streamed += 1
+        if isinstance(file, (str, os.PathLike)):
+            with open(file, "rb") as fh:
+                file = fh.read()
+        elif hasattr(file, "read"):
+            file = file.read()
+        with storage.lock:
+            if storage.root is None:
+                if (self.name, path) in storage._objects:
+                    raise APIError({"code": "409", "message": "The resource already exists (Duplicate)", "details": None, "hint": None})
+                storage._objects[(self.name, path)] = bytes(file)
+            else:
+                target = self._file(path)
+                if os.path.exists(target):
+                    raise APIError({"code": "409", "message": "The resource already exists (Duplicate)", "details": None, "hint": None})
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                with open(target, "wb") as fh:
+                    fh.write(file)
+            storage.content_types[(self.name, path)] = (file_options or {}).get("content-type")
+        return SimpleNamespace(path=path)
+
+    def list(self, path: Optional[str] = None, options: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        with self.storage.lock:
+            self.storage.calls["storage:list"] += 1
+        limit = (options or {}).get("limit", 100)
+        if self.storage.root is None:
+            prefix = f"{path}/" if path else ""
+            names = sorted(p[len(prefix):] for b, p in self.storage._objects if b == self.name and p.startswith(prefix))
+            names = [n for n in names if "/" not in n]
+        else:
+            folder = os.path.join(self.storage.root, self.name, path or "")
+            names = sorted(os.listdir(folder)) if os.path.isdir(folder) else []
+        return [{"name": n} for n in names[:limit]]
+
+    def download(self, path: str) -> bytes:
+        if self.storage.root is None:
+            return self.storage._objects[(self.name, path)]
+        with open(self._file(path), "rb") as fh:
+            return fh.read()
+
+    def get_public_url(self, path: str, options: Optional[Dict[str, Any]] = None) -> str:
+        if self.storage.root is None:
+            return f"memory://{self.name}/{path}"
+        return "file://" + self._file(path)
+
+
+# ---- selection ---------------------------------------------------------------
+_local_client: Optional[_LocalClient] = None
+_local_lock = threading.Lock()
+
+
+def get_local_client(backend: str) -> _LocalClient:
+    """
+    Process-wide local client for DB_BACKEND=memory or sqlite.
+
+    DB_SQLITE_PATH names the SQLite file (default local.sqlite3 in the working
+    directory, i.e. the service's own directory when started with `python app.py`);
+    DB_SEED_PATH optionally names a JSON file of {table: [rows]} loaded into an
+    empty database at startup.
+    """
+    global _local_client
+    with _local_lock:
+        if _local_client is None:
+            if backend == "memory":
+                client = MemoryClient()
+            elif backend == "sqlite":
+                client = SQLiteClient(os.getenv("DB_SQLITE_PATH", os.path.join(os.getcwd(), "local.sqlite3")))
+            else:
+                raise ValueError(f"Unknown DB_BACKEND: {backend}")
+            seed_path = os.getenv("DB_SEED_PATH")
+            if seed_path and not any(client.stats()["tables"].values()):
+                with open(seed_path) as fh:
+                    client.seed(json.load(fh))
+            _local_client = client
+        return _local_client
@@ -0,0 +1,253 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from shared.service_client import get_service_client
+
+# Default queue file lives in the service directory (services run from there) so
+# pending events survive restarts
+DEFAULT_OUTBOX_PATH = os.path.join(os.getcwd(), "notification_outbox.sqlite3")
+
+DEFAULT_BATCH_SIZE = 50
+DEFAULT_MAX_ATTEMPTS = 6
+DEFAULT_BASE_DELAY_SECONDS = 2.0
+MAX_DELAY_SECONDS = 300.0
+# How long a claim keeps an event from other workers sharing the file. Claims are
+# renewed before each send, so this only has to outlast one send (a name lookup
+# and a POST, each bounded by the service client timeouts), not a whole batch.
+CLAIM_SECONDS = 60.0
+
+# (payload field, user id, default) resolved to the user's name just before sending
+NameLookup = Tuple[str, Optional[int], str]
+
+
+class NotificationOutbox:
+    """
+    SQLite-backed outbox for calls to the notification service.
+
+    Write paths enqueue an event (one local insert) and return immediately; a
+    background worker drains due events in batches, POSTs them to the notification
+    service and retries failures with exponential backoff. Events that still fail
+    after max_attempts are kept with status 'dead' for inspection.
+
+    Several processes may share one queue file: each batch is claimed in a write
+    transaction before it is sent, recording the worker and a claim expiry. The
+    worker renews its claims before each send and skips events another worker has
+    taken over, so an event is delivered by one worker at a time however long
+    the batch takes.
+    """
+
+    def __init__(self, path: str = DEFAULT_OUTBOX_PATH, send: Optional[Callable[[str, Dict[str, Any]], bool]] = None,
+                 resolve_name: Optional[Callable[[int], Optional[str]]] = None, batch_size: int = DEFAULT_BATCH_SIZE,
+                 max_attempts: int = DEFAULT_MAX_ATTEMPTS, base_delay: float = DEFAULT_BASE_DELAY_SECONDS,
+                 poll_interval: float = 1.0, clock: Callable[[], float] = time.time):
+        self.path = path
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.poll_interval = poll_interval
+        self.clock = clock
+        self._send = send or self._post
+        self._resolve_name = resolve_name or self._get_user_name
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        # Identifies this outbox's claims among the processes sharing the file
+        self.worker_id = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                endpoint TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                name_lookup TEXT,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt_at REAL NOT NULL,
+                last_error TEXT,
+                created_at REAL NOT NULL,
+                claimed_by TEXT,
+                claimed_until REAL
+            )
+        """)
+        # Queue files created before claims had an owner
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(outbox)")}
+        for column, kind in (("claimed_by", "TEXT"), ("claimed_until", "REAL")):
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE outbox ADD COLUMN {column} {kind}")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS outbox_due ON outbox (status, next_attempt_at)")
+
+    # ---- producer side ----------------------------------------------------
+    def enqueue(self, endpoint: str, payload: Dict[str, Any], name_lookup: Optional[NameLookup] = None) -> int:
+        """
+        Queue a POST to the notification service `endpoint`. Returns the event ID.
+
+        `name_lookup` defers a users-service call to the worker, e.g.
+        ("creator_name", owner_id, "System") sets payload["creator_name"].
+        """
+        now = self.clock()
+        with self._lock:
+            cur = self._conn.execute(
+                "INSERT INTO outbox (endpoint, payload, name_lookup, next_attempt_at, created_at) VALUES (?, ?, ?, ?, ?)",
+                (endpoint, json.dumps(payload), json.dumps(name_lookup) if name_lookup else None, now, now))
+        self._wakeup.set()
+        return cur.lastrowid
+
+    # ---- worker side ------------------------------------------------------
+    def start(self) -> None:
+        """Start the background drain thread (idempotent)."""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="notification-outbox", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            try:
+                if self.drain_once()["claimed"]:
+                    continue  # there may be more due events
+            except Exception as e:
+                print(f"Warning: Notification outbox drain failed: {e}")
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+
+    def _claim_batch(self, now: float):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._conn.execute(
+                    "SELECT id, endpoint, payload, name_lookup, attempts FROM outbox "
+                    "WHERE status = 'pending' AND next_attempt_at <= ? "
+                    "AND (claimed_until IS NULL OR claimed_until <= ?) ORDER BY id LIMIT ?",
+                    (now, now, self.batch_size)).fetchall()
+                if rows:
+                    self._conn.executemany("UPDATE outbox SET claimed_by = ?, claimed_until = ? WHERE id = ?",
+                                           [(self.worker_id, now + CLAIM_SECONDS, row[0]) for row in rows])
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return rows
+
+    def _settle(self, sent: list, retries: list, dead: list, next_event_id: Optional[int] = None) -> bool:
+        """
+        Record the outcome of the events handled so far (only those this worker
+        still holds) and clear the lists. With `next_event_id`, also renew every
+        claim this worker holds and return False if that event has been claimed by
+        another worker.
+        """
+        owner = (self.worker_id,)
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.executemany("DELETE FROM outbox WHERE id = ? AND claimed_by = ?", [e + owner for e in sent])
+            self._conn.executemany(
+                "UPDATE outbox SET attempts = ?, next_attempt_at = ?, last_error = ?, claimed_by = NULL, claimed_until = NULL "
+                "WHERE id = ? AND claimed_by = ?", [e + owner for e in retries])
+            self._conn.executemany(
+                "UPDATE outbox SET status = 'dead', attempts = ?, last_error = ?, claimed_by = NULL, claimed_until = NULL "
+                "WHERE id = ? AND claimed_by = ?", [e + owner for e in dead])
+            held = True
+            if next_event_id is not None:
+                self._conn.execute("UPDATE outbox SET claimed_until = ? WHERE claimed_by = ? AND status = 'pending'",
+                                   (self.clock() + CLAIM_SECONDS, self.worker_id))
+                held = self._conn.execute("SELECT 1 FROM outbox WHERE id = ? AND claimed_by = ?",
+                                          (next_event_id, self.worker_id)).fetchone() is not None
+            self._conn.execute("COMMIT")
+        for outcomes in (sent, retries, dead):
+            outcomes.clear()
+        return held
+
+    def drain_once(self) -> Dict[str, int]:
+        """
+        Send one batch of due events.
+
+        Before each send the outcomes so far are written back and the batch's
+        claims renewed (one local transaction), so a slow batch keeps its claims
+        and a sent event is never left for another worker to send again.
+
+        Returns:
+            Counts of claimed, sent, retried, dead and lost events (claims taken over
+            by another worker after one send ran past CLAIM_SECONDS)
+        """
+        now = self.clock()
+        rows = self._claim_batch(now)
+        sent, retries, dead = [], [], []
+        counts = {"claimed": len(rows), "sent": 0, "retried": 0, "dead": 0, "lost": 0}
+        names: Dict[int, Optional[str]] = {}
+
+        for event_id, endpoint, payload_json, lookup_json, attempts in rows:
+            if not self._settle(sent, retries, dead, next_event_id=event_id):
+                counts["lost"] += 1
+                continue
+            payload = json.loads(payload_json)
+            try:
+                if lookup_json:
+                    field, user_id, default = json.loads(lookup_json)
+                    if user_id not in names:
+                        names[user_id] = self._resolve_name(user_id) if user_id else None
+                    payload[field] = names[user_id] or default
+                if not self._send(endpoint, payload):
+                    raise RuntimeError("notification service rejected the event")
+                sent.append((event_id,))
+                counts["sent"] += 1
+            except Exception as e:
+                attempts += 1
+                if attempts >= self.max_attempts:
+                    dead.append((attempts, str(e), event_id))
+                    counts["dead"] += 1
+                else:
+                    delay = min(self.base_delay * (2 ** (attempts - 1)), MAX_DELAY_SECONDS)
+                    retries.append((attempts, self.clock() + delay, str(e), event_id))
+                    counts["retried"] += 1
+        self._settle(sent, retries, dead)
+
+        if counts["dead"]:
+            print(f"Warning: {counts['dead']} notification events failed {self.max_attempts} times and were dead-lettered")
+        if counts["lost"]:
+            print(f"Warning: {counts['lost']} notification events were claimed by another worker before this one sent them")
+        return counts
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM outbox GROUP BY status").fetchall()
+        counts = dict(rows)
+        return {"pending": counts.get("pending", 0), "dead": counts.get("dead", 0)}
+
+    # ---- default transport ------------------------------------------------
+    def _post(self, endpoint: str, payload: Dict[str, Any]) -> bool:
+        # Failures are retried by the outbox itself, with its own backoff
+        response = get_service_client("notification").post(endpoint, json=payload, retries=0)
+        if response.status_code not in [200, 201]:
+            print(f"Warning: Notification service returned {response.status_code} for {endpoint}")
+            return False
+        return True
+
+    def _get_user_name(self, user_id: int) -> Optional[str]:
+        try:
+            response = get_service_client("users").get(f"/users/{user_id}", timeout=5)
+            if response.status_code == 200:
+                return response.json().get("data", {}).get("name")
+        except Exception:
+            pass  # Use the default name if we can't fetch it
+        return None
+
+
+_default_outbox: Optional[NotificationOutbox] = None
+_default_lock = threading.Lock()
+
+
+def get_default_outbox() -> NotificationOutbox:
+    """Process-wide outbox stored at NOTIFICATION_OUTBOX_PATH, with its drain thread running."""
+    global _default_outbox
+    with _default_lock:
+        if _default_outbox is None:
+            _default_outbox = NotificationOutbox(os.getenv("NOTIFICATION_OUTBOX_PATH", DEFAULT_OUTBOX_PATH))
+            _default_outbox.start()
+        return _default_outbox
@@ -0,0 +1,23 @@
+#!/usr/bin/env python3
+"""
+Simple Test Runner - Shared Module Tests
+
+These need no running services or environment variables.
+"""
+
+import sys
+import subprocess
+
+
+def main():
+    print("Running Shared Module Tests...")
+    result = subprocess.run([sys.executable, "-m", "unittest", "discover", "-s", "tests", "-v"])
+    if result.returncode == 0:
+        print("[SUCCESS] All shared module tests passed!")
+    else:
+        print("[ERROR] Some shared module tests failed")
+    return result.returncode
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,321 @@
+import os
+import random
+import re
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Any, Callable, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Base URL of each microservice, overridable with <NAME>_SERVICE_URL
+SERVICE_PORTS = {
+    "projects": 5001,
+    "tasks": 5002,
+    "users": 5003,
+    "team": 5004,
+    "dept": 5005,
+    "notification": 5006,
+}
+
+DEFAULT_POOL_SIZE = 20
+DEFAULT_CONNECT_TIMEOUT_SECONDS = 2.0
+DEFAULT_READ_TIMEOUT_SECONDS = 10.0
+# Retries after the first attempt, for idempotent requests only
+DEFAULT_RETRIES = 2
+DEFAULT_BACKOFF_SECONDS = 0.2
+MAX_BACKOFF_SECONDS = 2.0
+# Consecutive failures that open the circuit, and how long it stays open
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_RESET_TIMEOUT_SECONDS = 30.0
+# Calls slower than this are logged
+DEFAULT_SLOW_CALL_MS = 2000.0
+LATENCY_SAMPLES = 512
+
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+RETRY_STATUSES = frozenset({502, 503, 504})
+
+_ID_SEGMENT_RE = re.compile(r"^\d+$")
+
+
+def _env_float(name: str, default: float) -> float:
+    return float(os.getenv(name, default))
+
+
+def _endpoint_of(method: str, path: str) -> str:
+    """"GET /tasks/{id}" for "/tasks/12", so metrics group by route rather than by ID."""
+    segments = ["{id}" if _ID_SEGMENT_RE.match(s) else s for s in path.split("?", 1)[0].split("/")]
+    return f"{method} {'/'.join(segments)}"
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Raised without a network call while a service's circuit is open."""
+
+
+class CircuitBreaker:
+    """
+    Fails calls to a service fast after `failure_threshold` consecutive failures.
+
+    Only signs that the service is unreachable or overloaded count as failures
+    (connection errors, timeouts, 502/503/504); a service that answers, even
+    with a 500, is up.
+
+    After `reset_timeout` seconds one trial call is let through (half-open); its
+    success closes the circuit again, its failure re-opens it for another period.
+    """
+
+    def __init__(self, failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+                 reset_timeout: float = DEFAULT_RESET_TIMEOUT_SECONDS, clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state()
+
+    def _state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half_open" if self.clock() - self.opened_at >= self.reset_timeout else "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self._state()
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self._trial_in_flight or self.failures >= self.failure_threshold:
+                self.opened_at = self.clock()
+            self._trial_in_flight = False
+
+    def release(self) -> None:
+        """End a call that says nothing about the service's health."""
+        with self._lock:
+            self._trial_in_flight = False
+
+
+class EndpointMetrics:
+    """Per-endpoint call counts, errors, retries, fail-fast rejections and latency."""
+
+    def __init__(self, slow_call_ms: float = DEFAULT_SLOW_CALL_MS, samples: int = LATENCY_SAMPLES):
+        self.slow_call_ms = slow_call_ms
+        self.samples = samples
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self) -> None:
+        self._counts: Dict[str, int] = defaultdict(int)
+        self._errors: Dict[str, int] = defaultdict(int)
+        self._retries: Dict[str, int] = defaultdict(int)
+        self._rejected: Dict[str, int] = defaultdict(int)
+        self._total_ms: Dict[str, float] = defaultdict(float)
+        self._max_ms: Dict[str, float] = defaultdict(float)
+        self._recent: Dict[str, deque] = defaultdict(lambda: deque(maxlen=self.samples))
+
+    def record(self, endpoint: str, elapsed_ms: float, error: bool) -> None:
+        with self._lock:
+            self._counts[endpoint] += 1
+            self._total_ms[endpoint] += elapsed_ms
+            self._max_ms[endpoint] = max(self._max_ms[endpoint], elapsed_ms)
+            self._recent[endpoint].append(elapsed_ms)
+            if error:
+                self._errors[endpoint] += 1
+        if elapsed_ms >= self.slow_call_ms:
+            print(f"Warning: Slow call {endpoint}: {elapsed_ms:.0f} ms")
+
+    def record_retry(self, endpoint: str) -> None:
+        with self._lock:
+            self._retries[endpoint] += 1
+
+    def record_rejected(self, endpoint: str) -> None:
+        with self._lock:
+            self._rejected[endpoint] += 1
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """{endpoint: {count, errors, retries, rejected, avg_ms, p95_ms, max_ms}}"""
+        with self._lock:
+            result = {}
+            for endpoint in set(self._counts) | set(self._rejected):
+                count = self._counts.get(endpoint, 0)
+                recent = sorted(self._recent.get(endpoint, ()))
+                result[endpoint] = {
+                    "count": count,
+                    "errors": self._errors.get(endpoint, 0),
+                    "retries": self._retries.get(endpoint, 0),
+                    "rejected": self._rejected.get(endpoint, 0),
+                    "avg_ms": round(self._total_ms[endpoint] / count, 2) if count else 0.0,
+                    "p95_ms": round(recent[min(len(recent) - 1, int(len(recent) * 0.95))], 2) if recent else 0.0,
+                    "max_ms": round(self._max_ms.get(endpoint, 0.0), 2),
+                }
+            return result
+
+    def reset(self) -> None:
+        with self._lock:
+            self._reset()
+
+
+class ServiceClient:
+    """
+    HTTP client for one downstream microservice.
+
+    Calls share a pooled keep-alive session and always have a (connect, read)
+    timeout. Idempotent requests are retried on connection errors, timeouts and
+    502/503/504 with jittered exponential backoff; other methods are only retried
+    when `retries` is passed explicitly. A circuit breaker counts those failures
+    only (other 5xx responses are the endpoint's own errors, and must not cut off
+    every caller of the service) and, while open, raises CircuitOpenError
+    without touching the network, so a slow service cannot tie up every worker
+    of its callers.
+
+    Errors are the usual requests exceptions (CircuitOpenError is a
+    requests.ConnectionError); any other response is returned to the caller.
+    """
+
+    def __init__(self, name: str, base_url: str, pool_size: int = DEFAULT_POOL_SIZE,
+                 connect_timeout: float = DEFAULT_CONNECT_TIMEOUT_SECONDS,
+                 read_timeout: float = DEFAULT_READ_TIMEOUT_SECONDS, retries: int = DEFAULT_RETRIES,
+                 backoff: float = DEFAULT_BACKOFF_SECONDS, breaker: Optional[CircuitBreaker] = None,
+                 metrics: Optional[EndpointMetrics] = None, session: Optional[requests.Session] = None,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.name = name
+        self.base_url = base_url.rstrip("/")
+        self.timeout = (connect_timeout, read_timeout)
+        self.retries = retries
+        self.backoff = backoff
+        self.breaker = breaker or CircuitBreaker()
+        self.metrics = metrics or EndpointMetrics()
+        self.sleep = sleep
+        if session is None:
+            session = requests.Session()
+            # Retries are handled here, so the adapter must not retry on its own
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+        self.session = session
+
+    def get(self, path: str, **kwargs) -> requests.Response:
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path: str, **kwargs) -> requests.Response:
+        return self.request("POST", path, **kwargs)
+
+    def put(self, path: str, **kwargs) -> requests.Response:
+        return self.request("PUT", path, **kwargs)
+
+    def delete(self, path: str, **kwargs) -> requests.Response:
+        return self.request("DELETE", path, **kwargs)
+
+    def request(self, method: str, path: str, timeout: Any = None, retries: Optional[int] = None,
+                **kwargs) -> requests.Response:
+        """
+        Send `method` to base_url + `path`; extra kwargs go to requests (params, json, ...).
+
+        `timeout` overrides the client's (connect, read) timeout for this call.
+        """
+        method = method.upper()
+        endpoint = f"{self.name} {_endpoint_of(method, path)}"
+        if retries is None:
+            retries = self.retries if method in IDEMPOTENT_METHODS else 0
+        url = f"{self.base_url}{path}"
+
+        attempt = 0
+        while True:
+            if not self.breaker.allow():
+                self.metrics.record_rejected(endpoint)
+                raise CircuitOpenError(f"Circuit open for {self.name} service, not calling {method} {path}")
+
+            started = time.perf_counter()
+            try:
+                response = self.session.request(method, url, timeout=timeout or self.timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                self.metrics.record(endpoint, (time.perf_counter() - started) * 1000, error=True)
+                self.breaker.record_failure()
+                if attempt >= retries:
+                    raise
+            except Exception:
+                self.metrics.record(endpoint, (time.perf_counter() - started) * 1000, error=True)
+                self.breaker.release()
+                raise
+            else:
+                self.metrics.record(endpoint, (time.perf_counter() - started) * 1000,
+                                    error=response.status_code >= 500)
+                if response.status_code in RETRY_STATUSES:
+                    self.breaker.record_failure()
+                else:
+                    self.breaker.record_success()
+                if response.status_code not in RETRY_STATUSES or attempt >= retries:
+                    return response
+                response.close()
+
+            attempt += 1
+            self.metrics.record_retry(endpoint)
+            # Full jitter: callers retrying together do not hit the service in lockstep
+            self.sleep(random.uniform(0, min(MAX_BACKOFF_SECONDS, self.backoff * 2 ** (attempt - 1))))
+
+    def stats(self) -> Dict[str, Any]:
+        return {"base_url": self.base_url, "circuit": self.breaker.state, "endpoints": self.metrics.snapshot()}
+
+    def close(self) -> None:
+        self.session.close()
+
+
+_clients: Dict[str, ServiceClient] = {}
+_clients_lock = threading.Lock()
+
+
+def service_url(name: str) -> str:
+    return os.getenv(f"{name.upper()}_SERVICE_URL", f"http://127.0.0.1:{SERVICE_PORTS[name]}")
+
+
+def get_service_client(name: str, base_url: Optional[str] = None) -> ServiceClient:
+    """
+    The process-wide client for service `name` ("tasks", "users", ...).
+
+    Settings (environment): <NAME>_SERVICE_URL, SERVICE_HTTP_POOL_SIZE,
+    SERVICE_HTTP_CONNECT_TIMEOUT_SECONDS, SERVICE_HTTP_READ_TIMEOUT_SECONDS,
+    SERVICE_HTTP_RETRIES, SERVICE_BREAKER_FAILURES, SERVICE_BREAKER_RESET_SECONDS,
+    SERVICE_HTTP_SLOW_CALL_MS.
+    """
+    client = _clients.get(name)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(name)
+            if client is None:
+                client = _clients[name] = ServiceClient(
+                    name, base_url or service_url(name),
+                    pool_size=int(os.getenv("SERVICE_HTTP_POOL_SIZE", DEFAULT_POOL_SIZE)),
+                    connect_timeout=_env_float("SERVICE_HTTP_CONNECT_TIMEOUT_SECONDS", DEFAULT_CONNECT_TIMEOUT_SECONDS),
+                    read_timeout=_env_float("SERVICE_HTTP_READ_TIMEOUT_SECONDS", DEFAULT_READ_TIMEOUT_SECONDS),
+                    retries=int(os.getenv("SERVICE_HTTP_RETRIES", DEFAULT_RETRIES)),
+                    breaker=CircuitBreaker(int(os.getenv("SERVICE_BREAKER_FAILURES", DEFAULT_FAILURE_THRESHOLD)),
+                                           _env_float("SERVICE_BREAKER_RESET_SECONDS", DEFAULT_RESET_TIMEOUT_SECONDS)),
+                    metrics=EndpointMetrics(_env_float("SERVICE_HTTP_SLOW_CALL_MS", DEFAULT_SLOW_CALL_MS)),
+                )
+    return client
+
+
+def get_service_client_stats() -> Dict[str, Dict[str, Any]]:
+    """Circuit state and per-endpoint metrics of every client created in this process."""
+    with _clients_lock:
+        clients = dict(_clients)
+    return {name: client.stats() for name, client in clients.items()}
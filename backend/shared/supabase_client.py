@@ -0,0 +1,230 @@
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Any, Dict, Optional
+
+import httpx
+from supabase import Client, ClientOptions
+
+DEFAULT_POOL_SIZE = 20
+DEFAULT_KEEPALIVE_CONNECTIONS = 10
+DEFAULT_KEEPALIVE_EXPIRY_SECONDS = 30.0
+DEFAULT_CONNECT_TIMEOUT_SECONDS = 5.0
+DEFAULT_READ_TIMEOUT_SECONDS = 30.0
+# Storage transfers (attachments) get a longer read timeout than queries
+DEFAULT_STORAGE_TIMEOUT_SECONDS = 120.0
+# Queries slower than this are logged
+DEFAULT_SLOW_QUERY_MS = 1000.0
+# Latency samples kept per table for percentiles
+LATENCY_SAMPLES = 512
+
+_REST_PREFIX = "/rest/v1/"
+_STORAGE_PREFIX = "/storage/v1/object/"
+
+
+def _env_float(name: str, default: float) -> float:
+    return float(os.getenv(name, default))
+
+
+class QueryMetrics:
+    """
+    Per-table request counters and latencies for the Supabase REST and storage APIs.
+
+    Latency is measured from sending a request to receiving the response headers.
+    """
+
+    def __init__(self, slow_query_ms: float = DEFAULT_SLOW_QUERY_MS, samples: int = LATENCY_SAMPLES):
+        self.slow_query_ms = slow_query_ms
+        self.samples = samples
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self) -> None:
+        self._counts: Dict[str, int] = defaultdict(int)
+        self._errors: Dict[str, int] = defaultdict(int)
+        self._total_ms: Dict[str, float] = defaultdict(float)
+        self._max_ms: Dict[str, float] = defaultdict(float)
+        self._recent: Dict[str, deque] = defaultdict(lambda: deque(maxlen=self.samples))
+
+    def record(self, table: str, method: str, elapsed_ms: float, status_code: int) -> None:
+        with self._lock:
+            self._counts[table] += 1
+            self._total_ms[table] += elapsed_ms
+            self._max_ms[table] = max(self._max_ms[table], elapsed_ms)
+            self._recent[table].append(elapsed_ms)
+            if status_code >= 400:
+                self._errors[table] += 1
+        if elapsed_ms >= self.slow_query_ms:
+            print(f"Warning: Slow Supabase {method} on {table}: {elapsed_ms:.0f} ms")
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """{table: {count, errors, avg_ms, p95_ms, max_ms}}"""
+        with self._lock:
+            result = {}
+            for table, count in self._counts.items():
+                recent = sorted(self._recent[table])
+                result[table] = {
+                    "count": count,
+                    "errors": self._errors[table],
+                    "avg_ms": round(self._total_ms[table] / count, 2),
+                    "p95_ms": round(recent[min(len(recent) - 1, int(len(recent) * 0.95))], 2),
+                    "max_ms": round(self._max_ms[table], 2),
+                }
+            return result
+
+    def reset(self) -> None:
+        with self._lock:
+            self._reset()
+
+
+def _table_of(path: str) -> str:
+    """Table (or "rpc:<function>" / "storage:<bucket>") a Supabase API path refers to."""
+    if path.startswith(_REST_PREFIX):
+        parts = path[len(_REST_PREFIX):].split("/")
+        return f"rpc:{parts[1]}" if parts[0] == "rpc" and len(parts) > 1 else parts[0]
+    if path.startswith(_STORAGE_PREFIX):
+        parts = [p for p in path[len(_STORAGE_PREFIX):].split("/") if p]
+        # object/<bucket>/..., object/public/<bucket>/..., object/list/<bucket>
+        if parts and parts[0] in ("public", "list", "info", "sign", "authenticated") and len(parts) > 1:
+            parts = parts[1:]
+        return f"storage:{parts[0]}" if parts else "storage"
+    return path
+
+
+class PooledClient(Client):
+    """
+    supabase Client whose query (PostgREST) and storage APIs each run on a pooled
+    httpx client with keep-alive, the factory's limits and timeouts, and latency hooks.
+
+    The two APIs get separate httpx clients because postgrest and storage3 each set
+    the base URL of the client they are given.
+    """
+
+    rest_http: httpx.Client
+    storage_http: httpx.Client
+
+    @property
+    def postgrest(self):
+        if self._postgrest is None:
+            self._postgrest = self._init_postgrest_client(rest_url=self.rest_url, headers=self.options.headers,
+                                                          schema=self.options.schema, http_client=self.rest_http)
+        return self._postgrest
+
+    @property
+    def storage(self):
+        if self._storage is None:
+            self._storage = self._init_storage_client(storage_url=self.storage_url, headers=self.options.headers,
+                                                      http_client=self.storage_http)
+        return self._storage
+
+
+class SupabaseClientFactory:
+    """
+    Builds one Supabase client per process, on first use rather than at import.
+
+    Every repo in the service shares it, so connections (and their TLS sessions)
+    are reused across repos and requests instead of each repo opening its own.
+
+    Settings (environment): SUPABASE_URL, SUPABASE_SERVICE_KEY, SUPABASE_POOL_SIZE,
+    SUPABASE_KEEPALIVE_CONNECTIONS, SUPABASE_KEEPALIVE_EXPIRY_SECONDS,
+    SUPABASE_CONNECT_TIMEOUT_SECONDS, SUPABASE_READ_TIMEOUT_SECONDS,
+    SUPABASE_STORAGE_TIMEOUT_SECONDS, SUPABASE_SLOW_QUERY_MS.
+    """
+
+    def __init__(self, url: Optional[str] = None, key: Optional[str] = None, pool_size: Optional[int] = None,
+                 keepalive_connections: Optional[int] = None, keepalive_expiry: Optional[float] = None,
+                 connect_timeout: Optional[float] = None, read_timeout: Optional[float] = None,
+                 storage_timeout: Optional[float] = None, metrics: Optional[QueryMetrics] = None,
+                 transport: Optional[httpx.BaseTransport] = None):
+        self.url = url
+        self.key = key
+        self.pool_size = pool_size or int(os.getenv("SUPABASE_POOL_SIZE", DEFAULT_POOL_SIZE))
+        self.keepalive_connections = keepalive_connections or int(
+            os.getenv("SUPABASE_KEEPALIVE_CONNECTIONS", DEFAULT_KEEPALIVE_CONNECTIONS))
+        self.keepalive_expiry = keepalive_expiry or _env_float("SUPABASE_KEEPALIVE_EXPIRY_SECONDS", DEFAULT_KEEPALIVE_EXPIRY_SECONDS)
+        self.connect_timeout = connect_timeout or _env_float("SUPABASE_CONNECT_TIMEOUT_SECONDS", DEFAULT_CONNECT_TIMEOUT_SECONDS)
+        self.read_timeout = read_timeout or _env_float("SUPABASE_READ_TIMEOUT_SECONDS", DEFAULT_READ_TIMEOUT_SECONDS)
+        self.storage_timeout = storage_timeout or _env_float("SUPABASE_STORAGE_TIMEOUT_SECONDS", DEFAULT_STORAGE_TIMEOUT_SECONDS)
+        self.metrics = metrics or QueryMetrics(_env_float("SUPABASE_SLOW_QUERY_MS", DEFAULT_SLOW_QUERY_MS))
+        # Tests pass an httpx.MockTransport
+        self.transport = transport
+        self._client: Optional[PooledClient] = None
+        self._lock = threading.Lock()
+
+    def get(self) -> PooledClient:
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = self._build()
+        return self._client
+
+    def _build(self) -> PooledClient:
+        url = self.url or os.environ["SUPABASE_URL"]
+        key = self.key or os.environ["SUPABASE_SERVICE_KEY"]
+        client = PooledClient(url, key, ClientOptions(postgrest_client_timeout=self.read_timeout,
+                                                      storage_client_timeout=self.storage_timeout))
+        client.rest_http = self._http_client(self.read_timeout)
+        client.storage_http = self._http_client(self.storage_timeout)
+        return client
+
+    def _http_client(self, read_timeout: float) -> httpx.Client:
+        options: Dict[str, Any] = {"transport": self.transport} if self.transport else {"http2": True}
+        return httpx.Client(
+            limits=httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.keepalive_connections,
+                                keepalive_expiry=self.keepalive_expiry),
+            timeout=httpx.Timeout(read_timeout, connect=self.connect_timeout),
+            follow_redirects=True,
+            event_hooks={"request": [self._on_request], "response": [self._on_response]},
+            **options,
+        )
+
+    @staticmethod
+    def _on_request(request: httpx.Request) -> None:
+        request.extensions["started_at"] = time.perf_counter()
+
+    def _on_response(self, response: httpx.Response) -> None:
+        request = response.request
+        started_at = request.extensions.get("started_at")
+        if started_at is not None:
+            elapsed_ms = (time.perf_counter() - started_at) * 1000
+            self.metrics.record(_table_of(request.url.path), request.method, elapsed_ms, response.status_code)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._client is not None:
+                self._client.rest_http.close()
+                self._client.storage_http.close()
+                self._client = None
+
+
+class LazyClient:
+    """Stands in for the shared client and builds it on first attribute access."""
+
+    def __init__(self, factory: SupabaseClientFactory):
+        self._factory = factory
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._factory.get(), name)
+
+
+_default_factory = SupabaseClientFactory()
+
+
+def get_supabase_client() -> Client:
+    """
+    The process-wide Supabase client. Nothing is created until it is first used.
+
+    DB_BACKEND=memory or DB_BACKEND=sqlite swaps in a local database with the same
+    query interface (see local_db.py), for load testing without Supabase.
+    """
+    backend = os.getenv("DB_BACKEND", "supabase").lower()
+    if backend != "supabase":
+        from shared.local_db import get_local_client
+        return get_local_client(backend)
+    return LazyClient(_default_factory)
+
+
+def get_supabase_metrics() -> Dict[str, Dict[str, Any]]:
+    """Per-table latency stats of the process-wide client."""
+    return _default_factory.metrics.snapshot()
@@ -0,0 +1,85 @@
+import unittest
+import os
+import sys
+
+# Add the backend directory to path to find the shared package
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from flask import Flask
+
+from shared.etag import etag_json_response, not_modified, version_etag
+
+
+class TestETagResponse(unittest.TestCase):
+    """The conditional JSON response helper shared by the task, project and notification blueprints."""
+
+    def setUp(self):
+        app = Flask(__name__)
+        self.payload = {"data": {"unread_count": 3}}
+        self.status = 200
+
+        @app.route("/view")
+        def view():
+            return etag_json_response(self.payload, self.status)
+
+        self.http = app.test_client()
+
+    def test_matching_if_none_match_returns_304(self):
+        first = self.http.get("/view")
+        assert first.headers["Cache-Control"] == "no-cache"
+        response = self.http.get("/view", headers={"If-None-Match": first.headers["ETag"]})
+        assert response.status_code == 304
+        assert response.data == b""
+
+    def test_changed_payload_returns_200_with_new_etag(self):
+        etag = self.http.get("/view").headers["ETag"]
+        self.payload = {"data": {"unread_count": 4}}
+        response = self.http.get("/view", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+        assert response.get_json() == {"data": {"unread_count": 4}}
+
+    def test_errors_get_no_etag(self):
+        self.payload, self.status = {"Message": "not found"}, 404
+        response = self.http.get("/view")
+        assert response.status_code == 404
+        assert "ETag" not in response.headers
+
+
+class TestVersionETag(unittest.TestCase):
+    """A view whose ETag comes from row versions answers 304 without building the body."""
+
+    def setUp(self):
+        app = Flask(__name__)
+        self.versions = [(1, "2025-01-01T00:00:00+00:00"), (2, "2025-01-02T00:00:00+00:00")]
+        self.loads = 0
+
+        @app.route("/rows")
+        def rows():
+            etag = version_etag(self.versions)
+            unchanged = not_modified(etag)
+            if unchanged is not None:
+                return unchanged
+            self.loads += 1
+            return etag_json_response({"data": [i for i, _ in self.versions]}, 200, etag)
+
+        self.http = app.test_client()
+
+    def test_unchanged_versions_skip_loading_the_rows(self):
+        etag = self.http.get("/rows").headers["ETag"]
+        response = self.http.get("/rows", headers={"If-None-Match": etag})
+        assert response.status_code == 304 and response.data == b""
+        assert response.headers["ETag"] == etag and response.headers["Cache-Control"] == "no-cache"
+        assert self.loads == 1
+
+    def test_updated_row_changes_the_etag(self):
+        etag = self.http.get("/rows").headers["ETag"]
+        self.versions[1] = (2, "2025-01-03T00:00:00+00:00")
+        response = self.http.get("/rows", headers={"If-None-Match": etag})
+        assert response.status_code == 200 and response.headers["ETag"] != etag
+        assert self.loads == 2
+        assert version_etag([(1, "a")], "x") != version_etag([(1, "a")], "y")
+
+
+if __name__ == "__main__":
+    unittest.main()
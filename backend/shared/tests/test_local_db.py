@@ -0,0 +1,251 @@
+import unittest
+import os
+import sys
+import tempfile
+import threading
+from unittest.mock import patch
+
+# Add the backend directory to path to find the shared package
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from postgrest.exceptions import APIError
+
+import shared.local_db as local_db
+from shared.local_db import MemoryClient, SQLiteClient, LocalStorage
+
+
+def make_rows():
+    rows = [{"id": i, "task_name": f"Task {i}", "owner_id": 1 if i % 2 else 2, "collaborators": [i % 3, 7],
+             "due_date": f"2025-02-{10 + i}", "project_id": i % 2 or None, "type": "parent",
+             "created_at": f"2025-01-0{i}T00:00:00+00:00"} for i in range(1, 7)]
+    rows.append({"id": 7, "task_name": "Untyped", "owner_id": 3, "collaborators": [], "due_date": None,
+                 "project_id": None, "type": None, "created_at": "2025-01-07T00:00:00+00:00"})
+    return rows
+
+
+class TestLocalBackends(unittest.TestCase):
+    """The in-memory and SQLite backends answer postgrest-py queries the same way, with Postgres semantics."""
+
+    def setUp(self):
+        self.clients = {"memory": MemoryClient({"task": make_rows(), "project": [{"id": 1, "proj_name": "Launch"}]}),
+                        "sqlite": SQLiteClient(":memory:")}
+        self.clients["sqlite"].seed({"task": make_rows(), "project": [{"id": 1, "proj_name": "Launch"}]})
+
+    def run_everywhere(self, fn):
+        results = {name: fn(client) for name, client in self.clients.items()}
+        assert results["sqlite"] == results["memory"], results
+        return results["memory"]
+
+    @staticmethod
+    def ids(response):
+        return [row["id"] for row in response.data]
+
+    def test_filters(self):
+        select = lambda c: c.table("task").select("*")
+        assert self.run_everywhere(lambda c: self.ids(select(c).eq("owner_id", 1).execute())) == [1, 3, 5]
+        assert self.run_everywhere(lambda c: self.ids(select(c).filter("collaborators", "cs", [7]).execute())) == [1, 2, 3, 4, 5, 6]
+        assert self.run_everywhere(lambda c: self.ids(select(c).is_("project_id", "null").execute())) == [2, 4, 6, 7]
+        assert self.run_everywhere(lambda c: self.ids(select(c).gte("due_date", "2025-02-15").execute())) == [5, 6]
+        assert self.run_everywhere(lambda c: self.ids(select(c).ilike("task_name", "untyp%").execute())) == [7]
+        assert self.run_everywhere(lambda c: self.ids(select(c).or_("owner_id.eq.3,collaborators.cs.[2]").execute())) == [2, 5, 7]
+
+    def test_in_never_matches_null(self):
+        # PostgREST sends in.(parent,None); like SQL IN, that does not match a NULL type
+        query = lambda c: self.ids(c.table("task").select("id").in_("type", ["parent", None]).execute())
+        assert self.run_everywhere(query) == [1, 2, 3, 4, 5, 6]
+        logical = lambda c: self.ids(c.table("task").select("id").or_("type.in.(parent,null)").execute())
+        assert self.run_everywhere(logical) == [1, 2, 3, 4, 5, 6]
+
+    def test_order_limit_count_and_embedding(self):
+        ordered = lambda c: self.ids(c.table("task").select("*").order("project_id", desc=True).order("id").limit(4).execute())
+        assert self.run_everywhere(ordered) == [2, 4, 6, 7]
+        counted = lambda c: c.table("task").select("id", count="exact").eq("owner_id", 2).limit(1).execute().count
+        assert self.run_everywhere(counted) == 3
+        embedded = lambda c: c.table("task").select("id, project:project_id(proj_name)").eq("id", 1).execute().data
+        assert self.run_everywhere(embedded) == [{"id": 1, "project": {"proj_name": "Launch"}}]
+
+    def test_writes(self):
+        def write(c):
+            created = c.table("task").insert({"task_name": "New", "owner_id": 4, "collaborators": [4]}).execute().data[0]
+            c.table("task").update({"collaborators": [5]}).eq("id", created["id"]).execute()
+            deleted = c.table("task").delete().eq("id", 1).execute().data
+            return (created["id"], "created_at" in created, [d["id"] for d in deleted],
+                    self.ids(c.table("task").select("id").filter("collaborators", "cs", [5]).execute()))
+
+        assert self.run_everywhere(write) == (8, True, [1], [8])
+        for client in self.clients.values():
+            with self.assertRaises(APIError):
+                client.table("task").insert({"id": 2, "task_name": "Clash"}).execute()
+
+    def test_array_rpcs(self):
+        def rpc(c):
+            params = {"p_table": "task", "p_id": 1, "p_column": "collaborators"}
+            added = c.rpc("array_append_ids", {**params, "p_values": [7, 8, None]}).execute().data
+            removed = c.rpc("array_remove_ids", {**params, "p_values": [1, 9]}).execute().data
+            return added, removed
+
+        assert self.run_everywhere(rpc) == ({"values": [1, 7, 8], "added": [8]}, {"values": [7, 8], "removed": [1]})
+        for client in self.clients.values():
+            with self.assertRaises(APIError):
+                client.rpc("array_append_ids", {"p_table": "task", "p_id": 2, "p_column": "collaborators",
+                                                "p_values": [7], "p_fail_if_present": True}).execute()
+            with self.assertRaises(APIError):
+                client.rpc("array_append_ids", {"p_table": "task", "p_id": 99, "p_column": "collaborators",
+                                                "p_values": [1]}).execute()
+            with self.assertRaises(APIError):
+                client.rpc("no_such_function", {}).execute()
+
+    def test_project_add_tasks_rpc(self):
+        def add(c):
+            params = {"p_id": 1, "p_task_ids": [4, 5], "p_collaborators": [2, 2]}
+            first = c.rpc("project_add_tasks", params).execute().data
+            # The updated row comes back whole, not just the two arrays
+            row = first.pop("project")
+            assert row["proj_name"] == "Launch" and row["tasks"] == [4, 5] and row["collaborators"] == [2]
+            try:
+                c.rpc("project_add_tasks", {**params, "p_task_ids": [5, 6], "p_collaborators": [3]}).execute()
+            except APIError as e:
+                duplicate = e.code
+            project = c.table("project").select("tasks, collaborators").eq("id", 1).single().execute().data
+            return first, duplicate, project
+
+        assert self.run_everywhere(add) == (
+            {"tasks": {"values": [4, 5], "added": [4, 5]}, "collaborators": {"values": [2], "added": [2]}},
+            "23505", {"tasks": [4, 5], "collaborators": [2]})
+
+    def test_unique_columns(self):
+        for client in self.clients.values():
+            client.table("task").insert([{"task_name": "A", "recurrence_key": "1:2025-01-13"},
+                                         {"task_name": "B"}, {"task_name": "C"}]).execute()
+            with self.assertRaises(APIError) as raised:
+                client.table("task").insert({"task_name": "D", "recurrence_key": "1:2025-01-13"}).execute()
+            assert raised.exception.code == "23505"
+            with self.assertRaises(APIError):
+                client.table("task").update({"recurrence_key": "1:2025-01-13"}).eq("id", 2).execute()
+            # Re-saving a row with its own key is not a conflict
+            client.table("task").update({"task_name": "A2", "recurrence_key": "1:2025-01-13"}).eq("id", 8).execute()
+
+    def test_single_raises_like_postgrest(self):
+        for client in self.clients.values():
+            assert client.table("task").select("id").eq("id", 3).single().execute().data == {"id": 3}
+            with self.assertRaises(APIError):
+                client.table("task").select("*").eq("id", 999).single().execute()
+
+    def test_concurrent_appends_are_atomic(self):
+        client = MemoryClient({"task": [{"id": 1, "collaborators": []}]}, latency=0.001)
+        threads = [threading.Thread(target=lambda v=v: client.rpc("array_append_ids", {
+            "p_table": "task", "p_id": 1, "p_column": "collaborators", "p_values": [v]}).execute()) for v in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert sorted(client.rows("task")[0]["collaborators"]) == list(range(20))
+        assert client.calls["rpc:array_append_ids"] == 20
+
+    def test_calls_are_counted_per_round_trip(self):
+        client = self.clients["memory"]
+        client.table("task").select("*").execute()
+        client.table("task").update({"status": "Done"}).eq("id", 1).execute()
+        client.rpc("array_remove_ids", {"p_table": "task", "p_id": 1, "p_column": "collaborators", "p_values": [7]}).execute()
+        client.rows("task")
+        assert client.calls == {"task": 2, "rpc:array_remove_ids": 1}
+        assert client.total_calls == 3
+
+    def test_memory_backend_plans_from_indexes(self):
+        client = self.clients["memory"]
+        client.table("task").select("*").eq("owner_id", 2).execute()
+        client.table("task").select("*").or_("collaborators.cs.[1],collaborators.cs.[2]").execute()
+        client.table("task").select("*").lt("due_date", "2025-02-13").execute()
+        stats = client.stats()
+        assert stats["full_scans"] == 0 and stats["index_lookups"] == 3
+        assert stats["rows_examined"] == 3 + 4 + 2
+
+    def test_sqlite_backend_uses_expression_and_array_indexes(self):
+        client = self.clients["sqlite"]
+        owner_plan = " ".join(client.explain(client.table("task").select("*").eq("owner_id", 1)))
+        collab_plan = " ".join(client.explain(client.table("task").select("*").filter("collaborators", "cs", [7])))
+        due_plan = " ".join(client.explain(client.table("task").select("*").gte("due_date", "2025-02-15")))
+        assert "task_owner_id" in owner_plan
+        assert "task__collaborators" in collab_plan and "SCAN task__collaborators" not in collab_plan
+        assert "task_due_date" in due_plan
+
+
+class TestLocalStorage(unittest.TestCase):
+    """Buckets in memory or on disk, behind the storage3 calls the repos make."""
+
+    def check_bucket(self, client):
+        bucket = client.storage.from_("task-files")
+        bucket.upload("attachments/a.pdf", b"%PDF", {"content-type": "application/pdf"})
+        with tempfile.NamedTemporaryFile(delete=False) as fh:
+            fh.write(b"streamed")
+        try:
+            bucket.upload("attachments/b.bin", fh.name)
+        finally:
+            os.unlink(fh.name)
+        with self.assertRaises(APIError) as raised:
+            bucket.upload("attachments/a.pdf", b"again")
+        assert "Duplicate" in str(raised.exception)
+        assert [o["name"] for o in bucket.list("attachments")] == ["a.pdf", "b.bin"]
+        assert bucket.download("attachments/b.bin") == b"streamed"
+        assert client.storage.content_types[("task-files", "attachments/a.pdf")] == "application/pdf"
+        assert client.storage.streamed == 1
+        assert client.calls["storage:upload"] == 3 and client.calls["storage:list"] == 1
+
+    def test_memory_storage(self):
+        client = MemoryClient()
+        self.check_bucket(client)
+        assert client.storage.from_("task-files").get_public_url("attachments/a.pdf") == "memory://task-files/attachments/a.pdf"
+
+    def test_file_storage_next_to_sqlite_database(self):
+        with tempfile.TemporaryDirectory() as folder:
+            client = SQLiteClient(os.path.join(folder, "local.sqlite3"))
+            self.check_bucket(client)
+            assert os.path.exists(os.path.join(folder, "local_storage", "task-files", "attachments", "a.pdf"))
+            with self.assertRaises(ValueError):
+                client.storage.from_("task-files").upload("../escape.txt", b"x")
+
+    def test_rejects_bucket_names_with_paths(self):
+        with self.assertRaises(ValueError):
+            LocalStorage().from_("../etc")
+
+
+class TestGetLocalClient(unittest.TestCase):
+    """DB_BACKEND picks one process-wide local client."""
+
+    def setUp(self):
+        patcher = patch.object(local_db, "_local_client", None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_sqlite_file_defaults_to_working_directory(self):
+        with tempfile.TemporaryDirectory() as folder:
+            cwd = os.getcwd()
+            os.chdir(folder)
+            try:
+                with patch.dict(os.environ, {}, clear=False):
+                    os.environ.pop("DB_SQLITE_PATH", None)
+                    os.environ.pop("DB_SEED_PATH", None)
+                    client = local_db.get_local_client("sqlite")
+                assert client.path == os.path.join(folder, "local.sqlite3")
+                assert local_db.get_local_client("sqlite") is client
+                client._conn.close()
+            finally:
+                os.chdir(cwd)
+
+    def test_memory_backend_is_seeded_from_file(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as fh:
+            fh.write('{"task": [{"id": 1, "task_name": "Seeded"}]}')
+        try:
+            with patch.dict(os.environ, {"DB_SEED_PATH": fh.name}):
+                client = local_db.get_local_client("memory")
+            assert client.rows("task")[0]["task_name"] == "Seeded"
+        finally:
+            os.unlink(fh.name)
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            local_db.get_local_client("mongo")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+import unittest
+import os
+import sqlite3
+import sys
+import tempfile
+
+# Add the backend directory to path to find the shared package
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from shared.outbox import NotificationOutbox, CLAIM_SECONDS
+
+
+class TestOutboxClaims(unittest.TestCase):
+    """Workers sharing one queue file never send the same event twice."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "outbox.sqlite3")
+        self.now = 1000.0
+        self.sent = []
+        self.on_send = None
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def worker(self, name):
+        def send(endpoint, payload):
+            self.sent.append((name, payload["n"]))
+            if self.on_send:
+                self.on_send(name, payload["n"])
+            return True
+
+        return NotificationOutbox(self.path, send=send, batch_size=3, clock=lambda: self.now)
+
+    def test_slow_batch_keeps_its_claims(self):
+        first, second = self.worker("first"), self.worker("second")
+        for n in range(3):
+            first.enqueue("/notifications/test", {"n": n})
+
+        def slow_send(name, n):
+            # Each send takes half the claim time; the other worker polls meanwhile
+            self.now += CLAIM_SECONDS / 2
+            if name == "first":
+                assert second.drain_once()["claimed"] == 0
+
+        self.on_send = slow_send
+        assert first.drain_once() == {"claimed": 3, "sent": 3, "retried": 0, "dead": 0, "lost": 0}
+        assert self.sent == [("first", 0), ("first", 1), ("first", 2)]
+        assert first.stats()["pending"] == 0
+
+    def test_stalled_worker_skips_events_taken_over(self):
+        first, second = self.worker("first"), self.worker("second")
+        for n in range(3):
+            first.enqueue("/notifications/test", {"n": n})
+
+        def stall(name, n):
+            # The first worker's first send outlasts its claims
+            if name == "first":
+                self.now += CLAIM_SECONDS + 1
+                assert second.drain_once()["sent"] == 3
+
+        self.on_send = stall
+        assert first.drain_once() == {"claimed": 3, "sent": 1, "retried": 0, "dead": 0, "lost": 2}
+        # Only the event whose send outlasted the claim goes out twice
+        assert sorted(n for _, n in self.sent) == [0, 0, 1, 2]
+        assert first.stats()["pending"] == 0
+
+    def test_claims_of_a_crashed_worker_expire(self):
+        crashed = self.worker("crashed")
+        crashed.enqueue("/notifications/test", {"n": 0})
+        crashed._claim_batch(self.now)
+        survivor = self.worker("survivor")
+        assert survivor.drain_once()["claimed"] == 0
+        self.now += CLAIM_SECONDS
+        assert survivor.drain_once()["sent"] == 1
+        assert self.sent == [("survivor", 0)]
+
+    def test_older_queue_files_are_upgraded(self):
+        conn = sqlite3.connect(self.path)
+        conn.execute("CREATE TABLE outbox (id INTEGER PRIMARY KEY AUTOINCREMENT, endpoint TEXT NOT NULL, "
+                     "payload TEXT NOT NULL, name_lookup TEXT, status TEXT NOT NULL DEFAULT 'pending', "
+                     "attempts INTEGER NOT NULL DEFAULT 0, next_attempt_at REAL NOT NULL, last_error TEXT, "
+                     "created_at REAL NOT NULL)")
+        conn.execute("INSERT INTO outbox (endpoint, payload, next_attempt_at, created_at) "
+                     "VALUES ('/notifications/test', '{\"n\": 0}', 0, 0)")
+        conn.commit()
+        conn.close()
+        assert self.worker("upgraded").drain_once()["sent"] == 1
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,127 @@
+import unittest
+import json
+import os
+import sys
+
+# Add the backend directory to path to find the shared package
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import requests
+
+from shared.service_client import ServiceClient, CircuitBreaker, CircuitOpenError
+
+
+class FakeAdapter(requests.adapters.BaseAdapter):
+    """Transport adapter answering from a handler(request) instead of the network."""
+
+    def __init__(self, handler):
+        super().__init__()
+        self.handler = handler
+        self.calls = []
+
+    def send(self, request, **kwargs):
+        self.calls.append((request, kwargs))
+        result = self.handler(request)
+        if isinstance(result, Exception):
+            raise result
+        status, body = result
+        response = requests.Response()
+        response.status_code = status
+        response._content = json.dumps(body).encode()
+        response.request = request
+        response.url = request.url
+        return response
+
+    def close(self):
+        pass
+
+
+class TestServiceClient(unittest.TestCase):
+    """Pooled inter-service client: timeouts, jittered retries, circuit breaking and metrics."""
+
+    def make_client(self, handler, **kwargs):
+        self.adapter = FakeAdapter(handler)
+        session = requests.Session()
+        session.mount("http://", self.adapter)
+        self.sleeps = []
+        self.now = [0.0]
+        breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30, clock=lambda: self.now[0])
+        return ServiceClient("tasks", "http://tasks.test", session=session, breaker=breaker,
+                             sleep=self.sleeps.append, **kwargs)
+
+    def test_get_retries_transient_failures_with_backoff(self):
+        responses = [requests.ConnectionError("refused"), (503, {}), (200, {"data": [1]})]
+        client = self.make_client(lambda request: responses.pop(0), retries=2, backoff=0.2)
+        response = client.get("/tasks/12", params={"limit": 5})
+        assert response.json() == {"data": [1]}
+        assert len(self.sleeps) == 2 and 0 <= self.sleeps[0] <= 0.2 and 0 <= self.sleeps[1] <= 0.4
+        assert self.adapter.calls[0][0].url == "http://tasks.test/tasks/12?limit=5"
+        assert self.adapter.calls[0][1]["timeout"] == (2.0, 10.0)
+        stats = client.metrics.snapshot()["tasks GET /tasks/{id}"]
+        assert stats["count"] == 3 and stats["errors"] == 2 and stats["retries"] == 2
+        assert client.breaker.state == "closed"
+
+    def test_post_is_not_retried_by_default(self):
+        client = self.make_client(lambda request: requests.Timeout("slow"))
+        with self.assertRaises(requests.Timeout):
+            client.post("/tasks/update-project/bulk", json={"task_ids": [1]}, timeout=1)
+        assert len(self.adapter.calls) == 1 and self.adapter.calls[0][1]["timeout"] == 1
+        assert self.sleeps == []
+
+    def test_client_errors_are_returned_without_retry(self):
+        client = self.make_client(lambda request: (404, {"Message": "not found"}))
+        assert client.get("/tasks/9").status_code == 404
+        assert len(self.adapter.calls) == 1 and client.breaker.failures == 0
+
+    def test_circuit_opens_fails_fast_and_recovers(self):
+        healthy = [False]
+        client = self.make_client(lambda request: (200, {}) if healthy[0] else (503, {}), retries=0)
+        for _ in range(3):
+            assert client.get("/tasks/1").status_code == 503
+        assert client.breaker.state == "open"
+        with self.assertRaises(CircuitOpenError):
+            client.get("/tasks/1")
+        assert len(self.adapter.calls) == 3
+        assert client.metrics.snapshot()["tasks GET /tasks/{id}"]["rejected"] == 1
+
+        # After the reset timeout one trial call goes through and closes the circuit
+        self.now[0] = 31
+        healthy[0] = True
+        assert client.get("/tasks/1").status_code == 200
+        assert client.breaker.state == "closed"
+
+    def test_handled_server_errors_do_not_open_circuit(self):
+        client = self.make_client(lambda request: (500, {"Message": "bad row"}), retries=0)
+        for _ in range(5):
+            assert client.get("/tasks/1").status_code == 500
+        assert client.breaker.state == "closed" and client.breaker.failures == 0
+        assert client.metrics.snapshot()["tasks GET /tasks/{id}"]["errors"] == 5
+
+    def test_unexpected_errors_release_the_trial_call(self):
+        failures = [requests.ConnectionError("down")] * 3 + [ValueError("bad request")]
+        client = self.make_client(lambda request: failures.pop(0) if failures else (200, {}), retries=0)
+        for _ in range(3):
+            with self.assertRaises(requests.ConnectionError):
+                client.get("/tasks/1")
+        self.now[0] = 31
+        with self.assertRaises(ValueError):
+            client.get("/tasks/1")
+        # The failed trial said nothing about the service, so the next call may try again
+        assert client.breaker.state == "half_open"
+        assert client.get("/tasks/1").status_code == 200
+        assert client.breaker.state == "closed"
+
+    def test_failed_trial_reopens_circuit(self):
+        client = self.make_client(lambda request: requests.ConnectionError("down"), retries=0)
+        for _ in range(3):
+            with self.assertRaises(requests.ConnectionError):
+                client.get("/tasks/1")
+        self.now[0] = 31
+        assert client.breaker.state == "half_open"
+        with self.assertRaises(requests.ConnectionError):
+            client.get("/tasks/1")
+        assert client.breaker.state == "open"
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import unittest
+import os
+import sys
+from unittest.mock import patch
+
+# Add the backend directory to path to find the shared package
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import httpx
+
+import shared.local_db as local_db
+from shared.local_db import MemoryClient
+from shared.supabase_client import SupabaseClientFactory, LazyClient, get_supabase_client
+
+
+def task_row(task_id):
+    return {"id": task_id, "task_name": f"Task {task_id}", "owner_id": 1, "collaborators": [1]}
+
+
+class TestSupabaseClientFactory(unittest.TestCase):
+    """One lazily built, pooled client per process, with per-table latency stats."""
+
+    def setUp(self):
+        self.requests = []
+
+        def handler(request):
+            self.requests.append(request)
+            if request.url.path.startswith("/rest/v1/task") and request.method == "GET":
+                single = "vnd.pgrst.object" in request.headers.get("accept", "")
+                return httpx.Response(200, json=task_row(1) if single else [task_row(1)])
+            if request.url.path.startswith("/rest/v1/rpc/"):
+                return httpx.Response(200, json=task_row(1))
+            return httpx.Response(404, json={"message": "not found"})
+
+        self.factory = SupabaseClientFactory("http://supabase.test", "service-key",
+                                             transport=httpx.MockTransport(handler))
+
+    def tearDown(self):
+        self.factory.close()
+
+    def test_client_is_built_on_first_use_and_shared(self):
+        first, second = LazyClient(self.factory), LazyClient(self.factory)
+        assert self.factory._client is None
+        assert first.table("task").select("*").eq("id", 1).single().execute().data["id"] == 1
+        assert second.postgrest is first.postgrest
+        assert self.requests[0].headers["apikey"] == "service-key"
+
+    def test_latency_is_recorded_per_table(self):
+        client = LazyClient(self.factory)
+        client.table("task").select("*").eq("id", 1).execute()
+        client.table("task").select("*").execute()
+        client.rpc("array_append_ids", {"p_task_id": 1}).execute()
+        with self.assertRaises(Exception):
+            client.table("users").select("*").execute()
+        stats = self.factory.metrics.snapshot()
+        assert stats["task"]["count"] == 2 and stats["task"]["errors"] == 0
+        assert stats["rpc:array_append_ids"]["count"] == 1
+        assert stats["users"]["errors"] == 1
+        assert stats["task"]["max_ms"] >= stats["task"]["avg_ms"] >= 0
+
+    def test_db_backend_selects_a_local_client(self):
+        with patch.object(local_db, "_local_client", None), patch.dict(os.environ, {"DB_BACKEND": "memory"}):
+            os.environ.pop("DB_SEED_PATH", None)
+            client = get_supabase_client()
+            assert isinstance(client, MemoryClient)
+            assert get_supabase_client() is client
+        assert isinstance(get_supabase_client(), LazyClient)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,125 @@
+-- Atomic append/remove for the JSONB id arrays used by the tasks and projects services:
+--   task.subtasks, task.collaborators, project.tasks, project.collaborators
+--
+-- Each call locks the row, computes the new array and writes it inside one
+-- transaction, so concurrent appends to the same row queue on the row lock instead
+-- of overwriting each other, and the services no longer read the row first.
+-- Called through supabase-py as client.rpc("array_append_ids", {...}).
+
+create or replace function public._assert_id_array_column(p_table text, p_column text)
+returns void
+language plpgsql
+immutable
+as $$
+begin
+  if (p_table, p_column) not in (('task', 'subtasks'), ('task', 'collaborators'),
+                                 ('project', 'tasks'), ('project', 'collaborators')) then
+    raise exception 'Unsupported array column %.%', p_table, p_column using errcode = '22023';
+  end if;
+end;
+$$;
+
+-- Append ids that are not already present, keeping first-seen order.
+-- Returns {"values": <new array>, "added": <ids actually appended>}.
+-- With p_fail_if_present, raises unique_violation (23505) and changes nothing if any
+-- of p_values is already in the array.
+-- Raises no_data_found (P0002) if the row does not exist.
+create or replace function public.array_append_ids(
+  p_table text,
+  p_column text,
+  p_id bigint,
+  p_values bigint[],
+  p_fail_if_present boolean default false
+)
+returns jsonb
+language plpgsql
+as $$
+declare
+  current_values jsonb;
+  added jsonb;
+  requested integer;
+  n_rows integer;
+begin
+  perform public._assert_id_array_column(p_table, p_column);
+
+  execute format('select coalesce(%I, ''[]''::jsonb) from public.%I where id = $1 for update', p_column, p_table)
+    into current_values
+    using p_id;
+  get diagnostics n_rows = row_count;
+  if n_rows = 0 then
+    raise exception '% % not found', p_table, p_id using errcode = 'P0002';
+  end if;
+
+  select coalesce(jsonb_agg(to_jsonb(v) order by ord), '[]'::jsonb)
+    into added
+    from (select v, min(ord) as ord
+            from unnest(p_values) with ordinality as t(v, ord)
+           where v is not null
+           group by v) ids
+   where not current_values @> jsonb_build_array(v);
+
+  if p_fail_if_present then
+    select count(distinct v) into requested from unnest(p_values) as v where v is not null;
+    if jsonb_array_length(added) < requested then
+      raise exception 'Some ids are already in %.% of % %', p_table, p_column, p_table, p_id
+        using errcode = '23505';
+    end if;
+  end if;
+
+  if jsonb_array_length(added) > 0 then
+    execute format('update public.%I set %I = $2 where id = $1', p_table, p_column)
+      using p_id, current_values || added;
+  end if;
+
+  return jsonb_build_object('values', current_values || added, 'added', added);
+end;
+$$;
+
+-- Remove every occurrence of p_values, keeping the order of the remaining ids.
+-- Returns {"values": <new array>, "removed": <ids that were present>}.
+-- Raises no_data_found (P0002) if the row does not exist.
+create or replace function public.array_remove_ids(
+  p_table text,
+  p_column text,
+  p_id bigint,
+  p_values bigint[]
+)
+returns jsonb
+language plpgsql
+as $$
+declare
+  current_values jsonb;
+  remaining jsonb;
+  removed jsonb;
+  n_rows integer;
+begin
+  perform public._assert_id_array_column(p_table, p_column);
+
+  execute format('select coalesce(%I, ''[]''::jsonb) from public.%I where id = $1 for update', p_column, p_table)
+    into current_values
+    using p_id;
+  get diagnostics n_rows = row_count;
+  if n_rows = 0 then
+    raise exception '% % not found', p_table, p_id using errcode = 'P0002';
+  end if;
+
+  select coalesce(jsonb_agg(e order by ord) filter (where not e = any(targets)), '[]'::jsonb),
+         coalesce(jsonb_agg(distinct e) filter (where e = any(targets)), '[]'::jsonb)
+    into remaining, removed
+    from jsonb_array_elements(current_values) with ordinality as t(e, ord),
+         (select array_agg(to_jsonb(v)) as targets from unnest(p_values) as v) target_ids;
+
+  if jsonb_array_length(removed) > 0 then
+    execute format('update public.%I set %I = $2 where id = $1', p_table, p_column)
+      using p_id, remaining;
+  end if;
+
+  return jsonb_build_object('values', remaining, 'removed', removed);
+end;
+$$;
+
+-- Only the backend services (service_role key) may call these
+revoke all on function public.array_append_ids(text, text, bigint, bigint[], boolean) from public, anon, authenticated;
+revoke all on function public.array_remove_ids(text, text, bigint, bigint[]) from public, anon, authenticated;
+grant execute on function public.array_append_ids(text, text, bigint, bigint[], boolean) to service_role;
+grant execute on function public.array_remove_ids(text, text, bigint, bigint[]) to service_role;
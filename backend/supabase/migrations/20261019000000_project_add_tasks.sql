@@ -0,0 +1,32 @@
+-- Add a task (and its subtasks) to a project in one call: append the task ids to
+-- project.tasks and the task collaborators to project.collaborators in a single
+-- transaction, so a failure cannot leave the tasks added without their collaborators.
+-- Called through supabase-py as client.rpc("project_add_tasks", {...}).
+
+-- Returns {"tasks": {"values", "added"}, "collaborators": {"values", "added"},
+-- "project": <the updated project row>}.
+-- Raises unique_violation (23505) and changes nothing if any of p_task_ids is
+-- already in the project, and no_data_found (P0002) if the project does not exist.
+create or replace function public.project_add_tasks(
+  p_id bigint,
+  p_task_ids bigint[],
+  p_collaborators bigint[]
+)
+returns jsonb
+language plpgsql
+as $$
+declare
+  tasks jsonb;
+  collaborators jsonb;
+  project_row jsonb;
+begin
+  tasks := public.array_append_ids('project', 'tasks', p_id, p_task_ids, true);
+  collaborators := public.array_append_ids('project', 'collaborators', p_id, coalesce(p_collaborators, '{}'));
+  select to_jsonb(p.*) into project_row from public.project p where p.id = p_id;
+  return jsonb_build_object('tasks', tasks, 'collaborators', collaborators, 'project', project_row);
+end;
+$$;
+
+-- Only the backend services (service_role key) may call this
+revoke all on function public.project_add_tasks(bigint, bigint[], bigint[]) from public, anon, authenticated;
+grant execute on function public.project_add_tasks(bigint, bigint[], bigint[]) to service_role;
@@ -0,0 +1,8 @@
+-- Generated occurrences of recurring tasks carry "<completed task id>:<due date>"
+-- in recurrence_key. The unique index lets only one of several workers insert the
+-- same occurrence; the others get unique_violation (23505) and skip it.
+-- NULL for every task not generated by the recurrence worker.
+
+alter table public.task add column if not exists recurrence_key text;
+
+create unique index if not exists task_recurrence_key on public.task (recurrence_key);
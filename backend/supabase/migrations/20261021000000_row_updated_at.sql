@@ -0,0 +1,24 @@
+-- Row versions for conditional GETs: updated_at is set on insert and moved by a
+-- trigger on every update, including the array functions' updates, so the ETag
+-- of a task or project view can be computed from (id, updated_at) alone.
+
+create or replace function public.set_updated_at()
+returns trigger
+language plpgsql
+as $$
+begin
+  new.updated_at := clock_timestamp();
+  return new;
+end;
+$$;
+
+alter table public.task add column if not exists updated_at timestamptz not null default now();
+alter table public.project add column if not exists updated_at timestamptz not null default now();
+
+drop trigger if exists task_set_updated_at on public.task;
+create trigger task_set_updated_at before update on public.task
+  for each row execute function public.set_updated_at();
+
+drop trigger if exists project_set_updated_at on public.project;
+create trigger project_set_updated_at before update on public.project
+  for each row execute function public.set_updated_at();
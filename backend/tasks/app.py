@@ -1,18 +1,41 @@
 import os
+import sys
+import threading
 from flask import Flask
 from flask_cors import CORS
 from dotenv import load_dotenv
 
+# The backend directory, for the shared package
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
 load_dotenv()
 
+def _build_indexes(service):
+    for name, rebuild in (("search", service.rebuild_search_index), ("due date", service.rebuild_due_index)):
+        try:
+            print(rebuild().get("Message"))
+        except Exception as e:
+            print(f"Warning: Task {name} index rebuild failed: {e}")
+
 def create_app():
     app = Flask(__name__)
     CORS(app, origins=os.getenv("CORS_ORIGINS", "*").split(","), supports_credentials=True)
 
     # Register routes
-    from controllers.task_controller import task_bp
+    from controllers.task_controller import task_bp, service
     app.register_blueprint(task_bp)
 
+    # Start draining notifications queued by write paths (including any left from a restart)
+    from shared.outbox import get_default_outbox
+    get_default_outbox()
+
+    # Run recurrence jobs left queued or unfinished by a restart
+    service.recurrence_worker.start()
+
+    # Build the in-memory indexes in the background. Until then /tasks/search answers 503
+    # and /tasks/upcoming-deadlines falls back to querying Supabase.
+    threading.Thread(target=_build_indexes, args=(service,), name="task-index-rebuild", daemon=True).start()
+
     return app
 
 if __name__ == "__main__":
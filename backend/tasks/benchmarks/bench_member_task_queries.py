@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Benchmark: per-member vs set-based team/department task queries.
+
+Compares the old per-member loop (two queries per member) against
+SupabaseTaskRepo.find_parent_tasks_by_department for growing department
+sizes, using the shared in-memory client with a simulated round-trip latency.
+
+Usage:
+    python benchmarks/bench_member_task_queries.py [latency_ms]
+"""
+
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.append(os.path.dirname(ROOT))
+
+os.environ.setdefault("SUPABASE_URL", "http://localhost")
+os.environ.setdefault("SUPABASE_SERVICE_KEY", "bench-key")
+
+from repo.supa_task_repo import SupabaseTaskRepo, TABLE
+from shared.local_db import MemoryClient
+
+DEPT_SIZES = [10, 50, 100, 300, 1000]
+TASKS_PER_MEMBER = 3
+
+
+def build_client(dept_size, latency):
+    users = [{"userid": uid, "dept_id": 1} for uid in range(1, dept_size + 1)]
+    tasks = []
+    task_id = 1
+    for uid in range(1, dept_size + 1):
+        for _ in range(TASKS_PER_MEMBER):
+            peer = uid % dept_size + 1
+            tasks.append({"id": task_id, "owner_id": uid, "collaborators": [uid, peer], "type": "parent"})
+            task_id += 1
+    return MemoryClient({"user": users, "task": tasks}, latency=latency)
+
+
+def legacy_find_parent_tasks_by_department(client, dept_id):
+    """The pre-batching implementation: two queries per member."""
+    user_res = client.table("user").select("userid").eq("dept_id", dept_id).execute()
+    user_ids = [user["userid"] for user in (user_res.data or [])]
+    all_tasks = []
+    for user_id in user_ids:
+        owner_res = client.table(TABLE).select("*").eq("owner_id", user_id).in_("type", ["parent", None]).execute()
+        collab_res = client.table(TABLE).select("*").filter("collaborators", "cs", [user_id]).in_("type", ["parent", None]).execute()
+        all_tasks.extend((owner_res.data or []) + (collab_res.data or []))
+    return list({t["id"]: t for t in all_tasks}.values())
+
+
+def measure(fn, client):
+    start = time.perf_counter()
+    result = fn()
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    return len(result), client.total_calls, elapsed_ms
+
+
+def main():
+    latency_ms = float(sys.argv[1]) if len(sys.argv) > 1 else 2.0
+    latency = latency_ms / 1000
+
+    print(f"Simulated round-trip latency: {latency_ms:.1f} ms")
+    print(f"{'members':>8} | {'legacy queries':>14} {'legacy ms':>10} | {'set-based queries':>17} {'set-based ms':>12} | {'speedup':>7}")
+    print("-" * 82)
+
+    for size in DEPT_SIZES:
+        legacy_client = build_client(size, latency)
+        legacy_rows, legacy_calls, legacy_ms = measure(
+            lambda: legacy_find_parent_tasks_by_department(legacy_client, 1), legacy_client)
+
+        batched_client = build_client(size, latency)
+        repo = SupabaseTaskRepo(client=batched_client)
+        batched_rows, batched_calls, batched_ms = measure(
+            lambda: repo.find_parent_tasks_by_department(1), batched_client)
+
+        assert legacy_rows == batched_rows, "set-based query returned different tasks"
+        print(f"{size:>8} | {legacy_calls:>14} {legacy_ms:>10.1f} | {batched_calls:>17} {batched_ms:>12.1f} | {legacy_ms / batched_ms:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
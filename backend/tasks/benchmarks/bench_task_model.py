@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Task row conversion before and after the compact model layer.
+
+"before" rebuilds the previous model: a regular (non-slotted) dataclass whose
+from_dict parses every timestamp with dateutil. "after" is the current Task with
+slots, the datetime.fromisoformat fast path and the bulk from_rows/to_rows.
+Reports wall time for both directions and the memory held by the objects.
+
+Usage:
+    python benchmarks/bench_task_model.py [rows]
+"""
+
+import dataclasses
+import os
+import sys
+import time
+import tracemalloc
+from unittest.mock import patch
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from dateutil import parser as dateparser
+import models.task as task_module
+from models.task import Task
+
+DEFAULT_ROWS = 100_000
+
+
+def build_rows(n):
+    return [
+        {
+            "id": i,
+            "owner_id": i % 500,
+            "task_name": f"Task {i}",
+            "description": "Quarterly planning",
+            "due_date": f"2025-{i % 12 + 1:02d}-{i % 28 + 1:02d}T17:00:00+00:00",
+            "status": "Ongoing",
+            "collaborators": [i % 500, (i + 1) % 500],
+            "project_id": i % 40,
+            "parent_task": None,
+            "type": "parent",
+            "subtasks": [],
+            "attachments": [],
+            "created_at": "2025-01-01T09:30:00.123456+00:00",
+            "priority": i % 10 + 1,
+            "recurrence_type": "weekly" if i % 5 == 0 else None,
+            "recurrence_end_date": "2025-12-31T00:00:00+00:00" if i % 5 == 0 else None,
+            "reminder_intervals": [7, 3, 1],
+        }
+        for i in range(n)
+    ]
+
+
+def legacy_task_class():
+    """The pre-slots Task: same fields and converters, but a regular dataclass."""
+    fields = [
+        (f.name, f.type, dataclasses.field(default=f.default, default_factory=f.default_factory, init=f.init))
+        for f in dataclasses.fields(Task)
+    ]
+    namespace = {"to_dict": Task.to_dict, "from_dict": classmethod(Task.from_dict.__func__)}
+    return dataclasses.make_dataclass("LegacyTask", fields, namespace=namespace)
+
+
+def dateutil_only(value):
+    """The previous timestamp handling: dateutil for every string."""
+    try:
+        return dateparser.parse(value)
+    except Exception:
+        return None
+
+
+def measure(from_rows, to_rows, rows):
+    start = time.perf_counter()
+    objects = from_rows(rows)
+    parse_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    out = to_rows(objects)
+    dump_s = time.perf_counter() - start
+    assert len(out) == len(rows)
+
+    # Memory is traced in a separate pass, tracing slows conversion down a lot
+    del objects, out
+    tracemalloc.start()
+    objects = from_rows(rows)
+    held_mb = tracemalloc.get_traced_memory()[0] / 1e6
+    tracemalloc.stop()
+    return parse_s, dump_s, held_mb
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ROWS
+    rows = build_rows(n)
+    print(f"Converting {n} task rows")
+    print(f"{'variant':>8} | {'from_dict s':>11} | {'to_dict s':>9} | {'objects MB':>10}")
+    print("-" * 49)
+
+    legacy = legacy_task_class()
+    with patch.object(task_module, "_parse_datetime", dateutil_only):
+        before = measure(lambda rs: [legacy.from_dict(r) for r in rs], lambda objs: [o.to_dict() for o in objs], rows)
+    after = measure(Task.from_rows, Task.to_rows, rows)
+
+    for name, (parse_s, dump_s, held_mb) in (("before", before), ("after", after)):
+        print(f"{name:>8} | {parse_s:>11.3f} | {dump_s:>9.3f} | {held_mb:>10.1f}")
+    print(f"\nfrom_dict speedup: {before[0] / after[0]:.1f}x, memory: {before[2] / after[2]:.2f}x less")
+
+
+if __name__ == "__main__":
+    main()
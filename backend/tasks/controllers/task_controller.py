@@ -1,10 +1,28 @@
-from flask import Blueprint, request, jsonify
+import io
+from urllib.parse import quote
+from flask import Blueprint, Response, current_app, request, jsonify, stream_with_context
 from services.task_service import TaskService
-from utils.parsing import parse_task_payload, parse_subtask_payload, parse_task_update_payload
+from utils.parsing import parse_task_payload, parse_subtask_payload, parse_task_update_payload, parse_date_range_args, parse_search_args, parse_id_list_arg, MAX_FILTER_IDS
+from utils.pagination import PageRequest
+from shared.etag import etag_json_response, not_modified, version_etag
+from utils.search_index import DEFAULT_SEARCH_LIMIT, MAX_SEARCH_LIMIT
+from utils.task_import import detect_import_format, iter_import_records
+from werkzeug.utils import secure_filename
 
 task_bp = Blueprint("tasks", __name__)
 service = TaskService()
 
+
+def _pending_uploads(attachments: list) -> list:
+    """Uploads among `attachments` still finishing in the background, for the client to poll."""
+    return [{"upload_id": a["upload_id"], "name": a["name"], "status": a["status"]}
+            for a in attachments if a.get("upload_id")]
+
+def _content_disposition(filename: str) -> str:
+    """`inline` Content-Disposition with an ASCII fallback name and the RFC 6266 `filename*` for the real one."""
+    fallback = secure_filename(filename) or "file"
+    return f"inline; filename=\"{fallback}\"; filename*=UTF-8''{quote(filename, safe='')}"
+
 @task_bp.route("/tasks/manager-task/create", methods=["POST"])
 def manager_create_task():
     """
@@ -25,7 +43,7 @@ def manager_create_task():
     - subtasks: List of subtask IDs
     - priority: Priority level (integer)
     - reminder_intervals: List of days before due date to send reminders (comma-separated string or list, defaults to [7, 3, 1])
-    - attachment: PDF file to be uploaded
+    - attachment: File to be uploaded (content type detected; large files finish uploading in the background)
 
     RETURNS:
     {
@@ -49,12 +67,17 @@ def manager_create_task():
             try:
                 attachments = service.repo.upload_attachment(file)
                 payload["attachments"] = attachments
+            except ValueError:
+                raise
             except Exception as e:
                 raise Exception(f"Upload failed: {str(e)}")
 
 
         result = service.manager_create(payload)
         status = result.pop("__status", 201)
+        uploads = _pending_uploads(attachments) if file else []
+        if uploads:
+            result["uploads"] = uploads
 
         recurrence_type = payload.get("recurrence_type")
         recurrence_end_date = payload.get("recurrence_end_date")
@@ -100,7 +123,7 @@ def staff_create_task():
     - type: Task type ("parent" or "subtask") - defaults to "parent"
     - priority: Priority level (integer)
     - reminder_intervals: List of days before due date to send reminders (comma-separated string or list, defaults to [7, 3, 1])
-    - attachment: PDF file to be uploaded
+    - attachment: File to be uploaded (content type detected; large files finish uploading in the background)
 
     Note: owner_id is automatically added to the collaborators list
 
@@ -126,11 +149,16 @@ def staff_create_task():
             try:
                 attachments = service.repo.upload_attachment(file)
                 payload["attachments"] = attachments
+            except ValueError:
+                raise
             except Exception as e:
                 raise Exception(f"Upload failed: {str(e)}")
 
         result = service.staff_create(payload)
         status = result.pop("__status", 201)
+        uploads = _pending_uploads(attachments) if file else []
+        if uploads:
+            result["uploads"] = uploads
 
         recurrence_type = payload.get("recurrence_type")
         recurrence_end_date = payload.get("recurrence_end_date")
@@ -299,6 +327,70 @@ def staff_create_subtask():
     except Exception as e:
         return jsonify({"Message": str(e), "Code": 500}), 500
 
+@task_bp.route("/tasks/import", methods=["POST"])
+def import_tasks():
+    """
+    Create many tasks from a CSV or JSON-lines upload, read row by row.
+
+    Body: the file as a multipart "file" field, or the raw request body.
+    CSV columns / JSON keys are the manager-task/create fields, plus:
+    - ref: Label for the row, so other rows can point at it
+    - parent_ref: ref of a parent task in the same file (makes the row a subtask)
+
+    Query Parameters:
+    - format: "csv" or "jsonl" (default: from the file name or Content-Type)
+    - importer_id: ID of the user importing, named in collaborator notifications
+
+    RETURNS:
+    {
+        "Message": "Imported <n> of <m> tasks",
+        "summary": {"received": int, "created": int, "failed": int},
+        "data": [{"row": int, "id": int, "task_name": str}, ...],
+        "errors": [{"row": int, "task_name": str, "error": str}, ...],
+        "Code": 201
+    }
+
+    RESPONSES:
+        201: Every row imported
+        207: Some rows imported, the rest are listed in "errors"
+        400: No row imported, unknown format or too many rows
+        500: Internal Server Error
+    """
+    try:
+        file = request.files.get("file")
+        if file:
+            stream, filename, content_type = file.stream, file.filename, file.mimetype
+        else:
+            stream, filename, content_type = request.stream, None, request.mimetype
+        fmt = detect_import_format(request.args.get("format"), content_type, filename)
+        importer_id = request.args.get("importer_id", type=int)
+
+        records = iter_import_records(io.BufferedReader(_ReadableStream(stream)), fmt)
+        result = service.import_tasks(records, importer_id)
+        status = result.pop("__status", 201)
+        result["Code"] = status
+        return jsonify(result), status
+    except ValueError as ve:
+        return jsonify({"Message": str(ve), "Code": 400}), 400
+    except Exception as e:
+        return jsonify({"Message": str(e), "Code": 500}), 500
+
+
+class _ReadableStream(io.RawIOBase):
+    """Adapts a WSGI input stream (which only has read()) for io.TextIOWrapper."""
+
+    def __init__(self, stream):
+        self._stream = stream
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self._stream.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+
 @task_bp.route("/tasks/update", methods=["PUT", "PATCH"])
 def update_task():
     """
@@ -350,11 +442,16 @@ def update_task():
                     payload["attachments"] = existing_attachments + new_attachments
                 else:
                     payload["attachments"] = new_attachments
+            except ValueError:
+                raise
             except Exception as e:
                 raise Exception(f"Upload failed: {str(e)}")
 
         result = service.update_task_by_id(payload)
         status = result.pop("__status", 200)
+        uploads = _pending_uploads(new_attachments) if file else []
+        if uploads:
+            result["uploads"] = uploads
         result["Code"] = status
         return jsonify(result), status
     except ValueError as ve:
@@ -377,8 +474,100 @@ def get_task_by_id(task_id: int):
 # get tasks by user_id (in owner_id or collaborators) with nested subtasks
 @task_bp.route("/tasks/user-task/<int:user_id>", methods=["GET"])
 def get_tasks_by_user(user_id: int):
+    """
+    Get parent tasks where the user is owner or collaborator, with nested subtasks.
+
+    Query Parameters (optional):
+    - limit: Page size (1-500); enables keyset pagination ordered by created_at, id
+    - cursor: Opaque cursor from a previous response's pagination.next_cursor
+    - fields: Comma-separated task columns to return (id and created_at are always included)
+    - start_date / end_date: Inclusive YYYY-MM-DD range, applied in the database query
+    - date_field: Column the range applies to, "created_at" (default) or "due_date"
+
+    RESPONSES:
+        200: Tasks found and returned (paginated responses include "pagination";
+             date-filtered responses include the applied "date_filter")
+        304: Unchanged since the ETag sent in If-None-Match
+        400: Invalid limit, cursor, fields or date range
+        404: No tasks found for this user
+        500: Internal Server Error
+    """
     try:
-        result = service.get_by_user(user_id)
+        page = PageRequest.from_args(request.args)
+        date_range = parse_date_range_args(request.args)
+        # Answer an unchanged view from the row versions, before the rows are loaded
+        etag = version_etag(request.args.to_dict(flat=False), service.get_by_user_versions(user_id, page, date_range))
+        unchanged = not_modified(etag)
+        if unchanged is not None:
+            return unchanged
+        result = service.get_by_user(user_id, page, date_range)
+        status = result.pop("__status", 200)
+        result["Code"] = status
+        return etag_json_response(result, status, etag)
+    except ValueError as ve:
+        return jsonify({"Message": str(ve), "Code": 400}), 400
+    except Exception as e:
+        return jsonify({"Message": str(e), "Code": 500}), 500
+
+
+@task_bp.route("/tasks/search", methods=["GET"])
+def search_tasks():
+    """
+    Search task names, descriptions and comments, limited to tasks the user owns or collaborates on.
+
+    Query Parameters:
+    - q: Search text (required); every word must match, words also match as prefixes
+    - user_id: ID of the user searching (required)
+    - limit: Max results (1-100, default 20)
+
+    RESPONSES:
+        200: Matching tasks, best first, each with a "score"
+        400: Missing q/user_id or invalid limit
+        503: Search disabled or index still being built
+        500: Internal Server Error
+    """
+    try:
+        args = parse_search_args(request.args, DEFAULT_SEARCH_LIMIT, MAX_SEARCH_LIMIT)
+        result = service.search_tasks(args["user_id"], args["query"], args["limit"])
+        status = result.pop("__status", 200)
+        result["Code"] = status
+        return jsonify(result), status
+    except ValueError as ve:
+        return jsonify({"Message": str(ve), "Code": 400}), 400
+    except Exception as e:
+        return jsonify({"Message": str(e), "Code": 500}), 500
+
+@task_bp.route("/tasks/search/rebuild", methods=["POST"])
+def rebuild_search_index():
+    """
+    Rebuild the task search index from Supabase (also done at startup).
+
+    RESPONSES:
+        200: Index rebuilt, with its task and term counts
+        503: Search disabled
+        500: Internal Server Error
+    """
+    try:
+        result = service.rebuild_search_index()
+        status = result.pop("__status", 200)
+        result["Code"] = status
+        return jsonify(result), status
+    except Exception as e:
+        return jsonify({"Message": str(e), "Code": 500}), 500
+
+@task_bp.route("/tasks/<int:task_id>/search/refresh", methods=["POST"])
+def refresh_task_search_index(task_id: int):
+    """
+    Re-index one task and its comments, called by the comments service after comment changes.
+
+    RESPONSES:
+        200: Task re-indexed
+        404: Task not found (removed from the index)
+        503: Search disabled
+        500: Internal Server Error
+    """
+    try:
+        result = service.refresh_search_index(task_id)
         status = result.pop("__status", 200)
         result["Code"] = status
         return jsonify(result), status
@@ -394,6 +583,11 @@ def get_tasks_by_project(project_id: int):
     Parameters:
     - project_id: ID of the project
     
+    Query Parameters (optional):
+    - limit: Page size (1-500); enables keyset pagination ordered by created_at, id
+    - cursor: Opaque cursor from a previous response's pagination.next_cursor
+    - fields: Comma-separated task columns to return (id and created_at are always included)
+
     RETURNS:
     {
         "data": [ ... list of tasks ... ],
@@ -406,10 +600,13 @@ def get_tasks_by_project(project_id: int):
         500: Internal Server Error
     """
     try:
-        result = service.get_tasks_by_project(project_id)
+        page = PageRequest.from_args(request.args)
+        result = service.get_tasks_by_project(project_id, page)
         status = result.pop("__status", 200)
         result["Code"] = status
         return jsonify(result), status
+    except ValueError as ve:
+        return jsonify({"Message": str(ve), "Code": 400}), 400
     except Exception as e:
         return jsonify({"Message": str(e), "Code": 500}), 500
 
@@ -450,6 +647,10 @@ def bulk_update_project_id():
     Required fields in JSON body:
     - task_ids: List of task IDs (integers) to update
     - project_id: The project ID (integer) to set for all tasks
+
+    Optional fields in JSON body:
+    - chunk_size: Max task IDs per database query (integer, defaults to 200).
+      Lower it for very large batches to stay within URL/payload limits.
     
     RETURNS:
     {
@@ -482,9 +683,10 @@ def bulk_update_project_id():
         
         task_ids = data["task_ids"]
         project_id = data["project_id"]
+        chunk_size = data.get("chunk_size")
         
         # Call service to perform bulk update
-        result = service.bulk_update_project_id(task_ids, project_id)
+        result = service.bulk_update_project_id(task_ids, project_id, chunk_size)
         status = result.pop("__status", 200)
         result["Code"] = status
         
@@ -537,6 +739,11 @@ def get_tasks_by_team(team_id: int):
     Parameters:
     - team_id: ID of the team
     
+    Query Parameters (optional):
+    - limit: Page size (1-500); enables keyset pagination ordered by created_at, id
+    - cursor: Opaque cursor from a previous response's pagination.next_cursor
+    - fields: Comma-separated task columns to return (id and created_at are always included)
+
     RETURNS:
     {
         "data": [ ... list of tasks for all team members ... ],
@@ -549,10 +756,13 @@ def get_tasks_by_team(team_id: int):
         500: Internal Server Error
     """
     try:
-        result = service.get_tasks_by_team(team_id)
+        page = PageRequest.from_args(request.args)
+        result = service.get_tasks_by_team(team_id, page)
         status = result.pop("__status", 200)
         result["Code"] = status
         return jsonify(result), status
+    except ValueError as ve:
+        return jsonify({"Message": str(ve), "Code": 400}), 400
     except Exception as e:
         return jsonify({"Message": str(e), "Code": 500}), 500
 
@@ -564,6 +774,11 @@ def get_tasks_by_department(dept_id: int):
     Parameters:
     - dept_id: ID of the department
     
+    Query Parameters (optional):
+    - limit: Page size (1-500); enables keyset pagination ordered by created_at, id
+    - cursor: Opaque cursor from a previous response's pagination.next_cursor
+    - fields: Comma-separated task columns to return (id and created_at are always included)
+
     RETURNS:
     {
         "data": [ ... list of tasks for all department members ... ],
@@ -576,10 +791,13 @@ def get_tasks_by_department(dept_id: int):
     500: Internal Server Error
     """
     try:
-        result = service.get_tasks_by_department(dept_id)
+        page = PageRequest.from_args(request.args)
+        result = service.get_tasks_by_department(dept_id, page)
         status = result.pop("__status", 200)
         result["Code"] = status
         return jsonify(result), status
+    except ValueError as ve:
+        return jsonify({"Message": str(ve), "Code": 400}), 400
     except Exception as e:
         return jsonify({"Message": str(e), "Code": 500}), 500
 
@@ -590,11 +808,13 @@ def get_tasks_with_upcoming_deadlines():
     
     Query Parameters:
     - max_days_ahead: Maximum number of days to look ahead for deadlines (default: 7)
+    - reminders_due: "true" to return only tasks due in exactly N days for an N in
+      their reminder_intervals (max_days_ahead is then ignored)
     
     RETURNS:
     {
         "Message": "Successfully retrieved X tasks with upcoming deadlines",
-        "data": [ ... list of tasks with upcoming deadlines ... ],
+        "data": [ ... tasks, each with "days_until_due" and the matching "reminder_interval" (or null) ... ],
         "Code": 200
     }
     
@@ -611,7 +831,9 @@ def get_tasks_with_upcoming_deadlines():
         if max_days_ahead < 1 or max_days_ahead > 365:
             return jsonify({"Message": "max_days_ahead must be between 1 and 365", "Code": 400}), 400
         
-        result = service.get_tasks_with_upcoming_deadlines(max_days_ahead)
+        reminders_only = request.args.get('reminders_due', 'false').lower() in ('true', '1', 'yes')
+        
+        result = service.get_tasks_with_upcoming_deadlines(max_days_ahead, reminders_only)
         status = result.pop("__status", 200)
         result["Code"] = status
         return jsonify(result), status
@@ -623,6 +845,19 @@ def get_all_tasks():
     """
     Get all tasks for all teams/users.
     
+    Query Parameters (optional):
+    - limit: Page size (1-500); enables keyset pagination ordered by created_at, id
+    - cursor: Opaque cursor from a previous response's pagination.next_cursor
+    - fields: Comma-separated task columns to return (id and created_at are always included)
+    - format: "ndjson" streams every task (from cursor onwards) as one JSON object per
+      line, fetching `limit` tasks (default 100) per database round trip
+    - flat: "true" returns parents and subtasks as separate, un-nested rows (json format
+      only); used by bulk readers such as the report service's snapshot loader
+    - user_ids: With flat, only tasks owned by or shared with these users (comma-separated,
+      at most 100)
+    - project_ids: With flat, only tasks of these projects (comma-separated, at most 100);
+      given together with user_ids, tasks matching either are returned
+
     Returns:
     {
         "data": [ ... list of all tasks ... ],
@@ -631,16 +866,172 @@ def get_all_tasks():
     
     Responses:
         200: Tasks found and returned (or empty list if no tasks)
+        400: Invalid limit, cursor, fields, format, user_ids or project_ids
         500: Internal Server Error
     """
     try:
-        result = service.get_all_tasks()
+        page = PageRequest.from_args(request.args)
+        response_format = request.args.get("format", "json")
+        flat = request.args.get("flat", "false").lower() == "true"
+        user_ids = parse_id_list_arg(request.args, "user_ids", MAX_FILTER_IDS)
+        project_ids = parse_id_list_arg(request.args, "project_ids", MAX_FILTER_IDS)
+        if (user_ids is not None or project_ids is not None) and not flat:
+            raise ValueError("user_ids and project_ids are only supported with flat=true")
+        if response_format == "ndjson":
+            if flat:
+                raise ValueError("flat is only supported with format=json")
+            return _stream_ndjson(service.iter_all_tasks(page))
+        if response_format != "json":
+            raise ValueError("format must be 'json' or 'ndjson'")
+        result = service.get_all_tasks(page, flat=flat, user_ids=user_ids, project_ids=project_ids)
         status = result.pop("__status", 200)
         result["Code"] = status
         return jsonify(result), status
+    except ValueError as ve:
+        return jsonify({"Message": str(ve), "Code": 400}), 400
     except Exception as e:
         return jsonify({"Message": str(e), "Code": 500}), 500
     
+def _stream_ndjson(rows):
+    """
+    Stream rows as newline-delimited JSON. Once streaming has started the status
+    can no longer change, so a failure is reported as a final {"error": ...} line.
+    """
+    def generate():
+        try:
+            for row in rows:
+                yield current_app.json.dumps(row) + "\n"
+        except Exception as e:
+            yield current_app.json.dumps({"error": str(e)}) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+@task_bp.route("/tasks/db/stats", methods=["GET"])
+def get_db_stats():
+    """
+    Get Supabase request stats per table (count, errors, avg_ms, p95_ms, max_ms).
+
+    Calls are grouped by table, "rpc:<function>" or "storage:<bucket>". Latency is
+    time to response headers; counters are per worker process.
+
+    RESPONSES:
+        200: Stats returned
+        500: Internal Server Error
+    """
+    try:
+        result = service.get_db_stats()
+        status = result.pop("__status", 200)
+        result["Code"] = status
+        return jsonify(result), status
+    except Exception as e:
+        return jsonify({"Message": str(e), "Code": 500}), 500
+
+@task_bp.route("/tasks/cache/stats", methods=["GET"])
+def get_task_cache_stats():
+    """
+    Get the task cache counters (hits, misses, hit_rate, invalidations, evictions, size).
+
+    Counters are per worker process; with the redis backend the size is shared.
+
+    RESPONSES:
+        200: Stats returned ({"enabled": false} when the cache is disabled)
+        500: Internal Server Error
+    """
+    try:
+        result = service.get_cache_stats()
+        status = result.pop("__status", 200)
+        result["Code"] = status
+        return jsonify(result), status
+    except Exception as e:
+        return jsonify({"Message": str(e), "Code": 500}), 500
+
+@task_bp.route("/tasks/notification-dedup/stats", methods=["GET"])
+def get_notification_dedup_stats():
+    """
+    Get the task notification dedup counters (hits, misses, evictions, expirations, size).
+
+    Counters are per worker process; with the sqlite or redis backend the size is shared.
+
+    RESPONSES:
+        200: Stats returned
+        500: Internal Server Error
+    """
+    try:
+        result = service.get_notification_dedup_stats()
+        status = result.pop("__status", 200)
+        result["Code"] = status
+        return jsonify(result), status
+    except Exception as e:
+        return jsonify({"Message": str(e), "Code": 500}), 500
+
+@task_bp.route("/tasks/attachments/uploads/<upload_id>", methods=["GET"])
+def get_attachment_upload_status(upload_id: str):
+    """
+    Poll a large attachment upload that is finishing in the background.
+    The upload_id is returned in the response's "uploads" list when the upload was
+    deferred; it is not stored with the task. If the upload fails, its attachment
+    entry is removed from the task.
+
+    RETURNS:
+    {
+        "data": {"upload_id", "status": "pending|uploading|done|failed", "name", "checksum",
+                 "size", "content_type", "error" (if failed)},
+        "Code": 200
+    }
+
+    RESPONSES:
+        200: Status returned
+        404: Unknown upload_id (or handled by another worker process)
+        500: Internal Server Error
+    """
+    try:
+        result = service.get_attachment_upload_status(upload_id)
+        status = result.pop("__status", 200)
+        result["Code"] = status
+        return jsonify(result), status
+    except Exception as e:
+        return jsonify({"Message": str(e), "Code": 500}), 500
+
+@task_bp.route("/tasks/attachments/<checksum>", methods=["GET"])
+def download_attachment(checksum: str):
+    """
+    Stream an attachment from storage by its SHA-256 checksum, chunk by chunk.
+
+    RESPONSES:
+        200: File contents
+        400: checksum is not a hex SHA-256
+        404: No attachment with this checksum
+        500: Internal Server Error
+    """
+    try:
+        download = service.repo.attachments.open_download(checksum)
+        if download is None:
+            return jsonify({"Message": f"Attachment {checksum} not found", "Code": 404}), 404
+        filename, content_type, chunks = download
+        return Response(stream_with_context(chunks), mimetype=content_type,
+                        headers={"Content-Disposition": _content_disposition(filename)})
+    except ValueError as ve:
+        return jsonify({"Message": str(ve), "Code": 400}), 400
+    except Exception as e:
+        return jsonify({"Message": str(e), "Code": 500}), 500
+
+@task_bp.route("/tasks/attachments/stats", methods=["GET"])
+def get_attachment_stats():
+    """
+    Get the attachment store counters (uploaded, deduplicated, in_flight, known_checksums).
+
+    RESPONSES:
+        200: Stats returned
+        500: Internal Server Error
+    """
+    try:
+        result = service.get_attachment_stats()
+        status = result.pop("__status", 200)
+        result["Code"] = status
+        return jsonify(result), status
+    except Exception as e:
+        return jsonify({"Message": str(e), "Code": 500}), 500
+
 @task_bp.route("/health")
 def health_check():
     return jsonify({"status": "ok"}), 200
@@ -1,9 +1,24 @@
 from dataclasses import dataclass, field
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Iterable
 from datetime import datetime, UTC
 from dateutil import parser as dateparser
 
-@dataclass
+def _parse_datetime(value: str) -> Optional[datetime]:
+    """
+    Parse a timestamp string, using datetime.fromisoformat for the ISO-8601 strings
+    Supabase returns and falling back to dateutil only for other formats.
+    Returns None if neither can parse it.
+    """
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        pass
+    try:
+        return dateparser.parse(value)
+    except Exception:
+        return None
+
+@dataclass(slots=True)
 class Task:
     id: Optional[int] = field(default=None, init=False)                     # DB serial/bigint or UUID; adapt to your schema
     owner_id: int = 0
@@ -71,10 +86,7 @@ class Task:
         # Handle due_date conversion
         due_date = data.get('due_date')
         if due_date is not None and isinstance(due_date, str):
-            try:
-                due_date = dateparser.parse(due_date)
-            except Exception:
-                due_date = None
+            due_date = _parse_datetime(due_date)
         
         # Handle collaborators - ensure it's a list of integers
         collaborators = data.get('collaborators')
@@ -121,10 +133,7 @@ class Task:
 
         recurrence_end_date = data.get('recurrence_end_date')
         if recurrence_end_date is not None and isinstance(recurrence_end_date, str):
-            try:
-                recurrence_end_date = dateparser.parse(recurrence_end_date)
-            except Exception:
-                recurrence_end_date = None
+            recurrence_end_date = _parse_datetime(recurrence_end_date)
 
         recurrence_interval_days = data.get('recurrence_interval_days')
         if recurrence_interval_days is not None:
@@ -165,7 +174,7 @@ class Task:
             parent_task=int(data['parent_task']) if data.get('parent_task') not in (None, '') else None,
             type=str(data.get('type', 'parent')),
             subtasks=subtasks,
-            created_at=str(data.get('created_at', datetime.now(UTC).isoformat())),
+            created_at=str(data['created_at']) if 'created_at' in data else datetime.now(UTC).isoformat(),
             completed_at=data.get('completed_at'),
             attachments=attachments,
             priority=priority,
@@ -179,4 +188,15 @@ class Task:
         if 'id' in data and data['id'] is not None:
             task.id = int(data['id'])
             
-        return task
\ No newline at end of file
+        return task
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Dict[str, Any]]) -> List['Task']:
+        """Convert many database rows to Task objects"""
+        from_dict = cls.from_dict
+        return [from_dict(row) for row in rows]
+
+    @staticmethod
+    def to_rows(tasks: Iterable['Task']) -> List[Dict[str, Any]]:
+        """Convert many Task objects to dictionaries for the database"""
+        return [task.to_dict() for task in tasks]
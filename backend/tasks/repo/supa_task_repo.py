@@ -1,28 +1,190 @@
-import os
-import uuid
-from typing import Optional, Dict, Any, List
-from supabase import create_client, Client
+from datetime import date, timedelta
+from typing import Callable, Optional, Dict, Any, List, Tuple
+from supabase import Client
+from shared.supabase_client import get_supabase_client
+from utils.pagination import PageRequest
+from utils.cache import TaskCache
+from utils.search_index import TaskSearchIndex
+from utils.due_index import DueDateIndex
+from utils.attachments import AttachmentStore, UPLOAD_FIELDS
 
-SUPABASE_URL = os.environ["SUPABASE_URL"]
-SUPABASE_KEY = os.environ["SUPABASE_SERVICE_KEY"]
 
 # Table name kept as 'task' to match your existing schema.
 TABLE = "task"
 
+# Comments live in the comments service's table; only read here to build the search index.
+COMMENT_TABLE = "comment"
+
+# Rows fetched per request when scanning whole tables for the search index.
+SCAN_BATCH_SIZE = 1000
+
+# Max number of IDs sent in a single `in_` filter, keeps the PostgREST URL well under limits.
+IN_FILTER_CHUNK_SIZE = 200
+
+# Smaller chunk for the collaborators overlap filter, each ID expands to a full `cs` clause.
+OVERLAP_FILTER_CHUNK_SIZE = 100
+
+def _chunks(items: List[Any], size: int = IN_FILTER_CHUNK_SIZE):
+    """Yield successive slices of `items` of at most `size` elements."""
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+def _collaborators_overlap(user_ids: List[int]) -> str:
+    """
+    Build an `or` filter matching rows whose collaborators contain any of `user_ids`.
+
+    collaborators is a JSON array, so this is expressed as OR-ed `cs` (contains)
+    clauses, the JSON equivalent of an array overlap.
+    """
+    return ",".join(f"collaborators.cs.[{int(uid)}]" for uid in user_ids)
+
+def _apply_date_range(query, date_range: Optional[Dict[str, Any]]):
+    """
+    Restrict a query to rows whose date column falls in an inclusive YYYY-MM-DD range
+    (as produced by utils.parsing.parse_date_range_args).
+    """
+    if not date_range:
+        return query
+    field = date_range["field"]
+    if date_range.get("start_date"):
+        query = query.gte(field, date_range["start_date"])
+    if date_range.get("end_date"):
+        # Inclusive end day: everything before the following midnight
+        next_day = date.fromisoformat(date_range["end_date"]) + timedelta(days=1)
+        query = query.lt(field, next_day.isoformat())
+    return query
+
 class SupabaseTaskRepo:
-    def __init__(self):
-        self.client: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+    def __init__(self, client: Optional[Client] = None, cache: Optional[TaskCache] = None,
+                 search_index: Optional[TaskSearchIndex] = None, due_index: Optional[DueDateIndex] = None,
+                 attachments: Optional[AttachmentStore] = None):
+        self.client: Client = client or get_supabase_client()
+        # Read-through cache for get_task; None when disabled (TASK_CACHE_BACKEND=none)
+        self.cache: Optional[TaskCache] = cache if cache is not None else TaskCache.from_env()
+        # Text search index kept current by the writes below; None when disabled (TASK_SEARCH_INDEX=none)
+        self.search_index: Optional[TaskSearchIndex] = search_index if search_index is not None else TaskSearchIndex.from_env()
+        # Day buckets of open tasks by due date; None when disabled (TASK_DUE_INDEX=none)
+        self.due_index: Optional[DueDateIndex] = due_index if due_index is not None else DueDateIndex.from_env()
+        # Streams uploads into the task-files bucket, deduplicated by checksum
+        self.attachments: AttachmentStore = attachments or AttachmentStore(self.client)
+
+    def _select(self, page: Optional[PageRequest] = None):
+        """Start a task query, pushing any `fields=` projection down to Supabase."""
+        return self.client.table(TABLE).select(page.select_clause() if page else "*")
+
+    def _execute(self, query, page: Optional[PageRequest] = None) -> List[Dict[str, Any]]:
+        """Apply keyset pagination (if requested) and run the query."""
+        if page is not None:
+            query = page.apply(query)
+        return query.execute().data or []
 
     def find_by_owner_and_name(self, owner_id: int, task_name: str) -> List[Dict[str, Any]]:
         return self.client.table(TABLE).select("*").eq("owner_id", owner_id).eq("task_name", task_name).execute().data
 
+    def find_by_recurrence_key(self, recurrence_key: str) -> Optional[Dict[str, Any]]:
+        """The occurrence carrying `recurrence_key` (unique), or None."""
+        res = self.client.table(TABLE).select("*").eq("recurrence_key", recurrence_key).limit(1).execute()
+        return res.data[0] if res.data else None
+
+    def find_existing_owner_task_names(self, pairs: List[tuple], chunk_size: int = IN_FILTER_CHUNK_SIZE) -> set:
+        """
+        Return which (owner_id, task_name) pairs already exist, with one query per
+        chunk of names instead of one find_by_owner_and_name call per pair.
+        """
+        wanted = set(pairs)
+        owners = sorted({owner_id for owner_id, _ in wanted})
+        names = sorted({task_name for _, task_name in wanted})
+        existing = set()
+        for owner_chunk in _chunks(owners, chunk_size):
+            for name_chunk in _chunks(names, chunk_size):
+                res = self.client.table(TABLE).select("owner_id, task_name").in_(
+                    "owner_id", owner_chunk).in_("task_name", name_chunk).execute()
+                existing.update((row["owner_id"], row["task_name"]) for row in (res.data or []))
+        return existing & wanted
+
     def insert_task(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        data, uploads = self._split_uploads(data)
         res = self.client.table(TABLE).insert(data).execute()
         if not res.data:
             raise RuntimeError("Insert failed — no data returned")
+        self._index(res.data)
+        self._track_uploads(res.data[0]["id"], uploads)
         return res.data[0]
 
+    @staticmethod
+    def _split_uploads(data: Dict[str, Any]) -> Tuple[Dict[str, Any], List[str]]:
+        """
+        `data` with the background upload fields taken off its attachments, and the
+        IDs of those uploads. The fields only mean something to this process.
+        """
+        attachments = data.get("attachments")
+        if not isinstance(attachments, list):
+            return data, []
+        uploads = [a["upload_id"] for a in attachments if isinstance(a, dict) and a.get("upload_id")]
+        if not uploads:
+            return data, []
+        stored = [{k: v for k, v in a.items() if k not in UPLOAD_FIELDS} if isinstance(a, dict) else a
+                  for a in attachments]
+        return {**data, "attachments": stored}, uploads
+
+    def _track_uploads(self, task_id: int, uploads: List[str]) -> None:
+        for upload_id in uploads:
+            self.attachments.when_finished(upload_id, lambda status: self._drop_failed_upload(task_id, status))
+
+    def _drop_failed_upload(self, task_id: int, status: Optional[Dict[str, Any]]) -> None:
+        """Remove the attachment entry of a background upload that failed, so no dead URL is left."""
+        if not status or status["status"] != "failed":
+            return
+        task = self.fetch_task(task_id)
+        if not task:
+            return
+        attachments = task.get("attachments") or []
+        kept = [a for a in attachments if not (isinstance(a, dict) and a.get("checksum") == status["checksum"]
+                                               and a.get("name") == status["name"])]
+        if len(kept) != len(attachments):
+            self.update_attachments(task_id, kept)
+            print(f"Removed attachment {status['name']} from task {task_id}: its upload failed")
+
+    def insert_tasks(self, rows: List[Dict[str, Any]], chunk_size: int = IN_FILTER_CHUNK_SIZE) -> List[Dict[str, Any]]:
+        """
+        Insert many tasks with one INSERT statement per chunk.
+
+        Returns:
+            The created rows (with their new IDs) in the same order as `rows`
+        """
+        created = []
+        for chunk in _chunks(rows, chunk_size):
+            res = self.client.table(TABLE).insert(chunk).execute()
+            if len(res.data or []) != len(chunk):
+                raise RuntimeError("Bulk insert failed — not all rows returned")
+            self._index(res.data)
+            created.extend(res.data)
+        return created
+
     def get_task(self, task_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Get a task by ID, served from the task cache when enabled.
+        Writes through this repo invalidate the cached entry.
+        """
+        if self.cache is None:
+            return self.fetch_task(task_id)
+        return self.cache.get_or_load(task_id, self.fetch_task)
+
+    def _invalidate(self, *task_ids: int) -> None:
+        if self.cache is not None:
+            self.cache.invalidate(*task_ids)
+
+    def _index(self, rows: List[Dict[str, Any]]) -> None:
+        for index in (self.search_index, self.due_index):
+            if index is not None:
+                for row in rows:
+                    index.upsert(row)
+
+    def fetch_task(self, task_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Get a task by ID straight from the database, bypassing the task cache.
+        Use it to read a row that is about to be written back.
+        """
         try:
             res = self.client.table(TABLE).select("*").eq("id", task_id).single().execute()
             return res.data
@@ -30,6 +192,19 @@ class SupabaseTaskRepo:
             # Task not found or other error
             return None
 
+    def get_tasks_by_ids(self, task_ids: List[int]) -> List[Dict[str, Any]]:
+        """
+        Fetch many tasks by ID with one `in_` query per chunk.
+
+        Returns:
+            Tasks in the same order as `task_ids`; IDs that do not exist are skipped
+        """
+        by_id: Dict[int, Dict[str, Any]] = {}
+        for chunk in _chunks(list(dict.fromkeys(task_ids))):
+            res = self.client.table(TABLE).select("*").in_("id", chunk).execute()
+            by_id.update((row["id"], row) for row in (res.data or []))
+        return [by_id[task_id] for task_id in task_ids if task_id in by_id]
+
     def find_by_user(self, user_id: int) -> list:
         """
         Find all tasks (parent and subtask) where user is owner or collaborator.
@@ -58,53 +233,159 @@ class SupabaseTaskRepo:
         res = self.client.table(TABLE).select("*").eq("parent_task", parent_task_id).eq("type", "subtask").execute()
         return res.data or []
 
-    def find_parent_tasks_by_user(self, user_id: int) -> List[Dict[str, Any]]:
+    def find_subtasks_by_parents(self, parent_task_ids: List[int], columns: str = "*") -> Dict[int, List[Dict[str, Any]]]:
+        """
+        Find the subtasks of many parent tasks at once.
+
+        Runs one `in_` query per chunk of parent IDs instead of one query per parent,
+        then groups the rows in memory. `columns` must include parent_task.
+
+        Returns:
+            Dict mapping every requested parent ID to its list of subtasks (empty if none)
+        """
+        grouped: Dict[int, List[Dict[str, Any]]] = {pid: [] for pid in parent_task_ids}
+        ids = list(grouped.keys())
+
+        for chunk in _chunks(ids):
+            res = self.client.table(TABLE).select(columns).in_("parent_task", chunk).eq("type", "subtask").execute()
+            for subtask in res.data or []:
+                grouped.setdefault(subtask["parent_task"], []).append(subtask)
+
+        return grouped
+
+    def find_parent_tasks_by_user(self, user_id: int, page: Optional[PageRequest] = None,
+                                  date_range: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
         """
         Find only parent tasks (type='parent' or null) where user is owner or collaborator.
+
+        With a paginated `page`, each query returns at most limit + 1 rows after the
+        cursor; the caller merges them with PageRequest.slice. `date_range` filters
+        on created_at or due_date inside the query.
         """
         # Get parent tasks where user is owner
-        owner_res = self.client.table(TABLE).select("*").eq("owner_id", user_id).in_("type", ["parent", None]).execute()
-        owner_tasks = owner_res.data or []
+        owner_query = self._select(page).eq("owner_id", user_id).in_("type", ["parent", None])
+        owner_tasks = self._execute(_apply_date_range(owner_query, date_range), page)
 
         # Get parent tasks where user is collaborator  
-        collab_res = self.client.table(TABLE).select("*").filter("collaborators", "cs", [user_id]).in_("type", ["parent", None]).execute()
-        collab_tasks = collab_res.data or []
+        collab_query = self._select(page).filter("collaborators", "cs", [user_id]).in_("type", ["parent", None])
+        collab_tasks = self._execute(_apply_date_range(collab_query, date_range), page)
 
         # Combine and deduplicate
         combined = {t["id"]: t for t in (owner_tasks + collab_tasks)}
         return list(combined.values())
 
     def update_task(self, task_id: int, patch: Dict[str, Any]) -> Dict[str, Any]:
-        res = self.client.table(TABLE).update(patch).eq("id", task_id).execute()
+        patch, uploads = self._split_uploads(patch)
+        try:
+            res = self.client.table(TABLE).update(patch).eq("id", task_id).execute()
+        finally:
+            # Invalidate even on failure, the write may have reached the database
+            self._invalidate(task_id)
         if not res.data:
             raise RuntimeError("Update failed — no data returned")
+        self._index(res.data)
+        self._track_uploads(task_id, uploads)
         return res.data[0]
 
+    def find_existing_task_ids(self, task_ids: List[int], chunk_size: int = IN_FILTER_CHUNK_SIZE) -> set:
+        """
+        Return the subset of `task_ids` that exist, using one `in_` query per chunk.
+        """
+        existing = set()
+        for chunk in _chunks(list(dict.fromkeys(task_ids)), chunk_size):
+            res = self.client.table(TABLE).select("id").in_("id", chunk).execute()
+            existing.update(row["id"] for row in (res.data or []))
+        return existing
+
+    def bulk_update_tasks(self, task_ids: List[int], patch: Dict[str, Any], chunk_size: int = IN_FILTER_CHUNK_SIZE) -> List[Dict[str, Any]]:
+        """
+        Apply the same patch to many tasks, one UPDATE statement per chunk of IDs.
+
+        Returns:
+            List of updated task rows as returned by Supabase
+        """
+        updated = []
+        for chunk in _chunks(list(dict.fromkeys(task_ids)), chunk_size):
+            try:
+                res = self.client.table(TABLE).update(patch).in_("id", chunk).execute()
+            finally:
+                self._invalidate(*chunk)
+            self._index(res.data or [])
+            updated.extend(res.data or [])
+        return updated
+
+    def _array_rpc(self, function: str, task_id: int, column: str, values: List[int], **extra) -> Dict[str, Any]:
+        """
+        Run one of the atomic array RPCs (see supabase/migrations) against a task row.
+
+        Returns:
+            {"values": [...], "added" | "removed": [...]}
+        """
+        try:
+            res = self.client.rpc(function, {
+                "p_table": TABLE,
+                "p_column": column,
+                "p_id": task_id,
+                "p_values": [int(v) for v in values],
+                **extra
+            }).execute()
+        except Exception as e:
+            if getattr(e, "code", None) == "P0002":
+                raise RuntimeError(f"Task with ID {task_id} not found")
+            raise
+        finally:
+            self._invalidate(task_id)
+        if column == "collaborators":
+            self._index([{"id": task_id, "collaborators": res.data["values"]}])
+        return res.data
+
+    def append_to_array(self, task_id: int, column: str, values: List[int]) -> Dict[str, Any]:
+        """
+        Atomically append IDs (skipping ones already present) to the task's `subtasks`
+        or `collaborators` array in one round trip, without reading the row first.
+        """
+        return self._array_rpc("array_append_ids", task_id, column, values)
+
+    def remove_from_array(self, task_id: int, column: str, values: List[int]) -> Dict[str, Any]:
+        """
+        Atomically remove IDs from the task's `subtasks` or `collaborators` array.
+        """
+        return self._array_rpc("array_remove_ids", task_id, column, values)
+
     def add_subtask_to_parent(self, parent_task_id: int, subtask_id: int) -> Dict[str, Any]:
         """
         Add a subtask ID to the parent task's subtasks list.
+
+        Returns:
+            {"id": parent_task_id, "subtasks": <updated list>}
         """
-        # First get the current parent task
-        parent_task = self.get_task(parent_task_id)
-        if not parent_task:
-            raise RuntimeError(f"Parent task with ID {parent_task_id} not found")
-        
-        # Get current subtasks list or initialize empty list
-        current_subtasks = parent_task.get("subtasks") or []
-        
-        # Add the new subtask ID if not already present
-        if subtask_id not in current_subtasks:
-            current_subtasks.append(subtask_id)
-        
-        # Update the parent task with the new subtasks list
-        return self.update_task(parent_task_id, {"subtasks": current_subtasks})
+        result = self.append_to_array(parent_task_id, "subtasks", [subtask_id])
+        return {"id": parent_task_id, "subtasks": result["values"]}
+
+    def remove_subtask_from_parent(self, parent_task_id: int, subtask_id: int) -> Dict[str, Any]:
+        """
+        Remove a subtask ID from the parent task's subtasks list.
+        """
+        result = self.remove_from_array(parent_task_id, "subtasks", [subtask_id])
+        return {"id": parent_task_id, "subtasks": result["values"]}
 
-    def find_by_project(self, project_id: int) -> list:
+    def add_collaborators(self, task_id: int, user_ids: List[int]) -> List[int]:
+        """
+        Add users to a task's collaborators. Returns the IDs that were newly added.
+        """
+        return self.append_to_array(task_id, "collaborators", user_ids)["added"]
+
+    def remove_collaborators(self, task_id: int, user_ids: List[int]) -> List[int]:
+        """
+        Remove users from a task's collaborators. Returns the IDs that were removed.
+        """
+        return self.remove_from_array(task_id, "collaborators", user_ids)["removed"]
+
+    def find_by_project(self, project_id: int, page: Optional[PageRequest] = None) -> list:
         """
         Find all tasks that belong to a specific project.
         """
-        res = self.client.table(TABLE).select("*").eq("project_id", project_id).execute()
-        return res.data or []
+        return self._execute(self._select(page).eq("project_id", project_id), page)
 
     def find_by_owner(self, owner_id: int) -> list:
         """
@@ -115,31 +396,15 @@ class SupabaseTaskRepo:
     
     def upload_attachment(self, file) -> list[dict]:
         """
-        Upload a file to Supabase storage and return attachment info.
+        Stream a file into Supabase storage and return attachment info.
 
         Returns:
-            [{"url": <public_url>, "name": <filename>}]
+            [{"url": <public_url>, "name": <filename>, "checksum", "size", "content_type"}],
+            with "upload_id" and "status": "pending" for uploads finishing in the background.
+            insert_task/update_task store the entry without those two fields and
+            remove it from the task again if the upload fails.
         """
-        file_name = f"attachments/{uuid.uuid4()}_{file.filename}"
-        storage = self.client.storage.from_("task-files")
-
-        try:
-            storage.upload(file_name, file.read(), file_options={"content-type": "application/pdf"})
-        
-            public_url_response = storage.get_public_url(file_name)
-            if isinstance(public_url_response, dict):
-                public_url = public_url_response.get("data", {}).get("publicUrl")
-                if not public_url:
-                    raise RuntimeError("Failed to retrieve public URL from Supabase response")
-            elif isinstance(public_url_response, str):
-                public_url = public_url_response
-            else:
-                raise RuntimeError(f"Unexpected type for public URL response: {type(public_url_response)}")
-
-            return [{"url": public_url, "name": file.filename}]
-    
-        except Exception as e:
-            raise RuntimeError(f"Upload failed: {str(e)}")
+        return [self.attachments.save(file)]
     
     def update_attachments(self, task_id: int, attachments: List[Dict[str, str]]) -> Dict[str, Any]:
         return self.update_task(task_id, {"attachments": attachments})
@@ -154,68 +419,62 @@ class SupabaseTaskRepo:
         try:
             res = self.client.table(TABLE).delete().eq("id", task_id).execute()
             # Check if any rows were affected
-            return res.data is not None and len(res.data) > 0
+            deleted = res.data is not None and len(res.data) > 0
+            if deleted:
+                for index in (self.search_index, self.due_index):
+                    if index is not None:
+                        index.remove(task_id)
+            return deleted
         except Exception as e:
             print(f"Delete error for task {task_id}: {e}")
             return False
+        finally:
+            self._invalidate(task_id)
 
-    def find_parent_tasks_by_team(self, team_id: int) -> List[Dict[str, Any]]:
+    def find_parent_tasks_by_members(self, user_ids: List[int], page: Optional[PageRequest] = None) -> List[Dict[str, Any]]:
         """
-        Find all parent tasks for users in a specific team.
+        Find all parent tasks where any of the given users is owner or collaborator.
+
+        Uses set-based queries: one `in_` on owner_id and one collaborators overlap
+        filter per chunk of user IDs, rather than two queries per user.
         """
-        # Get all users in the team first
-        user_res = self.client.table("user").select("userid").eq("team_id", team_id).execute()
-        user_ids = [user["userid"] for user in (user_res.data or [])]
-        
+        user_ids = list(dict.fromkeys(user_ids))
         if not user_ids:
             return []
-        
-        # Get parent tasks where any team member is owner or collaborator
+
         all_tasks = []
-        
-        for user_id in user_ids:
-            # Get parent tasks where user is owner
-            owner_res = self.client.table(TABLE).select("*").eq("owner_id", user_id).in_("type", ["parent", None]).execute()
-            owner_tasks = owner_res.data or []
-            
-            # Get parent tasks where user is collaborator  
-            collab_res = self.client.table(TABLE).select("*").filter("collaborators", "cs", [user_id]).in_("type", ["parent", None]).execute()
-            collab_tasks = collab_res.data or []
-            
-            all_tasks.extend(owner_tasks + collab_tasks)
-        
+
+        # Parent tasks owned by any member
+        for chunk in _chunks(user_ids, IN_FILTER_CHUNK_SIZE):
+            all_tasks.extend(self._execute(self._select(page).in_("owner_id", chunk).in_("type", ["parent", None]), page))
+
+        # Parent tasks where any member is a collaborator
+        for chunk in _chunks(user_ids, OVERLAP_FILTER_CHUNK_SIZE):
+            all_tasks.extend(self._execute(self._select(page).or_(_collaborators_overlap(chunk)).in_("type", ["parent", None]), page))
+
         # Deduplicate by task ID
         combined = {t["id"]: t for t in all_tasks}
         return list(combined.values())
 
-    def find_parent_tasks_by_department(self, dept_id: int) -> List[Dict[str, Any]]:
+    def find_parent_tasks_by_team(self, team_id: int, page: Optional[PageRequest] = None) -> List[Dict[str, Any]]:
+        """
+        Find all parent tasks for users in a specific team.
+        """
+        # Get all users in the team first
+        user_res = self.client.table("user").select("userid").eq("team_id", team_id).execute()
+        user_ids = [user["userid"] for user in (user_res.data or [])]
+
+        return self.find_parent_tasks_by_members(user_ids, page)
+
+    def find_parent_tasks_by_department(self, dept_id: int, page: Optional[PageRequest] = None) -> List[Dict[str, Any]]:
         """
         Find all parent tasks for users in a specific department.
         """
         # Get all users in the department first
         user_res = self.client.table("user").select("userid").eq("dept_id", dept_id).execute()
         user_ids = [user["userid"] for user in (user_res.data or [])]
-        
-        if not user_ids:
-            return []
-        
-        # Get parent tasks where any department member is owner or collaborator
-        all_tasks = []
-        
-        for user_id in user_ids:
-            # Get parent tasks where user is owner
-            owner_res = self.client.table(TABLE).select("*").eq("owner_id", user_id).in_("type", ["parent", None]).execute()
-            owner_tasks = owner_res.data or []
-            
-            # Get parent tasks where user is collaborator  
-            collab_res = self.client.table(TABLE).select("*").filter("collaborators", "cs", [user_id]).in_("type", ["parent", None]).execute()
-            collab_tasks = collab_res.data or []
-            
-            all_tasks.extend(owner_tasks + collab_tasks)
-        
-        # Deduplicate by task ID
-        combined = {t["id"]: t for t in all_tasks}
-        return list(combined.values())
+
+        return self.find_parent_tasks_by_members(user_ids, page)
 
     def find_tasks_with_upcoming_deadlines(self, max_days_ahead: int = 7) -> List[Dict[str, Any]]:
         """
@@ -245,9 +504,97 @@ class SupabaseTaskRepo:
         
         return res.data or []
     
-    def find_all_parent_tasks(self) -> list:
+    def _scan(self, table: str, columns: str, batch_size: int = SCAN_BATCH_SIZE,
+              filters: Optional[Callable[[Any], Any]] = None):
+        """Yield every row of `table` (narrowed by `filters`), fetched in id order one batch at a time."""
+        last_id = None
+        while True:
+            query = self.client.table(table).select(columns)
+            if filters is not None:
+                query = filters(query)
+            if last_id is not None:
+                query = query.gt("id", last_id)
+            rows = query.order("id").limit(batch_size).execute().data or []
+            yield from rows
+            if len(rows) < batch_size:
+                return
+            last_id = rows[-1]["id"]
+
+    def rebuild_search_index(self, batch_size: int = SCAN_BATCH_SIZE) -> int:
+        """
+        Re-index every task and comment from Supabase.
+
+        Returns:
+            Number of tasks indexed (0 when the index is disabled)
+        """
+        if self.search_index is None:
+            return 0
+        comments = list(self._scan(COMMENT_TABLE, "id, task_id, content", batch_size))
+        tasks = self._scan(TABLE, "id, task_name, description, owner_id, collaborators", batch_size)
+        return self.search_index.rebuild(tasks, comments)
+
+    def rebuild_due_index(self, batch_size: int = SCAN_BATCH_SIZE) -> int:
+        """
+        Re-index open tasks due today or later from Supabase.
+
+        Returns:
+            Number of tasks indexed (0 when the index is disabled)
+        """
+        if self.due_index is None:
+            return 0
+        today = date.today().isoformat()
+        tasks = self._scan(TABLE, "id, due_date, status, reminder_intervals", batch_size,
+                           lambda query: query.gte("due_date", today).neq("status", "Completed"))
+        return self.due_index.rebuild(tasks)
+
+    def refresh_search_index(self, task_id: int) -> bool:
+        """
+        Re-index one task and its comments, e.g. after the comments service changed them.
+
+        Returns:
+            False if the task no longer exists (it is dropped from the index)
+        """
+        if self.search_index is None:
+            return False
+        task = self.fetch_task(task_id)
+        if task is None:
+            self.search_index.remove(task_id)
+            return False
+        res = self.client.table(COMMENT_TABLE).select("content").eq("task_id", task_id).execute()
+        self.search_index.set_comments(task_id, [row.get("content") for row in (res.data or [])])
+        self.search_index.upsert(task)
+        return True
+
+    def find_all_parent_tasks(self, page: Optional[PageRequest] = None) -> list:
         """
         Find all tasks (parent and subtasks) in the system.
         """
-        res = self.client.table(TABLE).select("*").is_("parent_task", None).execute()
-        return res.data or []
+        return self._execute(self._select(page).is_("parent_task", None), page)
+
+    def find_all_tasks(self, page: Optional[PageRequest] = None, user_ids: Optional[List[int]] = None,
+                       project_ids: Optional[List[int]] = None) -> list:
+        """
+        Find every task row, parents and subtasks alike, without nesting.
+
+        With `user_ids` and/or `project_ids`, only the rows owned by or shared with
+        one of the users, or belonging to one of the projects. Like
+        find_parent_tasks_by_members, the IDs go out in chunks (one `in_` or
+        collaborators overlap filter per query); with a paginated `page` each query
+        returns at most limit + 1 rows after the cursor, merged by PageRequest.slice.
+        """
+        if user_ids is None and project_ids is None:
+            return self._execute(self._select(page), page)
+        user_ids = list(dict.fromkeys(user_ids or []))
+        project_ids = list(dict.fromkeys(project_ids or []))
+
+        all_tasks = []
+        for chunk in _chunks(user_ids, IN_FILTER_CHUNK_SIZE):
+            all_tasks.extend(self._execute(self._select(page).in_("owner_id", chunk), page))
+        for chunk in _chunks(user_ids, OVERLAP_FILTER_CHUNK_SIZE):
+            all_tasks.extend(self._execute(self._select(page).or_(_collaborators_overlap(chunk)), page))
+        for chunk in _chunks(project_ids, IN_FILTER_CHUNK_SIZE):
+            all_tasks.extend(self._execute(self._select(page).in_("project_id", chunk), page))
+
+        # Deduplicate by task ID
+        combined = {t["id"]: t for t in all_tasks}
+        return list(combined.values())
@@ -0,0 +1,185 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Optional
+
+# Default job file lives in the service directory (services run from there) so
+# queued jobs survive restarts
+DEFAULT_RECURRENCE_JOBS_PATH = os.path.join(os.getcwd(), "recurrence_jobs.sqlite3")
+# How many finished job keys are remembered for de-duplication
+DEFAULT_MAX_REMEMBERED = 10_000
+DEFAULT_MAX_ATTEMPTS = 5
+DEFAULT_BASE_DELAY_SECONDS = 5.0
+MAX_DELAY_SECONDS = 600.0
+# How long a claimed job stays invisible to other workers sharing the file; one
+# job at a time is claimed, so this only has to outlast a single job
+CLAIM_SECONDS = 300.0
+
+
+class RecurrenceWorker:
+    """
+    Background worker that generates the next occurrence of completed recurring tasks,
+    keeping that work off the /tasks/update request path.
+
+    Jobs are keyed by "<task_id>:<occurrence date>" and kept in a SQLite file, so
+    jobs queued before a restart are run when the worker starts again. A key that
+    is already queued, running or recently finished is dropped, so completing the
+    same task twice yields one occurrence, also across the processes sharing the
+    file. Failed jobs are retried with exponential backoff; after max_attempts
+    they are kept as 'failed' until the key is submitted again. The database's
+    unique recurrence_key makes the insert itself safe against a second generator.
+
+    With inline=True (or RECURRENCE_WORKER_MODE=inline) jobs run synchronously in
+    submit(), which is handy for tests and one-off scripts.
+    """
+
+    def __init__(self, handler: Callable[[Dict[str, Any]], Any], inline: Optional[bool] = None,
+                 path: str = ":memory:", max_remembered: int = DEFAULT_MAX_REMEMBERED,
+                 max_attempts: int = DEFAULT_MAX_ATTEMPTS, base_delay: float = DEFAULT_BASE_DELAY_SECONDS,
+                 poll_interval: float = 1.0, clock: Callable[[], float] = time.time):
+        self.handler = handler
+        self.inline = inline if inline is not None else os.getenv("RECURRENCE_WORKER_MODE", "thread") == "inline"
+        self.max_remembered = max_remembered
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.poll_interval = poll_interval
+        self.clock = clock
+        self.processed = 0
+        self.failed = 0
+        # Identifies this worker's claims among the processes sharing the file
+        self.worker_id = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._waiting = set()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS recurrence_jobs (
+                key TEXT PRIMARY KEY,
+                task TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt_at REAL NOT NULL,
+                claimed_by TEXT,
+                claimed_until REAL,
+                last_error TEXT,
+                updated_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS recurrence_jobs_due ON recurrence_jobs (status, next_attempt_at)")
+
+    def submit(self, key: str, task: Dict[str, Any]) -> bool:
+        """
+        Queue `task` for occurrence generation. A job waiting for a retry, or one
+        that ran out of attempts, is queued again from the start.
+
+        Returns:
+            True if queued (or run, when inline), False if `key` is a duplicate
+        """
+        now = self.clock()
+        with self._lock:
+            cur = self._conn.execute(
+                "INSERT INTO recurrence_jobs (key, task, next_attempt_at, updated_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET task = excluded.task, status = 'pending', attempts = 0, "
+                "next_attempt_at = excluded.next_attempt_at, last_error = NULL, updated_at = excluded.updated_at "
+                "WHERE recurrence_jobs.status = 'failed' OR (recurrence_jobs.status = 'pending' "
+                "AND recurrence_jobs.attempts > 0 AND (recurrence_jobs.claimed_until IS NULL OR recurrence_jobs.claimed_until <= ?))",
+                (key, json.dumps(task, default=str), now, now, now))
+            if cur.rowcount != 1:
+                return False
+            if not self.inline:
+                self._waiting.add(key)
+
+        if self.inline:
+            job = self._claim(now, key)
+            if job:
+                self._process(*job)
+            return True
+
+        self.start()
+        self._wakeup.set()
+        return True
+
+    def start(self) -> None:
+        """Start the background thread (idempotent); it also runs jobs left from a restart."""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="recurrence-worker", daemon=True)
+                self._thread.start()
+
+    def join(self) -> None:
+        """Block until every job submitted to this worker has been attempted."""
+        with self._idle:
+            while self._waiting:
+                self._idle.wait()
+
+    def _run(self) -> None:
+        while True:
+            try:
+                job = self._claim(self.clock())
+                if job:
+                    self._process(*job)
+                    continue  # there may be more due jobs
+            except Exception as e:
+                print(f"⚠️ Recurrence worker failed to run a job: {e}")
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+
+    def _claim(self, now: float, key: Optional[str] = None):
+        """Claim the oldest due job (or the job `key`). Returns (key, task, attempts) or None."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                sql = ("SELECT key, task, attempts FROM recurrence_jobs WHERE status = 'pending' "
+                       "AND next_attempt_at <= ? AND (claimed_until IS NULL OR claimed_until <= ?)")
+                params = [now, now]
+                if key is not None:
+                    sql += " AND key = ?"
+                    params.append(key)
+                row = self._conn.execute(sql + " ORDER BY next_attempt_at LIMIT 1", params).fetchone()
+                if row:
+                    self._conn.execute("UPDATE recurrence_jobs SET claimed_by = ?, claimed_until = ? WHERE key = ?",
+                                       (self.worker_id, now + CLAIM_SECONDS, row[0]))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return (row[0], json.loads(row[1]), row[2]) if row else None
+
+    def _process(self, key: str, task: Dict[str, Any], attempts: int) -> None:
+        error = None
+        try:
+            self.handler(task)
+        except Exception as e:
+            error = str(e)
+            print(f"⚠️ Failed to generate recurring task for {key}: {e}")
+
+        now = self.clock()
+        with self._lock:
+            if error is None:
+                self.processed += 1
+                self._conn.execute(
+                    "UPDATE recurrence_jobs SET status = 'done', claimed_by = NULL, claimed_until = NULL, updated_at = ? "
+                    "WHERE key = ? AND claimed_by = ?", (now, key, self.worker_id))
+                # Forget the oldest finished keys beyond max_remembered
+                self._conn.execute(
+                    "DELETE FROM recurrence_jobs WHERE key IN (SELECT key FROM recurrence_jobs WHERE status = 'done' "
+                    "ORDER BY updated_at DESC LIMIT -1 OFFSET ?)", (self.max_remembered,))
+            else:
+                self.failed += 1
+                attempts += 1
+                status = "failed" if attempts >= self.max_attempts else "pending"
+                delay = min(self.base_delay * (2 ** (attempts - 1)), MAX_DELAY_SECONDS)
+                self._conn.execute(
+                    "UPDATE recurrence_jobs SET status = ?, attempts = ?, next_attempt_at = ?, last_error = ?, "
+                    "claimed_by = NULL, claimed_until = NULL, updated_at = ? WHERE key = ? AND claimed_by = ?",
+                    (status, attempts, now + delay, error, now, key, self.worker_id))
+            self._waiting.discard(key)
+            self._idle.notify_all()
@@ -1,18 +1,63 @@
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple
+from dataclasses import replace
 from datetime import datetime, UTC, timedelta,timezone
 from dateutil import parser as dateparser
 from dateutil.relativedelta import relativedelta
 from models.task import Task
-from repo.supa_task_repo import SupabaseTaskRepo
-import requests
-import time
+from repo.supa_task_repo import SupabaseTaskRepo, IN_FILTER_CHUNK_SIZE
+from services.recurrence_worker import RecurrenceWorker, DEFAULT_RECURRENCE_JOBS_PATH
+from utils.dedup import NotificationDedup
+from utils.pagination import PageRequest, DEFAULT_PAGE_LIMIT
+from utils.parsing import parse_task_payload
+from utils.task_import import MAX_IMPORT_ROWS
+from utils.search_index import DEFAULT_SEARCH_LIMIT
+from utils.due_index import DEFAULT_REMINDER_INTERVALS, due_day
+from shared.outbox import NotificationOutbox, get_default_outbox
+from shared.supabase_client import get_supabase_metrics
 import copy
+import os
 import calendar
 
+# ID array columns; updates change them through the atomic array RPCs
+ARRAY_COLUMNS = ("collaborators", "subtasks")
+
+
+def _array_diff(old: Optional[list], new: Optional[list]) -> Tuple[list, list]:
+    """(IDs in `new` but not `old`, IDs in `old` but not `new`), each in list order."""
+    old, new = old or [], new or []
+    return [v for v in new if v not in old], [v for v in old if v not in new]
+
+
 class TaskService:
-    def __init__(self, repo: Optional[SupabaseTaskRepo] = None):
+    def __init__(self, repo: Optional[SupabaseTaskRepo] = None, recurrence_worker: Optional[RecurrenceWorker] = None,
+                 outbox: Optional[NotificationOutbox] = None, notification_dedup: Optional[NotificationDedup] = None):
         self.repo = repo or SupabaseTaskRepo()
-        self._notification_cache = {}  # Cache to prevent duplicate notifications
+        self._recurrence_worker = recurrence_worker
+        self._outbox = outbox
+        # Bounded store of recently notified updates, to prevent duplicate notifications
+        self.notification_dedup = notification_dedup or NotificationDedup.from_env()
+
+    @property
+    def recurrence_worker(self) -> RecurrenceWorker:
+        """
+        Generates next occurrences of completed recurring tasks in the background,
+        from jobs kept at RECURRENCE_JOBS_PATH so they survive restarts.
+        """
+        if self._recurrence_worker is None:
+            self._recurrence_worker = RecurrenceWorker(
+                self._generate_next_occurrence, path=os.getenv("RECURRENCE_JOBS_PATH", DEFAULT_RECURRENCE_JOBS_PATH))
+        return self._recurrence_worker
+
+    @recurrence_worker.setter
+    def recurrence_worker(self, worker: RecurrenceWorker) -> None:
+        self._recurrence_worker = worker
+
+    @property
+    def outbox(self) -> NotificationOutbox:
+        """Queue for notification service calls; write paths never wait on delivery."""
+        if self._outbox is None:
+            self._outbox = get_default_outbox()
+        return self._outbox
 
     def manager_create(self, payload: Dict[str, Any]) -> Dict[str, Any]:
         # uniqueness per owner: task_name
@@ -32,51 +77,247 @@ class TaskService:
         created = self.repo.insert_task(data)
         
         # Trigger collaborator notifications after successful task creation
-        self._trigger_collaborator_notifications(created.get('id'), payload)
+        self._trigger_collaborator_notifications(created.get('id'), payload, created.get('created_at'))
         
         return {"__status": 201, "Message": f"Task created! Task ID: {created.get('id')}", "data": created}
 
+    def import_tasks(self, records: Iterable[Tuple[int, Any]], importer_id: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Create many tasks from (row_number, record) pairs, as produced by
+        utils.task_import.iter_import_records.
+
+        Each record is validated with parse_task_payload as it is read. Besides the
+        task columns a record may carry "ref", a label for the row, and "parent_ref",
+        the ref of a parent task in the same import (parent_task takes an existing ID).
+        Name uniqueness per owner is checked with one set-based query, rows are inserted
+        in chunks, subtasks are appended to each parent in one call, and every
+        collaborator gets one notification listing all of their imported tasks.
+
+        Returns:
+            Dict with a summary, the created tasks and the per-row errors
+        """
+        errors = []
+        accepted = []
+        seen_names = set()
+        refs = {}
+
+        def reject(row_no, record, message):
+            name = record.get("task_name") if isinstance(record, dict) else None
+            errors.append({"row": row_no, "task_name": name, "error": message})
+
+        received = 0
+        for row_no, record in records:
+            received += 1
+            if received > MAX_IMPORT_ROWS:
+                raise ValueError(f"Import is limited to {MAX_IMPORT_ROWS} rows")
+            if isinstance(record, Exception):
+                reject(row_no, None, str(record))
+                continue
+            try:
+                payload = parse_task_payload(record)
+            except Exception as e:
+                reject(row_no, record, str(e))
+                continue
+
+            ref = str(record["ref"]) if record.get("ref") not in (None, "") else None
+            parent_ref = str(record["parent_ref"]) if record.get("parent_ref") not in (None, "") else None
+            if parent_ref is not None:
+                payload["type"] = "subtask"
+            if payload["type"] == "subtask" and parent_ref is None and payload["parent_task"] is None:
+                reject(row_no, record, "Subtasks need parent_task or parent_ref")
+                continue
+            if ref is not None and ref in refs:
+                reject(row_no, record, f"Duplicate ref '{ref}'")
+                continue
+            key = (payload["owner_id"], payload["task_name"])
+            if key in seen_names:
+                reject(row_no, record, f"Task '{payload['task_name']}' appears more than once for this owner in the import")
+                continue
+            seen_names.add(key)
+            if ref is not None:
+                refs[ref] = payload["type"]
+            accepted.append({"row": row_no, "ref": ref, "parent_ref": parent_ref, "payload": payload})
+
+        # One set-based uniqueness check and one existence check for referenced parents
+        existing = self.repo.find_existing_owner_task_names(list(seen_names)) if seen_names else set()
+        parent_ids = {item["payload"]["parent_task"] for item in accepted
+                      if item["parent_ref"] is None and item["payload"]["parent_task"] is not None}
+        existing_parents = self.repo.find_existing_task_ids(list(parent_ids)) if parent_ids else set()
+
+        parents, subtasks = [], []
+        for item in accepted:
+            payload = item["payload"]
+            if (payload["owner_id"], payload["task_name"]) in existing:
+                reject(item["row"], payload, f"Task '{payload['task_name']}' already exists for this user.")
+            elif item["parent_ref"] is not None and refs.get(item["parent_ref"]) != "parent":
+                reject(item["row"], payload, f"parent_ref '{item['parent_ref']}' does not name a parent task in this import")
+            elif item["parent_ref"] is None and payload["parent_task"] is not None and payload["parent_task"] not in existing_parents:
+                reject(item["row"], payload, f"Parent task with ID {payload['parent_task']} not found")
+            else:
+                (subtasks if payload["type"] == "subtask" else parents).append(item)
+
+        created = []
+        ids_by_ref = {}
+        for item, row in zip(parents, self._insert_import_rows(parents)):
+            if item["ref"] is not None:
+                ids_by_ref[item["ref"]] = row["id"]
+            created.append((item, row))
+
+        linkable = []
+        for item in subtasks:
+            if item["parent_ref"] is not None:
+                if item["parent_ref"] not in ids_by_ref:
+                    reject(item["row"], item["payload"], f"Parent '{item['parent_ref']}' was not created")
+                    continue
+                item["payload"]["parent_task"] = ids_by_ref[item["parent_ref"]]
+            linkable.append(item)
+        subtask_rows = self._insert_import_rows(linkable)
+        created.extend(zip(linkable, subtask_rows))
+
+        # Link subtasks with one atomic append per parent
+        by_parent: Dict[int, list] = {}
+        for item, row in zip(linkable, subtask_rows):
+            by_parent.setdefault(item["payload"]["parent_task"], []).append(row["id"])
+        for parent_id, subtask_ids in by_parent.items():
+            try:
+                self.repo.append_to_array(parent_id, "subtasks", subtask_ids)
+            except Exception as e:
+                print(f"Warning: Failed to link subtasks {subtask_ids} to parent {parent_id}: {e}")
+
+        self._notify_imported_collaborators([row for _, row in created], importer_id)
+
+        errors.sort(key=lambda error: error["row"])
+        created.sort(key=lambda pair: pair[0]["row"])
+        summary = {"received": received, "created": len(created), "failed": len(errors)}
+        return {
+            "__status": (207 if errors else 201) if created else 400,
+            "Message": f"Imported {len(created)} of {received} tasks",
+            "summary": summary,
+            "data": [{"row": item["row"], "id": row["id"], "task_name": row.get("task_name")} for item, row in created],
+            "errors": errors,
+        }
+
+    def _insert_import_rows(self, items: list) -> list:
+        rows = []
+        for item in items:
+            data = Task.from_dict(item["payload"]).to_dict()
+            data.pop("id", None)
+            rows.append(data)
+        return self.repo.insert_tasks(rows) if rows else []
+
+    def _notify_imported_collaborators(self, created_rows: list, importer_id: Optional[int]) -> None:
+        """Queue one notification per collaborator covering all imported tasks they were added to."""
+        tasks_by_user: Dict[int, list] = {}
+        for row in created_rows:
+            for user_id in row.get("collaborators") or []:
+                if user_id != row.get("owner_id"):
+                    tasks_by_user.setdefault(user_id, []).append({"id": row["id"], "task_name": row.get("task_name")})
+        for user_id, tasks in tasks_by_user.items():
+            try:
+                self.outbox.enqueue("/notifications/triggers/task-import-summary", {
+                    "user_id": user_id,
+                    "tasks": tasks
+                }, name_lookup=("importer_name", importer_id, "System"))
+            except Exception as e:
+                print(f"Warning: Failed to queue import notification for user {user_id}: {e}")
+
     # get tasks by user_id (in owner_id or collaborators) with nested subtasks
-    def get_by_user(self, user_id: int) -> Dict[str, Any]:
+    def get_by_user(self, user_id: int, page: Optional[PageRequest] = None,
+                    date_range: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
 
-        # Get only parent tasks for the user
-        parent_tasks = self.repo.find_parent_tasks_by_user(user_id)
+        # Get only parent tasks for the user, date-filtered in the query when requested
+        parent_tasks = self.repo.find_parent_tasks_by_user(user_id, page, date_range=date_range)
         
+        # Cut down to the requested page and attach subtasks for that page only
+        parent_tasks, pagination = self._slice_page(parent_tasks, page, detailed=False)
+
         # Check if no tasks found
-        if not parent_tasks:
+        if not parent_tasks and not (page and page.cursor):
             return {"__status": 404, "Message": f"No tasks found for user ID {user_id}"}
         
-        # For each parent task, get its subtasks
+        result = {
+            "__status": 200,
+            "status": "success",
+            "data": parent_tasks
+        }
+        if pagination:
+            result["pagination"] = pagination
+        if date_range:
+            # Lets callers skip their own date filtering
+            result["date_filter"] = date_range
+        return result
+
+    def get_by_user_versions(self, user_id: int, page: Optional[PageRequest] = None,
+                             date_range: Optional[Dict[str, Any]] = None) -> List[Tuple[int, Any]]:
+        """
+        (id, updated_at) of every row get_by_user would return, parents and subtasks,
+        for its ETag: the same queries narrowed to the version columns, without
+        hydration. Read before the view itself, so a write in between only makes
+        the ETag older than the body, never newer.
+        """
+        version_page = replace(page or PageRequest(), fields=["id", "created_at", "updated_at"])
+        parents = self.repo.find_parent_tasks_by_user(user_id, version_page, date_range=date_range)
+        rows, _ = version_page.slice(parents)
+        if page is None or page.wants("subtasks"):
+            subtasks = self.repo.find_subtasks_by_parents([t["id"] for t in rows], columns="id,parent_task,updated_at")
+            rows = rows + [s for group in subtasks.values() for s in group]
+        return sorted((row["id"], row.get("updated_at")) for row in rows)
+
+    def _slice_page(self, tasks: list, page: Optional[PageRequest], hydrate: bool = True, detailed: bool = True):
+        """
+        Cut repo rows down to the requested page, then hydrate subtasks for that page only.
+
+        Subtasks are skipped entirely when a `fields=` projection leaves them out.
+
+        Returns:
+            (tasks, pagination metadata or None when the request is not paginated)
+        """
+        next_cursor = None
+        if page is not None:
+            tasks, next_cursor = page.slice(tasks)
+        if hydrate and (page is None or page.wants("subtasks")):
+            self._attach_subtasks(tasks, detailed=detailed)
+        pagination = page.metadata(next_cursor) if page is not None and page.is_paginated else None
+        return tasks, pagination
+
+    def _attach_subtasks(self, parent_tasks: list, detailed: bool = True) -> list:
+        """
+        Replace each parent's `subtasks` with its formatted subtask rows.
+
+        Subtasks for all parents are fetched in one batched repo call
+        (find_subtasks_by_parents) instead of one query per parent.
+        `detailed` adds priority and attachments, as used by the team,
+        department and all-task views.
+        """
+        if not parent_tasks:
+            return parent_tasks
+
+        subtasks_by_parent = self.repo.find_subtasks_by_parents([t["id"] for t in parent_tasks])
+
         for parent_task in parent_tasks:
-            parent_task_id = parent_task["id"]
-            subtasks = self.repo.find_subtasks_by_parent(parent_task_id)
-            
-            # Format subtasks for frontend
             formatted_subtasks = []
-            for subtask in subtasks:
+            for subtask in subtasks_by_parent.get(parent_task["id"], []):
                 formatted_subtask = {
                     "id": subtask["id"],
-                    "task_name": subtask["task_name"], 
+                    "task_name": subtask["task_name"],
                     "description": subtask["description"],
-                    "due_date": subtask["due_date"],  
+                    "due_date": subtask["due_date"],
                     "status": subtask["status"],
                     "owner_id": subtask["owner_id"],
                     "collaborators": subtask["collaborators"] or [],
                     "project_id": subtask["project_id"],
                     "created_at": subtask["created_at"],
                     "parent_task": subtask["parent_task"],
-                    "type": subtask["type"]
+                    "type": "subtask" if detailed else subtask["type"]
                 }
+                if detailed:
+                    formatted_subtask["priority"] = subtask["priority"]
+                    formatted_subtask["attachments"] = subtask["attachments"] or []
                 formatted_subtasks.append(formatted_subtask)
-            
-            # Format parent task for frontend
+
             parent_task["subtasks"] = formatted_subtasks
-        
-        return {
-            "__status": 200,
-            "status": "success",
-            "data": parent_tasks
-        }
+
+        return parent_tasks
 
     def update_status(self, task_id: int, new_status: str):
         updated = self.repo.update_task(task_id, {"status": new_status})
@@ -93,8 +334,8 @@ class TaskService:
         if not parent_task_id:
             raise ValueError("parent_task is required for subtasks")
         
-        parent_task = self.repo.get_task(parent_task_id)
-        if not parent_task:
+        # Existence check only; the parent's subtasks list is appended atomically below
+        if int(parent_task_id) not in self.repo.find_existing_task_ids([int(parent_task_id)]):
             raise ValueError(f"Parent task with ID {parent_task_id} not found")
         
         # Get the owner_id
@@ -125,7 +366,7 @@ class TaskService:
         created = self.repo.insert_task(data)
         
         # Trigger collaborator notifications after successful task creation
-        self._trigger_collaborator_notifications(created.get('id'), payload)
+        self._trigger_collaborator_notifications(created.get('id'), payload, created.get('created_at'))
         
         # If subtask was successfully created, update the parent
         if created.get('id'):
@@ -147,8 +388,8 @@ class TaskService:
         if not task_id:
             return {"__status": 400, "Message": "task_id is required for updates"}
         
-        # Check if task exists
-        existing_task_data = self.repo.get_task(task_id)
+        # Check if task exists; read past the cache, a cached row may be up to its TTL old
+        existing_task_data = self.repo.fetch_task(task_id)
         if not existing_task_data:
             return {"__status": 404, "Message": f"Task with ID {task_id} not found"}
         
@@ -159,6 +400,7 @@ class TaskService:
             return {"__status": 400, "Message": "No fields to update provided", "data": existing_task_data}
         
         # Handle status change logic - auto-set completed_at timestamp
+        completing = False
         if 'status' in update_fields:
             new_status = update_fields['status']
             old_status = existing_task_data.get('status')
@@ -166,10 +408,7 @@ class TaskService:
             # If status is changing TO "Completed", set completed_at timestamp
             if new_status == 'Completed' and old_status != 'Completed':
                 update_fields['completed_at'] = datetime.now(UTC).isoformat()
-                try:
-                    self._generate_next_occurrence(existing_task_data)
-                except Exception as e:
-                    print(f"⚠️ Failed to generate recurring task for {task_id}: {e}")
+                completing = True
             
             # If status is changing FROM "Completed" to something else, clear completed_at
             elif old_status == 'Completed' and new_status != 'Completed':
@@ -185,42 +424,182 @@ class TaskService:
         # Create updated task object to ensure proper type conversion
         updated_task_obj = Task.from_dict(merged_data)
         
-        # Convert back to dict for database update
-        update_data = updated_task_obj.to_dict()
-        
-        # Perform the update
+        # Write back only the columns being changed, so concurrent edits to the
+        # other columns (e.g. attachments added meanwhile) are kept. The ID arrays
+        # are changed by their difference from the current row through the atomic
+        # RPCs, so IDs other requests add or remove at the same time are kept too.
+        normalized = updated_task_obj.to_dict()
+        update_data = {k: v for k, v in normalized.items() if k in update_fields and k not in ARRAY_COLUMNS}
+        array_edits = {column: _array_diff(existing_task_data.get(column), normalized.get(column))
+                       for column in ARRAY_COLUMNS if column in update_fields}
+        if not update_data and not array_edits:
+            return {"__status": 400, "Message": "No fields to update provided", "data": existing_task_data}
+
+        old_parent = existing_task_data.get("parent_task")
+        new_parent = update_data.get("parent_task", old_parent)
+        if new_parent != old_parent and new_parent is not None and new_parent not in self.repo.find_existing_task_ids([new_parent]):
+            return {"__status": 400, "Message": f"Parent task with ID {new_parent} not found"}
+
+        # Perform the update: the columns first, so a rejected change (status, owner,
+        # parent, ...) leaves the arrays untouched, then the array edits. Each step
+        # that succeeded is undone if a later one fails.
+        undo = []
         try:
-            updated_task_data = self.repo.update_task(task_id, update_data)
+            if update_data:
+                updated_task_data = self.repo.update_task(task_id, update_data)
+                previous_columns = {k: existing_task_data.get(k) for k in update_data}
+                undo.append(lambda: self.repo.update_task(task_id, previous_columns))
+
+            added_collaborators, removed_collaborators = array_edits.get("collaborators", ([], []))
+            if added_collaborators:
+                added_collaborators = self.repo.add_collaborators(task_id, added_collaborators)
+                undo.append(lambda ids=added_collaborators: self.repo.remove_collaborators(task_id, ids))
+            if removed_collaborators:
+                removed_collaborators = self.repo.remove_collaborators(task_id, removed_collaborators)
+                undo.append(lambda ids=removed_collaborators: self.repo.add_collaborators(task_id, ids))
+            added_subtasks, removed_subtasks = array_edits.get("subtasks", ([], []))
+            if added_subtasks:
+                added_subtasks = self.repo.append_to_array(task_id, "subtasks", added_subtasks)["added"]
+                undo.append(lambda ids=added_subtasks: self.repo.remove_from_array(task_id, "subtasks", ids))
+            if removed_subtasks:
+                removed_subtasks = self.repo.remove_from_array(task_id, "subtasks", removed_subtasks)["removed"]
+                undo.append(lambda ids=removed_subtasks: self.repo.append_to_array(task_id, "subtasks", ids))
+
+            if array_edits or not update_data:
+                updated_task_data = self.repo.fetch_task(task_id)
+            undo.clear()
+
+            # Only once the completion is written, so a rejected update schedules nothing
+            if completing:
+                try:
+                    self._schedule_next_occurrence(existing_task_data)
+                except Exception as e:
+                    print(f"⚠️ Failed to schedule recurring task for {task_id}: {e}")
+
+            # A subtask moved to another parent leaves the old parent's subtasks list
+            if new_parent != old_parent:
+                try:
+                    if old_parent is not None:
+                        self.repo.remove_subtask_from_parent(old_parent, task_id)
+                    if new_parent is not None:
+                        self.repo.add_subtask_to_parent(new_parent, task_id)
+                except Exception as e:
+                    print(f"Warning: Failed to move subtask {task_id} from parent {old_parent} to {new_parent}: {e}")
             
             # Check for collaborator additions and trigger notifications
-            self._trigger_collaborator_addition_notifications(existing_task_data, update_fields, task_id)
+            event_at = datetime.now(UTC).isoformat()
+            self._trigger_collaborator_addition_notifications(existing_task_data, added_collaborators, task_id, event_at)
             
             # Notifications are now handled by the frontend to prevent duplicates
-            # self._trigger_update_notifications(existing_task_data, update_fields, task_id)
+            # self._trigger_update_notifications(existing_task_data, update_fields, task_id, event_at)
             
             return {"__status": 200, "Message": f"Task {task_id} updated successfully", "data": updated_task_data}
         except Exception as e:
+            for revert in reversed(undo):
+                try:
+                    revert()
+                except Exception as undo_error:
+                    print(f"Warning: Could not undo part of the failed update of task {task_id}: {undo_error}")
             return {"__status": 500, "Message": f"Failed to update task {task_id}: {str(e)}"}
 
     def get_task(self, task_id: int) -> Optional[Dict[str, Any]]:
         task = self.repo.get_task(task_id)
         return task
 
-    def _trigger_update_notifications(self, existing_task_data: Dict[str, Any], update_fields: Dict[str, Any], task_id: int):
+    def get_db_stats(self) -> Dict[str, Any]:
+        """
+        Per-table Supabase request counts and latencies (avg/p95/max ms) for this worker process.
+        """
+        return {"__status": 200, "data": get_supabase_metrics()}
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """
+        Hit/miss counters of the task cache for this worker process.
+        """
+        cache = getattr(self.repo, "cache", None)
+        if cache is None:
+            return {"__status": 200, "data": {"enabled": False}}
+        return {"__status": 200, "data": {"enabled": True, **cache.stats()}}
+
+    def search_tasks(self, user_id: int, query: str, limit: int = DEFAULT_SEARCH_LIMIT) -> Dict[str, Any]:
+        """
+        Full-text search over the tasks the user owns or collaborates on, best match first.
+        Each returned task carries its relevance "score".
+        """
+        index = self.repo.search_index
+        if index is None:
+            return {"__status": 503, "Message": "Task search is disabled"}
+        if not index.ready:
+            return {"__status": 503, "Message": "Task search index is still being built"}
+
+        hits = index.search(query, user_id, limit)
+        scores = dict(hits)
+        rows = self.repo.get_tasks_by_ids([task_id for task_id, _ in hits])
+        results = []
+        for row in rows:
+            # The index may trail the database briefly; never leak a task the user can no longer see
+            if row.get("owner_id") != user_id and user_id not in (row.get("collaborators") or []):
+                continue
+            results.append({**row, "score": scores[row["id"]]})
+        return {"__status": 200, "query": query, "data": results}
+
+    def rebuild_search_index(self) -> Dict[str, Any]:
+        """
+        Re-index every task and comment from Supabase.
+        """
+        if self.repo.search_index is None:
+            return {"__status": 503, "Message": "Task search is disabled"}
+        indexed = self.repo.rebuild_search_index()
+        return {"__status": 200, "Message": f"Indexed {indexed} tasks", "data": self.repo.search_index.stats()}
+
+    def rebuild_due_index(self) -> Dict[str, Any]:
+        """
+        Re-index open tasks by due date from Supabase.
+        """
+        if self.repo.due_index is None:
+            return {"__status": 503, "Message": "Due date index is disabled"}
+        indexed = self.repo.rebuild_due_index()
+        return {"__status": 200, "Message": f"Indexed {indexed} tasks by due date", "data": self.repo.due_index.stats()}
+
+    def refresh_search_index(self, task_id: int) -> Dict[str, Any]:
+        """
+        Re-index one task and its comments (called by the comments service).
+        """
+        if self.repo.search_index is None:
+            return {"__status": 503, "Message": "Task search is disabled"}
+        if not self.repo.refresh_search_index(task_id):
+            return {"__status": 404, "Message": f"Task with ID {task_id} not found"}
+        return {"__status": 200, "Message": f"Task {task_id} re-indexed"}
+
+    def get_notification_dedup_stats(self) -> Dict[str, Any]:
+        """
+        Hit/miss/eviction counters of the task notification dedup store for this worker process.
+        """
+        return {"__status": 200, "data": self.notification_dedup.stats()}
+
+    def get_attachment_upload_status(self, upload_id: str) -> Dict[str, Any]:
+        """
+        Progress of a background attachment upload (pending, uploading, done or failed).
+        Uploads are tracked per worker process.
+        """
+        status = self.repo.attachments.status(upload_id)
+        if status is None:
+            return {"__status": 404, "Message": f"Upload {upload_id} not found"}
+        return {"__status": 200, "data": status}
+
+    def get_attachment_stats(self) -> Dict[str, Any]:
+        """Upload and dedupe counters of the attachment store for this worker process."""
+        return {"__status": 200, "data": self.repo.attachments.stats()}
+
+    def _trigger_update_notifications(self, existing_task_data: Dict[str, Any], update_fields: Dict[str, Any], task_id: int,
+                                      event_at: Optional[str] = None):
         """
         Trigger consolidated notifications when specific task fields are updated.
+        `event_at` is when the update was written (see _queue_notification).
         """
         try:
             print(f"DEBUG: Triggering consolidated notifications for task {task_id} with fields: {list(update_fields.keys())}")
             
-            # Create a cache key for this update to prevent duplicates
-            cache_key = f"{task_id}_{hash(str(sorted(update_fields.items())))}"
-            
-            # Check if we've already sent notifications for this exact update
-            if cache_key in self._notification_cache:
-                print(f"DEBUG: Notifications already sent for this update, skipping duplicate")
-                return
-            
             # Get collaborators to notify
             collaborators = existing_task_data.get("collaborators", [])
             if not collaborators:
@@ -296,159 +675,113 @@ class TaskService:
                     })
             
             # Check for ownership changes (this is handled separately as it's a different type of notification)
-            if "owner_id" in update_fields:
-                old_owner_id = existing_task_data.get("owner_id")
-                new_owner_id = update_fields["owner_id"]
-                if old_owner_id != new_owner_id and new_owner_id:
-                    self._send_task_ownership_transfer_notification(task_id, new_owner_id, old_owner_id, updater_name)
+            old_owner_id = existing_task_data.get("owner_id")
+            new_owner_id = update_fields.get("owner_id")
+            ownership_changed = "owner_id" in update_fields and old_owner_id != new_owner_id and new_owner_id
+            
+            if not changes and not ownership_changed:
+                return
+            
+            if ownership_changed:
+                self._send_task_ownership_transfer_notification(task_id, new_owner_id, old_owner_id, updater_name, event_at)
             
             # Send consolidated notification if there are changes
             if changes:
-                self._send_consolidated_task_update_notification(task_id, collaborators, changes, updater_name)
-                
-                # Cache this update to prevent duplicates (expire after 5 minutes)
-                self._notification_cache[cache_key] = {
-                    'timestamp': time.time(),
-                    'changes': [change['field'] for change in changes]
-                }
-                print(f"DEBUG: Cached consolidated notification for {cache_key}, changes: {[change['field'] for change in changes]}")
-                
-                # Clean up old cache entries (older than 5 minutes)
-                current_time = time.time()
-                self._notification_cache = {
-                    k: v for k, v in self._notification_cache.items() 
-                    if current_time - v['timestamp'] < 300
-                }
+                self._send_consolidated_task_update_notification(task_id, collaborators, changes, updater_name, event_at)
                     
         except Exception as e:
             print(f"Warning: Failed to trigger update notifications for task {task_id}: {e}")
     
     # Individual notification methods removed - now using consolidated notifications only
+
+    def _queue_notification(self, task_id: int, endpoint: str, payload: Dict[str, Any],
+                            event_at: Optional[str] = None, name_lookup=None) -> bool:
+        """
+        Queue a notification in the outbox unless the same event was already queued within
+        the dedup TTL (shared across workers). Returns True if queued.
+
+        `event_at` is the time of the write the notification reports, and is part of the
+        dedup key: the same event queued twice is sent once, while the same change made
+        again (a collaborator removed and re-added, a second reassignment) is a new event.
+        Defaults to now.
+        """
+        event_at = event_at or datetime.now(UTC).isoformat()
+        key = NotificationDedup.key_for(task_id, {"endpoint": endpoint, "event_at": event_at, **payload})
+        if self.notification_dedup.is_duplicate(key):
+            print(f"Skipping duplicate notification {endpoint} for task {task_id}")
+            return False
+        self.outbox.enqueue(endpoint, payload, name_lookup=name_lookup)
+        return True
     
-    def _send_consolidated_task_update_notification(self, task_id: int, collaborators: list, changes: list, updater_name: str):
-        """Send consolidated notification for multiple task changes."""
+    def _send_consolidated_task_update_notification(self, task_id: int, collaborators: list, changes: list, updater_name: str,
+                                                    event_at: Optional[str] = None):
+        """Queue consolidated notification for multiple task changes."""
         try:
-            response = requests.post("http://127.0.0.1:5006/notifications/triggers/task-consolidated-update",
-                                   json={
-                                       "task_id": task_id,
-                                       "user_ids": collaborators,
-                                       "changes": changes,
-                                       "updater_name": updater_name
-                                   })
-            if response.status_code not in [200, 201]:
-                print(f"Warning: Failed to send consolidated update notification: {response.status_code}")
+            self._queue_notification(task_id, "/notifications/triggers/task-consolidated-update", {
+                "task_id": task_id,
+                "user_ids": collaborators,
+                "changes": changes,
+                "updater_name": updater_name
+            }, event_at)
         except Exception as e:
-            print(f"Warning: Failed to send consolidated update notification: {e}")
+            print(f"Warning: Failed to queue consolidated update notification: {e}")
     
-    def _send_task_ownership_transfer_notification(self, task_id: int, new_owner_id: int, old_owner_id: int, updater_name: str):
-        """Send notification for task ownership transfer."""
+    def _send_task_ownership_transfer_notification(self, task_id: int, new_owner_id: int, old_owner_id: int, updater_name: str,
+                                                   event_at: Optional[str] = None):
+        """Queue notification for task ownership transfer."""
         try:
-            # Get old owner name for the notification
-            old_owner_name = "Previous Owner"
-            if old_owner_id:
-                try:
-                    response = requests.get(f"http://127.0.0.1:5003/users/{old_owner_id}")
-                    if response.status_code == 200:
-                        user_data = response.json()
-                        old_owner_name = user_data.get("data", {}).get("name", "Previous Owner")
-                except Exception:
-                    pass  # Use default name if we can't fetch it
-            
-            response = requests.post("http://127.0.0.1:5006/notifications/triggers/task-ownership-transfer", 
-                                   json={
-                                       "task_id": task_id,
-                                       "new_owner_id": new_owner_id,
-                                       "previous_owner_name": old_owner_name
-                                   })
-            if response.status_code not in [200, 201]:
-                print(f"Warning: Failed to send ownership transfer notification: {response.status_code}")
+            # The old owner's name is looked up by the outbox worker, off the request path
+            self._queue_notification(task_id, "/notifications/triggers/task-ownership-transfer", {
+                "task_id": task_id,
+                "new_owner_id": new_owner_id
+            }, event_at, name_lookup=("previous_owner_name", old_owner_id, "Previous Owner"))
         except Exception as e:
-            print(f"Warning: Failed to send ownership transfer notification: {e}")
+            print(f"Warning: Failed to queue ownership transfer notification: {e}")
 
-    def _trigger_collaborator_notifications(self, task_id: int, payload: Dict[str, Any]):
+    def _trigger_collaborator_notifications(self, task_id: int, payload: Dict[str, Any], created_at: Optional[str] = None):
         """
         Trigger notifications for collaborators when a new task is created.
+        `created_at` is the new row's, identifying the event for the dedup store.
         """
         try:
             # Get collaborators from payload
             collaborators = payload.get("collaborators", [])
             owner_id = payload.get("owner_id")
             
-            # Get creator name
-            creator_name = "System"
-            if owner_id:
-                try:
-                    response = requests.get(f"http://127.0.0.1:5003/users/{owner_id}")
-                    if response.status_code == 200:
-                        user_data = response.json()
-                        creator_name = user_data.get("data", {}).get("name", "System")
-                except Exception:
-                    pass  # Use default name if we can't fetch it
-            
             # Send notifications to all collaborators except the owner
             collaborator_ids = [collab_id for collab_id in collaborators if collab_id != owner_id]
             
             if collaborator_ids:
-                response = requests.post("http://127.0.0.1:5006/notifications/triggers/task-collaborator-addition", 
-                                       json={
-                                           "task_id": task_id,
-                                           "collaborator_ids": collaborator_ids,
-                                           "creator_name": creator_name
-                                       })
-                if response.status_code not in [200, 201]:
-                    print(f"Warning: Failed to send collaborator notifications: {response.status_code}")
+                # Creator name is resolved by the outbox worker
+                self._queue_notification(task_id, "/notifications/triggers/task-collaborator-addition", {
+                    "task_id": task_id,
+                    "collaborator_ids": collaborator_ids
+                }, created_at, name_lookup=("creator_name", owner_id, "System"))
         except Exception as e:
-            print(f"Warning: Failed to send collaborator notifications: {e}")
+            print(f"Warning: Failed to queue collaborator notifications: {e}")
 
-    def _trigger_collaborator_addition_notifications(self, existing_task_data: Dict[str, Any], update_fields: Dict[str, Any], task_id: int):
+    def _trigger_collaborator_addition_notifications(self, existing_task_data: Dict[str, Any], added_collaborators: list, task_id: int,
+                                                     event_at: Optional[str] = None):
         """
-        Trigger notifications for newly added collaborators when updating an existing task.
+        Trigger notifications for collaborators newly added to an existing task.
+        `added_collaborators` are the IDs the add_collaborators RPC actually appended,
+        so a collaborator added by two concurrent requests is notified once.
+        `event_at` is when the update was written.
         """
         try:
-            # Check if collaborators field was updated
-            if 'collaborators' not in update_fields:
-                return
-            
-            # Get existing and new collaborators
-            existing_collaborators = set(existing_task_data.get("collaborators", []) or [])
-            new_collaborators = set(update_fields.get("collaborators", []) or [])
-            
-            # Find newly added collaborators (excluding the owner)
-            owner_id = existing_task_data.get("owner_id")
-            newly_added_collaborators = new_collaborators - existing_collaborators
-            
             # Remove owner from newly added collaborators (they shouldn't get notifications)
-            if owner_id:
-                newly_added_collaborators.discard(owner_id)
-            
-            if not newly_added_collaborators:
-                return
-            
-            # Get updater name
-            updater_name = "System"
-            # Try to get updater from request context or use owner as fallback
-            if owner_id:
-                try:
-                    response = requests.get(f"http://127.0.0.1:5003/users/{owner_id}")
-                    if response.status_code == 200:
-                        user_data = response.json()
-                        updater_name = user_data.get("data", {}).get("name", "System")
-                except Exception:
-                    pass  # Use default name if we can't fetch it
+            owner_id = existing_task_data.get("owner_id")
+            collaborator_ids = [c for c in added_collaborators if c != owner_id]
             
-            # Send notifications to newly added collaborators
-            collaborator_ids = list(newly_added_collaborators)
+            # Send notifications to newly added collaborators; the updater name
+            # (owner as fallback) is resolved by the outbox worker
             if collaborator_ids:
-                response = requests.post("http://127.0.0.1:5006/notifications/triggers/task-collaborator-addition", 
-                                       json={
-                                           "task_id": task_id,
-                                           "collaborator_ids": collaborator_ids,
-                                           "creator_name": updater_name
-                                       })
-                if response.status_code not in [200, 201]:
-                    print(f"Warning: Failed to send collaborator addition notifications: {response.status_code}")
+                self._queue_notification(task_id, "/notifications/triggers/task-collaborator-addition", {
+                    "task_id": task_id,
+                    "collaborator_ids": collaborator_ids
+                }, event_at, name_lookup=("creator_name", owner_id, "System"))
         except Exception as e:
-            print(f"Warning: Failed to send collaborator addition notifications: {e}")
+            print(f"Warning: Failed to queue collaborator addition notifications: {e}")
 
     def staff_create(self, payload: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -490,8 +823,8 @@ class TaskService:
         if not parent_task_id:
             raise ValueError("parent_task is required for subtasks")
         
-        parent_task = self.repo.get_task(parent_task_id)
-        if not parent_task:
+        # Existence check only; the parent's subtasks list is appended atomically below
+        if int(parent_task_id) not in self.repo.find_existing_task_ids([int(parent_task_id)]):
             raise ValueError(f"Parent task with ID {parent_task_id} not found")
         
         # Get the owner_id
@@ -535,14 +868,17 @@ class TaskService:
     #         return {"__status": 404, "Message": f"Task with ID {task_id} not found"}
     #     return {"__status": 200, "data": task}
 
-    def get_tasks_by_project(self, project_id: int) -> Dict[str, Any]:
+    def get_tasks_by_project(self, project_id: int, page: Optional[PageRequest] = None) -> Dict[str, Any]:
         """
         Get all tasks that belong to a specific project.
         """
-        tasks = self.repo.find_by_project(project_id)
-        if not tasks:
+        tasks, pagination = self._slice_page(self.repo.find_by_project(project_id, page), page, hydrate=False)
+        if not tasks and not (page and page.cursor):
             return {"__status": 404, "Message": f"No tasks found for project ID {project_id}"}
-        return {"__status": 200, "data": tasks}
+        result = {"__status": 200, "data": tasks}
+        if pagination:
+            result["pagination"] = pagination
+        return result
 
     def get_tasks_by_owner(self, owner_id: int) -> Dict[str, Any]:
         """
@@ -553,13 +889,17 @@ class TaskService:
             return {"__status": 404, "Message": f"No tasks found for owner ID {owner_id}"}
         return {"__status": 200, "data": tasks}
 
-    def bulk_update_project_id(self, task_ids: list, project_id: int) -> Dict[str, Any]:
+    def bulk_update_project_id(self, task_ids: list, project_id: int, chunk_size: Optional[int] = None) -> Dict[str, Any]:
         """
         Bulk update the project_id for multiple tasks.
+
+        Existence is checked with one set-based query and the update is applied with
+        one statement per chunk of IDs, instead of a get + update per task.
         
         Args:
             task_ids: List of task IDs to update
             project_id: The project ID to set for all tasks
+            chunk_size: Max IDs per query (defaults to the repo's IN_FILTER_CHUNK_SIZE)
             
         Returns:
             Dict with status, message, and results
@@ -575,24 +915,43 @@ class TaskService:
         
         if not isinstance(project_id, int):
             return {"__status": 400, "Message": "project_id must be an integer"}
+
+        if chunk_size is not None and (not isinstance(chunk_size, int) or isinstance(chunk_size, bool) or chunk_size < 1):
+            return {"__status": 400, "Message": "chunk_size must be a positive integer"}
+
+        chunk_size = chunk_size or IN_FILTER_CHUNK_SIZE
         
         updated_tasks = []
         failed_updates = []
-        
-        for task_id in task_ids:
+        errors_by_id = {}
+        updated_by_id = {}
+
+        # One existence check for the whole batch
+        try:
+            existing_ids = self.repo.find_existing_task_ids(task_ids, chunk_size)
+        except Exception as e:
+            existing_ids = set()
+            errors_by_id = {task_id: str(e) for task_id in task_ids}
+
+        # One UPDATE per chunk; a failing chunk only fails its own IDs
+        found_ids = [task_id for task_id in dict.fromkeys(task_ids) if task_id in existing_ids]
+        for start in range(0, len(found_ids), chunk_size):
+            chunk = found_ids[start:start + chunk_size]
             try:
-                # Check if task exists
-                existing_task = self.repo.get_task(task_id)
-                if not existing_task:
-                    failed_updates.append({"task_id": task_id, "error": "Task not found"})
-                    continue
-                
-                # Update the task's project_id
-                updated_task = self.repo.update_task(task_id, {"project_id": project_id})
-                updated_tasks.append(updated_task)
-                
+                for row in self.repo.bulk_update_tasks(chunk, {"project_id": project_id}, chunk_size):
+                    updated_by_id[row["id"]] = row
             except Exception as e:
-                failed_updates.append({"task_id": task_id, "error": str(e)})
+                errors_by_id.update((task_id, str(e)) for task_id in chunk)
+
+        for task_id in task_ids:
+            if task_id in updated_by_id:
+                updated_tasks.append(updated_by_id[task_id])
+            elif task_id in errors_by_id:
+                failed_updates.append({"task_id": task_id, "error": errors_by_id[task_id]})
+            elif task_id not in existing_ids:
+                failed_updates.append({"task_id": task_id, "error": "Task not found"})
+            else:
+                failed_updates.append({"task_id": task_id, "error": "Update failed — no data returned"})
         
         # Prepare response
         total_tasks = len(task_ids)
@@ -663,19 +1022,17 @@ class TaskService:
                 }
             }
         
-        # Get details for each subtask
-        subtask_details = []
-        failed_subtasks = []
-        
-        for subtask_id in subtask_ids:
-            try:
-                subtask = self.repo.get_task(subtask_id)
-                if subtask:
-                    subtask_details.append(subtask)
-                else:
-                    failed_subtasks.append({"subtask_id": subtask_id, "error": "Subtask not found"})
-            except Exception as e:
-                failed_subtasks.append({"subtask_id": subtask_id, "error": str(e)})
+        # Get details for all subtasks in one batched lookup
+        try:
+            subtask_details = self.repo.get_tasks_by_ids(subtask_ids)
+            found_ids = {subtask["id"] for subtask in subtask_details}
+            failed_subtasks = [
+                {"subtask_id": subtask_id, "error": "Subtask not found"}
+                for subtask_id in subtask_ids if subtask_id not in found_ids
+            ]
+        except Exception as e:
+            subtask_details = []
+            failed_subtasks = [{"subtask_id": subtask_id, "error": str(e)} for subtask_id in subtask_ids]
         
         # Prepare response
         if not subtask_details:
@@ -710,54 +1067,32 @@ class TaskService:
                 "data": response_data
             }
 
-    def get_tasks_by_team(self, team_id: int) -> Dict[str, Any]:
+    def get_tasks_by_team(self, team_id: int, page: Optional[PageRequest] = None) -> Dict[str, Any]:
         """
         Get all tasks for users in a specific team.
         """
         try:
             # Get all parent tasks for team members
-            parent_tasks = self.repo.find_parent_tasks_by_team(team_id)
+            parent_tasks = self.repo.find_parent_tasks_by_team(team_id, page)
             
-            # For each parent task, get its subtasks
-            for parent_task in parent_tasks:
-                parent_task_id = parent_task["id"]
-                subtasks = self.repo.find_subtasks_by_parent(parent_task_id)
-                
-                # Format subtasks for frontend
-                formatted_subtasks = []
-                for subtask in subtasks:
-                    formatted_subtask = {
-                        "id": subtask["id"],
-                        "task_name": subtask["task_name"], 
-                        "description": subtask["description"],
-                        "due_date": subtask["due_date"],  
-                        "status": subtask["status"],
-                        "owner_id": subtask["owner_id"],
-                        "collaborators": subtask["collaborators"] or [],
-                        "project_id": subtask["project_id"],
-                        "created_at": subtask["created_at"],
-                        "parent_task": subtask["parent_task"],
-                        "type": "subtask",
-                        "priority": subtask["priority"],
-                        "attachments": subtask["attachments"] or []
-                    }
-                    formatted_subtasks.append(formatted_subtask)
-                
-                # Add subtasks to parent task
-                parent_task["subtasks"] = formatted_subtasks
+            # Attach subtasks for the returned page with one batched lookup
+            parent_tasks, pagination = self._slice_page(parent_tasks, page)
             
-            if not parent_tasks:
+            if not parent_tasks and not (page and page.cursor):
                 return {
                     "__status": 404,
                     "Message": f"No tasks found for team {team_id}",
                     "data": []
                 }
             
-            return {
+            result = {
                 "__status": 200,
                 "Message": f"Successfully retrieved {len(parent_tasks)} tasks for team {team_id}",
                 "data": parent_tasks
             }
+            if pagination:
+                result["pagination"] = pagination
+            return result
         except Exception as e:
             return {
                 "__status": 500,
@@ -765,54 +1100,32 @@ class TaskService:
                 "data": []
             }
 
-    def get_tasks_by_department(self, dept_id: int) -> Dict[str, Any]:
+    def get_tasks_by_department(self, dept_id: int, page: Optional[PageRequest] = None) -> Dict[str, Any]:
         """
         Get all tasks for users in a specific department.
         """
         try:
             # Get all parent tasks for department members
-            parent_tasks = self.repo.find_parent_tasks_by_department(dept_id)
+            parent_tasks = self.repo.find_parent_tasks_by_department(dept_id, page)
             
-            # For each parent task, get its subtasks
-            for parent_task in parent_tasks:
-                parent_task_id = parent_task["id"]
-                subtasks = self.repo.find_subtasks_by_parent(parent_task_id)
-                
-                # Format subtasks for frontend
-                formatted_subtasks = []
-                for subtask in subtasks:
-                    formatted_subtask = {
-                        "id": subtask["id"],
-                        "task_name": subtask["task_name"], 
-                        "description": subtask["description"],
-                        "due_date": subtask["due_date"],  
-                        "status": subtask["status"],
-                        "owner_id": subtask["owner_id"],
-                        "collaborators": subtask["collaborators"] or [],
-                        "project_id": subtask["project_id"],
-                        "created_at": subtask["created_at"],
-                        "parent_task": subtask["parent_task"],
-                        "type": "subtask",
-                        "priority": subtask["priority"],
-                        "attachments": subtask["attachments"] or []
-                    }
-                    formatted_subtasks.append(formatted_subtask)
-                
-                # Add subtasks to parent task
-                parent_task["subtasks"] = formatted_subtasks
+            # Attach subtasks for the returned page with one batched lookup
+            parent_tasks, pagination = self._slice_page(parent_tasks, page)
             
-            if not parent_tasks:
+            if not parent_tasks and not (page and page.cursor):
                 return {
                     "__status": 404,
                     "Message": f"No tasks found for department {dept_id}",
                     "data": []
                 }
             
-            return {
+            result = {
                 "__status": 200,
                 "Message": f"Successfully retrieved {len(parent_tasks)} tasks for department {dept_id}",
                 "data": parent_tasks
             }
+            if pagination:
+                result["pagination"] = pagination
+            return result
         except Exception as e:
             return {
                 "__status": 500,
@@ -820,18 +1133,34 @@ class TaskService:
                 "data": []
             }
 
-    def get_tasks_with_upcoming_deadlines(self, max_days_ahead: int = 7) -> Dict[str, Any]:
+    def get_tasks_with_upcoming_deadlines(self, max_days_ahead: int = 7, reminders_only: bool = False) -> Dict[str, Any]:
         """
         Get tasks with upcoming deadlines within the specified number of days.
+        Each task carries "days_until_due" and "reminder_interval", the entry of its
+        reminder_intervals equal to days_until_due (None if no reminder is due today).
         
         Args:
             max_days_ahead: Maximum number of days to look ahead for deadlines
+            reminders_only: Only return tasks with a reminder due today, whatever the interval
             
         Returns:
             Dict with status, message, and task data
         """
         try:
-            tasks = self.repo.find_tasks_with_upcoming_deadlines(max_days_ahead)
+            index = self.repo.due_index
+            if index is not None and index.ready:
+                # Served from the due date buckets: cost follows the number of matching tasks
+                hits = index.reminders_due() if reminders_only else index.due_within(max_days_ahead)
+                deadlines = {task_id: (days, interval) for task_id, days, interval in hits}
+                rows = self.repo.get_tasks_by_ids(list(deadlines))
+                tasks = [
+                    {**row, "days_until_due": deadlines[row["id"]][0], "reminder_interval": deadlines[row["id"]][1]}
+                    for row in rows if row.get("status") != "Completed"
+                ]
+            else:
+                tasks = [self._with_deadline_info(row) for row in self.repo.find_tasks_with_upcoming_deadlines(max_days_ahead)]
+                if reminders_only:
+                    tasks = [task for task in tasks if task["reminder_interval"] is not None]
             
             if not tasks:
                 return {
@@ -852,19 +1181,45 @@ class TaskService:
                 "data": []
             }
         
-    def _generate_next_occurrence(self, completed_task: dict):
+    @staticmethod
+    def _with_deadline_info(task: Dict[str, Any]) -> Dict[str, Any]:
+        """Add days_until_due and the matching reminder_interval to a task row."""
+        day = due_day(task.get("due_date"))
+        days = (day - datetime.now().date()).days if day else None
+        intervals = task.get("reminder_intervals")
+        if intervals is None:
+            intervals = DEFAULT_REMINDER_INTERVALS
+        return {**task, "days_until_due": days, "reminder_interval": days if days in intervals else None}
+
+    def _schedule_next_occurrence(self, completed_task: dict) -> bool:
         """
-        Automatically generate the next task occurrence based on recurrence frequency.
-        Keeps timezone-awareness intact and ensures next due date > completed_at.
+        Queue generation of the next occurrence on the recurrence worker, keyed by
+        "<task_id>:<occurrence date>" so a task completed twice yields one occurrence.
 
-        When the completed task is a parent that has subtasks, this will create NEW
-        subtask rows (copies of the originals with new ids) and set the new parent's
-        'subtasks' column to exactly the list of newly-created subtask ids.
-        The previous subtask rows are NOT re-attached.
+        Returns:
+            True if a job was queued, False if the task does not recur again or the
+            same occurrence is already queued or done
         """
-        print(f"⚙️ Generating next occurrence for task {completed_task.get('id')} "
-            f"with recurrence_type={completed_task.get('recurrence_type')}")
+        next_due_date = self._next_occurrence_due_date(completed_task)
+        if next_due_date is None:
+            return False
+        return self.recurrence_worker.submit(self._recurrence_key(completed_task, next_due_date),
+                                             copy.deepcopy(completed_task))
+
+    @staticmethod
+    def _recurrence_key(completed_task: dict, next_due_date: datetime) -> str:
+        """
+        "<task_id>:<occurrence date>", stored on the occurrence in the task table's
+        unique recurrence_key column so it can only be inserted once.
+        """
+        return f"{completed_task.get('id')}:{next_due_date.astimezone(timezone.utc).date().isoformat()}"
 
+    def _next_occurrence_due_date(self, completed_task: dict) -> Optional[datetime]:
+        """
+        Due date of the next occurrence based on recurrence frequency, or None when the
+        task does not recur (again). Keeps timezone-awareness intact and ensures the
+        next due date > completed_at.
+        """
         recurrence_type = completed_task.get("recurrence_type")
         recurrence_end_date = completed_task.get("recurrence_end_date")
         recurrence_interval_days = completed_task.get("recurrence_interval_days")
@@ -956,6 +1311,62 @@ class TaskService:
             except Exception:
                 print(f"⚠️ Could not parse recurrence_end_date '{recurrence_end_date}'")
 
+        return next_due_date
+
+    def _existing_occurrence(self, completed_task: dict, next_due_date: datetime) -> Optional[dict]:
+        """
+        The occurrence due on next_due_date's day if it was already created, e.g. by
+        another worker process, by an earlier attempt of this job or before a restart.
+        Occurrences created before the recurrence_key column existed are only found
+        this way; for newer ones the unique key also stops an insert racing this check.
+        """
+        target_day = next_due_date.astimezone(timezone.utc).date()
+        candidates = self.repo.find_by_owner_and_name(completed_task.get("owner_id"), completed_task.get("task_name")) or []
+        for row in candidates:
+            if row.get("id") == completed_task.get("id") or row.get("parent_task") != completed_task.get("parent_task"):
+                continue
+            try:
+                row_due = dateparser.parse(row["due_date"]) if row.get("due_date") else None
+            except Exception:
+                continue
+            if row_due is None:
+                continue
+            if row_due.tzinfo is None:
+                row_due = row_due.replace(tzinfo=timezone.utc)
+            if row_due.astimezone(timezone.utc).date() == target_day:
+                return row
+        return None
+
+    def _generate_next_occurrence(self, completed_task: dict):
+        """
+        Generate the next task occurrence based on recurrence frequency. Runs on the
+        recurrence worker; idempotent per (task_id, occurrence date).
+
+        When the completed task is a parent that has subtasks, this will create NEW
+        subtask rows (copies of the originals with new ids, written in one bulk insert)
+        and set the new parent's 'subtasks' column to exactly the list of newly-created
+        subtask ids. The previous subtask rows are NOT re-attached.
+
+        The occurrence row is inserted first, carrying its recurrence_key. If a later
+        step fails, the retried job finds that row by its key and finishes the
+        subtask copies and parent links instead of creating a second occurrence.
+        """
+        print(f"⚙️ Generating next occurrence for task {completed_task.get('id')} "
+            f"with recurrence_type={completed_task.get('recurrence_type')}")
+
+        next_due_date = self._next_occurrence_due_date(completed_task)
+        if next_due_date is None:
+            return None
+
+        recurrence_key = self._recurrence_key(completed_task, next_due_date)
+        occurrence = self._existing_occurrence(completed_task, next_due_date)
+        if occurrence and occurrence.get("recurrence_key") != recurrence_key:
+            print(f"ℹ️ Occurrence due {next_due_date.date()} already exists for task {completed_task.get('id')}, skipping")
+            return None
+
+        recurrence_type = completed_task.get("recurrence_type")
+        now_aware = datetime.now(timezone.utc)
+
         # --- Prepare new task payload ---
         new_task_payload = copy.deepcopy(completed_task)
         new_task_payload.pop("id", None)
@@ -963,113 +1374,152 @@ class TaskService:
         new_task_payload["completed_at"] = None
         new_task_payload["created_at"] = now_aware.isoformat()
         new_task_payload["due_date"] = next_due_date.isoformat()
-        new_task_payload["recurrence_type"] = recurrence_type
-        new_task_payload["recurrence_end_date"] = recurrence_end_date
-        new_task_payload["recurrence_interval_days"] = recurrence_interval_days
+        new_task_payload["recurrence_key"] = recurrence_key
+        if completed_task.get("type") != "subtask":
+            # Filled with the copies' ids once they exist, never the completed task's
+            new_task_payload["subtasks"] = []
 
         try:
+            resumed = occurrence is not None
+            if occurrence is None:
+                try:
+                    occurrence = self.repo.insert_task(new_task_payload)
+                except Exception as e:
+                    if getattr(e, "code", None) != "23505":
+                        raise
+                    # Another worker (or an earlier attempt) inserted it first; finish it
+                    occurrence = self.repo.find_by_recurrence_key(recurrence_key)
+                    if not occurrence:
+                        raise
+                    resumed = True
+                if not occurrence:
+                    print(f"❌ Could not insert the next occurrence of task {completed_task.get('id')}")
+                    return None
+            if resumed:
+                print(f"ℹ️ Finishing occurrence {recurrence_key} (task {occurrence.get('id')})")
+
             # ------------------------------
             # Case 1: Parent recurring task
             # ------------------------------
             if completed_task.get("type") != "subtask":
-                created_parent = self.repo.insert_task(new_task_payload)
-                if not created_parent:
-                    print(f"❌ Could not insert new recurring parent task for {completed_task.get('id')}")
-                    return None
-
-                new_parent_id = created_parent.get("id")
-                print(f"✅ Created new parent occurrence {new_parent_id} for recurrence '{recurrence_type}'")
-
-                # Clone subtasks (if any)
-                seen_subtask_names = set()
-                new_subtask_ids = []
-
-                original_subtask_ids = completed_task.get("subtasks") or []
-
-                for orig_id in original_subtask_ids:
-                    orig = self.repo.get_task(orig_id)
-                    if not orig:
-                        print(f"⚠️ Original subtask {orig_id} not found, skipping")
-                        continue
-
-                    sub_name = orig.get("task_name")
-                    if sub_name in seen_subtask_names:
-                        print(f"ℹ️ Skipping duplicate subtask '{sub_name}'")
-                        continue
-
-                    seen_subtask_names.add(sub_name)
-
-                    # Clone subtask
-                    new_sub = copy.deepcopy(orig)
-                    new_sub.pop("id", None)
-                    new_sub["status"] = "Ongoing"
-                    new_sub["completed_at"] = None
-                    new_sub["created_at"] = now_aware.isoformat()
-                    new_sub["parent_task"] = new_parent_id
-
-                    # Adjust due date relative to parent
-                    try:
-                        if orig.get("due_date") and completed_task.get("due_date"):
-                            orig_due = dateparser.parse(orig["due_date"])
-                            parent_due = dateparser.parse(completed_task["due_date"])
-                            offset = orig_due - parent_due
-                            new_sub["due_date"] = (next_due_date + offset).isoformat()
-                        else:
-                            new_sub["due_date"] = next_due_date.isoformat()
-                    except Exception:
-                        new_sub["due_date"] = next_due_date.isoformat()
-
-                    inserted_sub = self.repo.insert_task(new_sub)
-                    if inserted_sub:
-                        new_subtask_ids.append(inserted_sub.get("id"))
-                        print(f"   ✅ Created new subtask {inserted_sub.get('id')} (from {orig_id})")
-
-                     # Adjust recurrence end date relative to parent
-                    try:
-                        if orig.get("recurrence_end_date") and completed_task.get("recurrence_end_date"):
-                            orig_end = dateparser.parse(orig["recurrence_end_date"])
-                            parent_end = dateparser.parse(completed_task["recurrence_end_date"])
-                            if orig_end and parent_end:
-                                end_offset = orig_end - parent_end
-                                new_parent_end = dateparser.parse(recurrence_end_date) if recurrence_end_date else None
-                                if new_parent_end:
-                                    new_end = new_parent_end + end_offset
-                                    new_sub["recurrence_end_date"] = new_end.isoformat()
-                                else:
-                                    new_sub["recurrence_end_date"] = None
-                            else:
-                                new_sub["recurrence_end_date"] = orig.get("recurrence_end_date")
-                        else:
-                            new_sub["recurrence_end_date"] = orig.get("recurrence_end_date")
-                    except Exception:
-                        new_sub["recurrence_end_date"] = orig.get("recurrence_end_date")
-
-                # Update parent with only unique subtasks
-                self.repo.update_task(new_parent_id, {"subtasks": new_subtask_ids})
-                print(f"   ✅ Updated parent {new_parent_id} with subtasks {new_subtask_ids}")
+                if not resumed:
+                    print(f"✅ Created new parent occurrence {occurrence.get('id')} for recurrence '{recurrence_type}'")
+                return self._copy_occurrence_subtasks(completed_task, occurrence, next_due_date, resumed)
 
             # ------------------------------
             # Case 2: Standalone subtask recurring
             # ------------------------------
-            else:
-                new_sub = copy.deepcopy(completed_task)
-                new_sub.pop("id", None)
-                new_sub["status"] = "Ongoing"
-                new_sub["completed_at"] = None
-                new_sub["created_at"] = now_aware.isoformat()
-                new_sub["due_date"] = next_due_date.isoformat()
-
-                inserted_sub = self.repo.insert_task(new_sub)
-                self.repo.add_subtask_to_parent(inserted_sub["parent_task"], inserted_sub["id"])
-                if inserted_sub:
-                    print(f"✅ Created new subtask occurrence {inserted_sub.get('id')} for completed subtask {completed_task.get('id')}")
-                return inserted_sub
+            if occurrence.get("parent_task") is not None:
+                # Appending an id already present is a no-op, so a resumed job can link again
+                self.repo.add_subtask_to_parent(occurrence["parent_task"], occurrence["id"])
+            if not resumed:
+                print(f"✅ Created new subtask occurrence {occurrence.get('id')} for completed subtask {completed_task.get('id')}")
+            return occurrence
 
         except Exception as e:
             print(f"❌ Failed to create recurring task: {e}")
-            return None
+            # Let the recurrence worker record the failure so the occurrence can be retried
+            raise
+
+    def _copy_occurrence_subtasks(self, completed_task: dict, new_parent: dict, next_due_date: datetime,
+                                  resumed: bool = False) -> dict:
+        """
+        Copy the completed parent's subtasks under `new_parent` (one bulk insert) and
+        set its subtasks column to the copies' ids. For a `resumed` occurrence, copies
+        an earlier attempt already made (matched by name) are kept, not made again.
+        """
+        new_parent_id = new_parent.get("id")
+        recurrence_end_date = completed_task.get("recurrence_end_date")
+        now_aware = datetime.now(timezone.utc)
+
+        existing_copies = {}
+        if resumed:
+            existing_copies = {sub.get("task_name"): sub.get("id") for sub in self.repo.find_subtasks_by_parent(new_parent_id)}
+
+        seen_subtask_names = set()
+        new_subtasks = []
+        source_ids = []
+        # Copy ids in the originals' order; None marks a copy still to be inserted
+        ordered_ids = []
+
+        original_subtask_ids = completed_task.get("subtasks") or []
+        original_subtasks = {t["id"]: t for t in self.repo.get_tasks_by_ids(original_subtask_ids)}
+
+        for orig_id in original_subtask_ids:
+            orig = original_subtasks.get(orig_id)
+            if not orig:
+                print(f"⚠️ Original subtask {orig_id} not found, skipping")
+                continue
+
+            sub_name = orig.get("task_name")
+            if sub_name in seen_subtask_names:
+                print(f"ℹ️ Skipping duplicate subtask '{sub_name}'")
+                continue
+
+            seen_subtask_names.add(sub_name)
+            if sub_name in existing_copies:
+                ordered_ids.append(existing_copies[sub_name])
+                continue
+
+            # Clone subtask
+            new_sub = copy.deepcopy(orig)
+            new_sub.pop("id", None)
+            new_sub["status"] = "Ongoing"
+            new_sub["completed_at"] = None
+            new_sub["created_at"] = now_aware.isoformat()
+            new_sub["parent_task"] = new_parent_id
+            new_sub["recurrence_key"] = None
+
+            # Adjust due date relative to parent
+            try:
+                if orig.get("due_date") and completed_task.get("due_date"):
+                    orig_due = dateparser.parse(orig["due_date"])
+                    parent_due = dateparser.parse(completed_task["due_date"])
+                    offset = orig_due - parent_due
+                    new_sub["due_date"] = (next_due_date + offset).isoformat()
+                else:
+                    new_sub["due_date"] = next_due_date.isoformat()
+            except Exception:
+                new_sub["due_date"] = next_due_date.isoformat()
+
+            # Adjust recurrence end date relative to parent
+            try:
+                if orig.get("recurrence_end_date") and completed_task.get("recurrence_end_date"):
+                    orig_end = dateparser.parse(orig["recurrence_end_date"])
+                    parent_end = dateparser.parse(completed_task["recurrence_end_date"])
+                    if orig_end and parent_end:
+                        end_offset = orig_end - parent_end
+                        new_parent_end = dateparser.parse(recurrence_end_date) if recurrence_end_date else None
+                        if new_parent_end:
+                            new_end = new_parent_end + end_offset
+                            new_sub["recurrence_end_date"] = new_end.isoformat()
+                        else:
+                            new_sub["recurrence_end_date"] = None
+                    else:
+                        new_sub["recurrence_end_date"] = orig.get("recurrence_end_date")
+                else:
+                    new_sub["recurrence_end_date"] = orig.get("recurrence_end_date")
+            except Exception:
+                new_sub["recurrence_end_date"] = orig.get("recurrence_end_date")
+
+            new_subtasks.append(new_sub)
+            source_ids.append(orig_id)
+            ordered_ids.append(None)
+
+        # Write all subtask copies in one bulk insert
+        inserted_subs = self.repo.insert_tasks(new_subtasks) if new_subtasks else []
+        inserted_ids = [sub.get("id") for sub in inserted_subs]
+        for orig_id, new_id in zip(source_ids, inserted_ids):
+            print(f"   ✅ Created new subtask {new_id} (from {orig_id})")
+        remaining = iter(inserted_ids)
+        new_subtask_ids = [sub_id if sub_id is not None else next(remaining) for sub_id in ordered_ids]
+
+        # Update parent with only unique subtasks
+        self.repo.update_task(new_parent_id, {"subtasks": new_subtask_ids})
+        print(f"   ✅ Updated parent {new_parent_id} with subtasks {new_subtask_ids}")
+        new_parent["subtasks"] = new_subtask_ids
+        return new_parent
 
-        
     def _prepare_subtask_payload(self, payload: Dict[str, Any]) -> Dict[str, Any]:
         """
         Ensures subtask payload has type, owner in collaborators, and recurrence fields.
@@ -1092,49 +1542,38 @@ class TaskService:
         
         return subtask_payload
     
-    def get_all_tasks(self) -> Dict[str, Any]:
+    def get_all_tasks(self, page: Optional[PageRequest] = None, flat: bool = False,
+                      user_ids: Optional[List[int]] = None, project_ids: Optional[List[int]] = None) -> Dict[str, Any]:
         """
         Get all tasks for all users (including subtasks).
+
+        With `flat`, subtasks are returned as rows of their own (as stored, like
+        get_tasks_by_project) instead of nested under their parents, optionally
+        only those of `user_ids` (owned or shared) or of `project_ids`.
         """
         try:
-            parent_tasks = self.repo.find_all_parent_tasks()
-
-            for parent_task in parent_tasks:
-                parent_task_id = parent_task["id"]
-                subtasks = self.repo.find_subtasks_by_parent(parent_task_id)
-
-                formatted_subtasks = []
-                for subtask in subtasks:
-                    formatted_subtasks.append({
-                        "id": subtask["id"],
-                        "task_name": subtask["task_name"],
-                        "description": subtask["description"],
-                        "due_date": subtask["due_date"],
-                        "status": subtask["status"],
-                        "owner_id": subtask["owner_id"],
-                        "collaborators": subtask["collaborators"] or [],
-                        "project_id": subtask["project_id"],
-                        "created_at": subtask["created_at"],
-                        "parent_task": subtask["parent_task"],
-                        "type": "subtask",
-                        "priority": subtask["priority"],
-                        "attachments": subtask["attachments"] or []
-                    })
+            if flat:
+                parent_tasks = self.repo.find_all_tasks(page, user_ids=user_ids, project_ids=project_ids)
+            else:
+                parent_tasks = self.repo.find_all_parent_tasks(page)
 
-                parent_task["subtasks"] = formatted_subtasks
+            parent_tasks, pagination = self._slice_page(parent_tasks, page, hydrate=not flat)
 
-            if not parent_tasks:
+            if not parent_tasks and not (page and page.cursor):
                 return {
                     "__status": 404,
                     "Message": "No tasks found",
                     "data": []
                 }
 
-            return {
+            result = {
                 "__status": 200,
                 "Message": f"Successfully retrieved {len(parent_tasks)} tasks",
                 "data": parent_tasks
             }
+            if pagination:
+                result["pagination"] = pagination
+            return result
 
         except Exception as e:
             return {
@@ -1142,3 +1581,23 @@ class TaskService:
                 "Message": f"Error retrieving tasks: {str(e)}",
                 "data": []
             }
+
+    def iter_all_tasks(self, page: Optional[PageRequest] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Yield every parent task (with subtasks) one keyset page at a time.
+
+        Only the current page and its subtasks are held in memory, so streaming
+        callers use the same memory regardless of how many tasks exist. `page`
+        sets the batch size, fields and an optional starting cursor.
+        """
+        page = page or PageRequest()
+        batch = PageRequest(limit=page.limit or DEFAULT_PAGE_LIMIT, cursor=page.cursor, fields=page.fields)
+        while True:
+            tasks, next_cursor = batch.slice(self.repo.find_all_parent_tasks(batch))
+            if batch.wants("subtasks"):
+                self._attach_subtasks(tasks)
+            yield from tasks
+            if not next_cursor:
+                return
+            last = tasks[-1]
+            batch = replace(batch, cursor=(last["created_at"], last["id"]))
@@ -6,6 +6,8 @@ from io import BytesIO
 
 # Add parent directory to path to find modules
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# The backend directory, for the shared package
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 from services.task_service import TaskService
 from models.task import Task
 from repo.supa_task_repo import SupabaseTaskRepo
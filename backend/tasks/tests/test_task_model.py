@@ -1,11 +1,109 @@
 import unittest
+import io
+import json
+import tempfile
+import threading
+import time
 import sys
 import os
-from datetime import datetime, UTC
+from collections import Counter
+from datetime import date, datetime, timedelta, UTC
 
 # Add parent directory to path to find modules
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# The backend directory, for the shared package
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+# The repo module reads these at import time; the service tests below never touch Supabase.
+os.environ.setdefault("SUPABASE_URL", "http://localhost")
+os.environ.setdefault("SUPABASE_SERVICE_KEY", "test-key")
+
 from models.task import Task
+from services.task_service import TaskService
+from repo.supa_task_repo import SupabaseTaskRepo
+from utils.pagination import PageRequest, encode_cursor, decode_cursor
+from utils.parsing import parse_date_range_args, parse_id_list_arg
+from utils.cache import TaskCache, CacheBackend, InMemoryLRUBackend
+from services.recurrence_worker import RecurrenceWorker
+from shared.outbox import NotificationOutbox
+from utils.dedup import NotificationDedup, DedupBackend, InMemoryDedupBackend, SQLiteDedupBackend
+from utils.search_index import TaskSearchIndex
+from utils.parsing import parse_search_args
+from utils.due_index import DueDateIndex
+from utils.task_import import detect_import_format, iter_import_records
+from utils.attachments import AttachmentStore, detect_content_type
+from werkzeug.datastructures import FileStorage
+from shared.local_db import MemoryClient, SQLiteClient
+from flask import Flask
+from unittest.mock import patch
+
+
+class FakeTaskRepo:
+    """In-memory stand-in for SupabaseTaskRepo that counts repo calls."""
+
+    def __init__(self, tasks=None):
+        self.tasks = {t["id"]: dict(t) for t in (tasks or [])}
+        self.calls = Counter()
+
+    def _parents(self):
+        return [dict(t) for t in self.tasks.values() if t.get("type") != "subtask"]
+
+    def find_parent_tasks_by_user(self, user_id, page=None, date_range=None):
+        self.calls["find_parent_tasks_by_user"] += 1
+        return [t for t in self._parents()
+                if t.get("owner_id") == user_id or user_id in (t.get("collaborators") or [])]
+
+    def find_parent_tasks_by_team(self, team_id, page=None):
+        self.calls["find_parent_tasks_by_team"] += 1
+        return self._parents()
+
+    def find_parent_tasks_by_department(self, dept_id, page=None):
+        self.calls["find_parent_tasks_by_department"] += 1
+        return self._parents()
+
+    def find_all_parent_tasks(self, page=None):
+        self.calls["find_all_parent_tasks"] += 1
+        return self._parents()
+
+    def find_subtasks_by_parent(self, parent_task_id):
+        self.calls["find_subtasks_by_parent"] += 1
+        return [dict(t) for t in self.tasks.values()
+                if t.get("type") == "subtask" and t.get("parent_task") == parent_task_id]
+
+    def find_subtasks_by_parents(self, parent_task_ids):
+        self.calls["find_subtasks_by_parents"] += 1
+        grouped = {pid: [] for pid in parent_task_ids}
+        for t in self.tasks.values():
+            if t.get("type") == "subtask" and t.get("parent_task") in grouped:
+                grouped[t["parent_task"]].append(dict(t))
+        return grouped
+
+    def get_task(self, task_id):
+        self.calls["get_task"] += 1
+        task = self.tasks.get(task_id)
+        return dict(task) if task else None
+
+
+def make_task_row(task_id, owner_id=1, parent_task=None, **overrides):
+    """Build a task row shaped like a Supabase `task` record."""
+    row = {
+        "id": task_id,
+        "task_name": f"Task {task_id}",
+        "description": "desc",
+        "due_date": None,
+        "status": "Ongoing",
+        "owner_id": owner_id,
+        "collaborators": [owner_id],
+        "project_id": None,
+        "created_at": "2025-01-01T00:00:00+00:00",
+        "parent_task": parent_task,
+        "type": "subtask" if parent_task else "parent",
+        "subtasks": None,
+        "priority": 5,
+        "attachments": None,
+    }
+    row.update(overrides)
+    return row
 
 
 class TestTaskModel(unittest.TestCase):
@@ -469,3 +567,1338 @@ class TestTaskModel(unittest.TestCase):
         }
         reconstructed_task = Task.from_dict(data)
         assert reconstructed_task.completed_at == completed_timestamp
+
+
+
+class TestTaskServiceSubtaskHydration(unittest.TestCase):
+    """Regression tests: list endpoints must hydrate subtasks in one batched repo call."""
+
+    def setUp(self):
+        rows = []
+        for parent_id in range(1, 201):
+            rows.append(make_task_row(parent_id))
+            rows.append(make_task_row(1000 + parent_id, parent_task=parent_id))
+        self.repo = FakeTaskRepo(rows)
+        self.service = TaskService(repo=self.repo)
+
+    def assert_batched(self, result):
+        assert result["__status"] == 200
+        assert len(result["data"]) == 200
+        assert self.repo.calls["find_subtasks_by_parents"] == 1
+        assert self.repo.calls["find_subtasks_by_parent"] == 0
+        for parent in result["data"]:
+            assert [s["id"] for s in parent["subtasks"]] == [1000 + parent["id"]]
+
+    def test_get_by_user_single_subtask_query(self):
+        """get_by_user fetches subtasks for all 200 parents with one query."""
+        result = self.service.get_by_user(1)
+        self.assert_batched(result)
+        assert "priority" not in result["data"][0]["subtasks"][0]
+
+    def test_get_tasks_by_team_single_subtask_query(self):
+        result = self.service.get_tasks_by_team(1)
+        self.assert_batched(result)
+        assert result["data"][0]["subtasks"][0]["priority"] == 5
+        assert result["data"][0]["subtasks"][0]["attachments"] == []
+
+    def test_get_tasks_by_department_single_subtask_query(self):
+        self.assert_batched(self.service.get_tasks_by_department(1))
+
+    def test_get_all_tasks_single_subtask_query(self):
+        self.assert_batched(self.service.get_all_tasks())
+
+    def test_get_by_user_not_found_skips_subtask_query(self):
+        result = self.service.get_by_user(424242)
+        assert result["__status"] == 404
+        assert self.repo.calls["find_subtasks_by_parents"] == 0
+
+
+class TestSupabaseTaskRepoMemberQueries(unittest.TestCase):
+    """Team/department lookups must be set-based, not two queries per member."""
+
+    def setUp(self):
+        users = [{"userid": uid, "dept_id": 7, "team_id": 70 if uid <= 10 else 71} for uid in range(1, 301)]
+        tasks = [
+            make_task_row(1, owner_id=5, collaborators=[5]),
+            make_task_row(2, owner_id=999, collaborators=[999, 250]),   # member only as collaborator
+            make_task_row(3, owner_id=120, collaborators=[120, 130]),   # matched by owner and collaborator
+            make_task_row(4, owner_id=999, collaborators=[999]),        # outsider
+            make_task_row(5, owner_id=5, parent_task=1),                # subtask, excluded
+        ]
+        self.client = MemoryClient({"user": users, "task": tasks})
+        self.repo = SupabaseTaskRepo(client=self.client)
+
+    def test_department_query_count_is_chunked_not_per_member(self):
+        tasks = self.repo.find_parent_tasks_by_department(7)
+        assert sorted(t["id"] for t in tasks) == [1, 2, 3]
+        # 1 member lookup + 2 owner chunks (200) + 3 collaborator chunks (100)
+        assert self.client.calls["user"] == 1
+        assert self.client.calls["task"] == 5
+
+    def test_team_query_deduplicates(self):
+        tasks = self.repo.find_parent_tasks_by_team(70)
+        assert [t["id"] for t in tasks] == [1]
+        assert self.client.calls["task"] == 2
+
+    def test_team_without_members_skips_task_queries(self):
+        assert self.repo.find_parent_tasks_by_team(12345) == []
+        assert self.client.calls["task"] == 0
+
+
+class TestTaskServiceBulkUpdateProject(unittest.TestCase):
+    """bulk_update_project_id must use set-based queries, not get + update per task."""
+
+    def setUp(self):
+        self.client = MemoryClient({"task": [make_task_row(i) for i in range(1, 501)]})
+        self.service = TaskService(repo=SupabaseTaskRepo(client=self.client))
+
+    def test_bulk_update_500_tasks_uses_chunked_statements(self):
+        result = self.service.bulk_update_project_id(list(range(1, 501)), 42)
+        assert result["__status"] == 200
+        assert result["data"]["successful_updates"] == 500
+        assert [t["id"] for t in result["data"]["updated_tasks"]] == list(range(1, 501))
+        assert all(t["project_id"] == 42 for t in result["data"]["updated_tasks"])
+        # 3 existence chunks + 3 update chunks of 200, instead of 1000 round trips
+        assert self.client.calls["task"] == 6
+
+    def test_bulk_update_custom_chunk_size(self):
+        result = self.service.bulk_update_project_id(list(range(1, 101)), 42, chunk_size=25)
+        assert result["__status"] == 200
+        assert self.client.calls["task"] == 8
+
+    def test_bulk_update_partial_reports_missing_ids(self):
+        result = self.service.bulk_update_project_id([1, 9999, 2], 42)
+        assert result["__status"] == 207
+        assert result["data"]["successful_updates"] == 2
+        assert result["data"]["failed_details"] == [{"task_id": 9999, "error": "Task not found"}]
+
+    def test_bulk_update_all_missing_returns_400(self):
+        result = self.service.bulk_update_project_id([9998, 9999], 42)
+        assert result["__status"] == 400
+        assert result["data"]["failed_updates"] == 2
+        assert self.client.calls["task"] == 1
+
+    def test_bulk_update_invalid_chunk_size(self):
+        result = self.service.bulk_update_project_id([1], 42, chunk_size=0)
+        assert result["__status"] == 400
+        assert self.client.calls["task"] == 0
+
+
+class TestTaskServiceSubtasksByParent(unittest.TestCase):
+    """get_subtasks_by_parent must fetch all subtask IDs with one batched query."""
+
+    def setUp(self):
+        rows = [make_task_row(10, subtasks=[13, 11, 99, 12])]
+        rows += [make_task_row(i, parent_task=10) for i in (11, 12, 13)]
+        self.client = MemoryClient({"task": rows})
+        self.repo = SupabaseTaskRepo(client=self.client)
+        self.service = TaskService(repo=self.repo)
+
+    def test_get_tasks_by_ids_preserves_input_order(self):
+        tasks = self.repo.get_tasks_by_ids([12, 404, 11, 13])
+        assert [t["id"] for t in tasks] == [12, 11, 13]
+        assert self.client.calls["task"] == 1
+
+    def test_get_tasks_by_ids_empty(self):
+        assert self.repo.get_tasks_by_ids([]) == []
+        assert self.client.calls["task"] == 0
+
+    def test_missing_subtasks_reported_from_set_difference(self):
+        result = self.service.get_subtasks_by_parent(10)
+        assert result["__status"] == 207
+        assert [t["id"] for t in result["data"]["subtasks"]] == [13, 11, 12]
+        assert result["data"]["failed_subtasks"] == [{"subtask_id": 99, "error": "Subtask not found"}]
+        # parent lookup + one batched subtask fetch
+        assert self.client.calls["task"] == 2
+
+
+
+class TestPageRequest(unittest.TestCase):
+    """Parsing of limit/cursor/fields query parameters."""
+
+    def test_no_params_is_unpaginated_select_all(self):
+        page = PageRequest.from_args({})
+        assert not page.is_paginated
+        assert page.select_clause() == "*"
+        assert page.wants("subtasks")
+
+    def test_fields_always_include_keyset_columns(self):
+        page = PageRequest.from_args({"fields": "task_name,status"})
+        assert page.select_clause() == "id,created_at,task_name,status"
+        assert not page.wants("subtasks")
+
+    def test_unknown_field_rejected(self):
+        with self.assertRaises(ValueError):
+            PageRequest.from_args({"fields": "task_name,password"})
+
+    def test_limit_bounds(self):
+        for bad in ("0", "501", "abc"):
+            with self.assertRaises(ValueError):
+                PageRequest.from_args({"limit": bad})
+
+    def test_cursor_roundtrip_and_default_limit(self):
+        token = encode_cursor({"created_at": "2025-01-01T00:00:00+00:00", "id": 7})
+        assert decode_cursor(token) == ("2025-01-01T00:00:00+00:00", 7)
+        page = PageRequest.from_args({"cursor": token})
+        assert page.limit == 100
+
+    def test_invalid_cursor_rejected(self):
+        with self.assertRaises(ValueError):
+            PageRequest.from_args({"cursor": "not-a-cursor"})
+
+
+class TestTaskServiceKeysetPagination(unittest.TestCase):
+    """Keyset pagination on list endpoints, with subtasks hydrated per page."""
+
+    def setUp(self):
+        rows = []
+        for i in range(1, 8):
+            # Two parents share a created_at so the id tie-breaker matters
+            created = f"2025-01-0{min(i, 6)}T00:00:00+00:00"
+            rows.append(make_task_row(i, owner_id=1 if i % 2 else 2, collaborators=[1, 2], created_at=created))
+            rows.append(make_task_row(100 + i, parent_task=i, created_at=created))
+        self.client = MemoryClient({"task": rows})
+        self.service = TaskService(repo=SupabaseTaskRepo(client=self.client))
+
+    def collect_pages(self, fetch, limit):
+        ids, cursor, pages = [], None, 0
+        while True:
+            args = {"limit": str(limit)}
+            if cursor:
+                args["cursor"] = cursor
+            result = fetch(PageRequest.from_args(args))
+            assert result["__status"] == 200
+            ids.extend(t["id"] for t in result["data"])
+            pages += 1
+            cursor = result["pagination"]["next_cursor"]
+            assert result["pagination"]["has_more"] == (cursor is not None)
+            if not cursor:
+                return ids, pages
+
+    def test_get_all_tasks_walks_every_page_once(self):
+        ids, pages = self.collect_pages(self.service.get_all_tasks, 3)
+        assert ids == [1, 2, 3, 4, 5, 6, 7]
+        assert pages == 3
+
+    def test_flat_get_all_tasks_pages_parents_and_subtasks_as_rows(self):
+        ids, pages = self.collect_pages(lambda page: self.service.get_all_tasks(page, flat=True), 5)
+        assert sorted(ids) == list(range(1, 8)) + list(range(101, 108))
+        assert len(ids) == 14 and pages == 3
+        result = self.service.get_all_tasks(PageRequest.from_args({"limit": "2"}), flat=True)
+        assert [t["id"] for t in result["data"]] == [1, 101]
+        assert result["data"][0]["subtasks"] is None and result["data"][1]["parent_task"] == 1
+
+    def test_flat_get_all_tasks_filters_by_users_and_projects(self):
+        rows = [make_task_row(1, owner_id=1), make_task_row(2, owner_id=2, collaborators=[3]),
+                make_task_row(3, owner_id=4, project_id=9), make_task_row(103, owner_id=4, parent_task=3, project_id=9),
+                make_task_row(4, owner_id=5)]
+        service = TaskService(repo=SupabaseTaskRepo(client=MemoryClient({"task": rows})))
+        page = PageRequest.from_args({"limit": "10"})
+
+        def ids(**filters):
+            return sorted(t["id"] for t in service.get_all_tasks(page, flat=True, **filters)["data"])
+
+        assert ids(user_ids=[2, 3]) == [2]
+        assert ids(user_ids=[1], project_ids=[9]) == [1, 3, 103]
+        assert ids(project_ids=[9]) == [3, 103]
+        assert ids(user_ids=[]) == []
+
+        # Long ID lists are split into several bounded queries and the pages merged exactly
+        with patch("repo.supa_task_repo.IN_FILTER_CHUNK_SIZE", 1), patch("repo.supa_task_repo.OVERLAP_FILTER_CHUNK_SIZE", 1):
+            assert ids(user_ids=[1, 2, 3, 5], project_ids=[8, 9]) == [1, 2, 3, 4, 103]
+            walked, cursor = [], None
+            while True:
+                args = {"limit": "2", **({"cursor": cursor} if cursor else {})}
+                result = service.get_all_tasks(PageRequest.from_args(args), flat=True, user_ids=[1, 3, 5], project_ids=[9])
+                walked.extend(t["id"] for t in result["data"])
+                cursor = result["pagination"]["next_cursor"]
+                if not cursor:
+                    break
+            assert sorted(walked) == [1, 2, 3, 4, 103] and len(walked) == 5
+        assert parse_id_list_arg({"user_ids": "3,1,3"}, "user_ids", 5) == [3, 1]
+        assert parse_id_list_arg({}, "user_ids", 5) is None
+        for bad in ("1,x", "1,2,3"):
+            with self.assertRaises(ValueError):
+                parse_id_list_arg({"user_ids": bad}, "user_ids", 2)
+
+    def test_get_by_user_merges_owner_and_collaborator_queries(self):
+        ids, _ = self.collect_pages(lambda page: self.service.get_by_user(1, page), 2)
+        assert ids == [1, 2, 3, 4, 5, 6, 7]
+
+    def test_subtasks_hydrated_only_for_returned_page(self):
+        result = self.service.get_all_tasks(PageRequest.from_args({"limit": "2"}))
+        assert [t["id"] for t in result["data"]] == [1, 2]
+        assert [[s["id"] for s in t["subtasks"]] for t in result["data"]] == [[101], [102]]
+
+    def test_fields_projection_skips_subtask_hydration(self):
+        result = self.service.get_all_tasks(PageRequest.from_args({"fields": "task_name"}))
+        assert result["__status"] == 200
+        assert set(result["data"][0].keys()) == {"id", "created_at", "task_name"}
+        assert "pagination" not in result
+        # only the parent query ran
+        assert self.client.calls["task"] == 1
+
+    def test_unpaginated_request_keeps_original_shape(self):
+        self.client.seed({"task": [make_task_row(50, project_id=3)]})
+        result = self.service.get_tasks_by_project(3, PageRequest())
+        assert result["__status"] == 200
+        assert "pagination" not in result
+
+
+class TestTaskServiceDateRange(unittest.TestCase):
+    """Date-range filtering pushed into the user task query."""
+
+    def setUp(self):
+        rows = [
+            make_task_row(1, created_at="2024-01-01T00:00:00+00:00", due_date="2024-06-30"),
+            make_task_row(2, created_at="2024-03-31T23:59:59+00:00", due_date="2024-04-15"),
+            make_task_row(3, owner_id=2, collaborators=[1], created_at="2024-02-10T08:00:00+00:00", due_date="2025-01-01"),
+            make_task_row(4, created_at="2024-04-01T00:00:00+00:00", due_date="2024-04-02"),
+        ]
+        self.client = MemoryClient({"task": rows})
+        self.service = TaskService(repo=SupabaseTaskRepo(client=self.client))
+
+    def test_parse_date_range_args(self):
+        assert parse_date_range_args({}) is None
+        assert parse_date_range_args({"start_date": "2024-01-01"}) == {
+            "field": "created_at", "start_date": "2024-01-01", "end_date": None}
+        for bad in ({"start_date": "01/01/2024"},
+                    {"start_date": "2024-02-01", "end_date": "2024-01-01"},
+                    {"start_date": "2024-01-01", "date_field": "updated_at"}):
+            with self.assertRaises(ValueError):
+                parse_date_range_args(bad)
+
+    def test_end_date_is_inclusive_on_both_queries(self):
+        date_range = parse_date_range_args({"start_date": "2024-01-01", "end_date": "2024-03-31"})
+        result = self.service.get_by_user(1, date_range=date_range)
+        assert sorted(t["id"] for t in result["data"]) == [1, 2, 3]
+        assert result["date_filter"] == date_range
+
+    def test_filter_on_due_date(self):
+        date_range = parse_date_range_args({"end_date": "2024-04-30", "date_field": "due_date"})
+        result = self.service.get_by_user(1, date_range=date_range)
+        assert sorted(t["id"] for t in result["data"]) == [2, 4]
+
+    def test_unfiltered_response_has_no_date_filter(self):
+        result = self.service.get_by_user(1)
+        assert "date_filter" not in result
+        assert len(result["data"]) == 4
+
+class TestTaskCache(unittest.TestCase):
+    """Read-through task cache in front of SupabaseTaskRepo.get_task."""
+
+    def setUp(self):
+        self.now = 0.0
+        self.cache = TaskCache(InMemoryLRUBackend(max_size=2, ttl_seconds=10, clock=lambda: self.now))
+        self.client = MemoryClient({"task": [make_task_row(1, subtasks=[]), make_task_row(2), make_task_row(3)]})
+        self.repo = SupabaseTaskRepo(client=self.client, cache=self.cache)
+
+    def test_backends_must_implement_the_interface(self):
+        class NoSize(CacheBackend):
+            def get(self, key):
+                return None
+
+            def set(self, key, value):
+                pass
+
+            def delete(self, key):
+                pass
+
+            def clear(self):
+                pass
+
+        with self.assertRaises(TypeError):
+            NoSize()
+
+    def test_repeated_reads_hit_the_cache(self):
+        assert self.repo.get_task(1)["id"] == 1
+        assert self.repo.get_task(1)["id"] == 1
+        assert self.client.calls["task"] == 1
+        stats = self.cache.stats()
+        assert (stats["hits"], stats["misses"], stats["hit_rate"]) == (1, 1, 0.5)
+
+    def test_entries_expire_after_ttl(self):
+        self.repo.get_task(1)
+        self.now = 10.0
+        self.repo.get_task(1)
+        assert self.client.calls["task"] == 2
+
+    def test_least_recently_used_entry_is_evicted(self):
+        self.repo.get_task(1)
+        self.repo.get_task(2)
+        self.repo.get_task(1)
+        self.repo.get_task(3)  # evicts 2, the least recently used
+        self.client.calls.clear()
+        self.repo.get_task(1)
+        self.repo.get_task(2)
+        assert self.client.calls["task"] == 1
+        assert self.cache.stats()["evictions"] >= 1
+
+    def test_writes_invalidate_cached_task(self):
+        self.repo.get_task(1)
+        self.repo.update_task(1, {"status": "Completed"})
+        assert self.repo.get_task(1)["status"] == "Completed"
+
+        self.repo.update_attachments(1, [{"url": "u", "name": "a.pdf"}])
+        assert self.repo.get_task(1)["attachments"] == [{"url": "u", "name": "a.pdf"}]
+
+        self.repo.add_subtask_to_parent(1, 3)
+        assert self.repo.get_task(1)["subtasks"] == [3]
+
+        self.repo.bulk_update_tasks([1, 2], {"project_id": 9})
+        assert self.repo.get_task(1)["project_id"] == 9
+
+        self.repo.delete_task(1)
+        assert self.repo.get_task(1) is None
+
+    def test_update_reads_past_the_cache_and_writes_only_changed_columns(self):
+        service = TaskService(repo=self.repo, outbox=NotificationOutbox(":memory:"))
+        self.repo.get_task(1)
+        # Another worker links a subtask while this worker holds the cached row
+        self.client.table("task").update({"subtasks": [3], "attachments": [{"url": "u"}]}).eq("id", 1).execute()
+        self.client.calls.clear()
+
+        result = service.update_task_by_id({"task_id": 1, "status": "Under Review", "priority": "7"})
+        assert result["__status"] == 200
+        row = self.client.rows("task")[0]
+        assert row["subtasks"] == [3] and row["attachments"] == [{"url": "u"}]
+        assert row["status"] == "Under Review" and row["priority"] == 7
+        # One uncached read, one write
+        assert self.client.calls["task"] == 2
+
+    def test_collaborator_edits_keep_concurrent_changes(self):
+        service = TaskService(repo=self.repo, outbox=NotificationOutbox(":memory:"))
+        self.client.table("task").update({"collaborators": [1, 4]}).eq("id", 2).execute()
+        original_add = self.repo.add_collaborators
+
+        def add_while_another_worker_edits(task_id, user_ids):
+            # Another worker adds user 9 between this worker's read and write
+            self.client.rpc("array_append_ids", {"p_table": "task", "p_column": "collaborators",
+                                                 "p_id": 2, "p_values": [9]}).execute()
+            return original_add(task_id, user_ids)
+
+        self.repo.add_collaborators = add_while_another_worker_edits
+        result = service.update_task_by_id({"task_id": 2, "collaborators": [1, 5]})
+        assert result["__status"] == 200
+        assert result["data"]["collaborators"] == [1, 9, 5]
+        assert self.client.calls["rpc:array_remove_ids"] == 1
+        assert self.client.calls["rpc:array_append_ids"] == 2
+
+    def test_moving_a_subtask_updates_both_parents(self):
+        service = TaskService(repo=self.repo, outbox=NotificationOutbox(":memory:"))
+        self.client.seed({"task": [make_task_row(4, parent_task=1)]})
+        self.repo.add_subtask_to_parent(1, 4)
+
+        result = service.update_task_by_id({"task_id": 4, "parent_task": 2})
+        assert result["__status"] == 200
+        rows = {row["id"]: row for row in self.client.rows("task")}
+        assert rows[4]["parent_task"] == 2
+        assert rows[1]["subtasks"] == [] and rows[2]["subtasks"] == [4]
+
+        missing = service.update_task_by_id({"task_id": 4, "parent_task": 99})
+        assert missing["__status"] == 400
+        assert self.client.rows("task")[-1]["parent_task"] == 2
+
+    def test_callers_cannot_mutate_cached_entry(self):
+        self.repo.get_task(1)["task_name"] = "changed"
+        assert self.repo.get_task(1)["task_name"] == "Task 1"
+
+    def test_missing_tasks_are_not_cached(self):
+        assert self.repo.get_task(42) is None
+        self.client.seed({"task": [make_task_row(42)]})
+        assert self.repo.get_task(42)["id"] == 42
+
+    def test_cache_can_be_disabled(self):
+        os.environ["TASK_CACHE_BACKEND"] = "none"
+        try:
+            assert TaskCache.from_env() is None
+            repo = SupabaseTaskRepo(client=self.client)
+            repo.get_task(1)
+            repo.get_task(1)
+            assert self.client.calls["task"] == 2
+            assert TaskService(repo=repo).get_cache_stats()["data"] == {"enabled": False}
+        finally:
+            del os.environ["TASK_CACHE_BACKEND"]
+
+class TestUserTaskETag(unittest.TestCase):
+    """Conditional GET on /tasks/user-task/<id>."""
+
+    def setUp(self):
+        from controllers.task_controller import task_bp
+        self.client = MemoryClient({"task": [make_task_row(1), make_task_row(2)]})
+        self.service = TaskService(repo=SupabaseTaskRepo(client=self.client))
+        app = Flask(__name__)
+        app.register_blueprint(task_bp)
+        self.http = app.test_client()
+        patcher = patch("controllers.task_controller.service", self.service)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_unchanged_view_returns_304_without_body(self):
+        first = self.http.get("/tasks/user-task/1")
+        assert first.status_code == 200
+        etag = first.headers["ETag"]
+
+        second = self.http.get("/tasks/user-task/1", headers={"If-None-Match": etag})
+        assert second.status_code == 304
+        assert second.data == b""
+        assert second.headers["ETag"] == etag
+
+    def test_row_change_produces_new_etag(self):
+        etag = self.http.get("/tasks/user-task/1").headers["ETag"]
+        self.service.repo.update_task(2, {"status": "Completed"})
+
+        response = self.http.get("/tasks/user-task/1", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+        assert response.get_json()["Code"] == 200
+
+    def test_unchanged_view_is_answered_from_row_versions(self):
+        etag = self.http.get("/tasks/user-task/1").headers["ETag"]
+        with patch.object(self.service, "get_by_user", side_effect=AssertionError("view was loaded")):
+            response = self.http.get("/tasks/user-task/1", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+
+    def test_subtask_change_and_other_args_produce_new_etag(self):
+        sub = self.service.repo.insert_task(make_task_row(3, parent_task=1))
+        etag = self.http.get("/tasks/user-task/1").headers["ETag"]
+        assert self.http.get("/tasks/user-task/1?limit=1", headers={"If-None-Match": etag}).status_code == 200
+
+        self.service.repo.update_task(sub["id"], {"status": "Completed"})
+        response = self.http.get("/tasks/user-task/1", headers={"If-None-Match": etag})
+        assert response.status_code == 200 and response.headers["ETag"] != etag
+
+    def test_errors_carry_no_etag(self):
+        response = self.http.get("/tasks/user-task/99")
+        assert response.status_code == 404
+        assert "ETag" not in response.headers
+
+class TestAllTasksNdjsonStream(unittest.TestCase):
+    """format=ndjson streaming of GET /tasks."""
+
+    def setUp(self):
+        from controllers.task_controller import task_bp
+        rows = []
+        for i in range(1, 251):
+            rows.append(make_task_row(i, created_at=f"2025-01-01T00:00:{i % 60:02d}+00:00", subtasks=[1000 + i]))
+            rows.append(make_task_row(1000 + i, parent_task=i))
+        self.client = MemoryClient({"task": rows})
+        self.service = TaskService(repo=SupabaseTaskRepo(client=self.client))
+        app = Flask(__name__)
+        app.register_blueprint(task_bp)
+        self.http = app.test_client()
+        patcher = patch("controllers.task_controller.service", self.service)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_generator_fetches_one_page_at_a_time(self):
+        tasks = self.service.iter_all_tasks(PageRequest(limit=100))
+        first = next(tasks)
+        assert first["subtasks"][0]["parent_task"] == first["id"]
+        # One page of parents plus one batched subtask query so far
+        assert self.client.calls["task"] == 2
+        assert len(list(tasks)) == 249
+
+    def test_stream_emits_every_task_once_per_line(self):
+        response = self.http.get("/tasks?format=ndjson&limit=100")
+        assert response.status_code == 200
+        assert response.mimetype == "application/x-ndjson"
+        lines = [json.loads(line) for line in response.data.decode().splitlines()]
+        assert sorted(t["id"] for t in lines) == list(range(1, 251))
+        assert all(len(t["subtasks"]) == 1 for t in lines)
+
+    def test_stream_honours_fields(self):
+        response = self.http.get("/tasks?format=ndjson&fields=task_name")
+        first = json.loads(response.data.decode().splitlines()[0])
+        assert set(first) == {"id", "created_at", "task_name"}
+
+    def test_unknown_format_is_rejected(self):
+        assert self.http.get("/tasks?format=xml").status_code == 400
+
+class TestTaskModelBulkConversion(unittest.TestCase):
+    """Slotted Task, fast timestamp parsing and bulk row converters."""
+
+    def test_task_is_slotted(self):
+        task = Task(owner_id=1)
+        assert not hasattr(task, "__dict__")
+        with self.assertRaises(AttributeError):
+            task.not_a_field = 1
+
+    def test_iso_timestamps_match_dateutil(self):
+        from dateutil import parser as dateparser
+        for value in ("2025-03-01", "2025-03-01T17:00:00", "2025-03-01T17:00:00.123456+00:00", "2025-03-01T17:00:00Z"):
+            task = Task.from_dict({"due_date": value, "recurrence_end_date": value, "recurrence_type": "daily"})
+            assert task.due_date == dateparser.parse(value)
+            assert task.recurrence_end_date == dateparser.parse(value)
+
+    def test_non_iso_timestamps_fall_back_to_dateutil(self):
+        assert Task.from_dict({"due_date": "March 1 2025 5pm"}).due_date == datetime(2025, 3, 1, 17, 0)
+        assert Task.from_dict({"due_date": "not a date"}).due_date is None
+
+    def test_from_rows_and_to_rows_round_trip(self):
+        rows = [make_task_row(i, due_date="2025-03-01T17:00:00+00:00") for i in range(1, 4)]
+        tasks = Task.from_rows(rows)
+        assert [t.id for t in tasks] == [1, 2, 3]
+        assert Task.to_rows(tasks) == [t.to_dict() for t in tasks]
+        assert Task.to_rows(tasks)[0]["due_date"] == "2025-03-01T17:00:00+00:00"
+
+class TestRecurringOccurrenceGeneration(unittest.TestCase):
+    """Bulk subtask copies and the idempotent recurrence worker."""
+
+    def setUp(self):
+        parent = make_task_row(1, subtasks=list(range(101, 131)), recurrence_type="weekly",
+                               due_date="2025-01-06T09:00:00+00:00", completed_at="2025-01-07T10:00:00+00:00")
+        subtasks = [make_task_row(100 + i, parent_task=1, task_name=f"Step {i}",
+                                  due_date="2025-01-05T09:00:00+00:00") for i in range(1, 31)]
+        self.client = MemoryClient({"task": [parent] + subtasks})
+        self.service = TaskService(repo=SupabaseTaskRepo(client=self.client))
+        self.service.recurrence_worker = RecurrenceWorker(self.service._generate_next_occurrence, inline=True)
+
+    def new_parents(self):
+        return [t for t in self.client.rows("task") if t["type"] == "parent" and t["id"] != 1]
+
+    def test_subtask_copies_use_one_bulk_insert(self):
+        completed = self.service.repo.get_task(1)
+        self.client.calls.clear()
+        created = self.service._generate_next_occurrence(completed)
+        # duplicate check, parent insert, subtask fetch, bulk insert, parent patch
+        assert self.client.calls["task"] == 5
+        assert len(created["subtasks"]) == 30
+        copies = self.service.repo.get_tasks_by_ids(created["subtasks"])
+        assert {c["parent_task"] for c in copies} == {created["id"]}
+        assert [c["task_name"] for c in copies] == [f"Step {i}" for i in range(1, 31)]
+        # Subtask due dates keep their offset from the parent
+        assert copies[0]["due_date"] == "2025-01-12T09:00:00+00:00"
+
+    def test_completion_schedules_occurrence_on_worker(self):
+        worker = RecurrenceWorker(self.service._generate_next_occurrence, inline=False)
+        self.service.recurrence_worker = worker
+        result = self.service.update_task_by_id({"task_id": 1, "status": "Completed"})
+        assert result["__status"] == 200
+        worker.join()
+        assert worker.processed == 1
+        assert len(self.new_parents()) == 1
+
+    def test_same_occurrence_is_generated_once(self):
+        task = self.service.repo.get_task(1)
+        assert self.service._schedule_next_occurrence(task) is True
+        assert self.service._schedule_next_occurrence(task) is False
+        # A fresh worker (e.g. after a restart) is stopped by the database check
+        self.service.recurrence_worker = RecurrenceWorker(self.service._generate_next_occurrence, inline=True)
+        self.service._schedule_next_occurrence(task)
+        assert len(self.new_parents()) == 1
+
+    def test_failed_job_can_be_retried(self):
+        calls = []
+
+        def flaky(task):
+            calls.append(task["id"])
+            if len(calls) == 1:
+                raise RuntimeError("database unavailable")
+
+        worker = RecurrenceWorker(flaky, inline=True)
+        assert worker.submit("1:2025-01-13", {"id": 1})
+        assert worker.submit("1:2025-01-13", {"id": 1})
+        assert worker.failed == 1 and worker.processed == 1
+        assert not worker.submit("1:2025-01-13", {"id": 1})
+
+    def test_queued_jobs_survive_a_restart(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "recurrence_jobs.sqlite3")
+            now = [1000.0]
+            # The process stops before its worker thread runs the job
+            stopped = RecurrenceWorker(self.service._generate_next_occurrence, inline=False, path=path, clock=lambda: now[0])
+            stopped.start = lambda: None
+            assert stopped.submit("1:2025-01-13", self.service.repo.get_task(1))
+            assert self.new_parents() == []
+
+            restarted = RecurrenceWorker(self.service._generate_next_occurrence, inline=False, path=path,
+                                         poll_interval=0.01, clock=lambda: now[0])
+            assert not restarted.submit("1:2025-01-13", self.service.repo.get_task(1))
+            restarted.start()
+            deadline = time.time() + 5
+            while restarted.processed == 0 and time.time() < deadline:
+                time.sleep(0.01)
+            assert restarted.processed == 1
+            assert len(self.new_parents()) == 1
+
+    def copies(self):
+        return [t for t in self.client.rows("task") if t["type"] == "subtask" and t["id"] > 130]
+
+    def fail_once(self, method, when=lambda *args: True):
+        """Make repo.`method` raise the first time `when(*args)` holds."""
+        real = getattr(self.service.repo, method)
+        failed = []
+
+        def flaky(*args, **kwargs):
+            if not failed and when(*args):
+                failed.append(args)
+                raise RuntimeError("database unavailable")
+            return real(*args, **kwargs)
+
+        patcher = patch.object(self.service.repo, method, side_effect=flaky)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return failed
+
+    def test_occurrence_is_inserted_once_by_racing_workers(self):
+        completed = self.service.repo.get_task(1)
+        # Both workers pass the existence check before either inserts
+        self.service._existing_occurrence = lambda task, due: None
+        first = self.service._generate_next_occurrence(completed)
+        assert first["recurrence_key"] == "1:2025-01-13"
+        # The second finds the first's row by its key and only re-links the copies
+        assert self.service._generate_next_occurrence(completed)["id"] == first["id"]
+        assert len(self.new_parents()) == 1 and len(self.copies()) == 30
+
+    def test_retry_finishes_occurrence_when_linking_subtasks_failed(self):
+        completed = self.service.repo.get_task(1)
+        failed = self.fail_once("update_task", when=lambda task_id, patch: "subtasks" in patch)
+        with self.assertRaises(RuntimeError):
+            self.service._generate_next_occurrence(completed)
+        assert failed
+        [parent] = self.new_parents()
+        # Never the completed task's subtasks, even before the copies are linked
+        assert parent["subtasks"] == []
+
+        retried = self.service._generate_next_occurrence(completed)
+        assert retried["id"] == parent["id"] and len(self.new_parents()) == 1
+        copies = self.copies()
+        assert len(copies) == 30 and self.service.repo.fetch_task(parent["id"])["subtasks"] == [c["id"] for c in copies]
+
+    def test_retry_finishes_occurrence_when_copying_subtasks_failed(self):
+        completed = self.service.repo.get_task(1)
+        self.fail_once("insert_tasks")
+        with self.assertRaises(RuntimeError):
+            self.service._generate_next_occurrence(completed)
+        assert self.copies() == []
+        retried = self.service._generate_next_occurrence(completed)
+        assert len(self.new_parents()) == 1 and len(retried["subtasks"]) == 30
+        assert [c["task_name"] for c in self.service.repo.get_tasks_by_ids(retried["subtasks"])] == \
+            [f"Step {i}" for i in range(1, 31)]
+
+    def test_retry_links_subtask_occurrence_to_its_parent(self):
+        self.client.table("task").update({"recurrence_type": "weekly"}).eq("id", 101).execute()
+        completed = self.service.repo.get_task(101)
+        self.fail_once("add_subtask_to_parent")
+        with self.assertRaises(RuntimeError):
+            self.service._generate_next_occurrence(completed)
+        [occurrence] = self.copies()
+        assert occurrence["id"] not in self.service.repo.fetch_task(1)["subtasks"]
+        assert self.service._generate_next_occurrence(completed)["id"] == occurrence["id"]
+        assert len(self.copies()) == 1 and occurrence["id"] in self.service.repo.fetch_task(1)["subtasks"]
+
+    def test_rejected_completion_schedules_nothing(self):
+        result = self.service.update_task_by_id({"task_id": 1, "status": "Completed", "parent_task": 999})
+        assert result["__status"] == 400
+        self.fail_once("update_task")
+        result = self.service.update_task_by_id({"task_id": 1, "status": "Completed"})
+        assert result["__status"] == 500
+        assert self.new_parents() == []
+        assert self.service._schedule_next_occurrence(self.service.repo.get_task(1)) is True
+
+class TestAtomicArrayOperations(unittest.TestCase):
+    """Atomic subtasks/collaborators appends through the array RPCs."""
+
+    def setUp(self):
+        self.client = MemoryClient({"task": [make_task_row(1, subtasks=[], collaborators=[1])]}, latency=0.001)
+        self.repo = SupabaseTaskRepo(client=self.client)
+
+    def test_parallel_subtask_appends_are_not_lost(self):
+        barrier = threading.Barrier(20)
+
+        def append(subtask_id):
+            barrier.wait()
+            self.repo.add_subtask_to_parent(1, subtask_id)
+
+        threads = [threading.Thread(target=append, args=(100 + i,)) for i in range(20)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert sorted(self.repo.get_task(1)["subtasks"]) == list(range(100, 120))
+        # One round trip per append, no read of the parent row
+        assert self.client.calls["rpc:array_append_ids"] == 20
+
+    def test_append_skips_existing_and_remove(self):
+        assert self.repo.add_collaborators(1, [1, 2, 3, 2]) == [2, 3]
+        assert self.repo.remove_collaborators(1, [3, 9]) == [3]
+        assert self.repo.get_task(1)["collaborators"] == [1, 2]
+        self.repo.add_subtask_to_parent(1, 5)
+        assert self.repo.remove_subtask_from_parent(1, 5) == {"id": 1, "subtasks": []}
+
+    def test_missing_parent_raises(self):
+        with self.assertRaises(RuntimeError):
+            self.repo.add_subtask_to_parent(99, 5)
+
+    def test_create_subtask_appends_without_reading_parent(self):
+        self.client.latency = 0
+        service = TaskService(repo=self.repo)
+        result = service.manager_create_subtask({"parent_task": 1, "owner_id": 1, "task_name": "Child"})
+        assert result["__status"] == 201
+        assert self.repo.get_task(1)["subtasks"] == [result["data"]["id"]]
+
+    def test_failed_update_leaves_arrays_and_columns_as_they_were(self):
+        self.client.latency = 0
+        service = TaskService(repo=self.repo, outbox=NotificationOutbox(":memory:"))
+        before = self.repo.fetch_task(1)
+
+        # The column write is rejected: no collaborator or subtask is added
+        with patch.object(self.repo, "update_task", side_effect=RuntimeError("check constraint")):
+            result = service.update_task_by_id({"task_id": 1, "status": "Completed", "collaborators": [1, 2]})
+        assert result["__status"] == 500
+        assert self.repo.fetch_task(1) == before
+
+        # A later array edit fails: the column and the collaborator already added are undone
+        append_to_array = self.repo.append_to_array
+
+        def append_failing_for_subtasks(task_id, column, values):
+            if column == "subtasks":
+                raise RuntimeError("rpc failed")
+            return append_to_array(task_id, column, values)
+
+        with patch.object(self.repo, "append_to_array", side_effect=append_failing_for_subtasks):
+            result = service.update_task_by_id({"task_id": 1, "status": "Completed", "collaborators": [1, 2],
+                                                "subtasks": [7]})
+        assert result["__status"] == 500
+        after = self.repo.fetch_task(1)
+        assert after["status"] == before["status"] and after["completed_at"] is None
+        assert after["collaborators"] == [1] and after["subtasks"] == []
+
+
+class TestNotificationOutbox(unittest.TestCase):
+    """Write paths queue notifications; the outbox worker delivers them in batches with retries."""
+
+    def setUp(self):
+        self.now = 1000.0
+        self.sent = []
+        self.service_up = True
+
+        def send(endpoint, payload):
+            if not self.service_up:
+                raise ConnectionError("notification service down")
+            self.sent.append((endpoint, payload))
+            return True
+
+        self.outbox = NotificationOutbox(":memory:", send=send, resolve_name=lambda user_id: f"User {user_id}",
+                                         batch_size=2, max_attempts=3, base_delay=10, clock=lambda: self.now)
+        self.client = MemoryClient({"task": [make_task_row(1)]})
+        self.service = TaskService(repo=SupabaseTaskRepo(client=self.client), outbox=self.outbox)
+
+    def test_update_queues_without_calling_notification_service(self):
+        self.service_up = False
+        result = self.service.update_task_by_id({"task_id": 1, "collaborators": [1, 2, 3]})
+        assert result["__status"] == 200
+        assert self.sent == []
+        assert self.outbox.stats() == {"pending": 1, "dead": 0}
+
+    def test_drain_sends_in_batches_and_resolves_names(self):
+        for task_id in range(1, 4):
+            self.service._trigger_collaborator_notifications(task_id, {"owner_id": 7, "collaborators": [7, 8]})
+        assert self.outbox.drain_once() == {"claimed": 2, "sent": 2, "retried": 0, "dead": 0, "lost": 0}
+        assert self.outbox.drain_once()["sent"] == 1
+        assert self.outbox.stats()["pending"] == 0
+        endpoint, payload = self.sent[0]
+        assert endpoint == "/notifications/triggers/task-collaborator-addition"
+        assert payload == {"task_id": 1, "collaborator_ids": [8], "creator_name": "User 7"}
+
+    def test_failed_events_back_off_then_dead_letter(self):
+        self.service_up = False
+        self.outbox.enqueue("/notifications/triggers/task-consolidated-update", {"task_id": 1})
+        assert self.outbox.drain_once()["retried"] == 1
+        # Not due again until the backoff has passed
+        assert self.outbox.drain_once()["claimed"] == 0
+        self.now += 10
+        assert self.outbox.drain_once()["retried"] == 1
+        self.now += 20
+        assert self.outbox.drain_once()["dead"] == 1
+        assert self.outbox.stats() == {"pending": 0, "dead": 1}
+
+    def test_retry_succeeds_once_service_recovers(self):
+        self.service_up = False
+        self.service._send_task_ownership_transfer_notification(1, 2, None, "System")
+        self.outbox.drain_once()
+        self.service_up = True
+        self.now += 10
+        assert self.outbox.drain_once()["sent"] == 1
+        assert self.sent[0][1]["previous_owner_name"] == "Previous Owner"
+
+
+class TestNotificationDedup(unittest.TestCase):
+    """Bounded TTL dedup store for task update notifications."""
+
+    def setUp(self):
+        self.now = 0.0
+
+    def clock(self):
+        return self.now
+
+    def test_backends_must_implement_the_interface(self):
+        class NoClear(DedupBackend):
+            def add_if_absent(self, key):
+                return True
+
+            def size(self):
+                return 0
+
+        with self.assertRaises(TypeError):
+            NoClear()
+
+    def test_memory_backend_expires_and_evicts(self):
+        dedup = NotificationDedup(InMemoryDedupBackend(max_entries=2, ttl_seconds=10, clock=self.clock))
+        assert not dedup.is_duplicate("a")
+        assert dedup.is_duplicate("a")
+        dedup.is_duplicate("b")
+        dedup.is_duplicate("c")  # over capacity: "a" is evicted
+        assert not dedup.is_duplicate("a")
+        self.now = 11
+        assert not dedup.is_duplicate("c")
+        stats = dedup.stats()
+        assert (stats["hits"], stats["misses"], stats["evictions"], stats["size"]) == (1, 5, 2, 1)
+        assert stats["expirations"] == 2
+
+    def test_sqlite_backend_is_shared_and_bounded(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "dedup.sqlite3")
+            first = NotificationDedup(SQLiteDedupBackend(path, ttl_seconds=10, clock=self.clock))
+            second = NotificationDedup(SQLiteDedupBackend(path, ttl_seconds=10, clock=self.clock))
+            assert not first.is_duplicate("1:x")
+            assert second.is_duplicate("1:x")
+            self.now = 10
+            assert not second.is_duplicate("1:x")
+
+            bounded = SQLiteDedupBackend(path, max_entries=100, ttl_seconds=10, clock=self.clock)
+            for i in range(512):
+                bounded.add_if_absent(f"k{i}")
+            assert bounded.size() <= 100 + 256
+            assert bounded.evictions > 0
+
+    def test_key_is_stable_and_order_independent(self):
+        assert NotificationDedup.key_for(1, {"status": "Done", "priority": 2}) == \
+            NotificationDedup.key_for(1, {"priority": 2, "status": "Done"})
+        assert NotificationDedup.key_for(1, {"status": "Done"}) != NotificationDedup.key_for(2, {"status": "Done"})
+
+    def test_repeated_update_notifies_once(self):
+        outbox = NotificationOutbox(":memory:", send=lambda endpoint, payload: True)
+        service = TaskService(repo=FakeTaskRepo([make_task_row(1, collaborators=[1, 2])]), outbox=outbox,
+                              notification_dedup=NotificationDedup(InMemoryDedupBackend(clock=self.clock)))
+        existing = service.repo.tasks[1]
+        for _ in range(3):
+            service._trigger_update_notifications(existing, {"status": "Completed"}, 1, "2025-01-02T00:00:00+00:00")
+        assert outbox.stats()["pending"] == 1
+        assert service.get_notification_dedup_stats()["data"]["hits"] == 2
+
+        # The same change made again later is a new event
+        service._trigger_update_notifications(existing, {"status": "Completed"}, 1, "2025-01-02T00:00:05+00:00")
+        assert outbox.stats()["pending"] == 2
+
+    def test_collaborator_additions_are_notified_once(self):
+        outbox = NotificationOutbox(":memory:", send=lambda endpoint, payload: True)
+        client = MemoryClient({"task": [make_task_row(1)]})
+        repo = SupabaseTaskRepo(client=client)
+        service = TaskService(repo=repo, outbox=outbox,
+                              notification_dedup=NotificationDedup(InMemoryDedupBackend(clock=self.clock)))
+        stale = repo.fetch_task(1)
+        # Both requests read the row before either adds the collaborator
+        repo.fetch_task = lambda task_id: dict(stale)
+        for _ in range(2):
+            assert service.update_task_by_id({"task_id": 1, "collaborators": [1, 5]})["__status"] == 200
+        assert client.rows("task")[0]["collaborators"] == [1, 5]
+        assert outbox.stats()["pending"] == 1
+
+        # The same creation event queued twice is sent once
+        created = {"owner_id": 1, "collaborators": [1, 6]}
+        service._trigger_collaborator_notifications(1, created, "2025-01-01T00:00:00+00:00")
+        service._trigger_collaborator_notifications(1, created, "2025-01-01T00:00:00+00:00")
+        assert outbox.stats()["pending"] == 2
+
+    def test_collaborator_removed_and_added_again_is_notified_again(self):
+        outbox = NotificationOutbox(":memory:", send=lambda endpoint, payload: True)
+        repo = SupabaseTaskRepo(client=MemoryClient({"task": [make_task_row(1)]}))
+        service = TaskService(repo=repo, outbox=outbox,
+                              notification_dedup=NotificationDedup(InMemoryDedupBackend(clock=self.clock)))
+        for collaborators in ([1, 5], [1], [1, 5]):
+            assert service.update_task_by_id({"task_id": 1, "collaborators": collaborators})["__status"] == 200
+        assert outbox.stats()["pending"] == 2
+        assert service.get_notification_dedup_stats()["data"]["hits"] == 0
+
+
+class TestTaskSearchIndex(unittest.TestCase):
+    """Inverted index behind /tasks/search, maintained by repo writes."""
+
+    def setUp(self):
+        rows = [
+            make_task_row(1, owner_id=1, task_name="Quarterly budget review", description="Finance numbers"),
+            make_task_row(2, owner_id=1, task_name="Team offsite", description="Book venue, review budget"),
+            make_task_row(3, owner_id=2, task_name="Budget approval", description="", collaborators=[2]),
+        ]
+        comments = [{"id": 50, "task_id": 2, "content": "Vendor invoices attached"}]
+        self.client = MemoryClient({"task": rows, "comment": comments})
+        self.repo = SupabaseTaskRepo(client=self.client, search_index=TaskSearchIndex())
+        self.service = TaskService(repo=self.repo)
+        assert self.repo.rebuild_search_index(batch_size=2) == 3
+
+    def ids(self, result):
+        return [t["id"] for t in result["data"]]
+
+    def test_ranks_name_matches_first_and_scopes_by_visibility(self):
+        result = self.service.search_tasks(1, "budget")
+        assert self.ids(result) == [1, 2]
+        assert result["data"][0]["score"] > result["data"][1]["score"]
+        assert self.ids(self.service.search_tasks(2, "budget")) == [3]
+
+    def test_prefix_and_multi_term_matching(self):
+        assert self.ids(self.service.search_tasks(1, "budg rev")) == [1, 2]
+        assert self.ids(self.service.search_tasks(1, "invoice")) == [2]  # comment text
+        assert self.ids(self.service.search_tasks(1, "budget venue")) == [2]
+        assert self.service.search_tasks(1, "nothing here")["data"] == []
+
+    def test_repo_writes_update_the_index(self):
+        created = self.repo.insert_task({"owner_id": 1, "task_name": "Budget forecast", "collaborators": [1]})
+        self.repo.update_task(1, {"task_name": "Hiring plan"})
+        self.repo.add_collaborators(3, [1])
+        assert self.ids(self.service.search_tasks(1, "budget")) == [created["id"], 3, 2]
+        self.repo.delete_task(created["id"])
+        self.repo.remove_collaborators(3, [1])
+        assert self.ids(self.service.search_tasks(1, "budget")) == [2]
+        assert self.ids(self.service.search_tasks(1, "hiring")) == [1]
+
+    def test_refresh_picks_up_comment_changes(self):
+        self.client.seed({"comment": [{"id": 51, "task_id": 1, "content": "Escalated to CFO"}]})
+        assert self.service.search_tasks(1, "cfo")["data"] == []
+        assert self.service.refresh_search_index(1)["__status"] == 200
+        assert self.ids(self.service.search_tasks(1, "cfo")) == [1]
+
+    def test_not_ready_and_argument_validation(self):
+        service = TaskService(repo=SupabaseTaskRepo(client=self.client, search_index=TaskSearchIndex()))
+        assert service.search_tasks(1, "budget")["__status"] == 503
+        assert parse_search_args({"q": " budget ", "user_id": "4"}) == {"query": "budget", "user_id": 4, "limit": 20}
+        for args in ({"user_id": "1"}, {"q": "x"}, {"q": "x", "user_id": "1", "limit": "500"}):
+            with self.assertRaises(ValueError):
+                parse_search_args(args)
+
+
+class TestDueDateIndex(unittest.TestCase):
+    """Day buckets behind /tasks/upcoming-deadlines and the reminder scheduler."""
+
+    def setUp(self):
+        self.today = date.today()
+
+        def due(days):
+            return (datetime.combine(self.today + timedelta(days=days), datetime.min.time())).isoformat() + "+00:00"
+
+        self.due = due
+        rows = [
+            make_task_row(1, due_date=due(3), reminder_intervals=[7, 3, 1]),
+            make_task_row(2, due_date=due(5), reminder_intervals=[7, 3, 1]),
+            make_task_row(3, due_date=due(14), reminder_intervals=[14]),
+            make_task_row(4, due_date=due(1), status="Completed"),
+            make_task_row(5, due_date=None),
+        ]
+        self.client = MemoryClient({"task": rows})
+        self.repo = SupabaseTaskRepo(client=self.client, due_index=DueDateIndex())
+        self.service = TaskService(repo=self.repo)
+        assert self.repo.rebuild_due_index() == 3
+
+    def test_reminders_due_carry_matching_interval(self):
+        result = self.service.get_tasks_with_upcoming_deadlines(reminders_only=True)
+        assert [(t["id"], t["days_until_due"], t["reminder_interval"]) for t in result["data"]] == [(1, 3, 3), (3, 14, 14)]
+
+    def test_due_within_range(self):
+        result = self.service.get_tasks_with_upcoming_deadlines(7)
+        assert [(t["id"], t["reminder_interval"]) for t in result["data"]] == [(1, 3), (2, None)]
+
+    def test_lookup_touches_only_matching_tasks(self):
+        self.client.calls.clear()
+        self.service.get_tasks_with_upcoming_deadlines(reminders_only=True)
+        # One `in_` fetch for the two hits, no range scan
+        assert self.client.calls["task"] == 1
+
+    def test_writes_keep_buckets_current(self):
+        self.repo.update_task(2, {"due_date": self.due(7)})
+        self.repo.update_task(1, {"status": "Completed"})
+        created = self.repo.insert_task({"owner_id": 1, "task_name": "New", "status": "Ongoing",
+                                         "due_date": self.due(1), "reminder_intervals": [1]})
+        reminders = self.repo.due_index.reminders_due(self.today)
+        assert reminders == [(2, 7, 7), (3, 14, 14), (created["id"], 1, 1)]
+        self.repo.delete_task(created["id"])
+        assert [r[0] for r in self.repo.due_index.reminders_due(self.today)] == [2, 3]
+        # The next day's bucket is read directly, past days are pruned
+        tomorrow = self.today + timedelta(days=1)
+        assert self.repo.due_index.reminders_due(tomorrow) == []
+
+    def test_falls_back_to_query_until_ready(self):
+        service = TaskService(repo=SupabaseTaskRepo(client=self.client, due_index=DueDateIndex()))
+        result = service.get_tasks_with_upcoming_deadlines(reminders_only=True)
+        assert [(t["id"], t["reminder_interval"]) for t in result["data"]] == [(1, 3)]
+
+
+class TestTaskImport(unittest.TestCase):
+    """/tasks/import validates rows as they stream in and writes in bulk."""
+
+    def setUp(self):
+        self.client = MemoryClient({"task": [make_task_row(1, owner_id=7, task_name="Existing")]})
+        self.outbox = NotificationOutbox(":memory:", send=lambda endpoint, payload: True)
+        self.service = TaskService(repo=SupabaseTaskRepo(client=self.client), outbox=self.outbox)
+
+    def records(self, text, fmt):
+        return iter_import_records(io.BytesIO(text.encode("utf-8")), fmt)
+
+    def queued(self):
+        rows = self.outbox._conn.execute("SELECT endpoint, payload FROM outbox ORDER BY id").fetchall()
+        return [(endpoint, json.loads(payload)) for endpoint, payload in rows]
+
+    def test_detect_format(self):
+        assert detect_import_format("ndjson", None, None) == "jsonl"
+        assert detect_import_format(None, "application/octet-stream", "tasks.CSV") == "csv"
+        assert detect_import_format(None, "application/x-ndjson; charset=utf-8", None) == "jsonl"
+        with self.assertRaises(ValueError):
+            detect_import_format(None, "application/json", "tasks.json")
+
+    def test_csv_rows_are_validated_and_reported(self):
+        csv_text = ("task_name,description,owner_id,collaborators\n"
+                    "Write spec,Draft,7,\"8,9\"\n"
+                    ",No name,7,\n"
+                    "\n"
+                    "Existing,Clashes with the database,7,\n"
+                    "Write spec,In-file duplicate,7,\n"
+                    "Review,Check,8,7\n")
+        result = self.service.import_tasks(self.records(csv_text, "csv"))
+        assert result["__status"] == 207
+        assert result["summary"] == {"received": 5, "created": 2, "failed": 3}
+        assert [(e["row"], e["task_name"]) for e in result["errors"]] == [(3, None), (5, "Existing"), (6, "Write spec")]
+        assert "Missing required fields" in result["errors"][0]["error"]
+        assert [(d["row"], d["task_name"]) for d in result["data"]] == [(2, "Write spec"), (7, "Review")]
+        created = {t["task_name"]: t for t in self.client.rows("task")}
+        assert created["Write spec"]["collaborators"] == [8, 9]
+
+    def test_bulk_queries_and_subtask_linking(self):
+        lines = [json.dumps({"ref": "p1", "task_name": "Launch", "description": "d", "owner_id": 7})]
+        lines += [json.dumps({"parent_ref": "p1", "task_name": f"Step {i}", "description": "d", "owner_id": 7})
+                  for i in range(3)]
+        lines += [json.dumps({"task_name": "Follow-up", "description": "d", "owner_id": 7, "type": "subtask",
+                              "parent_task": 1}),
+                  json.dumps({"task_name": "Orphan", "description": "d", "owner_id": 7, "parent_task": 999}),
+                  json.dumps({"task_name": "Bad ref", "description": "d", "owner_id": 7, "parent_ref": "nope"}),
+                  "not json", "[1, 2]"]
+        result = self.service.import_tasks(self.records("\n".join(lines), "jsonl"))
+
+        assert result["summary"] == {"received": 9, "created": 5, "failed": 4}
+        assert {e["row"] for e in result["errors"]} == {6, 7, 8, 9}
+        tasks = {t["task_name"]: t for t in self.client.rows("task")}
+        launch = tasks["Launch"]
+        assert sorted(launch["subtasks"]) == sorted(tasks[f"Step {i}"]["id"] for i in range(3))
+        assert all(tasks[f"Step {i}"]["parent_task"] == launch["id"] for i in range(3))
+        assert tasks["Follow-up"]["id"] in tasks["Existing"]["subtasks"]
+        # 1 name check + 1 parent check + 2 inserts (parents, subtasks); 1 append per parent
+        assert self.client.calls["task"] == 4
+        assert self.client.calls["rpc:array_append_ids"] == 2
+
+    def test_one_notification_per_collaborator(self):
+        lines = [json.dumps({"task_name": f"T{i}", "description": "d", "owner_id": 7, "collaborators": [7, 8, 9]})
+                 for i in range(3)]
+        lines.append(json.dumps({"task_name": "T3", "description": "d", "owner_id": 7, "collaborators": [9]}))
+        result = self.service.import_tasks(self.records("\n".join(lines), "jsonl"), importer_id=7)
+        assert result["__status"] == 201
+
+        queued = self.queued()
+        assert [payload["user_id"] for _, payload in queued] == [8, 9]
+        assert all(endpoint == "/notifications/triggers/task-import-summary" for endpoint, _ in queued)
+        assert [t["task_name"] for t in queued[1][1]["tasks"]] == ["T0", "T1", "T2", "T3"]
+
+    def test_nothing_imported_is_400(self):
+        result = self.service.import_tasks(self.records('{"task_name": "x"}\n', "jsonl"))
+        assert result["__status"] == 400
+        assert result["data"] == [] and self.client.calls["task"] == 0
+
+
+class TestAttachmentStore(unittest.TestCase):
+    """Attachments are streamed through a spool, deduplicated by checksum, large ones uploaded in the background."""
+
+    def setUp(self):
+        self.client = MemoryClient()
+        self.store = AttachmentStore(self.client, spool_threshold=1024, background_threshold=4096,
+                                     max_bytes=16 * 1024, inline=False)
+        self.repo = SupabaseTaskRepo(client=self.client, attachments=self.store)
+
+    def upload(self, data, filename="report.pdf", mimetype="application/octet-stream"):
+        return FileStorage(stream=io.BytesIO(data), filename=filename, content_type=mimetype)
+
+    def test_detect_content_type(self):
+        assert detect_content_type(b"%PDF-1.7", "notes.txt") == "application/pdf"
+        assert detect_content_type(b"PK\x03\x04", "plan.docx").endswith("wordprocessingml.document")
+        assert detect_content_type(b"PK\x03\x04", "bundle") == "application/zip"
+        assert detect_content_type(b"hello", "notes.txt") == "text/plain"
+        assert detect_content_type(b"hello", "blob", "application/x-custom") == "application/x-custom"
+
+    def test_small_upload_sends_bytes_with_detected_type(self):
+        [info] = self.repo.upload_attachment(self.upload(b"%PDF-1.4 small", "a.pdf"))
+        assert info["size"] == 14 and info["content_type"] == "application/pdf"
+        assert info["url"] == f"memory://task-files/attachments/{info['checksum']}/a.pdf"
+        assert "upload_id" not in info
+        assert self.client.storage.streamed == 0
+        assert self.client.storage.content_types[("task-files", f"attachments/{info['checksum']}/a.pdf")] == "application/pdf"
+
+    def test_spooled_upload_streams_from_disk_and_dedupes(self):
+        data = b"\x89PNG\r\n\x1a\n" + os.urandom(2000)
+        [first] = self.repo.upload_attachment(self.upload(data, "chart.png"))
+        assert first["content_type"] == "image/png"
+        assert self.client.storage.streamed == 1
+        [second] = self.repo.upload_attachment(self.upload(data, "copy.png"))
+        assert second["url"] == first["url"] and second["name"] == "copy.png"
+        assert self.client.calls["storage:upload"] == 1
+        assert self.store.stats()["deduplicated"] == 1
+
+    def test_dedupes_against_objects_already_in_storage(self):
+        data = b"%PDF-1.4 stored earlier"
+        self.repo.upload_attachment(self.upload(data, "old.pdf"))
+        fresh = AttachmentStore(self.client, inline=True)
+        info = fresh.save(self.upload(data, "new.pdf"))
+        assert info["url"].endswith("/old.pdf")
+        assert self.client.calls["storage:upload"] == 1
+
+    def hold_uploads(self, fail=False):
+        """Keep background uploads waiting until the returned event is set; make them raise if `fail`."""
+        release = threading.Event()
+        upload = self.store._upload
+
+        def held(*args):
+            release.wait(5)
+            if fail:
+                raise RuntimeError("storage unavailable")
+            upload(*args)
+
+        patcher = patch.object(self.store, "_upload", side_effect=held)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(release.set)
+        return release
+
+    def test_large_upload_runs_in_background(self):
+        release = self.hold_uploads()
+        data = os.urandom(8000)
+        [info] = self.repo.upload_attachment(self.upload(data, "big.bin"))
+        assert info["status"] == "pending"
+        # Same bytes while in flight share the upload
+        [again] = self.repo.upload_attachment(self.upload(data, "big.bin"))
+        assert again["upload_id"] == info["upload_id"]
+        release.set()
+        self.store.join()
+        service = TaskService(repo=self.repo, outbox=NotificationOutbox(":memory:"))
+        result = service.get_attachment_upload_status(info["upload_id"])
+        assert result["__status"] == 200 and result["data"]["status"] == "done"
+        assert service.get_attachment_upload_status("nope")["__status"] == 404
+        assert self.client.calls["storage:upload"] == 1
+        assert self.client.storage.from_("task-files").download(f"attachments/{info['checksum']}/big.bin") == data
+
+    def test_upload_state_is_not_stored_on_the_task(self):
+        release = self.hold_uploads()
+        [info] = self.repo.upload_attachment(self.upload(os.urandom(8000), "big.bin"))
+        task = self.repo.insert_task({"title": "Report", "attachments": [info]})
+        [stored] = self.repo.fetch_task(task["id"])["attachments"]
+        assert "upload_id" not in stored and "status" not in stored
+        assert stored["url"] == info["url"] and stored["checksum"] == info["checksum"]
+        release.set()
+        self.store.join()
+        assert self.repo.fetch_task(task["id"])["attachments"] == [stored]
+
+    def test_failed_upload_is_removed_from_the_task(self):
+        [kept] = self.repo.upload_attachment(self.upload(b"%PDF-1.4 small", "a.pdf"))
+        release = self.hold_uploads(fail=True)
+        [failed] = self.repo.upload_attachment(self.upload(os.urandom(8000), "big.bin"))
+        task = self.repo.insert_task({"title": "Report", "attachments": []})
+        self.repo.update_task(task["id"], {"attachments": [kept, failed]})
+        release.set()
+        self.store.join()
+        assert self.store.status(failed["upload_id"])["status"] == "failed"
+        assert self.repo.fetch_task(task["id"])["attachments"] == [kept]
+
+    def test_download_escapes_the_file_name(self):
+        from controllers.task_controller import task_bp
+        app = Flask(__name__)
+        app.register_blueprint(task_bp)
+        service = TaskService(repo=self.repo, outbox=NotificationOutbox(":memory:"))
+        hostile = 'r\u00e9sum\u00e9"\r\nSet-Cookie: x=1.pdf'
+        download = (hostile, "application/pdf", iter([b"%PDF-1.4"]))
+        with patch("controllers.task_controller.service", service), \
+                patch.object(self.store, "open_download", return_value=download):
+            response = app.test_client().get("/tasks/attachments/" + "a" * 64)
+        assert response.status_code == 200 and response.data == b"%PDF-1.4"
+        assert "Set-Cookie" not in response.headers
+        assert response.headers["Content-Disposition"] == (
+            'inline; filename="resume_Set-Cookie_x1.pdf"; '
+            "filename*=UTF-8''r%C3%A9sum%C3%A9%22%0D%0ASet-Cookie%3A%20x%3D1.pdf")
+
+    def test_oversized_upload_is_rejected(self):
+        with self.assertRaises(ValueError):
+            self.repo.upload_attachment(self.upload(os.urandom(20 * 1024)))
+        assert self.client.calls["storage:upload"] == 0
+
+
+class TestLocalDbBackends(unittest.TestCase):
+    """SupabaseTaskRepo gets the same answers from the in-memory and SQLite backends."""
+
+    def setUp(self):
+        rows = []
+        for i in range(1, 9):
+            created = f"2025-01-0{min(i, 6)}T00:00:00+00:00"
+            rows.append(make_task_row(i, owner_id=1 if i % 2 else 2, collaborators=[i % 3, 7], created_at=created,
+                                      due_date=f"2025-02-{10 + i}", project_id=i % 2 or None))
+            rows.append(make_task_row(100 + i, parent_task=i, created_at=created))
+        rows.append(make_task_row(200, type=None, status=None))
+        self.rows = rows
+        self.clients = {"memory": MemoryClient({"task": [dict(r) for r in rows]}),
+                        "sqlite": SQLiteClient(":memory:")}
+        self.clients["sqlite"].seed({"task": [dict(r) for r in rows]})
+
+    def run_everywhere(self, fn):
+        results = {name: fn(SupabaseTaskRepo(client=client, search_index=TaskSearchIndex(), due_index=DueDateIndex()))
+                   for name, client in self.clients.items()}
+        assert results["sqlite"] == results["memory"], results
+        return results["memory"]
+
+    def test_repo_queries_match(self):
+        ids = lambda tasks: sorted(t["id"] for t in tasks)
+        assert self.run_everywhere(lambda r: ids(r.find_by_user(1))) == [1, 3, 4, 5, 7, 101, 102, 103, 104, 105, 106, 107, 108, 200]
+        assert self.run_everywhere(lambda r: ids(r.find_parent_tasks_by_user(7))) == [1, 2, 3, 4, 5, 6, 7, 8]
+        assert self.run_everywhere(lambda r: {k: ids(v) for k, v in r.find_subtasks_by_parents([1, 2, 9]).items()})[1] == [101]
+        assert self.run_everywhere(lambda r: ids(r.find_by_project(1))) == [1, 3, 5, 7]
+        assert self.run_everywhere(lambda r: sorted(r.find_existing_task_ids([1, 2, 50, 108]))) == [1, 2, 108]
+        assert self.run_everywhere(lambda r: r.get_task(3))["id"] == 3
+        assert self.run_everywhere(lambda r: r.get_task(999)) is None
+
+    def test_keyset_pages_match(self):
+        def walk(repo):
+            service, cursor, ids = TaskService(repo=repo), None, []
+            while True:
+                args = {"limit": "3", **({"cursor": cursor} if cursor else {})}
+                result = service.get_by_user(1, PageRequest.from_args(args))
+                ids.extend(t["id"] for t in result["data"])
+                cursor = result["pagination"]["next_cursor"]
+                if not cursor:
+                    return ids
+
+        # Like PostgREST, in.(parent,null) leaves out the task without a type
+        assert self.run_everywhere(walk) == [1, 3, 4, 5, 7]
+
+    def test_writes_and_array_rpcs(self):
+        def write(repo):
+            created = repo.insert_task({"task_name": "New", "owner_id": 3, "collaborators": [3], "type": "parent"})
+            repo.add_collaborators(created["id"], [4, 5])
+            repo.remove_collaborators(created["id"], [3])
+            repo.update_task(created["id"], {"status": "Completed"})
+            row = repo.get_task(created["id"])
+            return created["id"], row["collaborators"], row["status"], [t["id"] for t in repo.find_by_user(5)]
+
+        assert self.run_everywhere(write) == (201, [4, 5], "Completed", [201])
+
+    def test_memory_backend_plans_from_indexes(self):
+        client = self.clients["memory"]
+        repo = SupabaseTaskRepo(client=client, search_index=TaskSearchIndex(), due_index=DueDateIndex())
+        repo.find_by_owner(2)
+        repo.find_by_user(1)
+        repo.find_subtasks_by_parents([1, 2])
+        assert client.full_scans == 0
+        # Only rows from the owner/collaborator/parent_task indexes were examined
+        assert client.rows_examined < 2 * len(self.rows)
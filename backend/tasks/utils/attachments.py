@@ -0,0 +1,378 @@
+import hashlib
+import io
+import mimetypes
+import os
+import queue
+import re
+import tempfile
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Any, BinaryIO, Dict, Iterator, Optional, Tuple
+
+import requests
+from werkzeug.utils import secure_filename
+
+ATTACHMENT_BUCKET = "task-files"
+ATTACHMENT_PREFIX = "attachments"
+
+# Bytes read from the upload (and from storage on download) at a time
+CHUNK_SIZE = 1024 * 1024
+# Uploads larger than this are spooled to a temp file instead of memory
+DEFAULT_SPOOL_THRESHOLD = int(os.getenv("ATTACHMENT_SPOOL_BYTES", 8 * 1024 * 1024))
+# Uploads at least this large are sent to storage in the background
+DEFAULT_BACKGROUND_THRESHOLD = int(os.getenv("ATTACHMENT_BACKGROUND_BYTES", 25 * 1024 * 1024))
+DEFAULT_MAX_BYTES = int(os.getenv("ATTACHMENT_MAX_BYTES", 1024 * 1024 * 1024))
+# Finished background uploads (and known checksums) remembered for status polling and dedupe
+DEFAULT_MAX_REMEMBERED = 10_000
+
+CHECKSUM_RE = re.compile(r"^[0-9a-f]{64}$")
+# Keys save() adds for a background upload. They describe this process's transfer,
+# not the file, so they are kept out of the task's attachments column.
+UPLOAD_FIELDS = ("upload_id", "status")
+
+# Leading bytes of common attachment formats. Zip and OLE containers (docx, xlsx, doc, ...)
+# are told apart by file name.
+_SIGNATURES = [
+    (b"%PDF-", "application/pdf"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+    (b"PK\x03\x04", "application/zip"),
+    (b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1", "application/x-ole-storage"),
+    (b"\x1f\x8b", "application/gzip"),
+]
+_CONTAINERS = ("application/zip", "application/x-ole-storage")
+
+
+def detect_content_type(head: bytes, filename: Optional[str], declared: Optional[str] = None) -> str:
+    """
+    Content type of an upload from its first bytes, then its file name, then the
+    type the client declared.
+    """
+    guessed = mimetypes.guess_type(filename or "")[0]
+    for signature, content_type in _SIGNATURES:
+        if head.startswith(signature):
+            return guessed if content_type in _CONTAINERS and guessed else content_type
+    if head[8:12] == b"WEBP" and head.startswith(b"RIFF"):
+        return "image/webp"
+    if guessed:
+        return guessed
+    return declared or "application/octet-stream"
+
+
+class _Spool:
+    """
+    An upload body copied in chunks: kept in memory up to `threshold` bytes, then
+    moved to a temp file. The SHA-256 and the first bytes are taken on the way.
+    """
+
+    def __init__(self, threshold: int):
+        self.threshold = threshold
+        self.size = 0
+        self.head = b""
+        self.path: Optional[str] = None
+        self._buffer = io.BytesIO()
+        self._file: Optional[BinaryIO] = None
+        self._digest = hashlib.sha256()
+
+    def write(self, chunk: bytes) -> None:
+        if len(self.head) < 16:
+            self.head += chunk[:16 - len(self.head)]
+        self._digest.update(chunk)
+        self.size += len(chunk)
+        if self._file is None and self.size > self.threshold:
+            fd, self.path = tempfile.mkstemp(prefix="attachment-")
+            self._file = os.fdopen(fd, "wb")
+            self._file.write(self._buffer.getvalue())
+            self._buffer = io.BytesIO()
+        (self._file or self._buffer).write(chunk)
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+
+    @property
+    def checksum(self) -> str:
+        return self._digest.hexdigest()
+
+    @property
+    def body(self):
+        """bytes for small uploads, or the temp file path, which storage3 opens and streams."""
+        return self.path if self.path else self._buffer.getvalue()
+
+    def cleanup(self) -> None:
+        self.close()
+        if self.path:
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+            self.path = None
+
+
+class AttachmentStore:
+    """
+    Streams task attachments into Supabase storage.
+
+    An upload is read in CHUNK_SIZE pieces into a spool (memory, then disk above
+    spool_threshold) while its SHA-256 is computed, so request memory stays flat
+    whatever the file size. Objects are stored under attachments/<sha256>/<name>:
+    a file whose checksum is already stored is not uploaded again. The spooled file
+    is handed to storage3 as a path, which streams it out in chunks.
+
+    Uploads of background_threshold bytes or more are queued for a worker thread;
+    save() returns at once with an upload_id whose progress status() reports.
+    With inline=True (or ATTACHMENT_UPLOAD_MODE=inline) every upload runs in save().
+    """
+
+    def __init__(self, client: Any, bucket: str = ATTACHMENT_BUCKET, spool_threshold: int = DEFAULT_SPOOL_THRESHOLD,
+                 background_threshold: int = DEFAULT_BACKGROUND_THRESHOLD, max_bytes: int = DEFAULT_MAX_BYTES,
+                 inline: Optional[bool] = None, max_remembered: int = DEFAULT_MAX_REMEMBERED):
+        self.client = client
+        self.bucket = bucket
+        self.spool_threshold = spool_threshold
+        self.background_threshold = background_threshold
+        self.max_bytes = max_bytes
+        self.inline = inline if inline is not None else os.getenv("ATTACHMENT_UPLOAD_MODE", "thread") == "inline"
+        self.max_remembered = max_remembered
+        self.uploaded = 0
+        self.deduplicated = 0
+        self._session = requests.Session()
+        # checksum -> object path, for files known to be in storage
+        self._known: "OrderedDict[str, str]" = OrderedDict()
+        # upload_id -> status record; checksum -> upload_id while a background upload runs
+        self._jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._in_flight: Dict[str, str] = {}
+        # upload_id -> callbacks to run once the upload is done or failed
+        self._callbacks: Dict[str, list] = {}
+        self._queue: "queue.Queue" = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def storage(self):
+        return self.client.storage.from_(self.bucket)
+
+    # ---- upload -------------------------------------------------------------
+    def save(self, file) -> Dict[str, Any]:
+        """
+        Store a werkzeug FileStorage.
+
+        Returns:
+            {"url", "name", "checksum", "size", "content_type"}, plus "upload_id" and
+            "status": "pending" when the transfer continues in the background
+        """
+        spool = self._spool(file.stream)
+        try:
+            checksum = spool.checksum
+            content_type = detect_content_type(spool.head, file.filename, file.mimetype)
+            info = {"name": file.filename, "checksum": checksum, "size": spool.size, "content_type": content_type}
+
+            with self._lock:
+                upload_id = self._in_flight.get(checksum)
+                path = self._jobs[upload_id]["path"] if upload_id else None
+            if upload_id:
+                # Same file already on its way up; share that upload
+                spool.cleanup()
+                return {**info, "url": self._public_url(path), "upload_id": upload_id, "status": "pending"}
+
+            existing = self._existing_path(checksum)
+            if existing:
+                spool.cleanup()
+                with self._lock:
+                    self.deduplicated += 1
+                return {**info, "url": self._public_url(existing)}
+
+            path = f"{ATTACHMENT_PREFIX}/{checksum}/{secure_filename(file.filename or '') or 'file'}"
+            if spool.size < self.background_threshold or self.inline:
+                try:
+                    self._upload(path, spool, content_type)
+                finally:
+                    spool.cleanup()
+                return {**info, "url": self._public_url(path)}
+
+            upload_id = uuid.uuid4().hex
+            with self._lock:
+                self._jobs[upload_id] = {"upload_id": upload_id, "status": "pending", "path": path, **info}
+                self._in_flight[checksum] = upload_id
+                self._trim_jobs()
+            self._ensure_started()
+            self._queue.put((upload_id, path, spool, content_type))
+            return {**info, "url": self._public_url(path), "upload_id": upload_id, "status": "pending"}
+        except Exception:
+            spool.cleanup()
+            raise
+
+    def _spool(self, stream: BinaryIO) -> _Spool:
+        spool = _Spool(self.spool_threshold)
+        try:
+            while True:
+                chunk = stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                spool.write(chunk)
+                if spool.size > self.max_bytes:
+                    raise ValueError(f"Attachment exceeds the {self.max_bytes} byte limit")
+            spool.close()
+            return spool
+        except Exception:
+            spool.cleanup()
+            raise
+
+    def _existing_path(self, checksum: str) -> Optional[str]:
+        with self._lock:
+            if checksum in self._known:
+                self._known.move_to_end(checksum)
+                return self._known[checksum]
+        try:
+            items = self.storage.list(f"{ATTACHMENT_PREFIX}/{checksum}", {"limit": 1})
+        except Exception as e:
+            print(f"Warning: Could not check storage for attachment {checksum}: {e}")
+            return None
+        names = [item.get("name") for item in items or [] if item.get("name")]
+        if not names:
+            return None
+        path = f"{ATTACHMENT_PREFIX}/{checksum}/{names[0]}"
+        self._remember(checksum, path)
+        return path
+
+    def _remember(self, checksum: str, path: str) -> None:
+        with self._lock:
+            self._known[checksum] = path
+            while len(self._known) > self.max_remembered:
+                self._known.popitem(last=False)
+
+    def _upload(self, path: str, spool: _Spool, content_type: str) -> None:
+        try:
+            self.storage.upload(path, spool.body, file_options={"content-type": content_type})
+        except Exception as e:
+            # Someone stored the same bytes under the same name first
+            if "Duplicate" not in str(e) and "already exists" not in str(e):
+                raise
+        with self._lock:
+            self.uploaded += 1
+        self._remember(spool.checksum, path)
+
+    def _public_url(self, path: str) -> str:
+        public_url_response = self.storage.get_public_url(path)
+        if isinstance(public_url_response, dict):
+            public_url = public_url_response.get("data", {}).get("publicUrl")
+            if not public_url:
+                raise RuntimeError("Failed to retrieve public URL from Supabase response")
+            return public_url
+        if isinstance(public_url_response, str):
+            return public_url_response
+        raise RuntimeError(f"Unexpected type for public URL response: {type(public_url_response)}")
+
+    # ---- background uploads ---------------------------------------------------
+    def _ensure_started(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="attachment-upload", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            upload_id, path, spool, content_type = self._queue.get()
+            try:
+                self._process(upload_id, path, spool, content_type)
+            finally:
+                self._queue.task_done()
+
+    def _process(self, upload_id: str, path: str, spool: _Spool, content_type: str) -> None:
+        self._set_status(upload_id, "uploading")
+        try:
+            self._upload(path, spool, content_type)
+            self._set_status(upload_id, "done")
+        except Exception as e:
+            print(f"Warning: Background upload {upload_id} failed: {e}")
+            self._set_status(upload_id, "failed", error=str(e))
+        finally:
+            spool.cleanup()
+            with self._lock:
+                self._in_flight.pop(spool.checksum, None)
+                callbacks = self._callbacks.pop(upload_id, [])
+            for callback in callbacks:
+                self._run_callback(upload_id, callback)
+
+    def when_finished(self, upload_id: str, callback) -> None:
+        """
+        Call `callback(status)` once the background upload is done or failed, with
+        its status() record; at once if it already has. Unknown IDs are ignored.
+        """
+        with self._lock:
+            job = self._jobs.get(upload_id)
+            if job is None:
+                return
+            if job["status"] in ("pending", "uploading"):
+                self._callbacks.setdefault(upload_id, []).append(callback)
+                return
+        self._run_callback(upload_id, callback)
+
+    def _run_callback(self, upload_id: str, callback) -> None:
+        try:
+            callback(self.status(upload_id))
+        except Exception as e:
+            print(f"Warning: Callback for background upload {upload_id} failed: {e}")
+
+    def _set_status(self, upload_id: str, status: str, error: Optional[str] = None) -> None:
+        with self._lock:
+            job = self._jobs.get(upload_id)
+            if job is not None:
+                job["status"] = status
+                if error:
+                    job["error"] = error
+
+    def _trim_jobs(self) -> None:
+        while len(self._jobs) > self.max_remembered:
+            oldest = next(iter(self._jobs))
+            if self._jobs[oldest]["status"] in ("pending", "uploading"):
+                break
+            self._jobs.popitem(last=False)
+
+    def join(self) -> None:
+        """Block until every queued upload has finished."""
+        self._queue.join()
+
+    def status(self, upload_id: str) -> Optional[Dict[str, Any]]:
+        """Status of a background upload: pending, uploading, done or failed."""
+        with self._lock:
+            job = self._jobs.get(upload_id)
+            return {k: v for k, v in job.items() if k != "path"} if job else None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "uploaded": self.uploaded,
+                "deduplicated": self.deduplicated,
+                "in_flight": len(self._in_flight),
+                "known_checksums": len(self._known),
+            }
+
+    # ---- download -----------------------------------------------------------
+    def open_download(self, checksum: str) -> Optional[Tuple[str, str, Iterator[bytes]]]:
+        """
+        Stream a stored attachment by checksum.
+
+        Returns:
+            (file name, content type, chunk iterator), or None if no such attachment
+        """
+        if not CHECKSUM_RE.match(checksum or ""):
+            raise ValueError("checksum must be a hex SHA-256")
+        path = self._existing_path(checksum)
+        if path is None:
+            return None
+        response = self._session.get(self._public_url(path), stream=True, timeout=30)
+        if response.status_code == 404:
+            response.close()
+            return None
+        response.raise_for_status()
+
+        def chunks():
+            with response:
+                yield from response.iter_content(CHUNK_SIZE)
+
+        content_type = response.headers.get("Content-Type", "application/octet-stream")
+        return path.rsplit("/", 1)[-1], content_type, chunks()
@@ -0,0 +1,222 @@
+import copy
+import json
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+DEFAULT_CACHE_MAX_SIZE = 1024
+DEFAULT_CACHE_TTL_SECONDS = 30.0
+
+
+class CacheBackend(ABC):
+    """
+    Storage interface used by TaskCache.
+
+    Implementations only store and expire values; hit/miss accounting lives in
+    TaskCache so every backend reports the same counters.
+    """
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Any]:
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value: Any) -> None:
+        ...
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        ...
+
+    @abstractmethod
+    def clear(self) -> None:
+        ...
+
+    @abstractmethod
+    def size(self) -> int:
+        ...
+
+
+class InMemoryLRUBackend(CacheBackend):
+    """
+    Per-process LRU cache with a fixed time-to-live per entry.
+
+    Entries are kept in an OrderedDict in least-recently-used order, so lookups,
+    inserts and evictions are all O(1). Safe to share between request threads.
+    """
+
+    def __init__(self, max_size: int = DEFAULT_CACHE_MAX_SIZE, ttl_seconds: float = DEFAULT_CACHE_TTL_SECONDS,
+                 clock: Callable[[], float] = time.monotonic):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self.evictions = 0
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if self.clock() >= expires_at:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (self.clock() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def size(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+class RedisBackend(CacheBackend):
+    """
+    Shared cache for running several workers, so an invalidation in one worker
+    is seen by all of them. Values are stored as JSON with a Redis-side TTL.
+
+    Requires the optional `redis` package.
+    """
+
+    def __init__(self, url: str, ttl_seconds: float = DEFAULT_CACHE_TTL_SECONDS, prefix: str = "tasks:"):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("TASK_CACHE_BACKEND=redis requires the 'redis' package")
+        self.client = redis.Redis.from_url(url)
+        self.ttl_ms = max(1, int(ttl_seconds * 1000))
+        self.prefix = prefix
+
+    def get(self, key: str) -> Optional[Any]:
+        raw = self.client.get(self.prefix + key)
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key: str, value: Any) -> None:
+        self.client.set(self.prefix + key, json.dumps(value), px=self.ttl_ms)
+
+    def delete(self, key: str) -> None:
+        self.client.delete(self.prefix + key)
+
+    def clear(self) -> None:
+        keys = list(self.client.scan_iter(match=self.prefix + "*"))
+        if keys:
+            self.client.delete(*keys)
+
+    def size(self) -> int:
+        return sum(1 for _ in self.client.scan_iter(match=self.prefix + "*"))
+
+
+class TaskCache:
+    """
+    Read-through cache of task rows keyed by task ID, with hit/miss counters.
+
+    Values are copied on the way in and out so callers can mutate the task
+    dicts they get back without corrupting the cached entry.
+    """
+
+    def __init__(self, backend: Optional[CacheBackend] = None):
+        self.backend = backend or InMemoryLRUBackend()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> Optional["TaskCache"]:
+        """
+        Build the cache from environment settings, or return None if disabled.
+
+        TASK_CACHE_BACKEND: "memory" (default), "redis" or "none"
+        TASK_CACHE_TTL_SECONDS / TASK_CACHE_MAX_SIZE: entry lifetime and LRU capacity
+        TASK_CACHE_REDIS_URL: connection URL for the redis backend
+        """
+        kind = os.getenv("TASK_CACHE_BACKEND", "memory").lower()
+        ttl = float(os.getenv("TASK_CACHE_TTL_SECONDS", DEFAULT_CACHE_TTL_SECONDS))
+        if kind in ("none", "off", "") or ttl <= 0:
+            return None
+        if kind == "redis":
+            return cls(RedisBackend(os.getenv("TASK_CACHE_REDIS_URL", "redis://localhost:6379/0"), ttl))
+        if kind != "memory":
+            raise ValueError(f"Unknown TASK_CACHE_BACKEND: {kind}")
+        max_size = int(os.getenv("TASK_CACHE_MAX_SIZE", DEFAULT_CACHE_MAX_SIZE))
+        return cls(InMemoryLRUBackend(max_size=max_size, ttl_seconds=ttl))
+
+    @staticmethod
+    def _key(task_id: int) -> str:
+        return f"task:{int(task_id)}"
+
+    def get_or_load(self, task_id: int, loader: Callable[[int], Optional[Dict[str, Any]]]) -> Optional[Dict[str, Any]]:
+        """Return the cached task, or load it with `loader` and cache it. Missing tasks are not cached."""
+        key = self._key(task_id)
+        try:
+            cached = self.backend.get(key)
+        except Exception as e:
+            # A broken shared cache must not take reads down with it
+            print(f"Task cache read failed for {task_id}: {e}")
+            cached = None
+        if cached is not None:
+            with self._lock:
+                self.hits += 1
+            return copy.deepcopy(cached)
+
+        with self._lock:
+            self.misses += 1
+        task = loader(task_id)
+        if task is not None:
+            try:
+                self.backend.set(key, copy.deepcopy(task))
+            except Exception as e:
+                print(f"Task cache write failed for {task_id}: {e}")
+        return task
+
+    def invalidate(self, *task_ids: int) -> None:
+        for task_id in task_ids:
+            try:
+                self.backend.delete(self._key(task_id))
+            except Exception as e:
+                print(f"Task cache invalidation failed for {task_id}: {e}")
+        with self._lock:
+            self.invalidations += len(task_ids)
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hits, misses, invalidations = self.hits, self.misses, self.invalidations
+        lookups = hits + misses
+        try:
+            size = self.backend.size()
+        except Exception:
+            size = None
+        return {
+            "backend": type(self.backend).__name__,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "invalidations": invalidations,
+            "evictions": getattr(self.backend, "evictions", None),
+            "size": size,
+        }
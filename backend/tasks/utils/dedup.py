@@ -0,0 +1,249 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+DEFAULT_DEDUP_MAX_ENTRIES = 10_000
+DEFAULT_DEDUP_TTL_SECONDS = 300.0
+DEFAULT_DEDUP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "notification_dedup.sqlite3")
+# The SQLite backend purges expired rows and trims to max_entries every this many inserts
+SQLITE_HOUSEKEEPING_EVERY = 256
+
+
+class DedupBackend(ABC):
+    """
+    Storage interface used by NotificationDedup.
+
+    add_if_absent() must be atomic: when several threads or workers offer the
+    same key at once, exactly one of them gets True.
+    """
+
+    evictions: Optional[int] = None
+
+    @abstractmethod
+    def add_if_absent(self, key: str) -> bool:
+        """Remember `key` for the TTL. Returns False if it is already remembered."""
+
+    @abstractmethod
+    def clear(self) -> None:
+        ...
+
+    @abstractmethod
+    def size(self) -> int:
+        ...
+
+
+class InMemoryDedupBackend(DedupBackend):
+    """
+    Per-process store holding at most max_entries keys.
+
+    Every key lives for the same TTL, so insertion order is also expiry order:
+    expired keys and, when full, the oldest key are popped from the front of an
+    OrderedDict in O(1).
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_DEDUP_MAX_ENTRIES, ttl_seconds: float = DEFAULT_DEDUP_TTL_SECONDS,
+                 clock: Callable[[], float] = time.monotonic):
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self.evictions = 0
+        self.expirations = 0
+        self._entries: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _expire(self, now: float) -> None:
+        while self._entries:
+            expires_at = next(iter(self._entries.values()))
+            if expires_at > now:
+                break
+            self._entries.popitem(last=False)
+            self.expirations += 1
+
+    def add_if_absent(self, key: str) -> bool:
+        with self._lock:
+            now = self.clock()
+            self._expire(now)
+            if key in self._entries:
+                return False
+            self._entries[key] = now + self.ttl_seconds
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            return True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def size(self) -> int:
+        with self._lock:
+            self._expire(self.clock())
+            return len(self._entries)
+
+
+class SQLiteDedupBackend(DedupBackend):
+    """
+    Store shared by every worker process on one host, kept in a SQLite file.
+
+    A key is claimed with a single upsert that only overwrites expired rows, so
+    the check-and-add is atomic across processes. Expired rows are purged and the
+    table trimmed to max_entries periodically.
+    """
+
+    def __init__(self, path: str, max_entries: int = DEFAULT_DEDUP_MAX_ENTRIES,
+                 ttl_seconds: float = DEFAULT_DEDUP_TTL_SECONDS, clock: Callable[[], float] = time.time):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self.evictions = 0
+        self._inserts = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS notification_dedup (key TEXT PRIMARY KEY, expires_at REAL NOT NULL)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS notification_dedup_expiry ON notification_dedup (expires_at)")
+
+    def add_if_absent(self, key: str) -> bool:
+        now = self.clock()
+        with self._lock:
+            cur = self._conn.execute(
+                "INSERT INTO notification_dedup (key, expires_at) VALUES (?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET expires_at = excluded.expires_at "
+                "WHERE notification_dedup.expires_at <= ?",
+                (key, now + self.ttl_seconds, now))
+            added = cur.rowcount == 1
+            if added:
+                self._inserts += 1
+                if self._inserts % SQLITE_HOUSEKEEPING_EVERY == 0:
+                    self._housekeeping(now)
+            return added
+
+    def _housekeeping(self, now: float) -> None:
+        self._conn.execute("DELETE FROM notification_dedup WHERE expires_at <= ?", (now,))
+        cur = self._conn.execute(
+            "DELETE FROM notification_dedup WHERE key IN ("
+            "SELECT key FROM notification_dedup ORDER BY expires_at "
+            "LIMIT max(0, (SELECT COUNT(*) FROM notification_dedup) - ?))",
+            (self.max_entries,))
+        self.evictions += max(cur.rowcount, 0)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM notification_dedup")
+
+    def size(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM notification_dedup WHERE expires_at > ?",
+                                      (self.clock(),)).fetchone()[0]
+
+
+class RedisDedupBackend(DedupBackend):
+    """
+    Store shared across hosts. Keys are set with SET NX and a Redis-side TTL;
+    the memory budget is Redis' own maxmemory policy.
+
+    Requires the optional `redis` package.
+    """
+
+    def __init__(self, url: str, ttl_seconds: float = DEFAULT_DEDUP_TTL_SECONDS, prefix: str = "notif-dedup:"):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("NOTIFICATION_DEDUP_BACKEND=redis requires the 'redis' package")
+        self.client = redis.Redis.from_url(url)
+        self.ttl_ms = max(1, int(ttl_seconds * 1000))
+        self.prefix = prefix
+
+    def add_if_absent(self, key: str) -> bool:
+        return bool(self.client.set(self.prefix + key, 1, nx=True, px=self.ttl_ms))
+
+    def clear(self) -> None:
+        keys = list(self.client.scan_iter(match=self.prefix + "*"))
+        if keys:
+            self.client.delete(*keys)
+
+    def size(self) -> int:
+        return sum(1 for _ in self.client.scan_iter(match=self.prefix + "*"))
+
+
+class NotificationDedup:
+    """
+    Remembers recently queued task notifications so the same event queued again
+    within the TTL is not sent twice, with hit/miss counters. Keys must identify
+    the event (e.g. include its time), not just its content.
+
+    A failing backend never blocks notifications: the update is treated as new.
+    """
+
+    def __init__(self, backend: Optional[DedupBackend] = None):
+        self.backend = backend or InMemoryDedupBackend()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "NotificationDedup":
+        """
+        Build the store from environment settings.
+
+        NOTIFICATION_DEDUP_BACKEND: "memory" (default), "sqlite" or "redis"
+        NOTIFICATION_DEDUP_TTL_SECONDS / NOTIFICATION_DEDUP_MAX_ENTRIES: key lifetime and capacity
+        NOTIFICATION_DEDUP_PATH: database file for the sqlite backend
+        NOTIFICATION_DEDUP_REDIS_URL: connection URL for the redis backend
+        """
+        kind = os.getenv("NOTIFICATION_DEDUP_BACKEND", "memory").lower()
+        ttl = float(os.getenv("NOTIFICATION_DEDUP_TTL_SECONDS", DEFAULT_DEDUP_TTL_SECONDS))
+        max_entries = int(os.getenv("NOTIFICATION_DEDUP_MAX_ENTRIES", DEFAULT_DEDUP_MAX_ENTRIES))
+        if kind == "sqlite":
+            path = os.getenv("NOTIFICATION_DEDUP_PATH", DEFAULT_DEDUP_PATH)
+            return cls(SQLiteDedupBackend(path, max_entries=max_entries, ttl_seconds=ttl))
+        if kind == "redis":
+            return cls(RedisDedupBackend(os.getenv("NOTIFICATION_DEDUP_REDIS_URL", "redis://localhost:6379/0"), ttl))
+        if kind != "memory":
+            raise ValueError(f"Unknown NOTIFICATION_DEDUP_BACKEND: {kind}")
+        return cls(InMemoryDedupBackend(max_entries=max_entries, ttl_seconds=ttl))
+
+    @staticmethod
+    def key_for(task_id: int, update_fields: Dict[str, Any]) -> str:
+        """Stable key for a task's notification fields, identical in every worker process."""
+        body = json.dumps(update_fields, sort_keys=True, default=str)
+        return f"{int(task_id)}:{hashlib.blake2b(body.encode(), digest_size=16).hexdigest()}"
+
+    def is_duplicate(self, key: str) -> bool:
+        """Return True if `key` was seen within the TTL; otherwise remember it and return False."""
+        try:
+            added = self.backend.add_if_absent(key)
+        except Exception as e:
+            print(f"Notification dedup store failed for {key}: {e}")
+            added = True
+        with self._lock:
+            if added:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return not added
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        try:
+            size = self.backend.size()
+        except Exception:
+            size = None
+        return {
+            "backend": type(self.backend).__name__,
+            "hits": hits,
+            "misses": misses,
+            "evictions": getattr(self.backend, "evictions", None),
+            "expirations": getattr(self.backend, "expirations", None),
+            "size": size,
+        }
@@ -0,0 +1,215 @@
+import os
+import threading
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+DEFAULT_REMINDER_INTERVALS = [7, 3, 1]
+
+
+def due_day(value: Any) -> Optional[date]:
+    """Calendar date of a due_date value (the date as stored, like the reminder scheduler uses)."""
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    try:
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00")).date()
+    except ValueError:
+        return None
+
+
+def _intervals(value: Any) -> List[int]:
+    if value is None:
+        return list(DEFAULT_REMINDER_INTERVALS)
+    result = []
+    for item in value:
+        try:
+            days = int(item)
+        except (TypeError, ValueError):
+            continue
+        if days >= 0 and days not in result:
+            result.append(days)
+    return result
+
+
+class DueDateIndex:
+    """
+    Day-bucketed index of open (not Completed) tasks that have a due date.
+
+    Two maps are kept in step:
+    - due date -> task IDs, for "due in the next N days" lookups
+    - reminder date -> {task ID: interval}, where a task due on D with
+      reminder_intervals [7, 3, 1] sits under D-7, D-3 and D-1
+
+    so "tasks due in exactly N days for N in their reminder_intervals" is a single
+    bucket read on today's date, in time proportional to the result. Buckets for
+    days in the past are dropped as the calendar moves on.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+        self._replay: Optional[List[Tuple[str, Any]]] = None
+        self.ready = False
+
+    def _reset(self) -> None:
+        self._by_due: Dict[date, Set[int]] = defaultdict(set)
+        self._by_reminder: Dict[date, Dict[int, int]] = defaultdict(dict)
+        # task_id -> (due day, reminder intervals) as indexed
+        self._tasks: Dict[int, Tuple[date, List[int]]] = {}
+        self._pruned_before: Optional[date] = None
+
+    @classmethod
+    def from_env(cls) -> Optional["DueDateIndex"]:
+        """Return a new index, or None if TASK_DUE_INDEX is "none"."""
+        if os.getenv("TASK_DUE_INDEX", "memory").lower() in ("none", "off", ""):
+            return None
+        return cls()
+
+    # ---- maintenance ------------------------------------------------------
+    def upsert(self, task: Dict[str, Any]) -> None:
+        """
+        Index a task row. Rows without due_date and status (e.g. an array append
+        result) leave the entry as it is.
+        """
+        if task.get("id") is None or not ({"due_date", "status", "reminder_intervals"} & task.keys()):
+            return
+        with self._lock:
+            self._upsert(task)
+            if self._replay is not None:
+                self._replay.append(("upsert", task))
+
+    def _upsert(self, task: Dict[str, Any]) -> None:
+        task_id = int(task["id"])
+        previous = self._tasks.get(task_id)
+        self._unlink(task_id)
+        if "due_date" in task:
+            day = due_day(task["due_date"])
+        else:
+            day = previous[0] if previous else None
+        if "reminder_intervals" in task:
+            intervals = _intervals(task["reminder_intervals"])
+        else:
+            intervals = previous[1] if previous else list(DEFAULT_REMINDER_INTERVALS)
+        if day is None or task.get("status") == "Completed":
+            return
+        if "status" not in task and previous is None:
+            # Partial row for a task we are not tracking (it may be completed)
+            return
+        self._link(task_id, day, intervals)
+
+    def remove(self, task_id: int) -> None:
+        with self._lock:
+            self._unlink(int(task_id))
+            if self._replay is not None:
+                self._replay.append(("remove", int(task_id)))
+
+    def rebuild(self, tasks: Iterable[Dict[str, Any]]) -> int:
+        """
+        Re-index from task rows (id, due_date, status, reminder_intervals).
+
+        Writes made while `tasks` is being read are replayed on top.
+
+        Returns:
+            Number of tasks indexed
+        """
+        with self._lock:
+            if self._replay is not None:
+                raise RuntimeError("A due date index rebuild is already running")
+            self._replay = []
+        try:
+            rows = list(tasks)
+            with self._lock:
+                self._reset()
+                for task in rows:
+                    day = due_day(task.get("due_date"))
+                    if task.get("id") is None or day is None or task.get("status") == "Completed":
+                        continue
+                    self._link(int(task["id"]), day, _intervals(task.get("reminder_intervals")))
+                for op, arg in self._replay:
+                    if op == "upsert":
+                        self._upsert(arg)
+                    else:
+                        self._unlink(arg)
+                self.ready = True
+                return len(self._tasks)
+        finally:
+            with self._lock:
+                self._replay = None
+
+    def _link(self, task_id: int, day: date, intervals: List[int]) -> None:
+        self._tasks[task_id] = (day, intervals)
+        self._by_due[day].add(task_id)
+        for days in intervals:
+            reminder_day = day - timedelta(days=days)
+            # Reminder days already pruned are in the past and never read again
+            if self._pruned_before is None or reminder_day >= self._pruned_before:
+                self._by_reminder[reminder_day][task_id] = days
+
+    def _unlink(self, task_id: int) -> None:
+        entry = self._tasks.pop(task_id, None)
+        if entry is None:
+            return
+        day, intervals = entry
+        self._discard(self._by_due, day, task_id)
+        for days in intervals:
+            self._discard(self._by_reminder, day - timedelta(days=days), task_id)
+
+    @staticmethod
+    def _discard(buckets, key: date, task_id: int) -> None:
+        bucket = buckets.get(key)
+        if bucket is None:
+            return
+        if isinstance(bucket, dict):
+            bucket.pop(task_id, None)
+        else:
+            bucket.discard(task_id)
+        if not bucket:
+            del buckets[key]
+
+    def _prune(self, today: date) -> None:
+        """Drop reminder buckets for days before today; due buckets stay for overdue tasks."""
+        if self._pruned_before is None:
+            stale = [d for d in self._by_reminder if d < today]
+        else:
+            stale = [self._pruned_before + timedelta(days=i) for i in range((today - self._pruned_before).days)]
+        for day in stale:
+            self._by_reminder.pop(day, None)
+        self._pruned_before = max(today, self._pruned_before or today)
+
+    # ---- queries ----------------------------------------------------------
+    def due_within(self, max_days_ahead: int, today: Optional[date] = None) -> List[Tuple[int, int, Optional[int]]]:
+        """
+        Tasks due from today through today + max_days_ahead.
+
+        Returns:
+            [(task_id, days_until_due, reminder_interval or None), ...] soonest first
+        """
+        today = today or date.today()
+        result = []
+        with self._lock:
+            for offset in range(max_days_ahead + 1):
+                for task_id in sorted(self._by_due.get(today + timedelta(days=offset), ())):
+                    intervals = self._tasks[task_id][1]
+                    result.append((task_id, offset, offset if offset in intervals else None))
+        return result
+
+    def reminders_due(self, today: Optional[date] = None) -> List[Tuple[int, int, int]]:
+        """
+        Tasks due in exactly N days where N is one of their reminder_intervals.
+
+        Returns:
+            [(task_id, days_until_due, reminder_interval), ...]
+        """
+        today = today or date.today()
+        with self._lock:
+            self._prune(today)
+            bucket = self._by_reminder.get(today, {})
+            return [(task_id, days, days) for task_id, days in sorted(bucket.items())]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"ready": self.ready, "tasks": len(self._tasks), "due_days": len(self._by_due)}
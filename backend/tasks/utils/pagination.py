@@ -0,0 +1,121 @@
+import base64
+import json
+from dataclasses import dataclass, fields as dataclass_fields
+from typing import Any, Dict, List, Optional, Tuple
+from models.task import Task
+
+DEFAULT_PAGE_LIMIT = 100
+MAX_PAGE_LIMIT = 500
+
+# Columns a client may request with `fields=`; "id" and "created_at" are always
+# selected because deduplication and the keyset cursor depend on them.
+TASK_COLUMNS = [f.name for f in dataclass_fields(Task)]
+REQUIRED_COLUMNS = ["id", "created_at"]
+
+
+def encode_cursor(row: Dict[str, Any]) -> str:
+    """Encode the (created_at, id) keyset of a row as an opaque URL-safe token."""
+    raw = json.dumps([row["created_at"], row["id"]]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> Tuple[str, int]:
+    """Decode a cursor produced by encode_cursor. Raises ValueError if malformed."""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        created_at, task_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return str(created_at), int(task_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+@dataclass
+class PageRequest:
+    """
+    Keyset pagination and sparse fieldset options for task list endpoints.
+
+    A request with no limit and no cursor is unpaginated and returns every row,
+    matching the endpoints' original behaviour.
+    """
+    limit: Optional[int] = None
+    cursor: Optional[Tuple[str, int]] = None
+    fields: Optional[List[str]] = None
+
+    @classmethod
+    def from_args(cls, args: Dict[str, Any]) -> "PageRequest":
+        """Build a PageRequest from query parameters (limit, cursor, fields)."""
+        g = args.get
+
+        limit_raw = g("limit")
+        cursor_raw = g("cursor")
+        fields_raw = g("fields")
+
+        limit = None
+        if limit_raw not in (None, ""):
+            try:
+                limit = int(limit_raw)
+            except (TypeError, ValueError):
+                raise ValueError("limit must be an integer")
+            if limit < 1 or limit > MAX_PAGE_LIMIT:
+                raise ValueError(f"limit must be between 1 and {MAX_PAGE_LIMIT}")
+
+        cursor = decode_cursor(cursor_raw) if cursor_raw else None
+        if cursor is not None and limit is None:
+            limit = DEFAULT_PAGE_LIMIT
+
+        fields = None
+        if fields_raw:
+            fields = [f.strip() for f in str(fields_raw).split(",") if f.strip()]
+            unknown = [f for f in fields if f not in TASK_COLUMNS]
+            if unknown:
+                raise ValueError(f"Unknown fields: {unknown}")
+            fields = REQUIRED_COLUMNS + [f for f in fields if f not in REQUIRED_COLUMNS]
+
+        return cls(limit=limit, cursor=cursor, fields=fields)
+
+    @property
+    def is_paginated(self) -> bool:
+        return self.limit is not None
+
+    def select_clause(self) -> str:
+        """Columns to push down to the Supabase select."""
+        return ",".join(self.fields) if self.fields else "*"
+
+    def wants(self, column: str) -> bool:
+        """Whether `column` is part of the response."""
+        return self.fields is None or column in self.fields
+
+    def apply(self, query):
+        """Add the keyset filter, ordering and limit to a Supabase query builder."""
+        if not self.is_paginated:
+            return query
+        if self.cursor is not None:
+            created_at, task_id = self.cursor
+            keyset = f'or(created_at.gt."{created_at}",and(created_at.eq."{created_at}",id.gt.{task_id}))'
+            # Sent as `and=(or(...))` rather than `or=(...)` so it cannot clash with an
+            # `or` filter already on the query (e.g. the collaborators overlap).
+            # postgrest-py has no and_() builder, so add the param the way or_() does.
+            query.params = query.params.add("and", f"({keyset})")
+        # Fetch one extra row so the caller can tell whether another page exists
+        return query.order("created_at").order("id").limit(self.limit + 1)
+
+    def slice(self, rows: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Order rows by the keyset and cut them down to one page.
+
+        Rows may come from several queries (owner + collaborator, chunked member
+        lists), each already limited to `limit + 1`, so merging them here is exact.
+
+        Returns:
+            (page rows, next cursor or None when this is the last page)
+        """
+        if not self.is_paginated:
+            return rows, None
+        ordered = sorted(rows, key=lambda r: (r["created_at"], r["id"]))
+        page = ordered[:self.limit]
+        next_cursor = encode_cursor(page[-1]) if len(ordered) > self.limit else None
+        return page, next_cursor
+
+    def metadata(self, next_cursor: Optional[str]) -> Dict[str, Any]:
+        """Pagination block included in paginated responses."""
+        return {"limit": self.limit, "next_cursor": next_cursor, "has_more": next_cursor is not None}
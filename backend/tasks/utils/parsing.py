@@ -1,6 +1,11 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
+from datetime import date
 from dateutil import parser as dateparser
 
+# Most IDs a user_ids / project_ids filter accepts; each user ID expands to its own
+# collaborators clause, so larger sets are sent in several requests
+MAX_FILTER_IDS = 100
+
 def parse_task_payload(form_or_json: Dict[str, Any]) -> Dict[str, Any]:
     """
     Accepts either request.form (ImmutableMultiDict) or request.json (dict)
@@ -236,3 +241,86 @@ def parse_recurrence_fields(form_or_json: Dict[str, Any]) -> Dict[str, Any]:
         "recurrence_interval_days": recurrence_interval_days
     }
 
+
+# ---- Date Range Parsing ----
+def parse_date_range_args(args: Dict[str, Any], allowed_fields: tuple = ("created_at", "due_date")) -> Optional[Dict[str, Any]]:
+    """
+    Parses optional start_date / end_date (YYYY-MM-DD, inclusive) and date_field
+    query parameters used to filter listings server-side.
+
+    Returns None when neither date is given, otherwise
+    {"field": ..., "start_date": ..., "end_date": ...}.
+    """
+    g = args.get
+
+    start_raw = g("start_date") or None
+    end_raw = g("end_date") or None
+    field = g("date_field") or allowed_fields[0]
+
+    if field not in allowed_fields:
+        raise ValueError(f"Invalid date_field: {field}. Must be one of {list(allowed_fields)}.")
+
+    if not start_raw and not end_raw:
+        return None
+
+    parsed = {}
+    for name, raw in (("start_date", start_raw), ("end_date", end_raw)):
+        if raw:
+            try:
+                parsed[name] = date.fromisoformat(str(raw)).isoformat()
+            except ValueError:
+                raise ValueError(f"Invalid {name}: '{raw}'. Expected YYYY-MM-DD.")
+        else:
+            parsed[name] = None
+
+    if parsed["start_date"] and parsed["end_date"] and parsed["start_date"] > parsed["end_date"]:
+        raise ValueError("start_date must be on or before end_date")
+
+    return {"field": field, "start_date": parsed["start_date"], "end_date": parsed["end_date"]}
+
+
+def parse_search_args(args: Dict[str, Any], default_limit: int = 20, max_limit: int = 100) -> Dict[str, Any]:
+    """
+    Parses the q, user_id and optional limit query parameters of task search.
+
+    Returns {"query": ..., "user_id": ..., "limit": ...}.
+    """
+    g = args.get
+
+    query = (g("q") or "").strip()
+    if not query:
+        raise ValueError("q is required")
+
+    try:
+        user_id = int(g("user_id"))
+    except (TypeError, ValueError):
+        raise ValueError("user_id is required and must be an integer")
+
+    limit_raw = g("limit")
+    limit = default_limit
+    if limit_raw not in (None, ""):
+        try:
+            limit = int(limit_raw)
+        except (TypeError, ValueError):
+            raise ValueError("limit must be an integer")
+        if limit < 1 or limit > max_limit:
+            raise ValueError(f"limit must be between 1 and {max_limit}")
+
+    return {"query": query, "user_id": user_id, "limit": limit}
+
+
+def parse_id_list_arg(args: Dict[str, Any], name: str, max_ids: int) -> Optional[List[int]]:
+    """
+    Parses an optional comma-separated list of integer IDs (at most `max_ids`),
+    e.g. user_ids=1,2,3. Returns None when the parameter is absent.
+    """
+    raw = args.get(name)
+    if raw is None:
+        return None
+    try:
+        ids = list(dict.fromkeys(int(part) for part in str(raw).split(",") if part.strip()))
+    except ValueError:
+        raise ValueError(f"{name} must be comma-separated integers")
+    if len(ids) > max_ids:
+        raise ValueError(f"{name} accepts at most {max_ids} ids")
+    return ids
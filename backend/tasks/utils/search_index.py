@@ -0,0 +1,267 @@
+import bisect
+import math
+import os
+import re
+import threading
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+# Relative weight of a term by the field it appears in
+FIELD_WEIGHTS = {"task_name": 3.0, "description": 1.0, "comments": 1.0}
+# A query term that only prefix-matches an indexed term counts for this fraction of an exact match
+PREFIX_MATCH_FACTOR = 0.5
+# Upper bound on the indexed terms one query term expands to by prefix
+MAX_PREFIX_EXPANSIONS = 50
+
+DEFAULT_SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 100
+
+_TOKEN_RE = re.compile(r"[0-9a-z]+")
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Lower-case alphanumeric tokens of `text`."""
+    return _TOKEN_RE.findall(str(text).lower()) if text else []
+
+
+def _as_int_set(values) -> Set[int]:
+    result = set()
+    for value in values or []:
+        try:
+            result.add(int(value))
+        except (TypeError, ValueError):
+            continue
+    return result
+
+
+@dataclass(slots=True)
+class _Doc:
+    task_name: str = ""
+    description: str = ""
+    owner_id: Optional[int] = None
+    collaborators: Set[int] = field(default_factory=set)
+    weights: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def visible_to(self) -> Set[int]:
+        return self.collaborators | ({self.owner_id} if self.owner_id is not None else set())
+
+
+class _IndexData:
+    """The index structures; rebuild() fills a fresh one and swaps it in."""
+
+    def __init__(self):
+        # term -> {task_id: weight}
+        self.postings: Dict[str, Dict[int, float]] = {}
+        # Sorted vocabulary, for prefix lookups with bisect
+        self.terms: List[str] = []
+        self.docs: Dict[int, _Doc] = {}
+        # user_id -> IDs of the tasks the user owns or collaborates on
+        self.by_user: Dict[int, Set[int]] = defaultdict(set)
+        # task_id -> comment texts, kept so task updates do not drop them
+        self.comments: Dict[int, List[str]] = defaultdict(list)
+
+
+class TaskSearchIndex:
+    """
+    In-memory inverted index over task_name, description and comment text.
+
+    Each term maps to the tasks containing it with a field-weighted frequency.
+    search() ranks matches with a TF-IDF score, also matches query terms as
+    prefixes, and only returns tasks the user owns or collaborates on.
+
+    The repo keeps the index current on its own writes; rebuild() re-indexes
+    everything (from Supabase at startup) and swaps the result in atomically.
+    Writes arriving while a rebuild runs are replayed on the new index.
+    """
+
+    def __init__(self):
+        self._data = _IndexData()
+        self._lock = threading.RLock()
+        self._replay: Optional[List[Tuple[str, tuple]]] = None
+        self.ready = False
+
+    @classmethod
+    def from_env(cls) -> Optional["TaskSearchIndex"]:
+        """Return a new index, or None if TASK_SEARCH_INDEX is "none"."""
+        if os.getenv("TASK_SEARCH_INDEX", "memory").lower() in ("none", "off", ""):
+            return None
+        return cls()
+
+    # ---- maintenance ------------------------------------------------------
+    def upsert(self, task: Dict[str, Any]) -> None:
+        """Index a task row. Columns missing from the row keep their indexed value."""
+        self._write("upsert", (task,))
+
+    def remove(self, task_id: int) -> None:
+        self._write("remove", (int(task_id),))
+
+    def set_comments(self, task_id: int, contents: List[str]) -> None:
+        """Replace the comment text indexed for a task."""
+        self._write("comments", (int(task_id), list(contents)))
+
+    def _write(self, op: str, args: tuple) -> None:
+        with self._lock:
+            self._apply(self._data, op, args)
+            if self._replay is not None:
+                self._replay.append((op, args))
+
+    def rebuild(self, tasks: Iterable[Dict[str, Any]], comments: Iterable[Dict[str, Any]] = ()) -> int:
+        """
+        Re-index from scratch. `tasks` are task rows, `comments` rows with task_id and content.
+
+        Returns:
+            Number of tasks indexed
+        """
+        with self._lock:
+            if self._replay is not None:
+                raise RuntimeError("A search index rebuild is already running")
+            self._replay = []
+        try:
+            fresh = _IndexData()
+            for comment in comments:
+                if comment.get("task_id") is not None:
+                    fresh.comments[int(comment["task_id"])].append(comment.get("content") or "")
+            for task in tasks:
+                self._apply(fresh, "upsert", (task,))
+            with self._lock:
+                for op, args in self._replay:
+                    self._apply(fresh, op, args)
+                self._data = fresh
+                self.ready = True
+                return len(fresh.docs)
+        finally:
+            with self._lock:
+                self._replay = None
+
+    def _apply(self, data: _IndexData, op: str, args: tuple) -> None:
+        if op == "remove":
+            self._unlink(data, args[0])
+            data.docs.pop(args[0], None)
+            data.comments.pop(args[0], None)
+            return
+
+        if op == "comments":
+            task_id, contents = args
+            data.comments[task_id] = [content or "" for content in contents]
+            doc = data.docs.get(task_id)
+            if doc is not None:
+                self._unlink(data, task_id)
+                self._link(data, task_id, doc)
+            return
+
+        task = args[0]
+        if task.get("id") is None:
+            return
+        task_id = int(task["id"])
+        self._unlink(data, task_id)
+        doc = data.docs.get(task_id) or _Doc()
+        if "task_name" in task:
+            doc.task_name = task["task_name"] or ""
+        if "description" in task:
+            doc.description = task["description"] or ""
+        if "owner_id" in task:
+            doc.owner_id = int(task["owner_id"]) if task["owner_id"] is not None else None
+        if "collaborators" in task:
+            doc.collaborators = _as_int_set(task["collaborators"])
+        data.docs[task_id] = doc
+        self._link(data, task_id, doc)
+
+    @staticmethod
+    def _unlink(data: _IndexData, task_id: int) -> None:
+        doc = data.docs.get(task_id)
+        if doc is None:
+            return
+        for term in doc.weights:
+            postings = data.postings.get(term)
+            if postings is None:
+                continue
+            postings.pop(task_id, None)
+            if not postings:
+                del data.postings[term]
+                i = bisect.bisect_left(data.terms, term)
+                if i < len(data.terms) and data.terms[i] == term:
+                    data.terms.pop(i)
+        for user_id in doc.visible_to:
+            tasks = data.by_user.get(user_id)
+            if tasks is not None:
+                tasks.discard(task_id)
+                if not tasks:
+                    del data.by_user[user_id]
+
+    @staticmethod
+    def _link(data: _IndexData, task_id: int, doc: _Doc) -> None:
+        weights: Dict[str, float] = defaultdict(float)
+        for term in tokenize(doc.task_name):
+            weights[term] += FIELD_WEIGHTS["task_name"]
+        for term in tokenize(doc.description):
+            weights[term] += FIELD_WEIGHTS["description"]
+        for content in data.comments.get(task_id, ()):
+            for term in tokenize(content):
+                weights[term] += FIELD_WEIGHTS["comments"]
+        doc.weights = dict(weights)
+
+        for term, weight in doc.weights.items():
+            postings = data.postings.get(term)
+            if postings is None:
+                postings = data.postings[term] = {}
+                bisect.insort(data.terms, term)
+            postings[task_id] = weight
+        for user_id in doc.visible_to:
+            data.by_user[user_id].add(task_id)
+
+    # ---- queries ----------------------------------------------------------
+    def _expand(self, data: _IndexData, token: str) -> List[Tuple[str, float]]:
+        """Indexed terms matching `token` exactly or by prefix, with their match factor."""
+        matches = []
+        i = bisect.bisect_left(data.terms, token)
+        while i < len(data.terms) and data.terms[i].startswith(token) and len(matches) < MAX_PREFIX_EXPANSIONS:
+            term = data.terms[i]
+            matches.append((term, 1.0 if term == token else PREFIX_MATCH_FACTOR))
+            i += 1
+        return matches
+
+    def search(self, query: str, user_id: int, limit: int = DEFAULT_SEARCH_LIMIT) -> List[Tuple[int, float]]:
+        """
+        Rank the tasks visible to `user_id` that match every term of `query`.
+
+        Returns:
+            [(task_id, score), ...] best first, at most `limit` entries
+        """
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            return []
+        with self._lock:
+            data = self._data
+            visible = data.by_user.get(int(user_id))
+            if not visible:
+                return []
+            total = len(data.docs)
+            scores: Optional[Dict[int, float]] = None
+            for token in tokens:
+                token_scores: Dict[int, float] = {}
+                for term, factor in self._expand(data, token):
+                    postings = data.postings[term]
+                    idf = math.log(1 + total / len(postings))
+                    # Walk whichever side is smaller
+                    ids = visible if len(visible) < len(postings) else postings
+                    for task_id in ids:
+                        weight = postings.get(task_id)
+                        if weight is None or task_id not in visible:
+                            continue
+                        score = weight * idf * factor
+                        if score > token_scores.get(task_id, 0.0):
+                            token_scores[task_id] = score
+                if scores is None:
+                    scores = token_scores
+                else:
+                    scores = {task_id: scores[task_id] + s for task_id, s in token_scores.items() if task_id in scores}
+                if not scores:
+                    return []
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], -item[0]))
+        return [(task_id, round(score, 4)) for task_id, score in ranked[:limit]]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"ready": self.ready, "tasks": len(self._data.docs), "terms": len(self._data.terms)}
@@ -0,0 +1,66 @@
+import csv
+import io
+import json
+from typing import Any, BinaryIO, Dict, Iterator, Optional, Tuple
+
+IMPORT_FORMATS = ("csv", "jsonl")
+
+# Rows accepted by one /tasks/import call
+MAX_IMPORT_ROWS = 5000
+
+
+def detect_import_format(explicit: Optional[str], content_type: Optional[str], filename: Optional[str]) -> str:
+    """
+    Pick the import format from ?format=, the upload's file name or the Content-Type.
+    Raises ValueError if none of them identifies CSV or JSON lines.
+    """
+    if explicit:
+        fmt = explicit.lower()
+        if fmt in ("ndjson", "jsonlines"):
+            fmt = "jsonl"
+        if fmt not in IMPORT_FORMATS:
+            raise ValueError(f"Invalid format: {explicit}. Must be one of {list(IMPORT_FORMATS)}.")
+        return fmt
+    name = (filename or "").lower()
+    if name.endswith(".csv"):
+        return "csv"
+    if name.endswith((".jsonl", ".ndjson")):
+        return "jsonl"
+    mimetype = (content_type or "").split(";")[0].strip().lower()
+    if mimetype in ("text/csv", "application/csv"):
+        return "csv"
+    if mimetype in ("application/x-ndjson", "application/jsonl", "application/x-jsonlines"):
+        return "jsonl"
+    raise ValueError("Could not tell the import format; send text/csv or application/x-ndjson, or pass ?format=")
+
+
+def iter_import_records(stream: BinaryIO, fmt: str) -> Iterator[Tuple[int, Any]]:
+    """
+    Read an upload one record at a time, without loading it whole.
+
+    Yields (row_number, record) where record is a dict, or a ValueError for a row
+    that could not be decoded. CSV row numbers count the header as row 1;
+    JSON-lines row numbers are line numbers. Blank lines are skipped.
+    """
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    if fmt == "csv":
+        reader = csv.DictReader(text)
+        for record in reader:
+            if not any((value or "").strip() for value in record.values() if isinstance(value, str)):
+                continue
+            # Empty cells mean "not given", like a missing JSON key
+            yield reader.line_num, {k.strip(): v for k, v in record.items() if k and v not in (None, "")}
+        return
+
+    for line_no, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_no, ValueError(f"Invalid JSON: {e.msg}")
+            continue
+        if not isinstance(record, dict):
+            yield line_no, ValueError("Each line must be a JSON object")
+            continue
+        yield line_no, record
@@ -1,15 +1,13 @@
-import os
 from typing import Optional, Dict, Any, List
-from supabase import create_client, Client
+from supabase import Client
+from shared.supabase_client import get_supabase_client
 
-SUPABASE_URL = os.environ["SUPABASE_URL"]
-SUPABASE_KEY = os.environ["SUPABASE_SERVICE_KEY"]
 
 TABLE = "team"
 
 class SupabaseTeamRepo:
     def __init__(self):
-        self.client: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+        self.client: Client = get_supabase_client()
 
     def insert_team(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """Insert a new team"""
@@ -73,6 +73,43 @@ def get_user_by_userid(userid: int):
     except Exception as e:
         return jsonify({"error": str(e), "status": 500}), 500
 
+@user_bp.route("/users/batch", methods=["GET"])
+def get_users_batch():
+    """
+    Get many users by userid in one request.
+    
+    Query Parameters:
+    - ids: Comma-separated userids, e.g. ids=1,2,3 (at most 500)
+    
+    Returns:
+    {
+        "message": "Retrieved 2 of 3 user(s)",
+        "data": [ ... users, in the order of ids ... ],
+        "missing": [3],
+        "status": 200
+    }
+    
+    Responses:
+        200: Users returned (unknown ids are listed in "missing")
+        400: ids missing, not integers, or too many
+        500: Internal Server Error
+    """
+    try:
+        raw_ids = request.args.get("ids", "")
+        try:
+            userids = [int(part) for part in raw_ids.split(",") if part.strip()]
+        except ValueError:
+            return jsonify({"message": "ids must be comma-separated integers", "status": 400}), 400
+
+        result = service.get_users_by_userids(userids)
+        status_code = result.get("status", 200)
+        
+        return jsonify(result), status_code
+        
+    except Exception as e:
+        return jsonify({"error": str(e), "status": 500}), 500
+
+
 @user_bp.route("/users/search", methods=["GET"])
 def search_users():
     """
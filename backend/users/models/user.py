@@ -1,9 +1,9 @@
 from dataclasses import dataclass, field
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Iterable
 # from datetime import datetime, UTC
 import uuid
 
-@dataclass
+@dataclass(slots=True)
 class User:
     id: uuid.UUID                   # DB serial/bigint or UUID; adapt to your schema
     userid: int = 0
@@ -52,4 +52,15 @@ class User:
             dept_id=data.get('dept_id'),
             notification_preferences=notification_preferences
         )
-    
\ No newline at end of file
+    
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Dict[str, Any]]) -> List['User']:
+        """Convert many database rows to User objects"""
+        from_dict = cls.from_dict
+        return [from_dict(row) for row in rows]
+
+    @staticmethod
+    def to_rows(users: Iterable['User']) -> List[Dict[str, Any]]:
+        """Convert many User objects to dictionaries"""
+        return [user.to_dict() for user in users]
@@ -1,15 +1,16 @@
-import os
-from typing import Optional, Dict, Any
-from supabase import create_client, Client
+from typing import Optional, Dict, Any, List
+from supabase import Client
+from shared.supabase_client import get_supabase_client
 
-SUPABASE_URL = os.environ["SUPABASE_URL"]
-SUPABASE_KEY = os.environ["SUPABASE_SERVICE_KEY"]
 
 TABLE = "user"
 
+# Max number of IDs sent in a single `in_` filter, keeps the PostgREST URL well under limits.
+IN_FILTER_CHUNK_SIZE = 200
+
 class SupabaseUserRepo:
     def __init__(self):
-        self.client: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+        self.client: Client = get_supabase_client()
 
     def get_user_by_userid(self, userid: int) -> Optional[Dict[str, Any]]:
         """
@@ -22,6 +23,17 @@ class SupabaseUserRepo:
             # User not found or other error
             return None
 
+    def get_users_by_userids(self, userids: List[int], chunk_size: int = IN_FILTER_CHUNK_SIZE) -> List[Dict[str, Any]]:
+        """
+        Get many users by userid, with one `in_` query per chunk of IDs.
+        Unknown IDs are left out.
+        """
+        users = []
+        for i in range(0, len(userids), chunk_size):
+            res = self.client.table(TABLE).select("*").in_("userid", userids[i:i + chunk_size]).execute()
+            users.extend(res.data or [])
+        return users
+
     def update_user_by_userid(self, userid: int, update_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Update user details by userid.
@@ -1,7 +1,10 @@
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, List
 from models.user import User
 from repo.supa_user_repo import SupabaseUserRepo
 
+# Most IDs accepted by one /users/batch request
+MAX_BATCH_IDS = 500
+
 class UserService:
     def __init__(self, repo: Optional[SupabaseUserRepo] = None):
         self.repo = repo or SupabaseUserRepo()
@@ -17,10 +20,36 @@ class UserService:
         # Convert dict to User object for validation
         try:
             user = User(**user_data)
-            return {"status": 200, "data": user.__dict__}
+            return {"status": 200, "data": user.to_dict()}
         except Exception as e:
             return {"status": 500, "message": f"Failed to parse user data: {str(e)}"}
 
+    def get_users_by_userids(self, userids: List[int]) -> Dict[str, Any]:
+        """
+        Get many users by userid in one call. Users come back in the order of the
+        first occurrence of their ID; IDs with no user are listed under "missing".
+        """
+        unique_ids = list(dict.fromkeys(userids))
+        if not unique_ids:
+            return {"status": 400, "message": "At least one user id is required"}
+        if len(unique_ids) > MAX_BATCH_IDS:
+            return {"status": 400, "message": f"At most {MAX_BATCH_IDS} user ids can be requested at once"}
+
+        try:
+            by_id = {row["userid"]: row for row in self.repo.get_users_by_userids(unique_ids)}
+        except Exception as e:
+            return {"status": 500, "message": f"Failed to get users: {str(e)}"}
+
+        users = []
+        for user in User.from_rows(by_id[userid] for userid in unique_ids if userid in by_id):
+            users.append(user.to_dict())
+        return {
+            "status": 200,
+            "message": f"Retrieved {len(users)} of {len(unique_ids)} user(s)",
+            "data": users,
+            "missing": [userid for userid in unique_ids if userid not in by_id]
+        }
+
     def update_user_by_userid(self, userid: int, update_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Update user details by userid.
@@ -51,7 +80,7 @@ class UserService:
             
             # Return updated User object
             updated_user = User(**updated_user_data)
-            return {"status": 200, "message": f"User {userid} updated successfully", "data": updated_user.__dict__}
+            return {"status": 200, "message": f"User {userid} updated successfully", "data": updated_user.to_dict()}
         except RuntimeError as e:
             # Handle case where user was not found during update
             if "not found" in str(e):
@@ -79,7 +108,7 @@ class UserService:
             for user_data in users_data:
                 try:
                     user = User(**user_data)
-                    users.append(user.__dict__)
+                    users.append(user.to_dict())
                 except Exception as e:
                     # Log the error but continue with other users
                     print(f"Warning: Failed to parse user data: {str(e)}")
@@ -113,7 +142,7 @@ class UserService:
             for user_data in users_data:
                 try:
                     user = User(**user_data)
-                    users.append(user.__dict__)
+                    users.append(user.to_dict())
                 except Exception as e:
                     # Log the error but continue with other users
                     print(f"Warning: Failed to parse user data: {str(e)}")
@@ -151,7 +180,7 @@ class UserService:
             
             # Return created User object
             created_user = User(**created_user_data)
-            return {"status": 201, "message": f"User {created_user.userid} created successfully", "data": created_user.__dict__}
+            return {"status": 201, "message": f"User {created_user.userid} created successfully", "data": created_user.to_dict()}
         except Exception as e:
             return {"status": 500, "message": f"Failed to create user: {str(e)}"}
         
@@ -169,7 +198,7 @@ class UserService:
             for user_data in users_data:
                 try:
                     user = User(**user_data)
-                    users.append(user.__dict__)
+                    users.append(user.to_dict())
                 except Exception as e:
                     print(f"Warning: Failed to parse user data: {str(e)}")
                     continue
@@ -227,7 +256,7 @@ class UserService:
                         try:
                             user = User(**user_data)
                             # Add username field for frontend convenience
-                            user_dict = user.__dict__
+                            user_dict = user.to_dict()
                             user_dict['username'] = username
                             filtered_users.append(user_dict)
                         except Exception as e:
@@ -261,7 +290,7 @@ class UserService:
             for user_data in users_data:
                 try:
                     user = User(**user_data)  # Validate/format
-                    users.append(user.__dict__)
+                    users.append(user.to_dict())
                 except Exception as e:
                     print(f"Warning: Failed to parse user data: {str(e)}")
                     continue
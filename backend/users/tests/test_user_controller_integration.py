@@ -6,6 +6,8 @@ import uuid
 
 # Add parent directory to path to find modules
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# The backend directory, for the shared package
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 from services.user_service import UserService
 from models.user import User
 from repo.supa_user_repo import SupabaseUserRepo
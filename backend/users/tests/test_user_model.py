@@ -6,7 +6,11 @@ from datetime import datetime, UTC
 
 # Add parent directory to path to find modules
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# The backend directory, for the shared package
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 from models.user import User
+from services.user_service import UserService, MAX_BATCH_IDS
+from unittest.mock import Mock
 
 
 class TestUserModel(unittest.TestCase):
@@ -334,6 +338,56 @@ class TestUserModel(unittest.TestCase):
         assert reconstructed.name == ""
         assert reconstructed.email == ""
 
+class TestUserBulkConversion(unittest.TestCase):
+    """Unit tests for the slotted User model and bulk converters."""
+
+    def test_from_rows_and_to_rows(self):
+        rows = [{'id': str(uuid.uuid4()), 'userid': i, 'role': 'staff', 'name': f'User {i}', 'email': f'u{i}@x.com'}
+                for i in range(3)]
+        users = User.from_rows(rows)
+        assert not hasattr(users[0], '__dict__')
+        assert [u['userid'] for u in User.to_rows(users)] == [0, 1, 2]
+        assert User.to_rows(users)[0]['id'] == rows[0]['id']
+
+
+class TestUserBatchLookup(unittest.TestCase):
+    """GET /users/batch resolves many userids in one repo call."""
+
+    def setUp(self):
+        self.repo = Mock()
+        self.repo.get_users_by_userids.side_effect = lambda ids: [
+            {'id': str(uuid.uuid4()), 'userid': i, 'role': 'staff', 'name': f'User {i}', 'email': f'u{i}@x.com'}
+            for i in ids if i < 100]
+        self.service = UserService(repo=self.repo)
+
+    def test_users_in_request_order_with_missing_ids(self):
+        result = self.service.get_users_by_userids([3, 1, 500, 3])
+        assert result['status'] == 200
+        assert [u['userid'] for u in result['data']] == [3, 1]
+        assert result['missing'] == [500]
+        self.repo.get_users_by_userids.assert_called_once_with([3, 1, 500])
+
+    def test_empty_and_oversized_requests_rejected(self):
+        assert self.service.get_users_by_userids([])['status'] == 400
+        assert self.service.get_users_by_userids(list(range(MAX_BATCH_IDS + 1)))['status'] == 400
+        self.repo.get_users_by_userids.assert_not_called()
+
+    def test_route_parses_ids(self):
+        from flask import Flask
+        import controllers.user_controller as user_controller
+        app = Flask(__name__)
+        app.register_blueprint(user_controller.user_bp)
+        original = user_controller.service
+        user_controller.service = self.service
+        try:
+            client = app.test_client()
+            response = client.get('/users/batch?ids=2,7')
+            assert response.status_code == 200
+            assert [u['name'] for u in response.get_json()['data']] == ['User 2', 'User 7']
+            assert client.get('/users/batch?ids=2,abc').status_code == 400
+        finally:
+            user_controller.service = original
+
 
 if __name__ == '__main__':
     unittest.main()